@@ -3,12 +3,28 @@ EPA Scoring API Routes
 File: backend/api/routes.py
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from datetime import datetime
+import gzip
+import hashlib
 import logging
 
+from models.scoring_policy import resolve_policy
+from services.analytics_service import COHORT_GROUPS
+from services.export_service import EXPORT_FETCH_SIZE, EXPORT_FORMATS, ExportError
+from services.assessment_service import (
+    INGEST_CHUNK_SIZE, assessment_row, iter_ndjson, new_assessment_id, validate_assessment
+)
+from utils.pagination import ListQueryError, paginate_rows, parse_list_query
+from utils.reference_cache import MAX_EPA_TREE_DEPTH, REFERENCE_QUERIES, ROSTER_DATASETS
+
 logger = logging.getLogger(__name__)
 
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/jsonlines')
+
+# Reference data the frontend needs for its first paint, in one response
+BOOTSTRAP_DATASETS = ('student_roster', 'faculty_roster', 'core_epas', 'contexts', 'technology_levels')
+
 # Create API blueprint
 api_bp = Blueprint('api', __name__)
 
@@ -21,6 +37,8 @@ def api_health():
         return jsonify({
             'status': 'healthy',
             'database': 'connected' if db_status else 'disconnected',
+            'pool': current_app.db_manager.pool_stats(),
+            'profile_cache': current_app.profile_cache.stats(),
             'timestamp': datetime.now().isoformat(),
             'api_version': '1.0.0'
         })
@@ -33,65 +51,75 @@ def api_health():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+def _list_response(resource: str, key: str, fetch_rows=None):
+    """
+    One page of a list endpoint: ?limit=&cursor= keyset pagination on the
+    resource's sort key, ?fields= projection and equality filters. Rows come
+    from the repository unless fetch_rows supplies them from memory.
+    """
+    try:
+        query = parse_list_query(resource, request.args)
+    except ListQueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if fetch_rows is None:
+        rows, next_cursor = current_app.repository.list_page(resource, query)
+    else:
+        rows, next_cursor = paginate_rows(resource, query, fetch_rows())
+    
+    return jsonify({
+        key: rows,
+        'count': len(rows),
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'timestamp': datetime.now().isoformat()
+    })
+
 @api_bp.route('/epas', methods=['GET'])
 def get_all_epas():
-    """Get all Core EPAs with metadata"""
+    """Get Core EPAs with metadata, one page at a time"""
     try:
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor(dictionary=True)
+        return _list_response('core_epas', 'epas', lambda: current_app.reference_cache.rows('core_epas'))
         
-        cursor.execute("SELECT * FROM core_epas ORDER BY epa_id")
-        epas = cursor.fetchall()
+    except Exception as e:
+        logger.error(f"Error fetching EPAs: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/epas/tree', methods=['GET'])
+def get_epa_tree():
+    """Full Core EPA -> smaller EPA -> activity -> indicator tree (?depth=0..3, default 3)"""
+    try:
+        depth = request.args.get('depth', MAX_EPA_TREE_DEPTH, type=int)
+        if not 0 <= depth <= MAX_EPA_TREE_DEPTH:
+            return jsonify({'error': f"depth must be between 0 and {MAX_EPA_TREE_DEPTH}"}), 400
         
-        cursor.close()
-        connection.close()
+        tree = current_app.reference_cache.epa_tree(depth)
         
         return jsonify({
-            'epas': epas,
-            'count': len(epas),
+            'epas': tree,
+            'depth': depth,
+            'count': len(tree),
             'timestamp': datetime.now().isoformat()
         })
         
     except Exception as e:
-        logger.error(f"Error fetching EPAs: {e}")
+        logger.error(f"Error fetching EPA tree: {e}")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/epas/<epa_id>', methods=['GET'])
 def get_epa_details(epa_id):
-    """Get detailed information about a specific EPA"""
+    """Get detailed information about a specific EPA (?depth=0..3, default 2: down to activities)"""
     try:
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor(dictionary=True)
+        depth = request.args.get('depth', 2, type=int)
+        if not 0 <= depth <= MAX_EPA_TREE_DEPTH:
+            return jsonify({'error': f"depth must be between 0 and {MAX_EPA_TREE_DEPTH}"}), 400
         
-        # Get EPA details
-        cursor.execute("SELECT * FROM core_epas WHERE epa_id = %s", (epa_id,))
-        epa = cursor.fetchone()
+        # EPA with its subtree, from the memoised tree in the reference cache
+        epa = current_app.reference_cache.epa_details(epa_id, depth)
         
         if not epa:
             return jsonify({'error': 'EPA not found'}), 404
         
-        # Get smaller EPAs
-        cursor.execute("""
-            SELECT * FROM smaller_epas 
-            WHERE core_epa_id = %s 
-            ORDER BY sequence_order
-        """, (epa_id,))
-        smaller_epas = cursor.fetchall()
-        
-        # Get activities for each smaller EPA
-        for smaller_epa in smaller_epas:
-            cursor.execute("""
-                SELECT * FROM activities 
-                WHERE smaller_epa_id = %s 
-                ORDER BY sequence_order
-            """, (smaller_epa['smaller_epa_id'],))
-            smaller_epa['activities'] = cursor.fetchall()
-        
-        epa['smaller_epas'] = smaller_epas
-        
-        cursor.close()
-        connection.close()
-        
         return jsonify({
             'epa': epa,
             'timestamp': datetime.now().isoformat()
@@ -103,22 +131,9 @@ def get_epa_details(epa_id):
 
 @api_bp.route('/students', methods=['GET'])
 def get_students():
-    """Get all students"""
+    """Get active students (?program=, ?year_level=, ?status=), one page at a time"""
     try:
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM students WHERE status = 'Active' ORDER BY student_name")
-        students = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
-        return jsonify({
-            'students': students,
-            'count': len(students),
-            'timestamp': datetime.now().isoformat()
-        })
+        return _list_response('students', 'students')
         
     except Exception as e:
         logger.error(f"Error fetching students: {e}")
@@ -126,22 +141,9 @@ def get_students():
 
 @api_bp.route('/faculty', methods=['GET'])
 def get_faculty():
-    """Get all faculty members"""
+    """Get active faculty members (?department=, ?status=), one page at a time"""
     try:
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM faculty WHERE status = 'Active' ORDER BY faculty_name")
-        faculty = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
-        
-        return jsonify({
-            'faculty': faculty,
-            'count': len(faculty),
-            'timestamp': datetime.now().isoformat()
-        })
+        return _list_response('faculty', 'faculty')
         
     except Exception as e:
         logger.error(f"Error fetching faculty: {e}")
@@ -149,25 +151,85 @@ def get_faculty():
 
 @api_bp.route('/contexts', methods=['GET'])
 def get_contexts():
-    """Get all context types"""
+    """Get context types, one page at a time"""
+    try:
+        return _list_response('contexts', 'contexts', lambda: current_app.reference_cache.rows('contexts'))
+        
+    except Exception as e:
+        logger.error(f"Error fetching contexts: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _build_bootstrap(students, faculty, epas, contexts, technology_levels):
+    """Serialised and gzipped bootstrap body, with a digest of its content as entity tag"""
+    body = current_app.json.dumps({
+        'students': students,
+        'faculty': faculty,
+        'epas': epas,
+        'contexts': contexts,
+        'technology_levels': technology_levels,
+        'counts': {
+            'students': len(students),
+            'faculty': len(faculty),
+            'epas': len(epas),
+            'contexts': len(contexts)
+        }
+    }).encode('utf-8')
+    return {
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=6),
+        'etag': hashlib.blake2b(body, digest_size=12).hexdigest()
+    }
+
+@api_bp.route('/bootstrap', methods=['GET'])
+def get_bootstrap_data():
+    """
+    Everything the frontend needs before its first paint (active students and
+    faculty, EPAs, contexts, technology levels) in one response. The body is
+    built and compressed once per reference data version and shared by all
+    requests; its ETag is a content digest, so it is stable across workers.
+    """
+    try:
+        payload = current_app.reference_cache.derived('bootstrap', BOOTSTRAP_DATASETS, _build_bootstrap)
+        
+        # Weak tag: the gzip and identity encodings are the same representation
+        if request.if_none_match.contains_weak(payload['etag']):
+            response = current_app.response_class(status=304)
+        elif 'gzip' in request.accept_encodings:
+            response = current_app.response_class(payload['gzip'], mimetype='application/json')
+            response.content_encoding = 'gzip'
+        else:
+            response = current_app.response_class(payload['body'], mimetype='application/json')
+        
+        response.set_etag(payload['etag'], weak=True)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = True
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error building bootstrap data: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/reference/invalidate', methods=['POST'])
+def invalidate_reference_data():
+    """Drop cached reference data after curriculum or context changes"""
     try:
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor(dictionary=True)
+        data = request.get_json(silent=True) or {}
+        datasets = data.get('datasets') or []
         
-        cursor.execute("SELECT * FROM context_types ORDER BY context_name")
-        contexts = cursor.fetchall()
+        unknown = [name for name in datasets if name not in REFERENCE_QUERIES]
+        if unknown:
+            return jsonify({'error': f"Unknown datasets: {', '.join(unknown)}"}), 400
         
-        cursor.close()
-        connection.close()
+        current_app.reference_cache.invalidate(*datasets)
+        current_app.profile_cache.bump_all()
         
         return jsonify({
-            'contexts': contexts,
-            'count': len(contexts),
+            'invalidated': datasets or list(REFERENCE_QUERIES),
             'timestamp': datetime.now().isoformat()
         })
         
     except Exception as e:
-        logger.error(f"Error fetching contexts: {e}")
+        logger.error(f"Error invalidating reference data: {e}")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/assessments', methods=['POST'])
@@ -176,48 +238,26 @@ def create_assessment():
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['student_id', 'indicator_id', 'assessor_id', 'base_score', 'evidence_type']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Validate score range
-        if not (1.0 <= data['base_score'] <= 5.0):
-            return jsonify({'error': 'Base score must be between 1.0 and 5.0'}), 400
-        
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor()
-        
-        # Generate assessment ID
-        assessment_id = f"ASS_{data['student_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
-        
-        # Insert assessment
-        insert_query = """
-        INSERT INTO student_assessments 
-        (assessment_id, student_id, indicator_id, assessor_id, base_score, 
-         context_id, tech_level_id, evidence_type, notes)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        cursor.execute(insert_query, (
-            assessment_id,
-            data['student_id'],
-            data['indicator_id'],
-            data['assessor_id'],
-            data['base_score'],
-            data.get('context_id'),
-            data.get('tech_level_id'),
-            data['evidence_type'],
-            data.get('notes', '')
-        ))
-        
-        connection.commit()
-        cursor.close()
-        connection.close()
+        error = validate_assessment(data) or current_app.assessment_service.reference_error(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        repository = current_app.repository
+        with repository.connection() as connection:
+            # Insert assessment
+            assessment_id = new_assessment_id()
+            repository.insert_assessment(connection, assessment_row(assessment_id, data))
+            
+            # Keep calculated_scores current in the same transaction as the insert
+            scores_updated = current_app.scoring_service.refresh_student_scores(
+                connection, data['student_id'], [data['indicator_id']])
+            connection.commit()
+        
+        current_app.profile_cache.bump(data['student_id'])
         
         return jsonify({
             'assessment_id': assessment_id,
+            'scores_updated': scores_updated,
             'message': 'Assessment created successfully',
             'timestamp': datetime.now().isoformat()
         }), 201
@@ -226,16 +266,92 @@ def create_assessment():
         logger.error(f"Error creating assessment: {e}")
         return jsonify({'error': str(e)}), 500
 
-@api_bp.route('/scoring/student/<student_id>', methods=['GET'])
-def calculate_student_profile(student_id):
-    """Calculate comprehensive student EPA profile"""
+@api_bp.route('/assessments/bulk', methods=['POST'])
+def bulk_create_assessments():
+    """
+    Create many assessments at once from a JSON array or an NDJSON stream
+    (Content-Type: application/x-ndjson). Rows are committed in chunks and
+    invalid rows are reported without failing the rest of the batch.
+    """
     try:
-        result = current_app.scoring_service.calculate_comprehensive_profile(student_id)
+        chunk_size = request.args.get('chunk_size', INGEST_CHUNK_SIZE, type=int)
+        if chunk_size < 1:
+            return jsonify({'error': 'chunk_size must be a positive integer'}), 400
+        
+        if request.mimetype in NDJSON_MIMETYPES:
+            records = iter_ndjson(request.stream)
+        else:
+            records = request.get_json(silent=True)
+            if isinstance(records, dict):
+                records = records.get('assessments')
+            if not isinstance(records, list):
+                return jsonify({'error': 'Expected a JSON array of assessments or an NDJSON body'}), 400
+        
+        result = current_app.assessment_service.ingest(records, chunk_size=chunk_size)
+        
+        if result['failed'] == 0:
+            status = 201
+        else:
+            status = 207 if result['inserted'] else 400
         
         return jsonify({
             'result': result,
             'timestamp': datetime.now().isoformat()
+        }), status
+        
+    except Exception as e:
+        logger.error(f"Error bulk creating assessments: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _reference_version() -> str:
+    """Changes whenever any cached reference dataset is reloaded"""
+    return ','.join(
+        f"{name}:{generation}" for name, generation in sorted(current_app.reference_cache.generations().items())
+        if name not in ROSTER_DATASETS
+    )
+
+def _cached_student_result(student_id, epa_id, compute):
+    """
+    Serve a per-student result through the profile cache with ETag and
+    Last-Modified validators; conditional requests that still match get a
+    304 without recomputing anything. Both are keyed by the student's
+    assessment state in the database, so writes by other workers count.
+    """
+    state = current_app.assessment_service.student_state(student_id)
+    etag, last_modified = current_app.profile_cache.validators(student_id, epa_id, _reference_version(), state)
+    
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+    
+    if not_modified:
+        response = current_app.response_class(status=304)
+    else:
+        result = current_app.profile_cache.get_or_compute(student_id, epa_id, compute, state)
+        # Computing may have loaded reference data for the first time, which changes the tag
+        etag, last_modified = current_app.profile_cache.validators(student_id, epa_id, _reference_version(), state)
+        response = jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
         })
+        if result.get('timeout'):
+            response.status_code = 504
+            return response
+    
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@api_bp.route('/scoring/student/<student_id>', methods=['GET'])
+def calculate_student_profile(student_id):
+    """Calculate comprehensive student EPA profile"""
+    try:
+        return _cached_student_result(
+            student_id, None,
+            lambda: current_app.scoring_service.calculate_comprehensive_profile(student_id))
         
     except Exception as e:
         logger.error(f"Error calculating student profile: {e}")
@@ -245,7 +361,28 @@ def calculate_student_profile(student_id):
 def calculate_epa_score(epa_id, student_id):
     """Calculate specific EPA score for student"""
     try:
-        result = current_app.scoring_service.calculate_epa_score(student_id, epa_id)
+        return _cached_student_result(
+            student_id, epa_id,
+            lambda: current_app.scoring_service.calculate_epa_score(student_id, epa_id))
+        
+    except Exception as e:
+        logger.error(f"Error calculating EPA score: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/scoring/activity/<activity_id>/student/<student_id>', methods=['GET'])
+def calculate_activity_score(activity_id, student_id):
+    """Calculate an activity score under a scoring policy (?policy=, ?last_n=, ?half_life_days=)"""
+    try:
+        policy = request.args.get('policy')
+        last_n = request.args.get('last_n', type=int)
+        half_life_days = request.args.get('half_life_days', type=float)
+        try:
+            resolve_policy(policy, last_n, half_life_days)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        result = current_app.scoring_service.engine.calculate_activity_score(
+            student_id, activity_id, policy, last_n, half_life_days)
         
         return jsonify({
             'result': result,
@@ -253,55 +390,129 @@ def calculate_epa_score(epa_id, student_id):
         })
         
     except Exception as e:
-        logger.error(f"Error calculating EPA score: {e}")
+        logger.error(f"Error calculating activity score: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/scoring/student/<student_id>/integration', methods=['GET'])
+def calculate_student_integration(student_id):
+    """Calculate every cross-EPA integration bonus for a student"""
+    try:
+        result = current_app.scoring_service.engine.calculate_integration_bonuses([student_id])
+        
+        return jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error calculating integration bonuses: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/scoring/integration/recompute', methods=['POST'])
+def recompute_integration_bonuses():
+    """
+    Evaluate integration bonuses for a cohort (all students by default);
+    with "persist": true they replace the students' stored bonuses
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        student_ids = data.get('student_ids')
+        if student_ids is not None and not isinstance(student_ids, list):
+            return jsonify({'error': 'student_ids must be a list'}), 400
+        persist = data.get('persist', False)
+        if not isinstance(persist, bool):
+            return jsonify({'error': 'persist must be true or false'}), 400
+        
+        result = current_app.scoring_service.recompute_integration_bonuses(student_ids, persist=persist)
+        
+        return jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error recomputing integration bonuses: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/scores/student/<student_id>', methods=['GET'])
+def get_student_scores(student_id):
+    """Current student EPA profile from the maintained calculated scores"""
+    try:
+        result = current_app.scoring_service.get_current_scores(student_id)
+        
+        return jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error reading student scores: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/reports/entrustment/distribution', methods=['GET'])
+def entrustment_distribution_report():
+    """Per-EPA entrustment level histograms across a cohort"""
+    try:
+        source = request.args.get('source', 'stored')
+        if source not in ('stored', 'live'):
+            return jsonify({'error': 'source must be "stored" or "live"'}), 400
+        
+        result = current_app.scoring_service.entrustment_distribution(
+            program=request.args.get('program'),
+            year_level=request.args.get('year_level', type=int),
+            source=source
+        )
+        
+        return jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error calculating entrustment distribution: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/reports/epa/performance', methods=['GET'])
+def epa_performance_report():
+    """Core EPA score statistics per EPA, from the incrementally maintained statistics tables"""
+    try:
+        result = current_app.scoring_service.epa_performance()
+        if 'error' in result:
+            return jsonify(result), 500
+        
+        return jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error reading EPA performance: {e}")
         return jsonify({'error': str(e)}), 500
 
 @api_bp.route('/reports/student/<student_id>/summary', methods=['GET'])
 def student_summary_report(student_id):
     """Get student summary report"""
     try:
-        connection = current_app.db_manager.get_connection()
-        cursor = connection.cursor(dictionary=True)
+        repository = current_app.repository
         
         # Get student info
-        cursor.execute("SELECT * FROM students WHERE student_id = %s", (student_id,))
-        student = cursor.fetchone()
-        
+        student = repository.student(student_id)
         if not student:
             return jsonify({'error': 'Student not found'}), 404
         
-        # Get EPA scores
-        cursor.execute("""
-            SELECT cs.epa_id, ce.epa_name, cs.final_score, cs.calculation_date
-            FROM calculated_scores cs
-            JOIN core_epas ce ON cs.epa_id = ce.epa_id
-            WHERE cs.student_id = %s AND cs.score_level = 'Core_EPA'
-            ORDER BY cs.calculation_date DESC, cs.epa_id
-        """, (student_id,))
-        epa_scores = cursor.fetchall()
-        
-        # Get recent assessments
-        cursor.execute("""
-            SELECT sa.assessment_date, sa.base_score, sa.evidence_type,
-                   pi.indicator_name, ce.epa_name
-            FROM student_assessments sa
-            JOIN performance_indicators pi ON sa.indicator_id = pi.indicator_id
-            JOIN activities a ON pi.activity_id = a.activity_id
-            JOIN smaller_epas se ON a.smaller_epa_id = se.smaller_epa_id
-            JOIN core_epas ce ON se.core_epa_id = ce.epa_id
-            WHERE sa.student_id = %s
-            ORDER BY sa.assessment_date DESC
-            LIMIT 10
-        """, (student_id,))
-        recent_assessments = cursor.fetchall()
-        
-        cursor.close()
-        connection.close()
+        # Get EPA scores and recent assessments
+        epa_scores = repository.student_core_epa_scores(student_id)
+        recent_assessments = repository.recent_assessments(student_id, limit=10)
+        
+        # Per-EPA averages from the running statistics rather than every stored score
+        with repository.connection() as connection:
+            epa_statistics = current_app.scoring_service.statistics.student_summary(connection, student_id)
         
         return jsonify({
             'student': student,
             'epa_scores': epa_scores,
             'recent_assessments': recent_assessments,
+            'epa_statistics': epa_statistics,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -311,9 +522,15 @@ def student_summary_report(student_id):
 
 @api_bp.route('/quality/reliability', methods=['GET'])
 def quality_reliability_report():
-    """Get quality assurance reliability report"""
+    """
+    Get quality assurance reliability report
+    (?full=true rebuilds from every assessment, ?persist=true stores the results)
+    """
     try:
-        result = current_app.quality_service.generate_reliability_report()
+        result = current_app.quality_service.generate_reliability_report(
+            full=request.args.get('full', 'false').lower() == 'true',
+            persist=request.args.get('persist', 'false').lower() == 'true'
+        )
         
         return jsonify({
             'result': result,
@@ -324,6 +541,105 @@ def quality_reliability_report():
         logger.error(f"Error generating quality report: {e}")
         return jsonify({'error': str(e)}), 500
 
+@api_bp.route('/export/<table>', methods=['GET'])
+def export_table(table):
+    """
+    Stream calculated scores (table=scores) or assessments (table=assessments)
+    as a chunked download: ?format=ndjson|csv|columnar, filters student_id,
+    epa_id, score_level (scores), indicator_id (assessments), date_from, date_to
+    """
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        fetch_size = request.args.get('fetch_size', EXPORT_FETCH_SIZE, type=int)
+        if fetch_size < 1:
+            return jsonify({'error': 'fetch_size must be a positive integer'}), 400
+        
+        try:
+            filters = current_app.export_service.parse_filters(table, request.args)
+            chunks = current_app.export_service.iter_export(table, filters, export_format, fetch_size)
+        except ExportError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+        response.headers['Content-Disposition'] = (
+            f"attachment; filename={table}-{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}")
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error exporting {table}: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def _snapshot_response(result):
+    """Analytics results; 503 until a snapshot has been built"""
+    return jsonify({
+        'result': result,
+        'timestamp': datetime.now().isoformat()
+    }), 503 if 'error' in result else 200
+
+@api_bp.route('/analytics/epa-performance', methods=['GET'])
+def analytics_epa_performance():
+    """Core EPA score statistics from the analytics snapshot (?latest=true: latest score per student)"""
+    try:
+        latest = request.args.get('latest', 'false').lower() == 'true'
+        return _snapshot_response(current_app.analytics_service.epa_performance(latest=latest))
+        
+    except Exception as e:
+        logger.error(f"Error calculating EPA performance: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/analytics/indicators', methods=['GET'])
+def analytics_indicator_statistics():
+    """Per-indicator assessment statistics from the analytics snapshot (?epa_id=)"""
+    try:
+        return _snapshot_response(
+            current_app.analytics_service.indicator_statistics(epa_id=request.args.get('epa_id')))
+        
+    except Exception as e:
+        logger.error(f"Error calculating indicator statistics: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/analytics/cohorts', methods=['GET'])
+def analytics_cohort_comparison():
+    """Compare latest Core EPA scores across cohorts (?group_by=program|year_level, ?epa_id=)"""
+    try:
+        group_by = request.args.get('group_by', 'program')
+        if group_by not in COHORT_GROUPS:
+            return jsonify({'error': f"group_by must be one of {', '.join(COHORT_GROUPS)}"}), 400
+        
+        return _snapshot_response(current_app.analytics_service.cohort_comparison(
+            group_by=group_by, epa_id=request.args.get('epa_id')))
+        
+    except Exception as e:
+        logger.error(f"Error comparing cohorts: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/analytics/snapshot', methods=['GET'])
+def analytics_snapshot_info():
+    """Freshness of the analytics snapshot: watermark and row count per table"""
+    try:
+        return _snapshot_response(current_app.analytics_service.snapshot_info())
+        
+    except Exception as e:
+        logger.error(f"Error reading analytics snapshot: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/analytics/snapshot', methods=['POST'])
+def refresh_analytics_snapshot():
+    """Append rows newer than the snapshot watermark (body {"full": true} rebuilds it)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        result = current_app.analytics_service.refresh_snapshot(full=bool(data.get('full', False)))
+        
+        return jsonify({
+            'result': result,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error refreshing analytics snapshot: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @api_bp.route('/docs', methods=['GET'])
 def api_documentation():
     """API documentation endpoint"""
@@ -333,16 +649,33 @@ def api_documentation():
         'description': 'REST API for EPA scoring and assessment management',
         'endpoints': {
             'GET /api/health': 'API health check',
-            'GET /api/epas': 'Get all Core EPAs',
-            'GET /api/epas/{epa_id}': 'Get EPA details',
-            'GET /api/students': 'Get all students',
-            'GET /api/faculty': 'Get all faculty',
-            'GET /api/contexts': 'Get context types',
+            'GET /api/epas': 'Get Core EPAs (?limit=, ?cursor=, ?fields=, ?status=)',
+            'GET /api/epas/tree': 'Full EPA -> smaller EPA -> activity -> indicator tree (?depth=0..3)',
+            'GET /api/epas/{epa_id}': 'Get EPA details (?depth=0..3, default 2)',
+            'GET /api/students': 'Get students (?limit=, ?cursor=, ?fields=, ?program=, ?year_level=, ?status=)',
+            'GET /api/faculty': 'Get faculty (?limit=, ?cursor=, ?fields=, ?department=, ?status=)',
+            'GET /api/contexts': 'Get context types (?limit=, ?cursor=, ?fields=)',
+            'GET /api/bootstrap': 'All reference data for the frontend in one cached, gzipped response',
+            'POST /api/reference/invalidate': 'Invalidate cached reference data',
             'POST /api/assessments': 'Create assessment',
+            'POST /api/assessments/bulk': 'Create assessments from a JSON array or NDJSON stream',
             'GET /api/scoring/student/{student_id}': 'Calculate student profile',
             'GET /api/scoring/epa/{epa_id}/student/{student_id}': 'Calculate EPA score',
+            'GET /api/scoring/activity/{activity_id}/student/{student_id}':
+                'Calculate activity score (?policy=all|latest|last_n|time_decayed, ?last_n=, ?half_life_days=)',
+            'GET /api/scoring/student/{student_id}/integration': 'Calculate all integration bonuses for a student',
+            'POST /api/scoring/integration/recompute': 'Recompute integration bonuses for a cohort (stored with persist=true)',
+            'GET /api/scores/student/{student_id}': 'Current student profile from calculated scores',
             'GET /api/reports/student/{student_id}/summary': 'Student summary report',
-            'GET /api/quality/reliability': 'Quality reliability report'
+            'GET /api/reports/entrustment/distribution': 'Per-EPA entrustment level histograms for a cohort',
+            'GET /api/reports/epa/performance': 'Core EPA score statistics from the running statistics tables',
+            'GET /api/quality/reliability': 'Quality reliability report',
+            'GET /api/export/{scores|assessments}': 'Streaming NDJSON/CSV/columnar export with filters',
+            'GET /api/analytics/epa-performance': 'Core EPA score statistics from the analytics snapshot',
+            'GET /api/analytics/indicators': 'Per-indicator assessment statistics from the analytics snapshot',
+            'GET /api/analytics/cohorts': 'Cohort comparison of latest Core EPA scores from the analytics snapshot',
+            'GET /api/analytics/snapshot': 'Analytics snapshot freshness',
+            'POST /api/analytics/snapshot': 'Append new rows to (or rebuild) the analytics snapshot'
         }
     }
     
@@ -3,7 +3,7 @@ EPA Scoring Engine - Main Application
 File: backend/app.py
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
@@ -15,9 +15,17 @@ load_dotenv()
 
 # Import our modules
 from models.scoring_engine import EPAScoringEngine
+from repositories.sql_repository import MySQLScoringRepository
 from services.scoring_service import ScoringService
 from services.quality_service import QualityService
+from services.assessment_service import AssessmentService
+from services.export_service import ExportService
+from services.analytics_service import AnalyticsService
 from utils.database import DatabaseManager
+from utils.metrics import REGISTRY, init_request_metrics, pool_counters, pool_gauges
+from utils.migrations import MigrationRunner
+from utils.reference_cache import ReferenceDataCache
+from utils.result_cache import ProfileCache
 from api.routes import api_bp
 
 # Configure logging
@@ -48,17 +56,64 @@ def create_app():
         'charset': 'utf8mb4'
     }
     
-    # Initialize database manager
-    db_manager = DatabaseManager(app.config['DB_CONFIG'])
+    # Connection pool configuration
+    app.config['DB_POOL_CONFIG'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'max_idle_time': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+        'health_check_interval': float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 5))
+    }
+    
+    # Initialize database manager (shared connection pool)
+    db_manager = DatabaseManager(app.config['DB_CONFIG'], app.config['DB_POOL_CONFIG'])
     app.db_manager = db_manager
     
+    # Score writes need the tables and indexes of every migration
+    try:
+        pending = MigrationRunner(db_manager).pending()
+        if pending:
+            logger.error(f"Database schema is behind the code; run 'python migrate.py up' "
+                         f"(pending: {', '.join(migration['name'] for migration in pending)})")
+    except Exception as e:
+        logger.warning(f"Could not check schema migrations: {e}")
+    
+    # Shared cache of contexts, technology levels and the EPA tree
+    app.reference_cache = ReferenceDataCache(
+        db_manager,
+        ttl=float(os.getenv('REFERENCE_CACHE_TTL', 300))
+    )
+    
+    # Computed student profiles, invalidated per student by assessment writes
+    app.profile_cache = ProfileCache(
+        max_entries=int(os.getenv('PROFILE_CACHE_SIZE', 10000)),
+        ttl=float(os.getenv('PROFILE_CACHE_TTL', 300))
+    )
+    
+    # Scoring, student and list reads of the services and routes
+    app.repository = MySQLScoringRepository(db_manager)
+    
     # Initialize services
-    app.scoring_service = ScoringService(app.config['DB_CONFIG'])
-    app.quality_service = QualityService(app.config['DB_CONFIG'])
+    app.scoring_service = ScoringService(
+        app.config['DB_CONFIG'], db_manager, app.reference_cache,
+        profile_workers=int(os.getenv('PROFILE_WORKERS', 0)),
+        profile_timeout=float(os.getenv('PROFILE_TIMEOUT', 30)),
+        repository=app.repository
+    )
+    app.quality_service = QualityService(app.config['DB_CONFIG'], db_manager)
+    app.assessment_service = AssessmentService(
+        db_manager, app.reference_cache, app.scoring_service, app.profile_cache, app.repository)
+    app.export_service = ExportService(db_manager, app.reference_cache)
+    app.analytics_service = AnalyticsService(
+        db_manager, app.reference_cache,
+        os.getenv('SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot'))
+    )
     
     # Register blueprints
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Per-endpoint latency, SQL count/time/rows and slow-request logging
+    init_request_metrics(app, slow_request_seconds=float(os.getenv('SLOW_REQUEST_SECONDS', 1.0)))
+    
     # Health check endpoint
     @app.route('/health')
     def health_check():
@@ -70,6 +125,7 @@ def create_app():
             return jsonify({
                 'status': 'healthy',
                 'database': 'connected' if db_status else 'disconnected',
+                'pool': db_manager.pool_stats(),
                 'timestamp': datetime.now().isoformat(),
                 'version': '1.0.0'
             })
@@ -81,6 +137,14 @@ def create_app():
                 'timestamp': datetime.now().isoformat()
             }), 500
     
+    # Prometheus metrics endpoint
+    @app.route('/metrics')
+    def metrics():
+        """Request, SQL, scoring and connection pool metrics in Prometheus text format"""
+        pool_stats = db_manager.pool_stats()
+        return Response(REGISTRY.render(pool_gauges(pool_stats), pool_counters(pool_stats)),
+                        mimetype='text/plain; version=0.0.4')
+    
     # Root endpoint
     @app.route('/')
     def index():
@@ -90,6 +154,7 @@ def create_app():
             'version': '1.0.0',
             'endpoints': {
                 'health': '/health',
+                'metrics': '/metrics',
                 'api': '/api',
                 'docs': '/api/docs'
             }
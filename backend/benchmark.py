@@ -0,0 +1,370 @@
+"""
+EPA Scoring Engine - Scoring Benchmark Suite
+File: backend/benchmark.py
+
+Times every scoring path, scalar and batch, against the database the DB_*
+settings point at (a local MySQL loaded with generate_data.py), and writes
+machine-readable results that can be compared with a stored baseline:
+
+    python benchmark.py --output results.json
+    python benchmark.py --save-baseline benchmarks/baseline.json
+    python benchmark.py --baseline benchmarks/baseline.json --threshold 0.15   # exit 1 on regression
+    python benchmark.py --only indicator_scalar,profile_parallel --repeat 10 --sample 200
+
+Samples (students, assessments, activities) are drawn with --seed, so two
+runs against the same generated dataset time exactly the same work.
+
+--backend sqlite reads from an embedded SQLite copy of schema.sql/data.sql
+(or the --sqlite-db file) and --backend memory from an in-memory snapshot
+of it, which separates scoring cost from MySQL round trips:
+
+    python benchmark.py --backend memory --sqlite-db cohort.db
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from models.scoring_engine import INTEGRATION_PAIRS
+from repositories.base import ScoringRepository
+from repositories.memory_repository import InMemoryScoringRepository
+from repositories.sql_repository import MySQLScoringRepository
+from repositories.sqlite_repository import SQLiteScoringRepository
+from services.scoring_service import PROFILE_POOL_SHARE, ScoringService
+from utils.database import DatabaseManager, db_config_from_env
+from utils.metrics import track, untrack
+from utils.reference_cache import ReferenceDataCache
+
+logger = logging.getLogger('benchmark')
+
+RESULTS_VERSION = 1
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.005
+
+BACKENDS = ('mysql', 'sqlite', 'memory')
+
+# Benchmarks that write through db_manager, so only run against MySQL
+MYSQL_ONLY_BENCHMARKS = ('cohort_recompute',)
+
+class BenchmarkContext:
+    """Service, engine and the seeded samples every benchmark works on"""
+    
+    def __init__(self, service: ScoringService, sample_size: int, seed: int):
+        self.service = service
+        self.engine = service.engine
+        self.seed = seed
+        self.recompute_date = datetime(2000, 1, 1)
+        self.pending_clear: Optional[datetime] = None
+        self.dataset = {}
+        self._sample(sample_size)
+        
+    def _sample(self, sample_size: int):
+        rng = random.Random(self.seed)
+        repository = self.engine.repository
+        students = repository.assessed_student_ids()
+        if not students:
+            raise ValueError("No assessments to benchmark (load data with generate_data.py)")
+        self.students = sorted(rng.sample(students, min(sample_size, len(students))))
+        
+        indicator_activity = {row['indicator_id']: row['activity_id'] for row in repository.reference_rows('indicators')}
+        rows = sorted(
+            (row['assessment_id'], row['student_id'], indicator_activity[row['indicator_id']])
+            for chunk in repository.iter_assessments(student_ids=self.students)
+            for row in chunk if row['indicator_id'] in indicator_activity
+        )
+        self.dataset.update(repository.table_sizes())
+        
+        self.assessment_ids = sorted(rng.sample([row[0] for row in rows], min(sample_size, len(rows))))
+        activities = sorted({(row[1], row[2]) for row in rows})
+        self.activity_pairs = rng.sample(activities, min(sample_size, len(activities)))
+        self.integration_triples = [
+            (student_id, *INTEGRATION_PAIRS[position % len(INTEGRATION_PAIRS)])
+            for position, student_id in enumerate(self.students)
+        ]
+        self.dataset['sampled_students'] = len(self.students)
+        
+    def next_recompute_date(self) -> datetime:
+        """A calculation_date no real run uses, so the rows can be cleared afterwards"""
+        self.recompute_date += timedelta(seconds=1)
+        self.pending_clear = self.recompute_date
+        return self.recompute_date
+        
+    def cleanup(self):
+        """Remove rows a benchmark run wrote (outside the timed section)"""
+        if self.pending_clear is not None:
+            self.service.clear_recompute(self.students, self.pending_clear)
+            self.pending_clear = None
+
+def _check(result: Dict, name: str) -> Dict:
+    """Fail the run instead of timing an error path"""
+    if isinstance(result, dict) and 'error' in result:
+        raise RuntimeError(f"{name} failed: {result['error']}")
+    return result
+
+def bench_indicator_scalar(ctx: BenchmarkContext) -> int:
+    for assessment_id in ctx.assessment_ids:
+        _check(ctx.engine.calculate_indicator_score(assessment_id), 'calculate_indicator_score')
+    return len(ctx.assessment_ids)
+
+def bench_indicator_batch(ctx: BenchmarkContext) -> int:
+    _check(ctx.engine.calculate_indicator_scores_batch(assessment_ids=ctx.assessment_ids),
+           'calculate_indicator_scores_batch')
+    return len(ctx.assessment_ids)
+
+def bench_activity_scalar(ctx: BenchmarkContext) -> int:
+    for student_id, activity_id in ctx.activity_pairs:
+        _check(ctx.engine.calculate_activity_score(student_id, activity_id), 'calculate_activity_score')
+    return len(ctx.activity_pairs)
+
+def bench_integration_scalar(ctx: BenchmarkContext) -> int:
+    for student_id, primary_epa, secondary_epa in ctx.integration_triples:
+        _check(ctx.engine.calculate_integration_bonus(student_id, primary_epa, secondary_epa),
+               'calculate_integration_bonus')
+    return len(ctx.integration_triples)
+
+def bench_integration_batch(ctx: BenchmarkContext) -> int:
+    _check(ctx.engine.calculate_integration_bonuses(ctx.students), 'calculate_integration_bonuses')
+    return len(ctx.students)
+
+def bench_profile_sequential(ctx: BenchmarkContext) -> int:
+    for student_id in ctx.students:
+        _check(ctx.service.calculate_comprehensive_profile(student_id, parallel=False), 'profile')
+    return len(ctx.students)
+
+def bench_profile_parallel(ctx: BenchmarkContext) -> int:
+    for student_id in ctx.students:
+        _check(ctx.service.calculate_comprehensive_profile(student_id, parallel=True), 'profile')
+    return len(ctx.students)
+
+def bench_cohort_scoring(ctx: BenchmarkContext) -> int:
+    scored = 0
+    for students, _ in ctx.service.score_students(ctx.students):
+        scored += len(students)
+    return scored
+
+def bench_cohort_recompute(ctx: BenchmarkContext) -> int:
+    stamp = ctx.next_recompute_date()
+    return _check(ctx.service.recompute_cohort(ctx.students, calculation_date=stamp), 'recompute_cohort')['students']
+
+# name -> (what is timed, function returning the number of items processed)
+BENCHMARKS: Dict[str, Tuple[str, Callable[[BenchmarkContext], int]]] = {
+    'indicator_scalar': ('calculate_indicator_score, one call per sampled assessment', bench_indicator_scalar),
+    'indicator_batch': ('calculate_indicator_scores_batch over the sampled assessments', bench_indicator_batch),
+    'activity_scalar': ('calculate_activity_score, one call per sampled (student, activity)', bench_activity_scalar),
+    'integration_scalar': ('calculate_integration_bonus, one call per sampled student', bench_integration_scalar),
+    'integration_batch': ('calculate_integration_bonuses for the sampled cohort', bench_integration_batch),
+    'profile_sequential': ('calculate_comprehensive_profile(parallel=False) per student', bench_profile_sequential),
+    'profile_parallel': ('calculate_comprehensive_profile(parallel=True) per student', bench_profile_parallel),
+    'cohort_scoring': ('score_students: in-memory roll-up of the sampled cohort', bench_cohort_scoring),
+    'cohort_recompute': ('recompute_cohort: score and persist the sampled cohort (rows cleared after)',
+                         bench_cohort_recompute)
+}
+
+def run_benchmark(ctx: BenchmarkContext, name: str, repeat: int, warmup: int) -> Dict:
+    description, function = BENCHMARKS[name]
+    for _ in range(warmup):
+        function(ctx)
+        ctx.cleanup()
+    
+    times = []
+    queries = []
+    db_times = []
+    items = 0
+    for _ in range(repeat):
+        stats, token = track()
+        started = time.perf_counter()
+        try:
+            items = function(ctx)
+        finally:
+            elapsed = time.perf_counter() - started
+            untrack(token)
+            ctx.cleanup()
+        times.append(elapsed)
+        queries.append(stats.queries)
+        db_times.append(stats.db_time)
+    
+    median = statistics.median(times)
+    result = {
+        'description': description,
+        'repeat': repeat,
+        'items': items,
+        'times_seconds': [round(value, 6) for value in times],
+        'min_seconds': round(min(times), 6),
+        'median_seconds': round(median, 6),
+        'mean_seconds': round(statistics.fmean(times), 6),
+        'p95_seconds': round(float(np.percentile(times, 95)), 6),
+        'stdev_seconds': round(statistics.stdev(times), 6) if len(times) > 1 else 0.0,
+        'items_per_second': round(items / median, 3) if median > 0 else None,
+        'db_queries': int(statistics.median(queries)),
+        'db_seconds': round(statistics.median(db_times), 6)
+    }
+    logger.info(f"{name}: median {median * 1000:.1f}ms for {items} items "
+                f"({result['db_queries']} queries, {result['db_seconds'] * 1000:.1f}ms in DB)")
+    return result
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    Median time of each benchmark against the baseline; status is regression,
+    improvement or ok (changes under MIN_REGRESSION_SECONDS are always ok)
+    """
+    rows = []
+    for name, current in results['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None or not previous.get('median_seconds'):
+            rows.append({'benchmark': name, 'status': 'new'})
+            continue
+        ratio = current['median_seconds'] / previous['median_seconds']
+        if abs(current['median_seconds'] - previous['median_seconds']) < MIN_REGRESSION_SECONDS:
+            status = 'ok'
+        else:
+            status = 'regression' if ratio > 1 + threshold else 'improvement' if ratio < 1 - threshold else 'ok'
+        rows.append({
+            'benchmark': name,
+            'baseline_median_seconds': previous['median_seconds'],
+            'median_seconds': current['median_seconds'],
+            'ratio': round(ratio, 3),
+            'status': status
+        })
+    return rows
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--sample', type=int, default=100, help='students / assessments sampled per benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--warmup', type=int, default=1, help='untimed runs per benchmark')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--profile-workers', type=int, default=4, help='threads for profile_parallel')
+    parser.add_argument('--backend', choices=BACKENDS, default='mysql',
+                        help=f"repository the scoring reads go to ({', '.join(MYSQL_ONLY_BENCHMARKS)} needs mysql)")
+    parser.add_argument('--sqlite-db', help='SQLite database for --backend sqlite/memory '
+                                            '(default: schema.sql and data.sql loaded in memory)')
+    parser.add_argument('--output', help='write results JSON here (default: stdout)')
+    parser.add_argument('--baseline', help='compare with this results JSON; exit 1 on regression')
+    parser.add_argument('--threshold', type=float, default=0.2, help='median slowdown that counts as a regression')
+    parser.add_argument('--save-baseline', help='also write the results to this baseline file')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    
+    args = parser.parse_args(argv)
+    if args.only:
+        args.only = [name.strip() for name in args.only.split(',')]
+    else:
+        args.only = [name for name in BENCHMARKS if args.backend == 'mysql' or name not in MYSQL_ONLY_BENCHMARKS]
+    unknown = [name for name in args.only if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    if args.backend != 'mysql' and any(name in MYSQL_ONLY_BENCHMARKS for name in args.only):
+        parser.error(f"{', '.join(MYSQL_ONLY_BENCHMARKS)} can only run with --backend mysql")
+    if args.sqlite_db and args.backend == 'mysql':
+        parser.error('--sqlite-db needs --backend sqlite or memory')
+    if args.sample < 1 or args.repeat < 1 or args.warmup < 0:
+        parser.error('--sample and --repeat must be positive and --warmup not negative')
+    return args
+
+def create_repository(args, db_manager: DatabaseManager) -> ScoringRepository:
+    """The --backend repository; the memory snapshot is copied out of the SQLite one"""
+    if args.backend == 'mysql':
+        return MySQLScoringRepository(db_manager)
+    
+    if args.sqlite_db:
+        if not os.path.exists(args.sqlite_db):
+            raise ValueError(f"SQLite database not found: {args.sqlite_db}")
+        source = SQLiteScoringRepository(args.sqlite_db)
+    else:
+        source = SQLiteScoringRepository.from_sql_files()
+    if args.backend == 'sqlite':
+        return source
+    
+    try:
+        return InMemoryScoringRepository.from_repository(source)
+    finally:
+        source.close()
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    # Logs go to stderr so stdout can carry the results
+    logging.basicConfig(level=args.log_level, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    db_config = db_config_from_env()
+    # Profile branches may hold at most PROFILE_POOL_SHARE of the pool
+    db_manager = DatabaseManager(db_config, {'pool_size': int(args.profile_workers / PROFILE_POOL_SHARE) + 2})
+    started = datetime.now()
+    try:
+        repository = create_repository(args, db_manager)
+        service = ScoringService(db_config, db_manager, ReferenceDataCache(db_manager, repository=repository),
+                                 profile_workers=args.profile_workers, repository=repository)
+        ctx = BenchmarkContext(service, args.sample, args.seed)
+        results = {name: run_benchmark(ctx, name, args.repeat, args.warmup) for name in args.only}
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+    finally:
+        db_manager.close()
+    
+    output = {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'started': started.isoformat(),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'database': ({'host': db_config['host'], 'database': db_config['database']} if args.backend == 'mysql'
+                         else {'sqlite': args.sqlite_db or 'schema.sql/data.sql'}),
+            'dataset': ctx.dataset,
+            'options': {'sample': args.sample, 'repeat': args.repeat, 'warmup': args.warmup, 'seed': args.seed,
+                        'profile_workers': args.profile_workers, 'backend': args.backend}
+        },
+        'results': results
+    }
+    
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        if baseline.get('meta', {}).get('dataset') != ctx.dataset:
+            logger.warning("Baseline was recorded on a different dataset; ratios may not be comparable")
+        output['comparison'] = compare(output, baseline, args.threshold)
+        for row in output['comparison']:
+            if row['status'] == 'new':
+                logger.info(f"{row['benchmark']:<20} new")
+                continue
+            logger.info(f"{row['benchmark']:<20} {row['baseline_median_seconds'] * 1000:10.1f}ms -> "
+                        f"{row['median_seconds'] * 1000:10.1f}ms  x{row['ratio']:.2f}  {row['status']}")
+        if any(row['status'] == 'regression' for row in output['comparison']):
+            logger.error(f"Benchmarks regressed by more than {args.threshold:.0%} against {args.baseline}")
+            exit_code = 1
+    
+    text = json.dumps(output, indent=2)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as handle:
+                handle.write(text + '\n')
+    if not args.output:
+        print(text)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
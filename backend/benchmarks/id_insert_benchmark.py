@@ -0,0 +1,239 @@
+"""
+EPA Scoring Engine - Assessment ID Insert Benchmark
+File: backend/benchmarks/id_insert_benchmark.py
+
+Compares primary key schemes for student_assessments under concurrent writers:
+
+    legacy        ASS_{student_id}_{timestamp with microseconds} (previous scheme)
+    random        ASS_{uuid4 hex}
+    time_ordered  ASS_{time-ordered 64-bit ID} (utils.id_generator default)
+
+Each scheme inserts into a scratch copy of student_assessments
+(CREATE TABLE ... LIKE, so same indexes, no foreign keys) that is dropped
+afterwards. Reports rows/second, duplicate-key failures and the resulting
+data/index size. Usage (from backend/):
+
+    python -m benchmarks.id_insert_benchmark --writers 8 --rows 20000
+    python -m benchmarks.id_insert_benchmark --generator-only
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from mysql.connector import Error, errorcode
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.assessment_service import EVIDENCE_TYPES
+from utils.database import DatabaseManager
+from utils.id_generator import ID_PREFIXES, RandomIdGenerator, TimeOrderedIdGenerator
+
+SCRATCH_TABLE = 'bench_assessment_ids'
+
+INSERT_QUERY = f"""
+INSERT INTO {SCRATCH_TABLE}
+(assessment_id, student_id, indicator_id, assessor_id, base_score, context_id, tech_level_id, evidence_type, notes)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def legacy_id_factory():
+    def next_id(student_id: str) -> str:
+        return f"ASS_{student_id}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    return next_id
+
+def random_id_factory():
+    generator = RandomIdGenerator()
+    return lambda student_id: generator.next_id(ID_PREFIXES['assessment'])
+
+def time_ordered_id_factory():
+    generator = TimeOrderedIdGenerator()
+    return lambda student_id: generator.next_id(ID_PREFIXES['assessment'])
+
+SCHEMES = {
+    'legacy': legacy_id_factory,
+    'random': random_id_factory,
+    'time_ordered': time_ordered_id_factory
+}
+
+def db_config_from_env():
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER', 'root'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'database': os.getenv('DB_NAME', 'epa_scoring'),
+        'port': int(os.getenv('DB_PORT', 3306)),
+        'charset': 'utf8mb4'
+    }
+
+def load_reference_ids(db_manager):
+    """Indicator, context and tech level IDs to draw realistic rows from"""
+    with db_manager.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            ids = {}
+            for name, query in (
+                ('indicators', "SELECT indicator_id FROM performance_indicators"),
+                ('contexts', "SELECT context_id FROM context_types"),
+                ('tech_levels', "SELECT tech_level_id FROM technology_levels")
+            ):
+                cursor.execute(query)
+                ids[name] = [row[0] for row in cursor.fetchall()]
+            return ids
+        finally:
+            cursor.close()
+
+def reset_scratch_table(db_manager, drop_only: bool = False):
+    with db_manager.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {SCRATCH_TABLE}")
+            if not drop_only:
+                cursor.execute(f"CREATE TABLE {SCRATCH_TABLE} LIKE student_assessments")
+            connection.commit()
+        finally:
+            cursor.close()
+
+def table_size(db_manager):
+    with db_manager.connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(f"ANALYZE TABLE {SCRATCH_TABLE}")
+            cursor.fetchall()
+            cursor.execute("""
+                SELECT data_length, index_length
+                FROM information_schema.tables
+                WHERE table_schema = DATABASE() AND table_name = %s
+            """, (SCRATCH_TABLE,))
+            row = cursor.fetchone() or {}
+            return {'data_bytes': row.get('data_length'), 'index_bytes': row.get('index_length')}
+        finally:
+            cursor.close()
+
+def run_writer(db_manager, next_id, reference_ids, rows: int, batch_size: int, students: int, seed: int):
+    """One concurrent writer; returns (inserted, duplicate_failures)"""
+    rng = random.Random(seed)
+    inserted = duplicates = 0
+    
+    with db_manager.connection() as connection:
+        cursor = connection.cursor()
+        try:
+            for start in range(0, rows, batch_size):
+                batch = []
+                for _ in range(min(batch_size, rows - start)):
+                    student_id = f"STU_{rng.randrange(students):05d}"
+                    batch.append((
+                        next_id(student_id), student_id,
+                        rng.choice(reference_ids['indicators']),
+                        'FAC_BENCH',
+                        round(rng.uniform(1.0, 5.0), 2),
+                        rng.choice(reference_ids['contexts']) if reference_ids['contexts'] else None,
+                        rng.choice(reference_ids['tech_levels']) if reference_ids['tech_levels'] else None,
+                        rng.choice(EVIDENCE_TYPES),
+                        ''
+                    ))
+                try:
+                    cursor.executemany(INSERT_QUERY, batch)
+                    connection.commit()
+                    inserted += len(batch)
+                except Error as e:
+                    connection.rollback()
+                    if e.errno != errorcode.ER_DUP_ENTRY:
+                        raise
+                    duplicates += len(batch)
+        finally:
+            cursor.close()
+    
+    return inserted, duplicates
+
+def run_scheme(db_manager, scheme: str, args, reference_ids):
+    reset_scratch_table(db_manager)
+    next_id = SCHEMES[scheme]()
+    rows_per_writer = args.rows // args.writers
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.writers) as pool:
+        results = list(pool.map(
+            lambda writer: run_writer(db_manager, next_id, reference_ids, rows_per_writer,
+                                      args.batch_size, args.students, args.seed + writer),
+            range(args.writers)
+        ))
+    elapsed = time.perf_counter() - started
+    
+    inserted = sum(result[0] for result in results)
+    result = {
+        'scheme': scheme,
+        'writers': args.writers,
+        'rows_attempted': rows_per_writer * args.writers,
+        'rows_inserted': inserted,
+        'rows_failed_duplicate_key': sum(result[1] for result in results),
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(inserted / elapsed, 1) if elapsed > 0 else None
+    }
+    result.update(table_size(db_manager))
+    return result
+
+def run_generator_only(args):
+    """ID generation throughput and cross-thread uniqueness, no database needed"""
+    results = []
+    per_thread = args.rows // args.writers
+    for scheme in args.schemes:
+        next_id = SCHEMES[scheme]()
+        generated = [None] * args.writers
+        
+        def generate(writer):
+            generated[writer] = [next_id('STU_00001') for _ in range(per_thread)]
+        
+        threads = [threading.Thread(target=generate, args=(writer,)) for writer in range(args.writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        all_ids = [value for chunk in generated for value in chunk]
+        results.append({
+            'scheme': scheme,
+            'threads': args.writers,
+            'ids': len(all_ids),
+            'duplicates': len(all_ids) - len(set(all_ids)),
+            'per_thread_monotonic': all(chunk == sorted(chunk) for chunk in generated),
+            'ids_per_second': round(len(all_ids) / elapsed, 1) if elapsed > 0 else None
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8, help='concurrent writer threads')
+    parser.add_argument('--rows', type=int, default=20000, help='total rows per scheme')
+    parser.add_argument('--batch-size', type=int, default=100, help='rows per multi-row INSERT/commit')
+    parser.add_argument('--students', type=int, default=500, help='distinct synthetic student IDs')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--schemes', nargs='+', choices=sorted(SCHEMES), default=['legacy', 'random', 'time_ordered'])
+    parser.add_argument('--generator-only', action='store_true', help='benchmark ID generation without a database')
+    args = parser.parse_args()
+    
+    if args.generator_only:
+        print(json.dumps(run_generator_only(args), indent=2))
+        return
+    
+    load_dotenv()
+    db_manager = DatabaseManager(db_config_from_env(), {'pool_size': args.writers + 1})
+    try:
+        reference_ids = load_reference_ids(db_manager)
+        results = [run_scheme(db_manager, scheme, args, reference_ids) for scheme in args.schemes]
+        print(json.dumps(results, indent=2))
+    finally:
+        reset_scratch_table(db_manager, drop_only=True)
+        db_manager.close()
+
+if __name__ == '__main__':
+    main()
@@ -101,7 +101,7 @@ CREATE TABLE student_assessments (
     FOREIGN KEY (indicator_id) REFERENCES performance_indicators(indicator_id),
     FOREIGN KEY (context_id) REFERENCES context_types(context_id),
     FOREIGN KEY (tech_level_id) REFERENCES technology_levels(tech_level_id),
-    INDEX idx_assessment_student (student_id),
+    INDEX idx_assessment_scoring (student_id, indicator_id, assessment_date, base_score, context_id, tech_level_id),
     INDEX idx_assessment_indicator (indicator_id),
     INDEX idx_assessment_date (assessment_date),
     INDEX idx_assessment_score (base_score)
@@ -123,12 +123,40 @@ CREATE TABLE calculated_scores (
     standards_bonus DECIMAL(5,3) DEFAULT 0.000,
     final_score DECIMAL(5,3) NOT NULL,
     calculation_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_calculated_student (student_id),
+    INDEX idx_calculated_student_level (student_id, score_level, epa_id, calculation_date, final_score),
+    INDEX idx_calculated_level_epa (score_level, epa_id, student_id, calculation_date, final_score),
     INDEX idx_calculated_epa (epa_id),
-    INDEX idx_calculated_level (score_level),
     INDEX idx_calculated_date (calculation_date)
 );
 
+-- Running Core_EPA score statistics per EPA, maintained as scores are written
+-- (count, mean and M2 = sum of squared deviations, for Welford's update)
+CREATE TABLE epa_score_stats (
+    epa_id VARCHAR(10) PRIMARY KEY,
+    score_count BIGINT NOT NULL DEFAULT 0,
+    student_count INT NOT NULL DEFAULT 0,
+    mean_score DOUBLE NOT NULL DEFAULT 0,
+    m2 DOUBLE NOT NULL DEFAULT 0,
+    min_score DECIMAL(5,3),
+    max_score DECIMAL(5,3),
+    last_calculation_date TIMESTAMP NULL,
+    updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Running Core_EPA score statistics per student and EPA
+CREATE TABLE student_epa_score_stats (
+    student_id VARCHAR(20) NOT NULL,
+    epa_id VARCHAR(10) NOT NULL,
+    score_count INT NOT NULL DEFAULT 0,
+    mean_score DOUBLE NOT NULL DEFAULT 0,
+    m2 DOUBLE NOT NULL DEFAULT 0,
+    min_score DECIMAL(5,3),
+    max_score DECIMAL(5,3),
+    last_calculation_date TIMESTAMP NULL,
+    PRIMARY KEY (student_id, epa_id),
+    INDEX idx_student_stats_epa (epa_id, student_id)
+);
+
 -- Integration bonuses table
 CREATE TABLE integration_bonuses (
     bonus_id VARCHAR(50) PRIMARY KEY,
@@ -189,7 +217,8 @@ CREATE TABLE students (
     created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_student_program (program),
     INDEX idx_student_year (year_level),
-    INDEX idx_student_status (status)
+    INDEX idx_student_status (status),
+    INDEX idx_student_status_name (status, student_name, student_id)
 );
 
 -- Faculty table (for reference)
@@ -203,9 +232,32 @@ CREATE TABLE faculty (
     status VARCHAR(20) DEFAULT 'Active',
     created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     INDEX idx_faculty_department (department),
-    INDEX idx_faculty_status (status)
+    INDEX idx_faculty_status (status),
+    INDEX idx_faculty_status_name (status, faculty_name, faculty_id)
+);
+
+-- Bulk rewrites (deletes, back-dated inserts) per table; see utils/database.py mark_rewritten
+CREATE TABLE table_rewrites (
+    table_name VARCHAR(64) PRIMARY KEY,
+    rewrite_count BIGINT NOT NULL DEFAULT 0,
+    rewritten_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Applied schema migrations (see migrate.py)
+CREATE TABLE schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- The migrations this schema already includes
+INSERT INTO schema_migrations (version, name) VALUES
+(1, 'list_order_indexes'),
+(2, 'score_statistics_tables'),
+(3, 'evidence_order_index'),
+(4, 'scoring_covering_indexes'),
+(5, 'table_rewrites');
+
 -- Create views for common queries
 CREATE VIEW student_epa_summary AS
 SELECT 
@@ -0,0 +1,82 @@
+"""
+EPA Scoring Engine - Export Command
+File: backend/export.py
+
+Streams calculated scores or assessments to a file (or stdout) without
+loading the result into memory:
+
+    python export.py scores --format csv --score-level Core_EPA -o core_epa_scores.csv
+    python export.py assessments --epa-id EPA_001 --date-from 2024-09-01 --date-to 2025-06-30
+    python export.py scores --format columnar --student-id STU_001 -o STU_001.columnar.ndjson
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from services.export_service import EXPORT_FETCH_SIZE, EXPORT_FORMATS, EXPORT_TABLES, ExportError, ExportService
+from utils.database import DatabaseManager, db_config_from_env
+from utils.reference_cache import ReferenceDataCache
+
+logger = logging.getLogger('export')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('table', choices=sorted(EXPORT_TABLES))
+    parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    parser.add_argument('--fetch-size', type=int, default=EXPORT_FETCH_SIZE, help='rows per fetch and per write')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    
+    filters = parser.add_argument_group('filters')
+    filters.add_argument('--student-id')
+    filters.add_argument('--epa-id')
+    filters.add_argument('--score-level', help='scores only')
+    filters.add_argument('--indicator-id', help='assessments only')
+    filters.add_argument('--date-from', help='ISO 8601 date or datetime (inclusive)')
+    filters.add_argument('--date-to', help='ISO 8601 date or datetime (inclusive)')
+    
+    args = parser.parse_args(argv)
+    if args.fetch_size < 1:
+        parser.error('--fetch-size must be positive')
+    return args
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    # Logs go to stderr so stdout can carry the export
+    logging.basicConfig(level=args.log_level, stream=sys.stderr,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    db_manager = DatabaseManager(db_config_from_env(), {'pool_size': 2})
+    service = ExportService(db_manager, ReferenceDataCache(db_manager))
+    
+    params = {
+        name: getattr(args, name)
+        for name in ('student_id', 'epa_id', 'score_level', 'indicator_id', 'date_from', 'date_to')
+    }
+    try:
+        filters = service.parse_filters(args.table, params)
+    except ExportError as e:
+        logger.error(str(e))
+        db_manager.close()
+        return 2
+    
+    started = time.monotonic()
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        written = service.write_export(output, args.table, filters, args.export_format, args.fetch_size)
+    finally:
+        if args.output:
+            output.close()
+        db_manager.close()
+    
+    logger.info(f"Wrote {written} characters to {args.output or 'stdout'} in {time.monotonic() - started:.2f}s")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
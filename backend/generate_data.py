@@ -0,0 +1,87 @@
+"""
+EPA Scoring Engine - Synthetic Data Command
+File: backend/generate_data.py
+
+Loads a reproducible synthetic cohort into a local or benchmark database
+(see utils/synthetic_data.py); never point it at production:
+
+    python generate_data.py --fill-hierarchy                       # complete the curriculum tree first
+    python generate_data.py --students 1000 --assessments-per-student 50 --seed 42
+    python generate_data.py --students 100000 --assessments-per-student 100   # ~10M assessments
+    python generate_data.py --clear                                # remove every synthetic student
+
+Then score the cohort with: python recompute.py --all --workers 8
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from models.score_statistics import ScoreStatistics
+from utils.database import DatabaseManager, db_config_from_env
+from utils.synthetic_data import HIERARCHY_SHAPE, SyntheticCohortGenerator
+
+logger = logging.getLogger('generate_data')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=0, help='synthetic students to add')
+    parser.add_argument('--assessments-per-student', type=float, default=100.0, help='mean (Poisson distributed)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--fill-hierarchy', action='store_true',
+                        help='give every EPA, smaller EPA and activity without children synthetic ones')
+    parser.add_argument('--shape', default=','.join(map(str, HIERARCHY_SHAPE)),
+                        help='smaller EPAs, activities, indicators per parent for --fill-hierarchy')
+    parser.add_argument('--clear', action='store_true', help='delete all synthetic students, scores and assessors')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    
+    args = parser.parse_args(argv)
+    try:
+        args.shape = tuple(int(part) for part in args.shape.split(','))
+    except ValueError:
+        parser.error('--shape must be three comma-separated integers')
+    if len(args.shape) != 3 or min(args.shape) < 1:
+        parser.error('--shape must be three positive integers')
+    if args.students < 0 or args.assessments_per_student < 0:
+        parser.error('--students and --assessments-per-student must not be negative')
+    if not (args.students or args.fill_hierarchy or args.clear):
+        parser.error('nothing to do: pass --students, --fill-hierarchy and/or --clear')
+    return args
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    db_manager = DatabaseManager(db_config_from_env(), {'pool_size': 1})
+    generator = SyntheticCohortGenerator(db_manager, args.seed)
+    result = {'seed': args.seed}
+    started = time.monotonic()
+    try:
+        if args.clear:
+            result['cleared'] = generator.clear()
+            # Scores were deleted underneath the running EPA statistics
+            with db_manager.connection() as connection:
+                ScoreStatistics().rebuild(connection)
+                connection.commit()
+        if args.fill_hierarchy:
+            result['hierarchy'] = generator.fill_hierarchy(args.shape)
+        if args.students:
+            result['generated'] = generator.generate(args.students, args.assessments_per_student)
+    except ValueError as e:
+        logger.error(str(e))
+        return 2
+    finally:
+        db_manager.close()
+    
+    result['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""
+EPA Scoring Engine - Gunicorn Configuration
+File: backend/gunicorn.conf.py
+
+    cd backend && gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Every worker gets a slot, the lowest one no live worker holds (a respawned
+worker takes over its predecessor's), and generates primary keys as ID
+worker ID_WORKER_ID + slot. A worker whose ID is already held by another
+process on the host fails to boot, which stops the server. Commands run
+outside gunicorn take IDs from the range after the slots (see
+utils/id_generator.py cli_worker_ids).
+"""
+
+import itertools
+import os
+
+bind = f"{os.getenv('API_HOST', '0.0.0.0')}:{os.getenv('API_PORT', 5000)}"
+workers = int(os.getenv('WEB_WORKERS', 4))
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+
+def pre_fork(server, worker):
+    # Runs in the master, which knows every live worker's slot
+    held = {getattr(live, 'id_slot', None) for live in server.WORKERS.values()}
+    worker.id_slot = next(slot for slot in itertools.count() if slot not in held)
+
+def post_fork(server, worker):
+    from utils.id_generator import get_id_generator
+    
+    os.environ['ID_WORKER_INDEX'] = str(worker.id_slot)
+    # Claim the worker ID now rather than on the first insert
+    generator = get_id_generator()
+    server.log.info(f"Worker {worker.pid} uses ID slot {worker.id_slot} "
+                    f"(ID worker {getattr(generator, 'worker_id', None)})")
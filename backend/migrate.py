@@ -0,0 +1,81 @@
+"""
+EPA Scoring Engine - Schema Migration Command
+File: backend/migrate.py
+
+Brings a database created from an older schema.sql up to date (see
+utils/migrations.py). Every migration EXPLAINs and times the queries it
+targets before and after it runs:
+
+    python migrate.py status
+    python migrate.py up                     # pending non-optional migrations
+    python migrate.py up --to 6              # include the optional partitioning
+    python migrate.py down --to 0
+    python migrate.py check                  # exit 1 when a plan misses its index
+    python migrate.py partitions --ahead 2   # add yearly partitions before they are needed
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from utils.database import DatabaseManager, db_config_from_env
+from utils.migrations import CHECKS, PARTITION_YEARS_AHEAD, MigrationError, MigrationRunner
+
+logger = logging.getLogger('migrate')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('status', 'up', 'down', 'check', 'partitions'))
+    parser.add_argument('--to', type=int, dest='target', help='up/down: target version')
+    parser.add_argument('--optional', action='store_true', help='up: include optional migrations')
+    parser.add_argument('--only', help='check: comma-separated check names (default: those of applied migrations)')
+    parser.add_argument('--repeat', type=int, default=5, help='timed executions per check query (0 = EXPLAIN only)')
+    parser.add_argument('--ahead', type=int, default=PARTITION_YEARS_AHEAD, help='partitions: years ahead to cover')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    args = parser.parse_args(argv)
+    
+    if args.command == 'down' and args.target is None:
+        parser.error('down requires --to')
+    if args.only and any(name not in CHECKS for name in args.only.split(',')):
+        parser.error(f"--only must name checks from: {', '.join(CHECKS)}")
+    return args
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    db_manager = DatabaseManager(db_config_from_env(), {'pool_size': 1})
+    runner = MigrationRunner(db_manager)
+    passed = True
+    try:
+        if args.command == 'status':
+            result = runner.status()
+        elif args.command == 'up':
+            result = runner.upgrade(args.target, args.optional, args.repeat)
+            passed = all(report['checks_passed'] for report in result)
+        elif args.command == 'down':
+            result = runner.downgrade(args.target)
+        elif args.command == 'check':
+            result = runner.run_checks(args.only.split(',') if args.only else runner.applied_checks(), args.repeat)
+            passed = all(check['passed'] for check in result.values())
+        else:
+            result = {'added': runner.extend_partitions(years_ahead=args.ahead)}
+    except MigrationError as e:
+        logger.error(f"Migration stopped: {str(e)}")
+        return 1
+    finally:
+        db_manager.close()
+    
+    print(json.dumps(result, indent=2, default=str))
+    if not passed:
+        logger.warning("Some queries do not use the expected index; see 'failure' in the output")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
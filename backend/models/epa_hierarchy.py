@@ -0,0 +1,279 @@
+"""
+EPA Scoring Engine - EPA Weight Hierarchy and Rollup
+File: backend/models/epa_hierarchy.py
+"""
+
+from typing import Dict, List, Optional, Tuple
+import logging
+import threading
+import numpy as np
+from scipy import sparse
+
+from utils.reference_cache import ReferenceDataCache, EPA_TREE_DATASETS
+
+logger = logging.getLogger(__name__)
+
+# calculated_scores.score_level values, from the leaves up
+SCORE_LEVELS = ('Indicator', 'Activity', 'Smaller_EPA', 'Core_EPA', 'Framework')
+
+# Per-assessment values rolled up through the hierarchy, as calculated_scores columns
+SCORE_METRICS = ('base_score', 'context_adjusted_score', 'tech_adjusted_score', 'final_score')
+
+class EPAHierarchy:
+    """
+    EPA -> smaller EPA -> activity -> indicator weight tree, compiled once
+    into scipy.sparse child x parent aggregation matrices so a students x
+    indicators score matrix rolls up through every score level with a few
+    sparse mat-muls. The compiled form is tagged with the curriculum version
+    (core_epas.version) it was built from.
+
+    Rollup rules follow EPAScoringEngine.calculate_activity_score:
+    - Activity: sum(adjusted * indicator_weight) / sum(indicator_weight) over
+      every assessment of the activity's indicators
+    - Smaller EPA, Core EPA, Framework: weighted mean of the child scores that
+      exist, using activities.weight_percentage, smaller_epas.weight_percentage
+      and core_epas.total_weight respectively
+    """
+    
+    def __init__(self, core_epas: List[Dict], smaller_epas: List[Dict],
+                 activities: List[Dict], indicators: List[Dict]):
+        self.version = self.version_key(row.get('version') for row in core_epas)
+        self.epa_ids = [row['epa_id'] for row in core_epas]
+        self.smaller_epa_ids = [row['smaller_epa_id'] for row in smaller_epas]
+        self.activity_ids = [row['activity_id'] for row in activities]
+        self.indicator_ids = [row['indicator_id'] for row in indicators]
+        
+        self.epa_index = {epa_id: i for i, epa_id in enumerate(self.epa_ids)}
+        self.smaller_epa_index = {smaller_id: i for i, smaller_id in enumerate(self.smaller_epa_ids)}
+        self.activity_index = {activity_id: i for i, activity_id in enumerate(self.activity_ids)}
+        self.indicator_index = {indicator_id: i for i, indicator_id in enumerate(self.indicator_ids)}
+        
+        # Parent index of every node; -1 marks an orphan whose parent row is missing
+        self.smaller_epa_parent = np.array(
+            [self.epa_index.get(row['core_epa_id'], -1) for row in smaller_epas], dtype=np.int64)
+        self.activity_parent = np.array(
+            [self.smaller_epa_index.get(row['smaller_epa_id'], -1) for row in activities], dtype=np.int64)
+        self.indicator_parent = np.array(
+            [self.activity_index.get(row['activity_id'], -1) for row in indicators], dtype=np.int64)
+        
+        self.epa_weights = np.array([float(row['total_weight']) for row in core_epas], dtype=np.float64)
+        self.smaller_epa_weights = np.array(
+            [float(row['weight_percentage']) for row in smaller_epas], dtype=np.float64)
+        self.activity_weights = np.array([float(row['weight_percentage']) for row in activities], dtype=np.float64)
+        self.indicator_weights = np.array([float(row['weight_percentage']) for row in indicators], dtype=np.float64)
+        
+        # Sparse child x parent weight matrices (CSR); orphans get an empty row
+        self.indicator_to_activity = self._weight_matrix(
+            self.indicator_parent, self.indicator_weights / 100.0, len(self.activity_ids))
+        self.activity_to_smaller_epa = self._weight_matrix(
+            self.activity_parent, self.activity_weights, len(self.smaller_epa_ids))
+        self.smaller_epa_to_epa = self._weight_matrix(
+            self.smaller_epa_parent, self.smaller_epa_weights, len(self.epa_ids))
+        self.epa_to_framework = self._weight_matrix(
+            np.zeros(len(self.epa_ids), dtype=np.int64), self.epa_weights, 1)
+        
+        self._lineage = self._build_lineage()
+        # Core EPA position of every indicator (-1 when its chain is broken)
+        self.indicator_epa = np.array(
+            [self.epa_index.get(epa_id, -1) for epa_id, _, _, _ in self._lineage['Indicator']], dtype=np.int64)
+    
+    @staticmethod
+    def _weight_matrix(parents: np.ndarray, weights: np.ndarray, parent_count: int) -> sparse.csr_matrix:
+        """Sparse child x parent matrix holding each child's weight in its parent column"""
+        linked = np.nonzero(parents >= 0)[0]
+        return sparse.csr_matrix(
+            (weights[linked], (linked, parents[linked])),
+            shape=(len(parents), parent_count)
+        )
+    
+    @staticmethod
+    def version_key(versions) -> str:
+        """Curriculum version tag from the core_epas.version values"""
+        return ','.join(sorted({str(version) for version in versions if version is not None})) or 'unversioned'
+    
+    @classmethod
+    def load(cls, connection) -> 'EPAHierarchy':
+        """Load the full weight tree with one query per level"""
+        cursor = connection.cursor(dictionary=True)
+        
+        try:
+            cursor.execute("SELECT epa_id, total_weight, version FROM core_epas ORDER BY epa_id")
+            core_epas = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT smaller_epa_id, core_epa_id, weight_percentage
+                FROM smaller_epas
+                ORDER BY core_epa_id, sequence_order
+            """)
+            smaller_epas = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT activity_id, smaller_epa_id, weight_percentage
+                FROM activities
+                ORDER BY smaller_epa_id, sequence_order
+            """)
+            activities = cursor.fetchall()
+            
+            cursor.execute("""
+                SELECT indicator_id, activity_id, weight_percentage
+                FROM performance_indicators
+                ORDER BY activity_id, sequence_order
+            """)
+            indicators = cursor.fetchall()
+        finally:
+            cursor.close()
+        
+        hierarchy = cls(core_epas, smaller_epas, activities, indicators)
+        logger.info(
+            f"Compiled EPA hierarchy version {hierarchy.version}: {len(core_epas)} EPAs, {len(smaller_epas)} smaller EPAs, "
+            f"{len(activities)} activities, {len(indicators)} indicators"
+        )
+        return hierarchy
+        
+    def _build_lineage(self) -> Dict[str, List[Tuple]]:
+        """(epa_id, smaller_epa_id, activity_id, indicator_id) for every node of every level"""
+        def parent_id(ids: List[str], parents: np.ndarray, i: int) -> Optional[str]:
+            return ids[parents[i]] if parents[i] >= 0 else None
+        
+        smaller = [
+            (parent_id(self.epa_ids, self.smaller_epa_parent, i), smaller_id, None, None)
+            for i, smaller_id in enumerate(self.smaller_epa_ids)
+        ]
+        activity = [
+            (smaller[self.activity_parent[i]][0] if self.activity_parent[i] >= 0 else None,
+             parent_id(self.smaller_epa_ids, self.activity_parent, i), activity_id, None)
+            for i, activity_id in enumerate(self.activity_ids)
+        ]
+        indicator = [
+            activity[self.indicator_parent[i]][:3] + (indicator_id,) if self.indicator_parent[i] >= 0
+            else (None, None, None, indicator_id)
+            for i, indicator_id in enumerate(self.indicator_ids)
+        ]
+        
+        return {
+            'Indicator': indicator,
+            'Activity': activity,
+            'Smaller_EPA': smaller,
+            'Core_EPA': [(epa_id, None, None, None) for epa_id in self.epa_ids],
+            'Framework': [(None, None, None, None)]
+        }
+        
+    def node_index(self, level: str) -> Dict:
+        """Node ID -> position for a score level (the framework has the single node None)"""
+        return {
+            'Indicator': self.indicator_index,
+            'Activity': self.activity_index,
+            'Smaller_EPA': self.smaller_epa_index,
+            'Core_EPA': self.epa_index,
+            'Framework': {None: 0}
+        }[level]
+        
+    def lineage(self, level: str, index: int) -> Tuple:
+        """(epa_id, smaller_epa_id, activity_id, indicator_id) of a node at a score level"""
+        return self._lineage[level][index]
+        
+    def activity_indicators(self, activity_index: int) -> np.ndarray:
+        """Positions of the indicators that belong to an activity"""
+        return np.flatnonzero(self.indicator_parent == activity_index)
+        
+    def epa_indicators(self, epa_positions) -> np.ndarray:
+        """Positions of every indicator under the given Core EPAs"""
+        return np.flatnonzero(np.isin(self.indicator_epa, list(epa_positions)))
+        
+    def accumulate(self, student_codes: np.ndarray, indicator_codes: np.ndarray, student_count: int,
+                   values: Dict[str, np.ndarray],
+                   row_weights: Optional[np.ndarray] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Reduce per-assessment values to students x indicators sums and counts.
+        student_codes / indicator_codes are row and column positions per assessment.
+        With row_weights (e.g. time-decayed evidence) sums are weighted and
+        counts become the total weight.
+        """
+        shape = (student_count, len(self.indicator_ids))
+        flat = student_codes * shape[1] + indicator_codes
+        size = shape[0] * shape[1]
+        
+        counts = np.bincount(flat, weights=row_weights, minlength=size).astype(np.float64).reshape(shape)
+        sums = {
+            metric: np.bincount(flat, weights=values[metric] if row_weights is None else values[metric] * row_weights,
+                                minlength=size).reshape(shape)
+            for metric in SCORE_METRICS
+        }
+        return sums, counts
+    
+    @staticmethod
+    def _weighted_mean(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        """numerator / denominator, NaN where nothing contributed"""
+        result = np.full(numerator.shape, np.nan)
+        np.divide(numerator, denominator, out=result, where=denominator > 0)
+        return result
+        
+    def activity_scores(self, sums: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        students x activities scores from students x indicators sums/counts:
+        sum(adjusted * indicator_weight) / sum(indicator_weight) per activity
+        """
+        return self._weighted_mean(np.asarray(sums @ self.indicator_to_activity),
+                                   np.asarray(counts @ self.indicator_to_activity))
+        
+    def roll_up(self, child_scores: np.ndarray, weights: sparse.csr_matrix) -> np.ndarray:
+        """Weighted mean of the child scores that exist (NaN = no evidence)"""
+        present = ~np.isnan(child_scores)
+        numerator = np.asarray(np.where(present, child_scores, 0.0) @ weights)
+        denominator = np.asarray(present.astype(np.float64) @ weights)
+        return self._weighted_mean(numerator, denominator)
+        
+    def rollup(self, sums: Dict[str, np.ndarray], counts: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+        """
+        Roll students x indicators sums/counts up through every score level.
+        Returns {score_level: {metric: students x nodes array}} with NaN where
+        a student has no evidence for a node.
+        """
+        # Stack the metrics row-wise so each level is a single sparse mat-mul
+        metric_count = len(SCORE_METRICS)
+        stacked_sums = np.concatenate([sums[metric] for metric in SCORE_METRICS], axis=0)
+        stacked_counts = np.tile(counts, (metric_count, 1))
+        
+        stacked = {'Indicator': self._weighted_mean(stacked_sums, stacked_counts)}
+        stacked['Activity'] = self.activity_scores(stacked_sums, stacked_counts)
+        stacked['Smaller_EPA'] = self.roll_up(stacked['Activity'], self.activity_to_smaller_epa)
+        stacked['Core_EPA'] = self.roll_up(stacked['Smaller_EPA'], self.smaller_epa_to_epa)
+        stacked['Framework'] = self.roll_up(stacked['Core_EPA'], self.epa_to_framework)
+        
+        return {
+            level: dict(zip(SCORE_METRICS, np.split(stacked[level], metric_count, axis=0)))
+            for level in SCORE_LEVELS
+        }
+
+class HierarchyCache:
+    """
+    Process-wide holder for the compiled EPAHierarchy, fed from the shared
+    ReferenceDataCache. When the EPA tree tables are reloaded (TTL expiry or
+    explicit invalidation) the core_epas.version of the fresh rows is compared
+    with the compiled one, and the matrices are rebuilt only when the
+    curriculum version changed.
+    """
+    
+    def __init__(self, reference_cache: ReferenceDataCache):
+        self.reference_cache = reference_cache
+        self._hierarchy = None
+        self._lock = threading.Lock()
+        
+    def get(self, reload: bool = False) -> EPAHierarchy:
+        """Compiled hierarchy for the current curriculum version"""
+        with self._lock:
+            if reload:
+                self.reference_cache.invalidate(*EPA_TREE_DATASETS)
+            
+            tree = [self.reference_cache.rows(name) for name in EPA_TREE_DATASETS]
+            version = EPAHierarchy.version_key(row.get('version') for row in tree[0])
+            
+            if self._hierarchy is None or reload or version != self._hierarchy.version:
+                self._hierarchy = EPAHierarchy(*tree)
+                logger.info(f"Compiled EPA hierarchy version {version}")
+            return self._hierarchy
+            
+    def invalidate(self):
+        """Force a recompile on the next get()"""
+        with self._lock:
+            self._hierarchy = None
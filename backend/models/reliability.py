@@ -0,0 +1,161 @@
+"""
+EPA Scoring Engine - Inter-Rater Reliability
+File: backend/models/reliability.py
+"""
+
+from typing import Dict, Hashable, List, Tuple
+import numpy as np
+
+# Interpretation bands (Koo & Li 2016 for ICC, Krippendorff 2004 for alpha)
+ICC_BANDS = ((0.9, 'Excellent'), (0.75, 'Good'), (0.5, 'Moderate'), (float('-inf'), 'Poor'))
+ALPHA_BANDS = ((0.8, 'Acceptable'), (0.667, 'Tentative'), (float('-inf'), 'Unacceptable'))
+
+def reliability_band(value: float, bands) -> str:
+    """Label for a reliability coefficient"""
+    if value is None or np.isnan(value):
+        return 'Insufficient_Data'
+    for threshold, label in bands:
+        if value >= threshold:
+            return label
+
+class RatingMatrix:
+    """
+    Sparse assessor x unit rating matrix, split into groups (an indicator, a
+    context, ...), that grows as new ratings arrive.
+
+    Each non-zero cell holds the count and sum of one assessor's ratings of
+    one unit (e.g. a student on an indicator); repeated ratings by the same
+    assessor are averaged so they count as one rater. Only the new ratings
+    are touched on update; reliability is recomputed from the cells with
+    bincount reductions, so the whole matrix is never materialised densely.
+    """
+    
+    def __init__(self, initial_capacity: int = 1024):
+        self.groups: List[Hashable] = []
+        self._group_index: Dict[Hashable, int] = {}
+        self._unit_index: Dict[Hashable, int] = {}
+        self._cell_index: Dict[Tuple[int, Hashable], int] = {}
+        self._assessor_index: Dict[Hashable, int] = {}
+        self._unit_group = np.empty(initial_capacity, dtype=np.int64)
+        self._cell_unit = np.empty(initial_capacity, dtype=np.int64)
+        self._cell_assessor = np.empty(initial_capacity, dtype=np.int64)
+        self._cell_count = np.zeros(initial_capacity)
+        self._cell_total = np.zeros(initial_capacity)
+        self.rating_count = 0
+    
+    @property
+    def unit_count(self) -> int:
+        return len(self._unit_index)
+    
+    @property
+    def cell_count(self) -> int:
+        return len(self._cell_index)
+    
+    @staticmethod
+    def _grow(array: np.ndarray, size: int, fill=0) -> np.ndarray:
+        if size <= len(array):
+            return array
+        grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+        
+    def add(self, groups: List[Hashable], units: List[Hashable], assessors: List[Hashable],
+            scores: np.ndarray) -> None:
+        """Add ratings; units must be unique across groups (include the group in the key)"""
+        cells = np.empty(len(scores), dtype=np.int64)
+        
+        for position, (group, unit, assessor) in enumerate(zip(groups, units, assessors)):
+            unit_position = self._unit_index.get(unit)
+            if unit_position is None:
+                group_position = self._group_index.get(group)
+                if group_position is None:
+                    group_position = self._group_index[group] = len(self.groups)
+                    self.groups.append(group)
+                unit_position = self._unit_index[unit] = len(self._unit_index)
+                self._unit_group = self._grow(self._unit_group, unit_position + 1, -1)
+                self._unit_group[unit_position] = group_position
+            
+            cell_position = self._cell_index.get((unit_position, assessor))
+            if cell_position is None:
+                cell_position = self._cell_index[(unit_position, assessor)] = len(self._cell_index)
+                self._cell_unit = self._grow(self._cell_unit, cell_position + 1, -1)
+                self._cell_assessor = self._grow(self._cell_assessor, cell_position + 1, -1)
+                self._cell_count = self._grow(self._cell_count, cell_position + 1)
+                self._cell_total = self._grow(self._cell_total, cell_position + 1)
+                self._cell_unit[cell_position] = unit_position
+                self._cell_assessor[cell_position] = self._assessor_index.setdefault(assessor, len(self._assessor_index))
+            cells[position] = cell_position
+        
+        np.add.at(self._cell_count, cells, 1.0)
+        np.add.at(self._cell_total, cells, np.asarray(scores, dtype=float))
+        self.rating_count += len(scores)
+        
+    def statistics(self) -> Dict[str, np.ndarray]:
+        """Per-group reliability; see group_reliability()"""
+        cells = self.cell_count
+        units = self.unit_count
+        rater_means = self._cell_total[:cells] / self._cell_count[:cells]
+        cell_unit = self._cell_unit[:cells]
+        
+        # Per-unit sufficient statistics: raters m, sum of ratings S, sum of squares Q
+        m = np.bincount(cell_unit, minlength=units).astype(float)
+        s = np.bincount(cell_unit, weights=rater_means, minlength=units)
+        q = np.bincount(cell_unit, weights=rater_means ** 2, minlength=units)
+        
+        stats = group_reliability(self._unit_group[:units], len(self.groups), m, s, q)
+        
+        # Distinct assessors per group
+        group_assessor = np.unique(self._unit_group[cell_unit] * max(len(self._assessor_index), 1)
+                                   + self._cell_assessor[:cells])
+        stats['raters'] = np.bincount(group_assessor // max(len(self._assessor_index), 1),
+                                      minlength=len(self.groups))
+        return stats
+
+def group_reliability(unit_group: np.ndarray, group_count: int, m: np.ndarray,
+                      s: np.ndarray, q: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    One-way random effects ICC(1) and Krippendorff's alpha (interval metric)
+    for every group at once, from per-unit rater counts m, rating sums s and
+    sums of squares q. Both handle unbalanced designs and any number of raters
+    per unit; units rated by fewer than two raters carry no agreement
+    information and are left out. Groups without at least two such units
+    (or without variance) get NaN.
+    """
+    pairable = m >= 2
+    unit_group = unit_group[pairable]
+    m, s, q = m[pairable], s[pairable], q[pairable]
+    
+    def per_group(weights=None):
+        return np.bincount(unit_group, weights=weights, minlength=group_count).astype(float)
+    
+    units = per_group()
+    n = per_group(m)                  # pairable ratings
+    total = per_group(s)
+    total_squares = per_group(q)
+    unit_means_term = per_group(s ** 2 / m)
+    m_squared = per_group(m ** 2)
+    # Sum over units of the squared differences of all ordered rating pairs, / (m - 1)
+    within_pairs = per_group(2.0 * (m * q - s ** 2) / (m - 1))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # ICC(1): mean squares between and within units, with the unbalanced-design n0
+        ms_between = (unit_means_term - total ** 2 / n) / (units - 1)
+        ms_within = (total_squares - unit_means_term) / (n - units)
+        n0 = (n - m_squared / n) / (units - 1)
+        icc = (ms_between - ms_within) / (ms_between + (n0 - 1) * ms_within)
+        
+        # Krippendorff's alpha: observed vs. expected disagreement over all pairable values
+        observed = within_pairs / n
+        expected = 2.0 * (n * total_squares - total ** 2) / (n * (n - 1))
+        alpha = 1.0 - observed / expected
+    
+    insufficient = (units < 2) | ~np.isfinite(icc)
+    icc[insufficient] = np.nan
+    alpha[(units < 2) | ~np.isfinite(alpha)] = np.nan
+    
+    return {
+        'units': units.astype(np.int64),
+        'ratings': n.astype(np.int64),
+        'icc': icc,
+        'alpha': alpha
+    }
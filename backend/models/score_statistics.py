@@ -0,0 +1,527 @@
+"""
+EPA Scoring Engine - Running Core EPA Score Statistics
+File: backend/models/score_statistics.py
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+import math
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Students per IN (...) list when locking or rebuilding rows
+STATS_CHUNK_SIZE = 1000
+
+# Rows per fetchmany() while rebuilding from calculated_scores
+STATS_FETCH_SIZE = 20000
+
+# Positions in a calculated_scores row as written by ScoringService
+SCORE_ROW_STUDENT, SCORE_ROW_EPA, SCORE_ROW_LEVEL, SCORE_ROW_FINAL, SCORE_ROW_DATE = 1, 2, 6, 10, 11
+
+# executemany() rewrites these into one multi-row statement per call
+UPSERT_STUDENT_STATS_QUERY = """
+INSERT INTO student_epa_score_stats
+(student_id, epa_id, score_count, mean_score, m2, min_score, max_score, last_calculation_date)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE score_count = VALUES(score_count), mean_score = VALUES(mean_score), m2 = VALUES(m2),
+    min_score = VALUES(min_score), max_score = VALUES(max_score), last_calculation_date = VALUES(last_calculation_date)
+"""
+
+UPSERT_EPA_STATS_QUERY = """
+INSERT INTO epa_score_stats
+(epa_id, score_count, student_count, mean_score, m2, min_score, max_score, last_calculation_date)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE score_count = VALUES(score_count), student_count = VALUES(student_count),
+    mean_score = VALUES(mean_score), m2 = VALUES(m2), min_score = VALUES(min_score), max_score = VALUES(max_score),
+    last_calculation_date = VALUES(last_calculation_date)
+"""
+
+class Moments:
+    """
+    count, mean and M2 (sum of squared deviations) of a set of scores, plus
+    min, max and the latest calculation date. Two sets combine exactly with
+    Chan et al.'s parallel form of Welford's update, so a running total never
+    needs the individual scores again.
+    """
+    __slots__ = ('count', 'mean', 'm2', 'minimum', 'maximum', 'last')
+    
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0, minimum: Optional[float] = None,
+                 maximum: Optional[float] = None, last: Optional[datetime] = None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.last = last
+        
+    def merge(self, other: 'Moments') -> 'Moments':
+        """Fold other into self (in place)"""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        if other.last is not None and (self.last is None or other.last > self.last):
+            self.last = other.last
+        return self
+    
+    @property
+    def stddev(self) -> Optional[float]:
+        """Population standard deviation, as MySQL STDDEV()"""
+        return math.sqrt(self.m2 / self.count) if self.count else None
+    
+    @property
+    def sample_stddev(self) -> Optional[float]:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+        
+    def as_dict(self) -> Dict:
+        return {
+            'score_count': self.count,
+            'avg_score': round(self.mean, 3) if self.count else None,
+            'score_stddev': round(self.stddev, 3) if self.count else None,
+            'min_score': self.minimum,
+            'max_score': self.maximum,
+            'last_calculation_date': self.last.isoformat() if hasattr(self.last, 'isoformat') else self.last
+        }
+
+def batch_moments(keys: List, scores: np.ndarray, dates: List) -> Dict:
+    """Moments of a batch of scores per key, with two exact vectorized passes"""
+    index = {}
+    codes = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.int64, count=len(keys))
+    count = np.bincount(codes, minlength=len(index))
+    mean = np.bincount(codes, weights=scores, minlength=len(index)) / count
+    m2 = np.bincount(codes, weights=(scores - mean[codes]) ** 2, minlength=len(index))
+    minimum = np.full(len(index), np.inf)
+    maximum = np.full(len(index), -np.inf)
+    np.minimum.at(minimum, codes, scores)
+    np.maximum.at(maximum, codes, scores)
+    
+    last = [None] * len(index)
+    for code, date in zip(codes.tolist(), dates):
+        if date is not None and (last[code] is None or date > last[code]):
+            last[code] = date
+    
+    return {
+        key: Moments(int(count[code]), float(mean[code]), float(m2[code]),
+                     float(minimum[code]), float(maximum[code]), last[code])
+        for key, code in index.items()
+    }
+
+def _stored(row) -> Moments:
+    """Moments from a stats table row (count, mean, m2, min, max, last)"""
+    count, mean, m2, minimum, maximum, last = row
+    return Moments(int(count or 0), float(mean or 0.0), float(m2 or 0.0),
+                   None if minimum is None else float(minimum),
+                   None if maximum is None else float(maximum), last)
+
+def _without(total: Moments, part: Moments) -> Moments:
+    """
+    count, mean and M2 of total with part taken out (the inverse of merge);
+    min, max and last stay those of total
+    """
+    count = total.count - part.count
+    if count <= 0:
+        return Moments()
+    mean = (total.mean * total.count - part.mean * part.count) / count
+    delta = part.mean - mean
+    m2 = total.m2 - part.m2 - delta * delta * part.count * count / total.count
+    return Moments(count, mean, max(m2, 0.0), total.minimum, total.maximum, total.last)
+
+def _recedes(old: Moments, new: Optional[Moments]) -> bool:
+    """Whether replacing old by new can raise a combined minimum or lower a combined maximum or last date"""
+    if old.count == 0:
+        return False
+    if new is None or new.count == 0:
+        return True
+    return (new.minimum > old.minimum or new.maximum < old.maximum
+            or (old.last is not None and (new.last is None or new.last < old.last)))
+
+def _placeholders(count: int) -> str:
+    return ', '.join(['%s'] * count)
+
+class ScoreStatistics:
+    """
+    Running statistics of Core_EPA final scores, per EPA (epa_score_stats)
+    and per student x EPA (student_epa_score_stats): the same numbers as the
+    epa_performance_overview and student_epa_summary views, maintained as
+    scores are written so reading them costs one row per EPA.
+
+    apply() runs inside the transaction that inserts the scores. New
+    student x EPA rows are created with INSERT IGNORE, whose row count is the
+    number of new students per EPA; existing rows are then locked in a fixed
+    order (student rows by key, then EPA rows by ID), merged with the batch
+    and written back, so concurrent writers serialise instead of losing
+    updates. rebuild_students() takes its locks in the same order.
+    """
+    
+    def apply(self, connection, score_rows: List[Tuple]) -> int:
+        """Fold newly inserted calculated_scores rows into the running statistics; returns Core_EPA rows applied"""
+        core_rows = [
+            row for row in score_rows
+            if row[SCORE_ROW_LEVEL] == 'Core_EPA' and row[SCORE_ROW_EPA] is not None and row[SCORE_ROW_FINAL] is not None
+        ]
+        if not core_rows:
+            return 0
+        
+        batch = batch_moments(
+            [(row[SCORE_ROW_STUDENT], row[SCORE_ROW_EPA]) for row in core_rows],
+            np.array([float(row[SCORE_ROW_FINAL]) for row in core_rows]),
+            [row[SCORE_ROW_DATE] for row in core_rows])
+        
+        cursor = connection.cursor()
+        try:
+            epa_batches, new_students = self._apply_student_stats(cursor, batch)
+            self._apply_epa_stats(cursor, epa_batches, new_students)
+        finally:
+            cursor.close()
+        return len(core_rows)
+        
+    def _apply_student_stats(self, cursor, batch: Dict) -> Tuple[Dict[str, Moments], Dict[str, int]]:
+        by_epa: Dict[str, List[str]] = {}
+        for student_id, epa_id in sorted(batch):
+            by_epa.setdefault(epa_id, []).append(student_id)
+        
+        new_students = {}
+        epa_batches = {}
+        for epa_id, student_ids in sorted(by_epa.items()):
+            cursor.executemany(
+                "INSERT IGNORE INTO student_epa_score_stats (student_id, epa_id) VALUES (%s, %s)",
+                [(student_id, epa_id) for student_id in student_ids])
+            new_students[epa_id] = max(cursor.rowcount, 0)
+            
+            updates = []
+            for start in range(0, len(student_ids), STATS_CHUNK_SIZE):
+                chunk = student_ids[start:start + STATS_CHUNK_SIZE]
+                cursor.execute(f"""
+                    SELECT student_id, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+                    FROM student_epa_score_stats
+                    WHERE epa_id = %s AND student_id IN ({_placeholders(len(chunk))})
+                    ORDER BY student_id
+                    FOR UPDATE
+                """, (epa_id, *chunk))
+                for row in cursor.fetchall():
+                    merged = _stored(row[1:]).merge(batch[(row[0], epa_id)])
+                    updates.append((row[0], epa_id, merged.count, merged.mean, merged.m2, merged.minimum,
+                                    merged.maximum, merged.last))
+            cursor.executemany(UPSERT_STUDENT_STATS_QUERY, updates)
+            
+            epa_batch = Moments()
+            for student_id in student_ids:
+                epa_batch.merge(batch[(student_id, epa_id)])
+            epa_batches[epa_id] = epa_batch
+        
+        return epa_batches, new_students
+        
+    def _apply_epa_stats(self, cursor, epa_batches: Dict[str, Moments], new_students: Dict[str, int]) -> None:
+        epa_ids = sorted(epa_batches)
+        cursor.executemany("INSERT IGNORE INTO epa_score_stats (epa_id) VALUES (%s)", [(epa_id,) for epa_id in epa_ids])
+        cursor.execute(f"""
+            SELECT epa_id, student_count, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+            FROM epa_score_stats
+            WHERE epa_id IN ({_placeholders(len(epa_ids))})
+            ORDER BY epa_id
+            FOR UPDATE
+        """, epa_ids)
+        
+        updates = []
+        for row in cursor.fetchall():
+            epa_id = row[0]
+            merged = _stored(row[2:]).merge(epa_batches[epa_id])
+            updates.append((epa_id, merged.count, int(row[1] or 0) + new_students.get(epa_id, 0), merged.mean,
+                            merged.m2, merged.minimum, merged.maximum, merged.last))
+        cursor.executemany(UPSERT_EPA_STATS_QUERY, updates)
+        
+    def _student_moments(self, connection, student_ids: Optional[List[str]]) -> Dict[Tuple[str, str], Moments]:
+        """Per student x EPA moments straight from calculated_scores (all students when None)"""
+        query = """
+            SELECT student_id, epa_id, final_score, calculation_date
+            FROM calculated_scores
+            WHERE score_level = 'Core_EPA' AND epa_id IS NOT NULL AND final_score IS NOT NULL
+        """
+        chunks = [None] if student_ids is None else [
+            student_ids[start:start + STATS_CHUNK_SIZE] for start in range(0, len(student_ids), STATS_CHUNK_SIZE)
+        ]
+        
+        moments: Dict[Tuple[str, str], Moments] = {}
+        for chunk in chunks:
+            cursor = connection.cursor(buffered=False)
+            try:
+                if chunk is None:
+                    cursor.execute(query)
+                else:
+                    cursor.execute(query + f" AND student_id IN ({_placeholders(len(chunk))})", chunk)
+                while True:
+                    rows = cursor.fetchmany(STATS_FETCH_SIZE)
+                    if not rows:
+                        break
+                    batch = batch_moments([(row[0], row[1]) for row in rows],
+                                          np.array([float(row[2]) for row in rows]), [row[3] for row in rows])
+                    for key, values in batch.items():
+                        moments.setdefault(key, Moments()).merge(values)
+            finally:
+                cursor.close()
+        return moments
+        
+    def _write_student_rows(self, cursor, moments: Dict[Tuple[str, str], Moments]) -> None:
+        rows = [
+            (student_id, epa_id, values.count, values.mean, values.m2, values.minimum, values.maximum, values.last)
+            for (student_id, epa_id), values in sorted(moments.items())
+        ]
+        for start in range(0, len(rows), STATS_CHUNK_SIZE):
+            cursor.executemany(UPSERT_STUDENT_STATS_QUERY, rows[start:start + STATS_CHUNK_SIZE])
+            
+    def _rebuild_epa_rows(self, cursor) -> int:
+        """Replace the per-EPA rows by merging every student x EPA row (full rebuild only)"""
+        cursor.execute("""
+            SELECT epa_id, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+            FROM student_epa_score_stats
+            WHERE score_count > 0
+        """)
+        per_epa: Dict[str, Moments] = {}
+        students: Dict[str, int] = {}
+        for row in cursor.fetchall():
+            per_epa.setdefault(row[0], Moments()).merge(_stored(row[1:]))
+            students[row[0]] = students.get(row[0], 0) + 1
+        
+        cursor.execute("DELETE FROM epa_score_stats")
+        cursor.executemany("""
+            INSERT INTO epa_score_stats
+            (epa_id, score_count, student_count, mean_score, m2, min_score, max_score, last_calculation_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, [
+            (epa_id, values.count, students[epa_id], values.mean, values.m2, values.minimum, values.maximum,
+             values.last)
+            for epa_id, values in sorted(per_epa.items())
+        ])
+        return len(per_epa)
+        
+    def rebuild(self, connection) -> Dict:
+        """Recompute both tables from calculated_scores; the caller commits"""
+        moments = self._student_moments(connection, None)
+        cursor = connection.cursor()
+        try:
+            cursor.execute("DELETE FROM student_epa_score_stats")
+            self._write_student_rows(cursor, moments)
+            epas = self._rebuild_epa_rows(cursor)
+        finally:
+            cursor.close()
+        return {'student_epa_rows': len(moments), 'epa_rows': epas}
+        
+    def rebuild_students(self, connection, student_ids: List[str]) -> None:
+        """
+        Recompute the rows of some students from calculated_scores (e.g. after
+        their scores were deleted or replaced) and adjust the per-EPA rows
+        they contribute to; the caller commits. Rows are locked in apply()'s
+        order: the students' rows EPA by EPA, then the affected EPA rows. An
+        EPA row is adjusted by the students' old and new moments; only when
+        one of them lost its minimum, maximum or latest date are that EPA's
+        student rows re-read (under the same locks) to find the new ones.
+        """
+        if not student_ids:
+            return
+        moments = self._student_moments(connection, student_ids)
+        chunks = [student_ids[start:start + STATS_CHUNK_SIZE] for start in range(0, len(student_ids), STATS_CHUNK_SIZE)]
+        selected = set(student_ids)
+        
+        new: Dict[str, Dict[str, Moments]] = {}
+        for (student_id, epa_id), values in moments.items():
+            new.setdefault(epa_id, {})[student_id] = values
+        
+        cursor = connection.cursor()
+        try:
+            epa_ids = set(new)
+            for chunk in chunks:
+                cursor.execute(f"""
+                    SELECT DISTINCT epa_id FROM student_epa_score_stats WHERE student_id IN ({_placeholders(len(chunk))})
+                """, chunk)
+                epa_ids.update(row[0] for row in cursor.fetchall())
+            epa_ids = sorted(epa_ids)
+            
+            old: Dict[str, Dict[str, Moments]] = {}
+            others: Dict[str, Tuple[int, Moments]] = {}
+            for epa_id in epa_ids:
+                old[epa_id] = {}
+                for chunk in chunks:
+                    cursor.execute(f"""
+                        SELECT student_id, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+                        FROM student_epa_score_stats
+                        WHERE epa_id = %s AND student_id IN ({_placeholders(len(chunk))})
+                        ORDER BY student_id
+                        FOR UPDATE
+                    """, (epa_id, *chunk))
+                    old[epa_id].update((row[0], _stored(row[1:])) for row in cursor.fetchall())
+                
+                if any(_recedes(values, new.get(epa_id, {}).get(student_id))
+                       for student_id, values in old[epa_id].items()):
+                    cursor.execute("""
+                        SELECT student_id, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+                        FROM student_epa_score_stats
+                        WHERE epa_id = %s AND score_count > 0
+                        ORDER BY student_id
+                        FOR UPDATE
+                    """, (epa_id,))
+                    rest, students = Moments(), 0
+                    for row in cursor.fetchall():
+                        if row[0] not in selected:
+                            rest.merge(_stored(row[1:]))
+                            students += 1
+                    others[epa_id] = (students, rest)
+            
+            for chunk in chunks:
+                cursor.execute(
+                    f"DELETE FROM student_epa_score_stats WHERE student_id IN ({_placeholders(len(chunk))})", chunk)
+            self._write_student_rows(cursor, moments)
+            
+            if not epa_ids:
+                return
+            cursor.executemany("INSERT IGNORE INTO epa_score_stats (epa_id) VALUES (%s)", [(epa_id,) for epa_id in epa_ids])
+            cursor.execute(f"""
+                SELECT epa_id, student_count, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+                FROM epa_score_stats
+                WHERE epa_id IN ({_placeholders(len(epa_ids))})
+                ORDER BY epa_id
+                FOR UPDATE
+            """, epa_ids)
+            
+            updates, emptied = [], []
+            for row in cursor.fetchall():
+                epa_id = row[0]
+                if epa_id in others:
+                    students, total = others[epa_id]
+                else:
+                    removed = Moments()
+                    for values in old[epa_id].values():
+                        removed.merge(values)
+                    total = _without(_stored(row[2:]), removed)
+                    students = int(row[1] or 0) - sum(1 for values in old[epa_id].values() if values.count)
+                for values in new.get(epa_id, {}).values():
+                    total.merge(values)
+                    students += 1
+                
+                if total.count == 0:
+                    emptied.append(epa_id)
+                else:
+                    updates.append((epa_id, total.count, students, total.mean, total.m2, total.minimum, total.maximum,
+                                    total.last))
+            cursor.executemany(UPSERT_EPA_STATS_QUERY, updates)
+            if emptied:
+                cursor.execute(f"DELETE FROM epa_score_stats WHERE epa_id IN ({_placeholders(len(emptied))})", emptied)
+        finally:
+            cursor.close()
+            
+    def _epa_moments(self, connection) -> List[Tuple[str, int, Moments]]:
+        """(epa_id, student_count, moments) per row of epa_score_stats"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT epa_id, student_count, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+                FROM epa_score_stats
+                ORDER BY epa_id
+            """)
+            return [(row[0], int(row[1] or 0), _stored(row[2:])) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+    def epa_overview(self, connection) -> Tuple[List[Dict], Dict]:
+        """Per-EPA statistics and all EPAs combined, from epa_score_stats"""
+        overall = Moments()
+        epas = []
+        for epa_id, student_count, values in self._epa_moments(connection):
+            overall.merge(values)
+            epas.append(dict(values.as_dict(), epa_id=epa_id, student_count=student_count))
+        return epas, overall.as_dict()
+        
+    def student_summary(self, connection, student_id: str) -> List[Dict]:
+        """Per-EPA statistics of one student's Core EPA scores, from student_epa_score_stats"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT epa_id, score_count, mean_score, m2, min_score, max_score, last_calculation_date
+                FROM student_epa_score_stats
+                WHERE student_id = %s
+                ORDER BY epa_id
+            """, (student_id,))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+        return [dict(_stored(row[1:]).as_dict(), epa_id=row[0]) for row in rows]
+        
+    def reconcile(self, connection, tolerance: float = 1e-6) -> Dict:
+        """
+        Compare the running statistics with the epa_performance_overview and
+        student_epa_summary views; returns the mismatching keys
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT epa_id, student_count, avg_score, min_score, max_score, score_stddev
+                FROM epa_performance_overview
+            """)
+            view_epas = {row[0]: row[1:] for row in cursor.fetchall()}
+            cursor.execute("""
+                SELECT student_id, epa_id, avg_score, assessment_count, last_assessment
+                FROM student_epa_summary
+            """)
+            view_students = {(row[0], row[1]): row[2:] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+            
+        def differs(a, b) -> bool:
+            if a is None or b is None:
+                return (a is None) != (b is None)
+            return abs(float(a) - float(b)) > tolerance
+        
+        stored_epas = {epa_id: (student_count, values) for epa_id, student_count, values in self._epa_moments(connection)}
+        epa_mismatches = []
+        for epa_id in sorted(set(view_epas) | set(stored_epas)):
+            view = view_epas.get(epa_id)
+            stored = stored_epas.get(epa_id)
+            if view is not None and stored is not None:
+                student_count, values = stored
+                if (int(view[0]) == student_count and not differs(view[1], values.mean)
+                        and not differs(view[2], values.minimum) and not differs(view[3], values.maximum)
+                        and not differs(view[4], values.stddev)):
+                    continue
+            epa_mismatches.append({
+                'epa_id': epa_id,
+                'view': list(view) if view else None,
+                'stored': [stored[0], stored[1].mean, stored[1].minimum, stored[1].maximum, stored[1].stddev]
+                if stored else None
+            })
+        
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT st.student_id, st.epa_id, st.mean_score, st.score_count, st.last_calculation_date
+                FROM student_epa_score_stats st
+                JOIN students s ON s.student_id = st.student_id
+                WHERE st.score_count > 0
+            """)
+            stored_students = {(row[0], row[1]): row[2:] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+        
+        student_mismatches = []
+        for key in sorted(set(view_students) | set(stored_students)):
+            view = view_students.get(key)
+            stored = stored_students.get(key)
+            if (view is None or stored is None or differs(view[0], stored[0]) or int(view[1]) != int(stored[1])
+                    or str(view[2]) != str(stored[2])):
+                student_mismatches.append({'student_id': key[0], 'epa_id': key[1],
+                                           'view': list(view) if view else None,
+                                           'stored': list(stored) if stored else None})
+        
+        return {
+            'epas_checked': len(view_epas),
+            'student_epas_checked': len(view_students),
+            'epa_mismatches': epa_mismatches,
+            'student_epa_mismatches': student_mismatches[:100],
+            'student_epa_mismatch_count': len(student_mismatches),
+            'consistent': not epa_mismatches and not student_mismatches
+        }
@@ -3,7 +3,6 @@ EPA Scoring Engine - Core Models
 File: backend/models/scoring_engine.py
 """
 
-import mysql.connector
 from mysql.connector import Error
 import json
 from datetime import datetime
@@ -11,59 +10,172 @@ from typing import Dict, List, Optional, Tuple
 import logging
 import numpy as np
 
+from models.epa_hierarchy import HierarchyCache, SCORE_METRICS
+from models.scoring_policy import evidence_weights, resolve_policy
+from repositories.base import ScoringRepository
+from repositories.sql_repository import MySQLScoringRepository
+from utils.database import DatabaseManager
+from utils.metrics import timed
+from utils.reference_cache import ReferenceDataCache
+
 logger = logging.getLogger(__name__)
 
+# Adjusted scores are capped at the top of the 1-5 rating scale
+SCORE_CAP = 5.0
+
+# Rows fetched per round trip by the batch scoring paths
+BATCH_CHUNK_SIZE = 1000
+
+def adjust_scores(base_scores: np.ndarray, context_multipliers: np.ndarray,
+                  tech_multipliers: np.ndarray, indicator_weights: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized context/technology adjustment, cap and weighting.
+    Performs the same float64 operations, in the same order, as
+    calculate_indicator_score so both paths produce identical values.
+    """
+    context_adjusted = base_scores * context_multipliers
+    tech_adjusted = context_adjusted * tech_multipliers
+    final_scores = np.minimum(tech_adjusted, SCORE_CAP)
+    final_weighted = (final_scores * indicator_weights) / 100.0
+    
+    return {
+        'context_adjusted_score': context_adjusted,
+        'tech_adjusted_score': tech_adjusted,
+        'final_score': final_scores,
+        'final_weighted_score': final_weighted
+    }
+
+# Cross-EPA integration matrix with bonus values
+INTEGRATION_MATRIX = {
+    ('EPA_001', 'EPA_002'): {'type': 'Assessment_to_Diagnosis', 'bonus': 0.2},
+    ('EPA_002', 'EPA_003'): {'type': 'Diagnosis_to_Planning', 'bonus': 0.2},
+    ('EPA_003', 'EPA_004'): {'type': 'Planning_to_Implementation', 'bonus': 0.15},
+    ('EPA_001', 'EPA_005'): {'type': 'Assessment_to_Emergency', 'bonus': 0.25},
+    ('EPA_004', 'EPA_006'): {'type': 'Intervention_to_Specialized_Care', 'bonus': 0.15},
+    ('EPA_007', 'EPA_003'): {'type': 'Community_to_Individual_Care', 'bonus': 0.1},
+    ('EPA_008', 'EPA_001'): {'type': 'Technology_Enhanced_Assessment', 'bonus': 0.1},
+    ('EPA_008', 'EPA_002'): {'type': 'Technology_Enhanced_Diagnosis', 'bonus': 0.1},
+    ('EPA_008', 'EPA_003'): {'type': 'Technology_Enhanced_Planning', 'bonus': 0.1},
+    ('EPA_008', 'EPA_004'): {'type': 'Technology_Enhanced_Implementation', 'bonus': 0.1},
+    ('EPA_008', 'EPA_005'): {'type': 'Technology_Enhanced_Emergency', 'bonus': 0.15},
+    ('EPA_008', 'EPA_006'): {'type': 'Technology_Enhanced_Specialized', 'bonus': 0.1},
+    ('EPA_008', 'EPA_007'): {'type': 'Technology_Enhanced_Community', 'bonus': 0.1}
+}
+
+# Integration tiers: the weaker EPA score of a pair must reach each threshold
+INTEGRATION_THRESHOLDS = np.array([3.0, 3.5, 4.0])
+INTEGRATION_LEVELS = ('Insufficient', 'Basic', 'Moderate', 'High')
+INTEGRATION_MULTIPLIERS = np.array([0.0, 0.5, 0.75, 1.0])
+
+# INTEGRATION_MATRIX compiled to parallel arrays (one entry per pair) over a fixed EPA column order
+INTEGRATION_PAIRS = tuple(INTEGRATION_MATRIX)
+INTEGRATION_TYPES = tuple(INTEGRATION_MATRIX[pair]['type'] for pair in INTEGRATION_PAIRS)
+INTEGRATION_BASE_BONUS = np.array([INTEGRATION_MATRIX[pair]['bonus'] for pair in INTEGRATION_PAIRS])
+INTEGRATION_EPAS = tuple(sorted({epa_id for pair in INTEGRATION_PAIRS for epa_id in pair}))
+INTEGRATION_PRIMARY = np.array([INTEGRATION_EPAS.index(pair[0]) for pair in INTEGRATION_PAIRS])
+INTEGRATION_SECONDARY = np.array([INTEGRATION_EPAS.index(pair[1]) for pair in INTEGRATION_PAIRS])
+
+def integration_tiers(min_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized tiering: index into INTEGRATION_LEVELS and bonus multiplier
+    for each weaker-of-two EPA score
+    """
+    tiers = np.searchsorted(INTEGRATION_THRESHOLDS, min_scores, side='right')
+    return tiers, INTEGRATION_MULTIPLIERS[tiers]
+
+def integration_tier(min_score: float) -> Tuple[str, float]:
+    """
+    Integration level and bonus multiplier for the weaker of two EPA scores
+    """
+    tier = int(np.searchsorted(INTEGRATION_THRESHOLDS, min_score, side='right'))
+    return INTEGRATION_LEVELS[tier], float(INTEGRATION_MULTIPLIERS[tier])
+
+def score_integration_pairs(epa_scores: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Evaluate every INTEGRATION_MATRIX pair for a block of students at once.
+    epa_scores is (students x INTEGRATION_EPAS) average Core EPA final scores,
+    0.0 where a student has none (as calculate_integration_bonus treats them).
+    Returns (students x pairs) arrays.
+    """
+    primary_scores = epa_scores[:, INTEGRATION_PRIMARY]
+    secondary_scores = epa_scores[:, INTEGRATION_SECONDARY]
+    tiers, multipliers = integration_tiers(np.minimum(primary_scores, secondary_scores))
+    
+    return {
+        'primary_score': primary_scores,
+        'secondary_score': secondary_scores,
+        'tier': tiers,
+        'bonus_multiplier': multipliers,
+        'bonus_points': INTEGRATION_BASE_BONUS * multipliers
+    }
+
+# Entrustment levels 1-5: an EPA score reaching ENTRUSTMENT_THRESHOLDS[k] earns level k + 2
+ENTRUSTMENT_THRESHOLDS = np.array([2.0, 3.0, 3.5, 4.5])
+ENTRUSTMENT_DESCRIPTIONS = {
+    1: ("Novice - Significant guidance needed", "Close supervision with extensive guidance"),
+    2: ("Advanced Beginner - Moderate guidance", "Direct supervision with guided practice"),
+    3: ("Competent - Minimal guidance needed", "Independent practice with available supervision"),
+    4: ("Proficient - Independent practice", "Independent practice with minimal oversight"),
+    5: ("Expert - Able to supervise others", "Independent practice with teaching responsibilities")
+}
+ENTRUSTMENT_LEVEL_COUNT = len(ENTRUSTMENT_DESCRIPTIONS)
+
+def entrustment_levels(epa_scores: np.ndarray) -> np.ndarray:
+    """
+    Classify an array of EPA scores into entrustment levels 1-5 with one
+    searchsorted over ENTRUSTMENT_THRESHOLDS; NaN (no evidence) maps to 0
+    """
+    epa_scores = np.asarray(epa_scores, dtype=float)
+    levels = np.searchsorted(ENTRUSTMENT_THRESHOLDS, epa_scores, side='right') + 1
+    return np.where(np.isnan(epa_scores), 0, levels)
+
 class EPAScoringEngine:
     """
-    Complete EPA scoring engine with algorithmic calculations
+    Complete EPA scoring engine with algorithmic calculations.
+    Reads go through a ScoringRepository (MySQL unless another one, e.g. an
+    InMemoryScoringRepository for simulations, is given).
     """
     
-    def __init__(self, db_config: Dict):
+    def __init__(self, db_config: Dict, db_manager: Optional[DatabaseManager] = None,
+                 hierarchy_cache: Optional[HierarchyCache] = None,
+                 reference_cache: Optional[ReferenceDataCache] = None,
+                 repository: Optional[ScoringRepository] = None):
         self.db_config = db_config
-        self.connection = None
+        # Share the application's pool when one is provided; otherwise own a private pool
+        self._owns_db_manager = db_manager is None
+        self.db_manager = db_manager or DatabaseManager(db_config)
+        self.repository = repository or MySQLScoringRepository(self.db_manager)
+        # Multipliers and indicator weights are resolved in memory from reference data
+        self.reference_cache = reference_cache or ReferenceDataCache(self.db_manager, repository=self.repository)
+        # Compiled EPA hierarchy; when present, activity scoring uses its weight matrices
+        self.hierarchy_cache = hierarchy_cache
         
     def connect_database(self):
-        """Establish database connection"""
+        """Verify that pooled database connections can be established"""
         try:
-            self.connection = mysql.connector.connect(**self.db_config)
+            with self.db_manager.connection() as connection:
+                connection.ping()
             logger.info("Database connection established successfully")
         except Error as e:
             logger.error(f"Database connection error: {e}")
             raise
             
     def disconnect_database(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Close pooled database connections owned by this engine"""
+        if self._owns_db_manager:
+            self.db_manager.close()
             logger.info("Database connection closed")
-            
+    
+    @timed('calculate_indicator_score')
     def calculate_indicator_score(self, assessment_id: str) -> Dict:
         """
         Calculate performance indicator score with context and technology adjustments
         """
-        if not self.connection:
-            self.connect_database()
-            
-        cursor = self.connection.cursor(dictionary=True)
-        
         try:
-            # Get assessment details
-            query = """
-            SELECT sa.*, pi.weight_percentage as indicator_weight,
-                   ct.base_multiplier as context_multiplier,
-                   tl.multiplier as tech_multiplier,
-                   pi.competency_type
-            FROM student_assessments sa
-            JOIN performance_indicators pi ON sa.indicator_id = pi.indicator_id
-            LEFT JOIN context_types ct ON sa.context_id = ct.context_id
-            LEFT JOIN technology_levels tl ON sa.tech_level_id = tl.tech_level_id
-            WHERE sa.assessment_id = %s
-            """
-            
-            cursor.execute(query, (assessment_id,))
-            assessment = cursor.fetchone()
+            # Get assessment details; weights and multipliers come from reference data
+            assessment = self.repository.assessment(assessment_id)
             
-            if not assessment:
+            if not assessment or not self._resolve_reference_data([assessment]):
                 return {'error': 'Assessment not found'}
             
             # Calculate scores
@@ -75,7 +187,7 @@ class EPAScoringEngine:
             # Apply adjustments
             context_adjusted_score = base_score * context_multiplier
             tech_adjusted_score = context_adjusted_score * tech_multiplier
-            final_score = min(tech_adjusted_score, 5.0)  # Cap at 5.0
+            final_score = min(tech_adjusted_score, SCORE_CAP)  # Cap at 5.0
             final_weighted_score = (final_score * indicator_weight) / 100.0
             
             return {
@@ -95,34 +207,160 @@ class EPAScoringEngine:
         except Error as e:
             logger.error(f"Error calculating indicator score: {e}")
             return {'error': str(e)}
-        finally:
-            cursor.close()
+    
+    @timed('calculate_indicator_scores_batch')
+    def calculate_indicator_scores_batch(self, assessment_ids: Optional[List[str]] = None,
+                                         student_ids: Optional[List[str]] = None,
+                                         start_date: Optional[datetime] = None,
+                                         end_date: Optional[datetime] = None,
+                                         chunk_size: int = BATCH_CHUNK_SIZE) -> Dict:
+        """
+        Calculate indicator scores for many assessments at once.
+        Select by explicit assessment IDs, a set of students and/or an
+        assessment date range; values match calculate_indicator_score exactly.
+        """
+        if assessment_ids is None and student_ids is None and start_date is None and end_date is None:
+            return {'error': 'Provide assessment_ids, student_ids or a date range'}
+        
+        calculation_timestamp = datetime.now().isoformat()
+        scores = []
+        
+        try:
+            for rows, arrays in self._iter_indicator_score_chunks(
+                    assessment_ids, student_ids, start_date, end_date, chunk_size):
+                columns = {name: values.tolist() for name, values in arrays.items()}
+                
+                for i, row in enumerate(rows):
+                    scores.append({
+                        'assessment_id': row['assessment_id'],
+                        'base_score': columns['base_score'][i],
+                        'context_multiplier': columns['context_multiplier'][i],
+                        'tech_multiplier': columns['tech_multiplier'][i],
+                        'context_adjusted_score': columns['context_adjusted_score'][i],
+                        'tech_adjusted_score': columns['tech_adjusted_score'][i],
+                        'final_score': columns['final_score'][i],
+                        'indicator_weight': columns['indicator_weight'][i],
+                        'final_weighted_score': columns['final_weighted_score'][i],
+                        'competency_type': row['competency_type'],
+                        'calculation_timestamp': calculation_timestamp
+                    })
             
-    def calculate_activity_score(self, student_id: str, activity_id: str) -> Dict:
+            return {
+                'scores': scores,
+                'count': len(scores),
+                'calculation_timestamp': calculation_timestamp
+            }
+            
+        except Error as e:
+            logger.error(f"Error calculating batch indicator scores: {e}")
+            return {'error': str(e)}
+            
+    def _iter_indicator_score_chunks(self, assessment_ids: Optional[List[str]], student_ids: Optional[List[str]],
+                                     start_date: Optional[datetime], end_date: Optional[datetime],
+                                     chunk_size: int, order_by_student: bool = False):
+        """
+        Yield (rows, arrays) per chunk of matching assessments, where arrays
+        holds the inputs and the adjust_scores() outputs as float64 columns.
+        With no filters at all, every assessment is streamed. order_by_student
+        keeps each student's rows contiguous across chunks.
+        """
+        for rows in self.repository.iter_assessments(assessment_ids, student_ids, start_date, end_date,
+                                                     chunk_size, order_by_student):
+            rows = self._resolve_reference_data(rows)
+            if rows:
+                yield rows, self._score_rows(rows)
+    
+    @timed('score_student_assessments')
+    def score_student_assessments(self, connection, student_id: str,
+                                  indicator_ids: List[str]) -> Tuple[List[Dict], Dict[str, np.ndarray]]:
         """
-        Calculate activity-level score from multiple performance indicators
+        Fetch and score one student's assessments for the given indicators on
+        the caller's connection, so uncommitted rows in its transaction are included
         """
-        if not self.connection:
-            self.connect_database()
+        if not indicator_ids:
+            return [], {}
+        
+        rows = self._resolve_reference_data(
+            self.repository.student_assessments(student_id, indicator_ids, connection))
+        return rows, (self._score_rows(rows) if rows else {})
+        
+    def _resolve_reference_data(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Attach indicator weight, competency type and context/technology
+        multipliers from the reference cache. Rows whose indicator is unknown
+        are dropped, matching the inner join these queries used to perform.
+        """
+        cache = self.reference_cache
+        # Resolve against the current tables once per call; misses fall back to a reloading lookup
+        indicators = cache.index('indicators')
+        contexts = cache.index('contexts')
+        tech_levels = cache.index('technology_levels')
+        resolved = []
+        
+        for row in rows:
+            indicator = indicators.get(row['indicator_id']) or cache.indicator(row['indicator_id'])
+            if indicator is None:
+                continue
+            
+            context_id = row.get('context_id')
+            tech_level_id = row.get('tech_level_id')
+            context = contexts.get(context_id)
+            tech_level = tech_levels.get(tech_level_id)
             
-        cursor = self.connection.cursor(dictionary=True)
+            row['indicator_weight'] = indicator['weight_percentage']
+            row['competency_type'] = indicator['competency_type']
+            row['context_multiplier'] = (context['base_multiplier'] if context
+                                         else cache.context_multiplier(context_id))
+            row['tech_multiplier'] = (tech_level['multiplier'] if tech_level
+                                      else cache.tech_multiplier(tech_level_id))
+            resolved.append(row)
+        
+        return resolved
+    
+    @staticmethod
+    def _score_rows(rows: List[Dict]) -> Dict[str, np.ndarray]:
+        """Convert fetched assessment rows to float64 columns and apply adjust_scores()"""
+        count = len(rows)
+        base_scores = np.fromiter((float(r['base_score']) for r in rows), dtype=np.float64, count=count)
+        context_multipliers = np.fromiter((float(r['context_multiplier'] or 1.0) for r in rows),
+                                          dtype=np.float64, count=count)
+        tech_multipliers = np.fromiter((float(r['tech_multiplier'] or 1.0) for r in rows),
+                                       dtype=np.float64, count=count)
+        indicator_weights = np.fromiter((float(r['indicator_weight']) for r in rows),
+                                        dtype=np.float64, count=count)
         
+        arrays = adjust_scores(base_scores, context_multipliers, tech_multipliers, indicator_weights)
+        arrays.update({
+            'base_score': base_scores,
+            'context_multiplier': context_multipliers,
+            'tech_multiplier': tech_multipliers,
+            'indicator_weight': indicator_weights
+        })
+        return arrays
+    
+    @timed('calculate_activity_score')
+    def calculate_activity_score(self, student_id: str, activity_id: str, policy: Optional[str] = None,
+                                 last_n: Optional[int] = None, half_life_days: Optional[float] = None) -> Dict:
+        """
+        Calculate activity-level score from multiple performance indicators.
+        policy picks the evidence that counts (see models/scoring_policy.py);
+        every policy but 'all' reads only the newest rows per indicator.
+        """
         try:
-            # Get all assessments for this student and activity
-            query = """
-            SELECT sa.assessment_id, sa.base_score, pi.indicator_id, pi.weight_percentage,
-                   ct.base_multiplier as context_multiplier,
-                   tl.multiplier as tech_multiplier
-            FROM student_assessments sa
-            JOIN performance_indicators pi ON sa.indicator_id = pi.indicator_id
-            LEFT JOIN context_types ct ON sa.context_id = ct.context_id
-            LEFT JOIN technology_levels tl ON sa.tech_level_id = tl.tech_level_id
-            WHERE sa.student_id = %s AND pi.activity_id = %s
-            ORDER BY sa.assessment_date DESC
-            """
-            
-            cursor.execute(query, (student_id, activity_id))
-            assessments = cursor.fetchall()
+            settings = resolve_policy(policy, last_n, half_life_days)
+        except ValueError as e:
+            return {'error': str(e)}
+        
+        if self.hierarchy_cache is not None:
+            return self._calculate_activity_score_compiled(student_id, activity_id, settings)
+        
+        indicator_ids = self.reference_cache.activity_indicator_ids(activity_id)
+        if not indicator_ids:
+            return {'error': 'No assessments found for this activity'}
+        
+        try:
+            # Get the policy's assessments for this student and activity
+            assessments = self._resolve_reference_data(self._activity_evidence(student_id, indicator_ids, settings))
             
             if not assessments:
                 return {'error': 'No assessments found for this activity'}
@@ -132,14 +370,14 @@ class EPAScoringEngine:
             total_weighted_score = 0.0
             total_weight = 0.0
             
-            for assessment in assessments:
+            for assessment, evidence_weight in zip(assessments, evidence_weights(settings, assessments).tolist()):
                 base_score = float(assessment['base_score'])
                 context_multiplier = float(assessment['context_multiplier'] or 1.0)
                 tech_multiplier = float(assessment['tech_multiplier'] or 1.0)
-                weight = float(assessment['weight_percentage'])
+                weight = float(assessment['indicator_weight'])
                 
                 # Apply adjustments
-                adjusted_score = min(base_score * context_multiplier * tech_multiplier, 5.0)
+                adjusted_score = min(base_score * context_multiplier * tech_multiplier, SCORE_CAP)
                 weighted_score = adjusted_score * weight / 100.0
                 
                 indicator_scores.append({
@@ -147,11 +385,12 @@ class EPAScoringEngine:
                     'base_score': base_score,
                     'adjusted_score': adjusted_score,
                     'weight': weight,
-                    'weighted_score': weighted_score
+                    'weighted_score': weighted_score,
+                    'evidence_weight': evidence_weight
                 })
                 
-                total_weighted_score += weighted_score
-                total_weight += weight / 100.0
+                total_weighted_score += weighted_score * evidence_weight
+                total_weight += weight / 100.0 * evidence_weight
             
             # Calculate activity score
             activity_score = total_weighted_score / total_weight if total_weight > 0 else 0.0
@@ -160,6 +399,7 @@ class EPAScoringEngine:
                 'student_id': student_id,
                 'activity_id': activity_id,
                 'activity_score': activity_score,
+                'policy': settings['policy'],
                 'indicator_count': len(indicator_scores),
                 'indicator_scores': indicator_scores,
                 'calculation_timestamp': datetime.now().isoformat()
@@ -168,32 +408,78 @@ class EPAScoringEngine:
         except Error as e:
             logger.error(f"Error calculating activity score: {e}")
             return {'error': str(e)}
-        finally:
-            cursor.close()
             
+    def _activity_evidence(self, student_id: str, indicator_ids: List[str], settings: Dict) -> List[Dict]:
+        """The student's assessments of the indicators that the scoring policy selects"""
+        if settings['per_indicator'] is None:
+            return self.repository.student_assessments(student_id, indicator_ids, newest_first=True)
+        return self.repository.latest_student_assessments(student_id, indicator_ids, settings['per_indicator'])
+        
+    def _calculate_activity_score_compiled(self, student_id: str, activity_id: str, settings: Dict) -> Dict:
+        """
+        Activity score using the compiled hierarchy: the activity's indicators
+        are looked up in the compiled tree and the score is one column of the
+        sparse indicator -> activity weight matrix.
+        """
+        hierarchy = self.hierarchy_cache.get()
+        activity_index = hierarchy.activity_index.get(activity_id)
+        indicator_positions = (hierarchy.activity_indicators(activity_index)
+                               if activity_index is not None else [])
+        if not len(indicator_positions):
+            return {'error': 'No assessments found for this activity'}
+        
+        try:
+            assessments = self._resolve_reference_data(self._activity_evidence(
+                student_id, [hierarchy.indicator_ids[i] for i in indicator_positions], settings))
+            
+            if not assessments:
+                return {'error': 'No assessments found for this activity'}
+            
+            indicator_codes = np.fromiter((hierarchy.indicator_index[a['indicator_id']] for a in assessments),
+                                          dtype=np.int64, count=len(assessments))
+            
+            arrays = self._score_rows(assessments)
+            evidence = evidence_weights(settings, assessments)
+            sums, counts = hierarchy.accumulate(np.zeros(len(assessments), dtype=np.int64), indicator_codes, 1,
+                                                {metric: arrays[metric] for metric in SCORE_METRICS}, evidence)
+            activity_score = hierarchy.activity_scores(sums['final_score'], counts)[0, activity_index]
+            
+            weights = arrays['indicator_weight'].tolist()
+            adjusted_scores = arrays['final_score'].tolist()
+            indicator_scores = [
+                {
+                    'indicator_id': assessment['indicator_id'],
+                    'base_score': float(assessment['base_score']),
+                    'adjusted_score': adjusted_score,
+                    'weight': weight,
+                    'weighted_score': adjusted_score * weight / 100.0,
+                    'evidence_weight': evidence_weight
+                }
+                for assessment, adjusted_score, weight, evidence_weight
+                in zip(assessments, adjusted_scores, weights, evidence.tolist())
+            ]
+            
+            return {
+                'student_id': student_id,
+                'activity_id': activity_id,
+                'activity_score': float(activity_score) if not np.isnan(activity_score) else 0.0,
+                'policy': settings['policy'],
+                'indicator_count': len(indicator_scores),
+                'indicator_scores': indicator_scores,
+                'calculation_timestamp': datetime.now().isoformat()
+            }
+            
+        except Error as e:
+            logger.error(f"Error calculating activity score: {e}")
+            return {'error': str(e)}
+    
+    @timed('calculate_integration_bonus')
     def calculate_integration_bonus(self, student_id: str, primary_epa: str, secondary_epa: str) -> Dict:
         """
         Calculate cross-EPA integration bonus
         """
-        # Integration matrix with bonus values
-        integration_matrix = {
-            ('EPA_001', 'EPA_002'): {'type': 'Assessment_to_Diagnosis', 'bonus': 0.2},
-            ('EPA_002', 'EPA_003'): {'type': 'Diagnosis_to_Planning', 'bonus': 0.2},
-            ('EPA_003', 'EPA_004'): {'type': 'Planning_to_Implementation', 'bonus': 0.15},
-            ('EPA_001', 'EPA_005'): {'type': 'Assessment_to_Emergency', 'bonus': 0.25},
-            ('EPA_004', 'EPA_006'): {'type': 'Intervention_to_Specialized_Care', 'bonus': 0.15},
-            ('EPA_007', 'EPA_003'): {'type': 'Community_to_Individual_Care', 'bonus': 0.1},
-            ('EPA_008', 'EPA_001'): {'type': 'Technology_Enhanced_Assessment', 'bonus': 0.1},
-            ('EPA_008', 'EPA_002'): {'type': 'Technology_Enhanced_Diagnosis', 'bonus': 0.1},
-            ('EPA_008', 'EPA_003'): {'type': 'Technology_Enhanced_Planning', 'bonus': 0.1},
-            ('EPA_008', 'EPA_004'): {'type': 'Technology_Enhanced_Implementation', 'bonus': 0.1},
-            ('EPA_008', 'EPA_005'): {'type': 'Technology_Enhanced_Emergency', 'bonus': 0.15},
-            ('EPA_008', 'EPA_006'): {'type': 'Technology_Enhanced_Specialized', 'bonus': 0.1},
-            ('EPA_008', 'EPA_007'): {'type': 'Technology_Enhanced_Community', 'bonus': 0.1}
-        }
-        
         integration_key = (primary_epa, secondary_epa)
-        if integration_key not in integration_matrix:
+        if integration_key not in INTEGRATION_MATRIX:
             return {
                 'student_id': student_id,
                 'primary_epa': primary_epa,
@@ -203,44 +489,19 @@ class EPAScoringEngine:
                 'calculation_timestamp': datetime.now().isoformat()
             }
         
-        integration_info = integration_matrix[integration_key]
-        
-        if not self.connection:
-            self.connect_database()
-            
-        cursor = self.connection.cursor(dictionary=True)
+        integration_info = INTEGRATION_MATRIX[integration_key]
         
         try:
             # Get student performance in both EPAs
-            score_query = """
-            SELECT AVG(final_score) as avg_score
-            FROM calculated_scores
-            WHERE student_id = %s AND epa_id = %s AND score_level = 'Core_EPA'
-            """
-            
-            cursor.execute(score_query, (student_id, primary_epa))
-            primary_result = cursor.fetchone()
-            primary_score = float(primary_result['avg_score'] or 0.0)
-            
-            cursor.execute(score_query, (student_id, secondary_epa))
-            secondary_result = cursor.fetchone()
-            secondary_score = float(secondary_result['avg_score'] or 0.0)
+            averages = {
+                epa_id: avg_score
+                for _, epa_id, avg_score, _ in self.repository.core_epa_averages([student_id], integration_key)
+            }
+            primary_score = float(averages.get(primary_epa) or 0.0)
+            secondary_score = float(averages.get(secondary_epa) or 0.0)
             
             # Calculate integration level
-            min_score = min(primary_score, secondary_score)
-            
-            if min_score >= 4.0:
-                integration_level = 'High'
-                bonus_multiplier = 1.0
-            elif min_score >= 3.5:
-                integration_level = 'Moderate'
-                bonus_multiplier = 0.75
-            elif min_score >= 3.0:
-                integration_level = 'Basic'
-                bonus_multiplier = 0.5
-            else:
-                integration_level = 'Insufficient'
-                bonus_multiplier = 0.0
+            integration_level, bonus_multiplier = integration_tier(min(primary_score, secondary_score))
             
             bonus_points = integration_info['bonus'] * bonus_multiplier
             
@@ -261,33 +522,88 @@ class EPAScoringEngine:
         except Error as e:
             logger.error(f"Error calculating integration bonus: {e}")
             return {'error': str(e)}
-        finally:
-            cursor.close()
             
+    def load_integration_scores(self, connection, student_ids: Optional[List[str]] = None,
+                                chunk_size: int = BATCH_CHUNK_SIZE) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Average Core EPA final score per student and integration EPA from one
+        grouped aggregate over calculated_scores (chunked IN lists for large
+        student selections). Returns the students, a (students x
+        INTEGRATION_EPAS) score matrix with 0.0 for missing EPAs, and a mask
+        of the cells that had scores.
+        """
+        epa_columns = {epa_id: column for column, epa_id in enumerate(INTEGRATION_EPAS)}
+        aggregates = self.repository.core_epa_averages(student_ids, INTEGRATION_EPAS, chunk_size, connection)
+        
+        students = list(student_ids) if student_ids is not None else sorted({row[0] for row in aggregates})
+        student_rows = {student_id: row for row, student_id in enumerate(dict.fromkeys(students))}
+        students = list(student_rows)
+        
+        scores = np.zeros((len(students), len(INTEGRATION_EPAS)))
+        present = np.zeros(scores.shape, dtype=bool)
+        for student_id, epa_id, avg_score, _ in aggregates:
+            row, column = student_rows[student_id], epa_columns[epa_id]
+            scores[row, column] = float(avg_score)
+            present[row, column] = True
+        
+        return students, scores, present
+    
+    @timed('calculate_integration_bonuses')
+    def calculate_integration_bonuses(self, student_ids: Optional[List[str]] = None) -> Dict:
+        """
+        Every integration pair for one student, a list of students, or the whole
+        cohort (student_ids=None), from a single grouped aggregate instead of
+        two queries per pair. Values match calculate_integration_bonus.
+        """
+        calculation_timestamp = datetime.now().isoformat()
+        
+        try:
+            with self.repository.connection() as connection:
+                students, scores, present = self.load_integration_scores(connection, student_ids)
+        except Error as e:
+            logger.error(f"Error calculating integration bonuses: {e}")
+            return {'error': str(e)}
+        
+        pairs = score_integration_pairs(scores)
+        evaluated = present[:, INTEGRATION_PRIMARY] & present[:, INTEGRATION_SECONDARY]
+        
+        results = []
+        for row, student_id in enumerate(students):
+            bonuses = [
+                {
+                    'primary_epa': primary_epa,
+                    'secondary_epa': secondary_epa,
+                    'integration_type': INTEGRATION_TYPES[column],
+                    'integration_level': INTEGRATION_LEVELS[pairs['tier'][row, column]],
+                    'primary_score': float(pairs['primary_score'][row, column]),
+                    'secondary_score': float(pairs['secondary_score'][row, column]),
+                    'base_bonus': float(INTEGRATION_BASE_BONUS[column]),
+                    'bonus_multiplier': float(pairs['bonus_multiplier'][row, column]),
+                    'bonus_points': float(pairs['bonus_points'][row, column]),
+                    'evaluated': bool(evaluated[row, column])
+                }
+                for column, (primary_epa, secondary_epa) in enumerate(INTEGRATION_PAIRS)
+            ]
+            results.append({
+                'student_id': student_id,
+                'total_bonus': float(pairs['bonus_points'][row].sum()),
+                'bonuses': bonuses
+            })
+        
+        return {
+            'students': results,
+            'student_count': len(results),
+            'calculation_timestamp': calculation_timestamp
+        }
+    
+    @timed('calculate_entrustment_level')
     def calculate_entrustment_level(self, epa_score: float) -> Dict:
         """
         Calculate entrustment level based on EPA score
         """
-        if epa_score >= 4.5:
-            level = 5
-            description = "Expert - Able to supervise others"
-            supervision = "Independent practice with teaching responsibilities"
-        elif epa_score >= 3.5:
-            level = 4
-            description = "Proficient - Independent practice"
-            supervision = "Independent practice with minimal oversight"
-        elif epa_score >= 3.0:
-            level = 3
-            description = "Competent - Minimal guidance needed"
-            supervision = "Independent practice with available supervision"
-        elif epa_score >= 2.0:
-            level = 2
-            description = "Advanced Beginner - Moderate guidance"
-            supervision = "Direct supervision with guided practice"
-        else:
-            level = 1
-            description = "Novice - Significant guidance needed"
-            supervision = "Close supervision with extensive guidance"
+        # A NaN score has always fallen through to Novice
+        level = max(int(entrustment_levels([epa_score])[0]), 1)
+        description, supervision = ENTRUSTMENT_DESCRIPTIONS[level]
         
         return {
             'epa_score': epa_score,
@@ -296,4 +612,3 @@ class EPAScoringEngine:
             'supervision_type': supervision,
             'calculation_timestamp': datetime.now().isoformat()
         }
-
@@ -0,0 +1,69 @@
+"""
+EPA Scoring Engine - Evidence Selection Policies
+File: backend/models/scoring_policy.py
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+
+# Which assessments of an indicator count towards an activity score:
+#   all           every assessment ever recorded (the original behaviour)
+#   latest        only the most recent assessment per indicator
+#   last_n        the last_n most recent assessments per indicator
+#   time_decayed  the last_n most recent per indicator, each weighted by
+#                 0.5 ** (age_days / half_life_days)
+SCORING_POLICIES = ('all', 'latest', 'last_n', 'time_decayed')
+DEFAULT_SCORING_POLICY = 'all'
+
+DEFAULT_LAST_N = 3
+DEFAULT_HALF_LIFE_DAYS = 90.0
+
+# Older evidence than this many assessments per indicator weighs too little to matter when decayed
+DEFAULT_DECAY_WINDOW = 10
+
+def resolve_policy(policy: Optional[str] = None, last_n: Optional[int] = None,
+                   half_life_days: Optional[float] = None) -> Dict:
+    """
+    Validated policy settings: {'policy', 'per_indicator', 'half_life_days'}
+    where per_indicator is the number of most recent assessments read per
+    indicator (None = all of them). Raises ValueError on bad settings.
+    """
+    policy = policy or DEFAULT_SCORING_POLICY
+    if policy not in SCORING_POLICIES:
+        raise ValueError(f"policy must be one of: {', '.join(SCORING_POLICIES)}")
+    if last_n is not None and last_n < 1:
+        raise ValueError("last_n must be at least 1")
+    if half_life_days is not None and half_life_days <= 0:
+        raise ValueError("half_life_days must be positive")
+    
+    per_indicator = {
+        'all': None,
+        'latest': 1,
+        'last_n': last_n or DEFAULT_LAST_N,
+        'time_decayed': last_n or DEFAULT_DECAY_WINDOW
+    }[policy]
+    
+    return {
+        'policy': policy,
+        'per_indicator': per_indicator,
+        'half_life_days': (half_life_days or DEFAULT_HALF_LIFE_DAYS) if policy == 'time_decayed' else None
+    }
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+def evidence_weights(settings: Dict, assessments: List[Dict], now: Optional[datetime] = None) -> np.ndarray:
+    """
+    Per-assessment evidence weight under the policy: 1.0 unless time-decayed.
+    Assessments dated in the future count as brand new.
+    """
+    if settings['half_life_days'] is None:
+        return np.ones(len(assessments))
+    
+    now = now or datetime.now()
+    ages = np.fromiter(
+        ((now - _as_datetime(assessment['assessment_date'])).total_seconds() / 86400.0
+         for assessment in assessments),
+        dtype=np.float64, count=len(assessments))
+    return 0.5 ** (np.maximum(ages, 0.0) / settings['half_life_days'])
@@ -0,0 +1,245 @@
+"""
+EPA Scoring Engine - Cohort Recompute Command
+File: backend/recompute.py
+
+Recomputes and stores every score level for a program, a year level or all
+active students, sharded across a process pool:
+
+    python recompute.py --all --workers 8
+    python recompute.py --program BSN --year-level 3 --checkpoint bsn3.json
+    python recompute.py --resume --checkpoint bsn3.json
+
+Every shard is scored by ScoringService.recompute_cohort() in its own
+process with its own database connection, and all shards share one
+calculation_date, so the stored rows are exactly those of a single-process
+run over the same students. Finished shards are recorded in the checkpoint
+file; --resume skips them and clears any partial rows of the others first.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from services.scoring_service import ScoringService, COHORT_BLOCK_SIZE, SCORE_WRITE_BATCH_SIZE
+from utils.database import DatabaseManager, db_config_from_env
+from utils.id_generator import get_id_generator
+from utils.reference_cache import ReferenceDataCache
+
+logger = logging.getLogger('recompute')
+
+# Students per shard (one unit of work and of checkpointing)
+DEFAULT_SHARD_SIZE = 500
+
+# Per-process service, created by the pool initializer
+_worker_service: Optional[ScoringService] = None
+
+def create_service(pool_size: int = 3) -> ScoringService:
+    """
+    Scoring service with a private connection pool: one connection streams
+    assessments, one writes scores, one (re)loads reference data
+    """
+    db_config = db_config_from_env()
+    db_manager = DatabaseManager(db_config, {'pool_size': pool_size})
+    return ScoringService(db_config, db_manager, ReferenceDataCache(db_manager))
+
+def _init_worker(log_level: str):
+    global _worker_service
+    load_dotenv()
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    
+    # Claim a free ID worker from the CLI range now, so concurrent score_ids never collide
+    # and a full range fails the process before it scores anything
+    get_id_generator()
+    
+    _worker_service = create_service()
+
+def recompute_shard(service: ScoringService, shard_index: int, student_ids: List[str], calculation_date: str,
+                    block_size: int, write_batch_size: int, clear_partial: bool) -> Dict:
+    """Score and store one shard; returns its timing"""
+    started = time.monotonic()
+    stamp = datetime.fromisoformat(calculation_date)
+    
+    cleared = service.clear_recompute(student_ids, stamp) if clear_partial else 0
+    result = service.recompute_cohort(student_ids, block_size, write_batch_size, calculation_date=stamp)
+    if 'error' in result:
+        raise RuntimeError(f"Shard {shard_index} failed: {result['error']}")
+    
+    elapsed = time.monotonic() - started
+    return {
+        'shard': shard_index,
+        'students': len(student_ids),
+        'students_scored': result['students'],
+        'scores_written': result['scores_written'],
+        'rows_cleared': cleared,
+        'elapsed_seconds': round(elapsed, 3),
+        'students_per_second': round(len(student_ids) / elapsed, 1) if elapsed > 0 else None
+    }
+
+def _run_shard_in_worker(*args) -> Dict:
+    return recompute_shard(_worker_service, *args)
+
+def shard_students(student_ids: List[str], shard_size: int) -> List[List[str]]:
+    """Consecutive shards of at most shard_size students, in selection order"""
+    return [student_ids[start:start + shard_size] for start in range(0, len(student_ids), shard_size)]
+
+def select_students(args) -> List[str]:
+    """Students chosen on the command line, as the students table groups them"""
+    service = create_service()
+    try:
+        with service.db_manager.connection() as connection:
+            status = None if args.include_inactive else 'Active'
+            return service.select_students(connection, args.program, args.year_level, status) or []
+    finally:
+        service.db_manager.close()
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as checkpoint_file:
+        return json.load(checkpoint_file)
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    """Write atomically so a crash mid-write never corrupts the checkpoint"""
+    if not path:
+        return
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, indent=2)
+    os.replace(temporary, path)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    selection = parser.add_argument_group('student selection')
+    selection.add_argument('--all', action='store_true', help='every active student')
+    selection.add_argument('--program', help='students.program')
+    selection.add_argument('--year-level', type=int, help='students.year_level')
+    selection.add_argument('--include-inactive', action='store_true', help='do not restrict to status = Active')
+    
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (1 runs in this process)')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='students per shard')
+    parser.add_argument('--block-size', type=int, default=COHORT_BLOCK_SIZE, help='assessment rows per scoring block')
+    parser.add_argument('--write-batch-size', type=int, default=SCORE_WRITE_BATCH_SIZE, help='rows per multi-row INSERT')
+    parser.add_argument('--checkpoint', help='JSON file recording finished shards')
+    parser.add_argument('--resume', action='store_true', help='continue the run recorded in --checkpoint')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    
+    args = parser.parse_args(argv)
+    if args.resume and not args.checkpoint:
+        parser.error('--resume requires --checkpoint')
+    if not args.resume and not (args.all or args.program or args.year_level is not None):
+        parser.error('choose --all, --program and/or --year-level (or --resume)')
+    if args.workers < 1 or args.shard_size < 1:
+        parser.error('--workers and --shard-size must be positive')
+    return args
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    
+    checkpoint = load_checkpoint(args.checkpoint) if args.resume else None
+    if args.resume and checkpoint is None:
+        logger.error(f"No checkpoint found at {args.checkpoint}")
+        return 1
+    
+    if checkpoint is None:
+        students = select_students(args)
+        shards = shard_students(students, args.shard_size)
+        checkpoint = {
+            'selection': {'program': args.program, 'year_level': args.year_level,
+                          'include_inactive': args.include_inactive},
+            'calculation_date': datetime.now().replace(microsecond=0).isoformat(),
+            'shards': shards,
+            'completed': {},
+            'attempted': []
+        }
+        save_checkpoint(args.checkpoint, checkpoint)
+    
+    shards = checkpoint['shards']
+    pending = [index for index in range(len(shards)) if str(index) not in checkpoint['completed']]
+    student_total = sum(len(shard) for shard in shards)
+    logger.info(
+        f"Recompute {checkpoint['calculation_date']}: {student_total} students in {len(shards)} shards, "
+        f"{len(pending)} pending, {args.workers} workers"
+    )
+    
+    started = time.monotonic()
+    failures = 0
+    
+    # Shards started by an earlier, interrupted run may have written rows; clear those first
+    previously_attempted = set(checkpoint['attempted'])
+    
+    def task_args(index):
+        clear_partial = index in previously_attempted
+        return (index, shards[index], checkpoint['calculation_date'],
+                args.block_size, args.write_batch_size, clear_partial)
+        
+    def record(shard_stats):
+        checkpoint['completed'][str(shard_stats['shard'])] = shard_stats
+        save_checkpoint(args.checkpoint, checkpoint)
+        logger.info(
+            f"Shard {shard_stats['shard']}: {shard_stats['students']} students in "
+            f"{shard_stats['elapsed_seconds']:.2f}s ({shard_stats['students_per_second']} students/s), "
+            f"{len(checkpoint['completed'])}/{len(shards)} shards done"
+        )
+    
+    checkpoint['attempted'] = sorted(previously_attempted | set(pending))
+    save_checkpoint(args.checkpoint, checkpoint)
+    
+    if args.workers == 1:
+        service = create_service()
+        try:
+            for index in pending:
+                try:
+                    record(recompute_shard(service, *task_args(index)))
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Shard {index} failed: {e}")
+        finally:
+            service.db_manager.close()
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(args.log_level,)) as pool:
+            futures = {pool.submit(_run_shard_in_worker, *task_args(index)): index for index in pending}
+            for future in as_completed(futures):
+                try:
+                    record(future.result())
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"Shard {futures[future]} failed: {e}")
+    
+    elapsed = time.monotonic() - started
+    processed = sum(len(shards[index]) for index in pending if str(index) in checkpoint['completed'])
+    summary = {
+        'calculation_date': checkpoint['calculation_date'],
+        'students': student_total,
+        'students_this_run': processed,
+        'shards': len(shards),
+        'shards_completed': len(checkpoint['completed']),
+        'shards_failed': failures,
+        'scores_written': sum(stats['scores_written'] for stats in checkpoint['completed'].values()),
+        'elapsed_seconds': round(elapsed, 3),
+        'students_per_second': round(processed / elapsed, 1) if elapsed > 0 else None,
+        'shard_seconds': {
+            'min': min((s['elapsed_seconds'] for s in checkpoint['completed'].values()), default=None),
+            'max': max((s['elapsed_seconds'] for s in checkpoint['completed'].values()), default=None)
+        }
+    }
+    print(json.dumps(summary, indent=2))
+    
+    if failures:
+        logger.error(f"{failures} shards failed; rerun with --resume --checkpoint {args.checkpoint or '<file>'}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
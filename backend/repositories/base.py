@@ -0,0 +1,137 @@
+"""
+EPA Scoring Engine - Scoring Repository Interface
+File: backend/repositories/base.py
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Assessment columns the scoring paths read; reference data is resolved in memory
+ASSESSMENT_SCORE_COLUMNS = ('assessment_id', 'student_id', 'indicator_id', 'base_score',
+                            'context_id', 'tech_level_id', 'assessment_date')
+
+# Columns an inserted assessment supplies; the database fills in the dates
+ASSESSMENT_INSERT_COLUMNS = ('assessment_id', 'student_id', 'indicator_id', 'assessor_id', 'base_score',
+                             'context_id', 'tech_level_id', 'evidence_type', 'notes')
+
+# Tables counted by table_sizes()
+DATASET_TABLES = ('students', 'student_assessments', 'performance_indicators', 'calculated_scores')
+
+def chunked(values: List, size: int):
+    """Split a list into consecutive chunks of at most size items"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+class ScoringRepository(ABC):
+    """
+    Read queries issued by EPAScoringEngine, the scoring read paths of
+    ScoringService and ReferenceDataCache, and the student, list and
+    assessment queries of the API routes.
+
+    Implementations: MySQLScoringRepository (the production database),
+    SQLiteScoringRepository (an embedded copy of schema.sql/data.sql) and
+    InMemoryScoringRepository (indexed dicts, no SQL at all). Rows are plain
+    dicts; every row returned is a fresh dict the caller may modify.
+    """
+    
+    @abstractmethod
+    def connection(self, timeout: Optional[float] = None):
+        """
+        Context manager yielding a connection handle to pass back into the
+        methods below, so several reads share one connection or transaction
+        """
+    
+    @abstractmethod
+    def reference_rows(self, name: str) -> List[Dict]:
+        """Rows of a ReferenceDataCache dataset, ordered as REFERENCE_QUERIES orders them"""
+    
+    @abstractmethod
+    def assessment(self, assessment_id: str) -> Optional[Dict]:
+        """Every column of one student_assessments row"""
+    
+    @abstractmethod
+    def iter_assessments(self, assessment_ids: Optional[List[str]] = None,
+                         student_ids: Optional[List[str]] = None,
+                         start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                         chunk_size: int = 1000, order_by_student: bool = False) -> Iterator[List[Dict]]:
+        """
+        Yield lists of at most chunk_size assessments (ASSESSMENT_SCORE_COLUMNS)
+        matching every given filter; all assessments when none is given.
+        order_by_student keeps each student's rows contiguous across chunks.
+        """
+    
+    @abstractmethod
+    def student_assessments(self, student_id: str, indicator_ids: Sequence[str], connection=None,
+                            newest_first: bool = False) -> List[Dict]:
+        """One student's assessments (ASSESSMENT_SCORE_COLUMNS) for the given indicators"""
+    
+    @abstractmethod
+    def latest_student_assessments(self, student_id: str, indicator_ids: Sequence[str], per_indicator: int,
+                                   connection=None) -> List[Dict]:
+        """
+        The per_indicator most recent assessments of each indicator for one
+        student (ASSESSMENT_SCORE_COLUMNS), newest first
+        """
+    
+    @abstractmethod
+    def core_epa_averages(self, student_ids: Optional[List[str]], epa_ids: Sequence[str],
+                          chunk_size: int = 1000, connection=None) -> List[Tuple[str, str, float, int]]:
+        """
+        (student_id, epa_id, average Core EPA final_score, score count) for
+        every student and EPA with stored scores; every student when
+        student_ids is None
+        """
+    
+    @abstractmethod
+    def iter_core_epa_scores(self, student_ids: Optional[List[str]] = None,
+                             chunk_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Yield lists of at most chunk_size stored Core EPA scores (student_id,
+        epa_id, final_score, calculation_date) of the given students, or of
+        every student
+        """
+    
+    @abstractmethod
+    def assessed_student_ids(self) -> List[str]:
+        """IDs of every student with at least one assessment, in order"""
+    
+    @abstractmethod
+    def table_sizes(self) -> Dict[str, int]:
+        """Row count of each of DATASET_TABLES"""
+    
+    @abstractmethod
+    def list_page(self, resource: str, query: Dict) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of a LIST_RESOURCES resource for a parse_list_query() query,
+        and the cursor of the next page (None at the end)
+        """
+    
+    @abstractmethod
+    def student(self, student_id: str) -> Optional[Dict]:
+        """Every column of one students row"""
+    
+    @abstractmethod
+    def student_core_epa_scores(self, student_id: str) -> List[Dict]:
+        """
+        A student's stored Core EPA scores (epa_id, epa_name, final_score,
+        calculation_date), newest calculation first
+        """
+    
+    @abstractmethod
+    def recent_assessments(self, student_id: str, limit: int = 10) -> List[Dict]:
+        """
+        A student's newest assessments (assessment_date, base_score,
+        evidence_type, indicator_name, epa_name)
+        """
+    
+    @abstractmethod
+    def student_state(self, student_id: str) -> Tuple[int, Optional[str]]:
+        """(assessment count, newest created_date as ISO text) of a student"""
+    
+    @abstractmethod
+    def insert_assessment(self, connection, assessment: Dict):
+        """
+        Insert one assessment (a dict of ASSESSMENT_INSERT_COLUMNS) on the
+        caller's connection; the caller commits
+        """
@@ -0,0 +1,332 @@
+"""
+EPA Scoring Engine - In-Memory Scoring Repository
+File: backend/repositories/memory_repository.py
+"""
+
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import heapq
+import threading
+import logging
+
+from repositories.base import ASSESSMENT_SCORE_COLUMNS, ScoringRepository, chunked
+from utils.pagination import LIST_RESOURCES, MAX_PAGE_SIZE, decode_cursor, paginate_rows
+from utils.reference_cache import REFERENCE_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# List resources held as records (the others are served from reference data), by primary key
+RECORD_KEYS = {'students': 'student_id', 'faculty': 'faculty_id'}
+
+def _as_datetime(value) -> Optional[datetime]:
+    """assessment_date as a datetime, whether the source returned one or text"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+def _recency(row: Dict):
+    """Sort key matching ORDER BY assessment_date DESC, assessment_id DESC"""
+    return row['assessment_date'], row['assessment_id']
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+class InMemoryScoringRepository(ScoringRepository):
+    """
+    Scoring reads served from Python dicts, so the engine and the scoring
+    service's read paths run entirely in process (simulations, load tests).
+
+    Assessments are indexed by assessment ID and by student -> indicator;
+    Core EPA scores are kept per student and as running (sum, count) per
+    (student, EPA); students and faculty by ID. Load a snapshot from another
+    repository with from_repository(), then add rows with add_assessments(),
+    add_calculated_scores() and add_records().
+    """
+    
+    def __init__(self, reference_data: Optional[Dict[str, List[Dict]]] = None):
+        self._reference = {name: list((reference_data or {}).get(name, [])) for name in REFERENCE_QUERIES}
+        self._records = {resource: {} for resource in RECORD_KEYS}
+        self._assessments = {}
+        self._by_student = {}
+        self._core_epa_scores = {}
+        self._core_epa_totals = {}
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def from_repository(cls, source: ScoringRepository, student_ids: Optional[List[str]] = None,
+                        chunk_size: int = 10000) -> 'InMemoryScoringRepository':
+        """
+        Copy reference data, students, faculty, assessments and Core EPA scores
+        (of the given students, or everyone) out of another repository
+        """
+        repository = cls({name: source.reference_rows(name) for name in REFERENCE_QUERIES})
+        
+        for resource in RECORD_KEYS:
+            spec = LIST_RESOURCES[resource]
+            query = {'limit': MAX_PAGE_SIZE, 'fields': list(spec['columns']), 'filters': {}, 'after': None}
+            while True:
+                rows, cursor = source.list_page(resource, query)
+                repository.add_records(resource, rows)
+                if cursor is None:
+                    break
+                query['after'] = decode_cursor(cursor, len(spec['sort']))
+        if student_ids is not None:
+            wanted = set(student_ids)
+            repository._records['students'] = {
+                student_id: row for student_id, row in repository._records['students'].items() if student_id in wanted
+            }
+        
+        for rows in source.iter_core_epa_scores(student_ids, chunk_size):
+            repository.add_calculated_scores({**row, 'score_level': 'Core_EPA'} for row in rows)
+        
+        count = 0
+        for rows in source.iter_assessments(student_ids=student_ids, chunk_size=chunk_size):
+            count += repository.add_assessments(rows)
+        
+        logger.info(f"Loaded {count} assessments for {len(repository._by_student)} students into memory")
+        return repository
+    
+    @classmethod
+    def from_sql_files(cls, **kwargs) -> 'InMemoryScoringRepository':
+        """Data equivalent to schema.sql/data.sql (see SQLiteScoringRepository.from_sql_files)"""
+        from repositories.sqlite_repository import SQLiteScoringRepository
+        
+        source = SQLiteScoringRepository.from_sql_files(**kwargs)
+        try:
+            return cls.from_repository(source)
+        finally:
+            source.close()
+            
+    def add_assessments(self, rows: Iterable[Dict]) -> int:
+        """Index student_assessments rows (dicts with at least ASSESSMENT_SCORE_COLUMNS)"""
+        count = 0
+        with self._lock:
+            for row in rows:
+                row = dict(row)
+                row['assessment_date'] = _as_datetime(row.get('assessment_date')) or datetime.now()
+                previous = self._assessments.get(row['assessment_id'])
+                if previous is not None:
+                    self._unindex(previous)
+                
+                self._assessments[row['assessment_id']] = row
+                self._by_student.setdefault(row['student_id'], {}).setdefault(row['indicator_id'], []).append(row)
+                count += 1
+        return count
+        
+    def _unindex(self, row: Dict):
+        indicators = self._by_student[row['student_id']]
+        indicators[row['indicator_id']].remove(row)
+        if not indicators[row['indicator_id']]:
+            del indicators[row['indicator_id']]
+        if not indicators:
+            del self._by_student[row['student_id']]
+            
+    def add_calculated_scores(self, rows: Iterable[Dict]) -> int:
+        """Keep calculated_scores rows of the Core EPA level (other levels are ignored)"""
+        count = 0
+        with self._lock:
+            for row in rows:
+                if row.get('score_level') != 'Core_EPA' or row.get('final_score') is None:
+                    continue
+                self._core_epa_scores.setdefault(row['student_id'], []).append({
+                    'epa_id': row['epa_id'],
+                    'final_score': float(row['final_score']),
+                    'calculation_date': _as_datetime(row.get('calculation_date')) or datetime.now()
+                })
+                totals = self._core_epa_totals.setdefault((row['student_id'], row['epa_id']), [0.0, 0])
+                totals[0] += float(row['final_score'])
+                totals[1] += 1
+                count += 1
+        return count
+        
+    def add_records(self, resource: str, rows: Iterable[Dict]) -> int:
+        """Add or replace students or faculty rows (resource is a RECORD_KEYS key)"""
+        key = RECORD_KEYS[resource]
+        count = 0
+        with self._lock:
+            for row in rows:
+                self._records[resource][row[key]] = dict(row)
+                count += 1
+        return count
+        
+    def connection(self, timeout: Optional[float] = None):
+        # Nothing to check out; methods accept and ignore the handle
+        return nullcontext()
+        
+    def reference_rows(self, name: str) -> List[Dict]:
+        return [dict(row) for row in self._reference[name]]
+        
+    def assessment(self, assessment_id: str) -> Optional[Dict]:
+        row = self._assessments.get(assessment_id)
+        return dict(row) if row is not None else None
+    
+    @staticmethod
+    def _score_row(row: Dict) -> Dict:
+        return {column: row.get(column) for column in ASSESSMENT_SCORE_COLUMNS}
+        
+    def iter_assessments(self, assessment_ids: Optional[List[str]] = None,
+                         student_ids: Optional[List[str]] = None,
+                         start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                         chunk_size: int = 1000, order_by_student: bool = False) -> Iterator[List[Dict]]:
+        """Rows are always grouped by student, in student ID order unless IDs were given"""
+        with self._lock:
+            if assessment_ids is not None:
+                wanted = set(student_ids) if student_ids is not None else None
+                rows = [self._assessments[assessment_id] for assessment_id in dict.fromkeys(assessment_ids)
+                        if assessment_id in self._assessments]
+                rows = [row for row in rows if wanted is None or row['student_id'] in wanted]
+                if order_by_student:
+                    rows.sort(key=lambda row: row['student_id'])
+            else:
+                students = dict.fromkeys(student_ids) if student_ids is not None else sorted(self._by_student)
+                rows = [
+                    row
+                    for student_id in students
+                    for indicator_rows in self._by_student.get(student_id, {}).values()
+                    for row in indicator_rows
+                ]
+        
+        if start_date is not None or end_date is not None:
+            rows = [
+                row for row in rows
+                if (start_date is None or row['assessment_date'] >= start_date)
+                and (end_date is None or row['assessment_date'] <= end_date)
+            ]
+        
+        for chunk in chunked(rows, chunk_size):
+            yield [self._score_row(row) for row in chunk]
+            
+    def student_assessments(self, student_id: str, indicator_ids: Sequence[str], connection=None,
+                            newest_first: bool = False) -> List[Dict]:
+        with self._lock:
+            indicators = self._by_student.get(student_id, {})
+            rows = [row for indicator_id in dict.fromkeys(indicator_ids) for row in indicators.get(indicator_id, ())]
+        
+        if newest_first:
+            rows.sort(key=lambda row: row['assessment_date'], reverse=True)
+        return [self._score_row(row) for row in rows]
+        
+    def latest_student_assessments(self, student_id: str, indicator_ids: Sequence[str], per_indicator: int,
+                                   connection=None) -> List[Dict]:
+        with self._lock:
+            indicators = self._by_student.get(student_id, {})
+            rows = [
+                row
+                for indicator_id in dict.fromkeys(indicator_ids)
+                for row in heapq.nlargest(per_indicator, indicators.get(indicator_id, ()), key=_recency)
+            ]
+        
+        rows.sort(key=_recency, reverse=True)
+        return [self._score_row(row) for row in rows]
+        
+    def core_epa_averages(self, student_ids: Optional[List[str]], epa_ids: Sequence[str],
+                          chunk_size: int = 1000, connection=None) -> List[Tuple[str, str, float, int]]:
+        with self._lock:
+            if student_ids is None:
+                wanted = set(epa_ids)
+                keys = [key for key in self._core_epa_totals if key[1] in wanted]
+            else:
+                keys = [(student_id, epa_id) for student_id in dict.fromkeys(student_ids) for epa_id in epa_ids
+                        if (student_id, epa_id) in self._core_epa_totals]
+            totals = [(key, self._core_epa_totals[key]) for key in keys]
+        
+        return [(student_id, epa_id, total / count, count) for (student_id, epa_id), (total, count) in totals]
+        
+    def iter_core_epa_scores(self, student_ids: Optional[List[str]] = None,
+                             chunk_size: int = 1000) -> Iterator[List[Dict]]:
+        with self._lock:
+            students = dict.fromkeys(student_ids) if student_ids is not None else sorted(self._core_epa_scores)
+            rows = [
+                {'student_id': student_id, **row}
+                for student_id in students
+                for row in self._core_epa_scores.get(student_id, ())
+            ]
+        yield from chunked(rows, chunk_size)
+        
+    def assessed_student_ids(self) -> List[str]:
+        with self._lock:
+            return sorted(self._by_student)
+            
+    def table_sizes(self) -> Dict[str, int]:
+        """calculated_scores counts the Core EPA rows held, the only level kept"""
+        with self._lock:
+            return {
+                'students': len(self._records['students']),
+                'student_assessments': len(self._assessments),
+                'performance_indicators': len(self._reference['indicators']),
+                'calculated_scores': sum(len(rows) for rows in self._core_epa_scores.values())
+            }
+            
+    def list_page(self, resource: str, query: Dict) -> Tuple[List[Dict], Optional[str]]:
+        with self._lock:
+            if resource in RECORD_KEYS:
+                rows = list(self._records[resource].values())
+            else:
+                rows = self._reference[resource]
+            return paginate_rows(resource, query, rows)
+            
+    def student(self, student_id: str) -> Optional[Dict]:
+        row = self._records['students'].get(student_id)
+        return dict(row) if row is not None else None
+        
+    def student_core_epa_scores(self, student_id: str) -> List[Dict]:
+        names = {row['epa_id']: row['epa_name'] for row in self._reference['core_epas']}
+        with self._lock:
+            rows = [dict(row, epa_name=names[row['epa_id']])
+                    for row in self._core_epa_scores.get(student_id, ()) if row['epa_id'] in names]
+        
+        rows.sort(key=lambda row: row['epa_id'])
+        rows.sort(key=lambda row: row['calculation_date'], reverse=True)
+        return [{column: row[column] for column in ('epa_id', 'epa_name', 'final_score', 'calculation_date')}
+                for row in rows]
+        
+    def recent_assessments(self, student_id: str, limit: int = 10) -> List[Dict]:
+        """Only assessments whose indicator resolves to a Core EPA, as with the SQL joins"""
+        indicators = {row['indicator_id']: row for row in self._reference['indicators']}
+        activities = {row['activity_id']: row['smaller_epa_id'] for row in self._reference['activities']}
+        smaller_epas = {row['smaller_epa_id']: row['core_epa_id'] for row in self._reference['smaller_epas']}
+        epa_names = {row['epa_id']: row['epa_name'] for row in self._reference['core_epas']}
+        
+        def epa_name(indicator):
+            smaller_epa_id = activities.get(indicator['activity_id'])
+            return epa_names.get(smaller_epas.get(smaller_epa_id))
+        
+        with self._lock:
+            rows = [row for indicator_rows in self._by_student.get(student_id, {}).values() for row in indicator_rows]
+        
+        recent = []
+        for row in sorted(rows, key=_recency, reverse=True):
+            indicator = indicators.get(row['indicator_id'])
+            if indicator is None or epa_name(indicator) is None:
+                continue
+            recent.append({
+                'assessment_date': row['assessment_date'],
+                'base_score': row['base_score'],
+                'evidence_type': row.get('evidence_type'),
+                'indicator_name': indicator['indicator_name'],
+                'epa_name': epa_name(indicator)
+            })
+            if len(recent) == limit:
+                break
+        return recent
+        
+    def student_state(self, student_id: str) -> Tuple[int, Optional[str]]:
+        """Rows loaded without created_date count as created on their assessment_date"""
+        with self._lock:
+            created = [row.get('created_date') or row['assessment_date']
+                       for indicator_rows in self._by_student.get(student_id, {}).values() for row in indicator_rows]
+        return len(created), _iso(max(map(_as_datetime, created))) if created else None
+        
+    def insert_assessment(self, connection, assessment: Dict):
+        now = datetime.now()
+        self.add_assessments([{**assessment, 'assessment_date': now, 'created_date': now}])
+        
+    def stats(self) -> Dict:
+        """Sizes of the in-memory indexes"""
+        with self._lock:
+            return {
+                'students': len(self._by_student),
+                'assessments': len(self._assessments),
+                'core_epa_scores': len(self._core_epa_totals)
+            }
@@ -0,0 +1,295 @@
+"""
+EPA Scoring Engine - SQL Scoring Repositories
+File: backend/repositories/sql_repository.py
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import logging
+
+from repositories.base import (
+    ASSESSMENT_INSERT_COLUMNS, ASSESSMENT_SCORE_COLUMNS, DATASET_TABLES, ScoringRepository, chunked
+)
+from utils.database import DatabaseManager
+from utils.pagination import build_list_query, finish_page
+from utils.reference_cache import REFERENCE_QUERIES
+
+logger = logging.getLogger(__name__)
+
+SCORE_COLUMNS_SQL = ', '.join(f"sa.{column}" for column in ASSESSMENT_SCORE_COLUMNS)
+
+INSERT_ASSESSMENT_QUERY = f"""
+INSERT INTO student_assessments
+({', '.join(ASSESSMENT_INSERT_COLUMNS)})
+VALUES ({', '.join(['%s'] * len(ASSESSMENT_INSERT_COLUMNS))})
+"""
+
+class SQLScoringRepository(ScoringRepository):
+    """
+    The scoring read queries in portable SQL, written with %s placeholders.
+    Subclasses provide connections and adapt the placeholders and cursors
+    to their driver.
+    """
+    
+    def _cursor(self, connection, dictionary: bool = True):
+        """Cursor returning dict rows (or tuples with dictionary=False)"""
+        return connection.cursor(dictionary=dictionary)
+        
+    def _execute(self, cursor, query: str, params: Sequence = ()):
+        cursor.execute(query, tuple(params))
+    
+    @contextmanager
+    def _borrow(self, connection):
+        """The caller's connection, or one checked out for the duration of the block"""
+        if connection is not None:
+            yield connection
+        else:
+            with self.connection() as connection:
+                yield connection
+                
+    def _fetchall(self, query: str, params: Sequence = (), connection=None, dictionary: bool = True) -> List:
+        with self._borrow(connection) as connection:
+            cursor = self._cursor(connection, dictionary)
+            try:
+                self._execute(cursor, query, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+                
+    def reference_rows(self, name: str) -> List[Dict]:
+        return self._fetchall(REFERENCE_QUERIES[name])
+        
+    def assessment(self, assessment_id: str) -> Optional[Dict]:
+        rows = self._fetchall("""
+            SELECT sa.*
+            FROM student_assessments sa
+            WHERE sa.assessment_id = %s
+        """, (assessment_id,))
+        return rows[0] if rows else None
+        
+    def iter_assessments(self, assessment_ids: Optional[List[str]] = None,
+                         student_ids: Optional[List[str]] = None,
+                         start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                         chunk_size: int = 1000, order_by_student: bool = False) -> Iterator[List[Dict]]:
+        """
+        ID lists are split into IN (...) chunks; other filters stream via
+        fetchmany, on one connection held until the generator is exhausted
+        """
+        query = f"""
+        SELECT {SCORE_COLUMNS_SQL}
+        FROM student_assessments sa
+        WHERE {{conditions}}
+        {{order_by}}
+        """
+        
+        conditions = []
+        params = []
+        if start_date is not None:
+            conditions.append("sa.assessment_date >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("sa.assessment_date <= %s")
+            params.append(end_date)
+        
+        # Chunk whichever ID list was given; the remaining filters apply to every chunk
+        if assessment_ids is not None:
+            id_column, id_values = 'sa.assessment_id', list(assessment_ids)
+            if student_ids is not None:
+                conditions.append(f"sa.student_id IN ({', '.join(['%s'] * len(student_ids))})")
+                params.extend(student_ids)
+        elif student_ids is not None:
+            id_column, id_values = 'sa.student_id', list(student_ids)
+        else:
+            id_column, id_values = None, None
+        
+        order_by = "ORDER BY sa.student_id" if order_by_student else ""
+        
+        if id_column is None:
+            batches = [(conditions or ["1 = 1"], params)]
+        else:
+            batches = [
+                (conditions + [f"{id_column} IN ({', '.join(['%s'] * len(chunk))})"], params + chunk)
+                for chunk in chunked(id_values, chunk_size)
+            ]
+        
+        with self.connection() as connection:
+            cursor = self._cursor(connection)
+            try:
+                for batch_conditions, batch_params in batches:
+                    self._execute(cursor, query.format(conditions=' AND '.join(batch_conditions), order_by=order_by),
+                                  batch_params)
+                    
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+            finally:
+                cursor.close()
+                
+    def student_assessments(self, student_id: str, indicator_ids: Sequence[str], connection=None,
+                            newest_first: bool = False) -> List[Dict]:
+        if not indicator_ids:
+            return []
+        
+        return self._fetchall(f"""
+            SELECT {SCORE_COLUMNS_SQL}
+            FROM student_assessments sa
+            WHERE sa.student_id = %s AND sa.indicator_id IN ({', '.join(['%s'] * len(indicator_ids))})
+            {"ORDER BY sa.assessment_date DESC" if newest_first else ""}
+        """, (student_id, *indicator_ids), connection)
+        
+    def latest_student_assessments(self, student_id: str, indicator_ids: Sequence[str], per_indicator: int,
+                                   connection=None) -> List[Dict]:
+        """
+        Ranks the student's assessments per indicator with ROW_NUMBER() over
+        idx_assessment_scoring, which covers the ranking subquery (InnoDB
+        appends the assessment_id key), so only the rows that survive the
+        rank filter are read from the table
+        """
+        if not indicator_ids:
+            return []
+        
+        return self._fetchall(f"""
+            SELECT {SCORE_COLUMNS_SQL}
+            FROM (
+                SELECT assessment_id,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY indicator_id
+                           ORDER BY assessment_date DESC, assessment_id DESC
+                       ) AS evidence_rank
+                FROM student_assessments
+                WHERE student_id = %s AND indicator_id IN ({', '.join(['%s'] * len(indicator_ids))})
+            ) ranked
+            JOIN student_assessments sa ON sa.assessment_id = ranked.assessment_id
+            WHERE ranked.evidence_rank <= %s
+            ORDER BY sa.assessment_date DESC, sa.assessment_id DESC
+        """, (student_id, *indicator_ids, per_indicator), connection)
+        
+    def core_epa_averages(self, student_ids: Optional[List[str]], epa_ids: Sequence[str],
+                          chunk_size: int = 1000, connection=None) -> List[Tuple[str, str, float, int]]:
+        """One grouped aggregate per chunk of students over calculated_scores"""
+        query = f"""
+            SELECT student_id, epa_id, AVG(final_score) as avg_score, COUNT(final_score) as score_count
+            FROM calculated_scores
+            WHERE score_level = 'Core_EPA'
+              AND epa_id IN ({', '.join(['%s'] * len(epa_ids))})
+              {{student_filter}}
+            GROUP BY student_id, epa_id
+        """
+        
+        if student_ids is None:
+            batches = [("", ())]
+        else:
+            batches = [
+                (f"AND student_id IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+                for chunk in chunked(list(dict.fromkeys(student_ids)), chunk_size)
+            ]
+        
+        aggregates = []
+        with self._borrow(connection) as connection:
+            cursor = self._cursor(connection, dictionary=False)
+            try:
+                for student_filter, params in batches:
+                    self._execute(cursor, query.format(student_filter=student_filter), (*epa_ids, *params))
+                    aggregates.extend(cursor.fetchall())
+            finally:
+                cursor.close()
+        
+        return [(student_id, epa_id, float(avg_score), int(score_count))
+                for student_id, epa_id, avg_score, score_count in aggregates if avg_score is not None]
+        
+    def iter_core_epa_scores(self, student_ids: Optional[List[str]] = None,
+                             chunk_size: int = 1000) -> Iterator[List[Dict]]:
+        query = """
+            SELECT student_id, epa_id, final_score, calculation_date
+            FROM calculated_scores
+            WHERE score_level = 'Core_EPA' {student_filter}
+        """
+        if student_ids is None:
+            batches = [("", ())]
+        else:
+            batches = [
+                (f"AND student_id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+                for chunk in chunked(list(dict.fromkeys(student_ids)), chunk_size)
+            ]
+        
+        with self.connection() as connection:
+            cursor = self._cursor(connection)
+            try:
+                for student_filter, params in batches:
+                    self._execute(cursor, query.format(student_filter=student_filter), params)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+            finally:
+                cursor.close()
+                
+    def assessed_student_ids(self) -> List[str]:
+        rows = self._fetchall("SELECT DISTINCT student_id FROM student_assessments ORDER BY student_id",
+                              dictionary=False)
+        return [row[0] for row in rows]
+        
+    def table_sizes(self) -> Dict[str, int]:
+        with self.connection() as connection:
+            return {table: int(self._fetchall(f"SELECT COUNT(*) FROM {table}", (), connection, False)[0][0])
+                    for table in DATASET_TABLES}
+            
+    def list_page(self, resource: str, query: Dict) -> Tuple[List[Dict], Optional[str]]:
+        """A keyset query that reads limit + 1 rows (see utils/pagination.py)"""
+        sql, params = build_list_query(resource, query)
+        return finish_page(resource, query, self._fetchall(sql, params))
+        
+    def student(self, student_id: str) -> Optional[Dict]:
+        rows = self._fetchall("SELECT * FROM students WHERE student_id = %s", (student_id,))
+        return rows[0] if rows else None
+        
+    def student_core_epa_scores(self, student_id: str) -> List[Dict]:
+        return self._fetchall("""
+            SELECT cs.epa_id, ce.epa_name, cs.final_score, cs.calculation_date
+            FROM calculated_scores cs
+            JOIN core_epas ce ON cs.epa_id = ce.epa_id
+            WHERE cs.student_id = %s AND cs.score_level = 'Core_EPA'
+            ORDER BY cs.calculation_date DESC, cs.epa_id
+        """, (student_id,))
+        
+    def recent_assessments(self, student_id: str, limit: int = 10) -> List[Dict]:
+        return self._fetchall("""
+            SELECT sa.assessment_date, sa.base_score, sa.evidence_type,
+                   pi.indicator_name, ce.epa_name
+            FROM student_assessments sa
+            JOIN performance_indicators pi ON sa.indicator_id = pi.indicator_id
+            JOIN activities a ON pi.activity_id = a.activity_id
+            JOIN smaller_epas se ON a.smaller_epa_id = se.smaller_epa_id
+            JOIN core_epas ce ON se.core_epa_id = ce.epa_id
+            WHERE sa.student_id = %s
+            ORDER BY sa.assessment_date DESC, sa.assessment_id DESC
+            LIMIT %s
+        """, (student_id, limit))
+        
+    def student_state(self, student_id: str) -> Tuple[int, Optional[str]]:
+        """Read from the database, so that writes by every process change it"""
+        (count, newest), = self._fetchall("""
+            SELECT COUNT(*), MAX(created_date) FROM student_assessments WHERE student_id = %s
+        """, (student_id,), dictionary=False)
+        return int(count), newest.isoformat() if hasattr(newest, 'isoformat') else newest
+        
+    def insert_assessment(self, connection, assessment: Dict):
+        cursor = self._cursor(connection, dictionary=False)
+        try:
+            self._execute(cursor, INSERT_ASSESSMENT_QUERY,
+                          [assessment.get(column) for column in ASSESSMENT_INSERT_COLUMNS])
+        finally:
+            cursor.close()
+
+class MySQLScoringRepository(SQLScoringRepository):
+    """Scoring reads against the application's MySQL pool"""
+    
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        
+    def connection(self, timeout: Optional[float] = None):
+        return self.db_manager.connection(timeout)
@@ -0,0 +1,133 @@
+"""
+EPA Scoring Engine - Embedded SQLite Scoring Repository
+File: backend/repositories/sqlite_repository.py
+"""
+
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Sequence
+import os
+import re
+import sqlite3
+import threading
+import logging
+
+from repositories.sql_repository import SQLScoringRepository
+
+logger = logging.getLogger(__name__)
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
+SCHEMA_PATH = os.path.join(DATABASE_DIR, 'schema.sql')
+DATA_PATH = os.path.join(DATABASE_DIR, 'data.sql')
+
+# MySQL-only DDL rewritten (or dropped) so schema.sql and data.sql run on SQLite
+MYSQL_TO_SQLITE = (
+    (re.compile(r'^\s*(CREATE DATABASE|USE)\b[^;]*;', re.IGNORECASE | re.MULTILINE), ''),
+    # Inline secondary indexes; SQLite only knows CREATE INDEX statements
+    (re.compile(r',\s*\n\s*(UNIQUE\s+)?(INDEX|KEY)\s+\w+\s*\([^)]*\)', re.IGNORECASE), ''),
+    (re.compile(r'\bENUM\s*\([^)]*\)', re.IGNORECASE), 'TEXT'),
+    (re.compile(r'\bON UPDATE CURRENT_TIMESTAMP\b', re.IGNORECASE), '')
+)
+
+def mysql_to_sqlite(sql: str) -> str:
+    """Rewrite the MySQL dialect used by schema.sql/data.sql for SQLite"""
+    for pattern, replacement in MYSQL_TO_SQLITE:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+def _sql_param(value):
+    """Bind parameters as SQLite stores them (dates as MySQL-formatted text)"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _dict_row(cursor, row):
+    return {description[0]: value for description, value in zip(cursor.description, row)}
+
+class _PopulationStddev:
+    """MySQL's STDDEV() (population standard deviation), used by the schema views"""
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = float(value) - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (float(value) - self.mean)
+        
+    def finalize(self):
+        return (self.m2 / self.count) ** 0.5 if self.count else None
+
+class SQLiteScoringRepository(SQLScoringRepository):
+    """
+    Scoring reads against an embedded SQLite database, by default a private
+    in-memory one. Loaded from schema.sql/data.sql (or any script in the same
+    dialect), it needs no database server, which suits local benchmarks and
+    isolated test runs. One connection is shared and serialised by a lock;
+    timestamps come back as text.
+    """
+    
+    def __init__(self, database: str = ':memory:'):
+        self.database = database
+        self._connection = sqlite3.connect(database, check_same_thread=False)
+        self._connection.create_aggregate('STDDEV', 1, _PopulationStddev)
+        self._lock = threading.RLock()
+    
+    @classmethod
+    def from_sql_files(cls, schema_path: str = SCHEMA_PATH, data_path: Optional[str] = DATA_PATH,
+                       database: str = ':memory:') -> 'SQLiteScoringRepository':
+        """A database created from schema.sql and populated from data.sql"""
+        repository = cls(database)
+        for path in (schema_path, data_path):
+            if path:
+                repository.load_script(path)
+        return repository
+        
+    def load_script(self, path: str):
+        """Run a MySQL-dialect SQL script (see mysql_to_sqlite)"""
+        with open(path, encoding='utf-8') as handle:
+            script = mysql_to_sqlite(handle.read())
+        
+        with self._lock:
+            self._connection.executescript(script)
+            self._connection.commit()
+        logger.info(f"Loaded {os.path.basename(path)} into SQLite database {self.database}")
+        
+    def executemany(self, query: str, rows: Sequence[Sequence]) -> int:
+        """Bulk insert with %s placeholders (e.g. synthetic assessments for a simulation)"""
+        with self._lock:
+            cursor = self._connection.cursor()
+            try:
+                cursor.executemany(query.replace('%s', '?'), [tuple(map(_sql_param, row)) for row in rows])
+                self._connection.commit()
+                return cursor.rowcount
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        with self._lock:
+            yield self._connection
+            
+    def _cursor(self, connection, dictionary: bool = True):
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return cursor
+        
+    def _execute(self, cursor, query: str, params: Sequence = ()):
+        cursor.execute(query.replace('%s', '?'), tuple(map(_sql_param, params)))
+        
+    def close(self):
+        with self._lock:
+            self._connection.close()
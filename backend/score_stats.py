@@ -0,0 +1,67 @@
+"""
+EPA Scoring Engine - Running EPA Statistics Command
+File: backend/score_stats.py
+
+Maintains the epa_score_stats and student_epa_score_stats tables, which are
+otherwise updated as scores are written (see models/score_statistics.py):
+
+    python score_stats.py rebuild     # recompute both tables from calculated_scores
+    python score_stats.py check       # compare them with the SQL views; exit 1 on drift
+    python score_stats.py check --rebuild-on-drift
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from models.score_statistics import ScoreStatistics
+from utils.database import DatabaseManager, db_config_from_env
+
+logger = logging.getLogger('score_stats')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('rebuild', 'check'))
+    parser.add_argument('--tolerance', type=float, default=1e-6, help='largest accepted difference from the views')
+    parser.add_argument('--rebuild-on-drift', action='store_true', help='check: rebuild when the tables drifted')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    db_manager = DatabaseManager(db_config_from_env(), {'pool_size': 1})
+    statistics = ScoreStatistics()
+    started = time.monotonic()
+    try:
+        with db_manager.connection() as connection:
+            if args.command == 'check':
+                result = statistics.reconcile(connection, args.tolerance)
+                rebuild = args.rebuild_on_drift and not result['consistent']
+            else:
+                result = {}
+                rebuild = True
+            
+            if rebuild:
+                result['rebuilt'] = statistics.rebuild(connection)
+                connection.commit()
+    finally:
+        db_manager.close()
+    
+    result['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    print(json.dumps(result, indent=2, default=str))
+    if args.command == 'check' and not result['consistent']:
+        logger.warning(f"Running statistics differ from the views: {len(result['epa_mismatches'])} EPAs, "
+                       f"{result['student_epa_mismatch_count']} student EPAs")
+        return 0 if 'rebuilt' in result else 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
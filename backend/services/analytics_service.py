@@ -0,0 +1,232 @@
+"""
+EPA Scoring Service - Snapshot Analytics
+File: backend/services/analytics_service.py
+"""
+
+from typing import Dict, List, Optional
+import logging
+import time
+import numpy as np
+
+from utils.columnar_snapshot import NULL_CODE, SnapshotStore, ColumnarSnapshot
+from utils.database import DatabaseManager
+from utils.reference_cache import ReferenceDataCache
+
+logger = logging.getLogger(__name__)
+
+COHORT_GROUPS = ('program', 'year_level')
+
+NO_SNAPSHOT_ERROR = 'No analytics snapshot has been built yet (run: python snapshot.py build)'
+
+def _latest_rows(student: np.ndarray, epa: np.ndarray, epa_count: int) -> np.ndarray:
+    """
+    Positions of the latest row per (student, EPA); snapshot rows are in
+    (calculation_date, score_id) order, so that is the last occurrence
+    """
+    key = student.astype(np.int64) * max(epa_count, 1) + epa
+    _, first_from_end = np.unique(key[::-1], return_index=True)
+    return np.sort(len(key) - 1 - first_from_end)
+
+def _segment_stats(values: np.ndarray, groups: np.ndarray, group_count: int) -> Dict[str, np.ndarray]:
+    """count, mean, population stddev (as MySQL STDDEV), min and max per group"""
+    count = np.bincount(groups, minlength=group_count).astype(float)
+    total = np.bincount(groups, weights=values, minlength=group_count)
+    squares = np.bincount(groups, weights=values ** 2, minlength=group_count)
+    minimum = np.full(group_count, np.inf)
+    maximum = np.full(group_count, -np.inf)
+    np.minimum.at(minimum, groups, values)
+    np.maximum.at(maximum, groups, values)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        stddev = np.sqrt(np.maximum(squares / count - mean ** 2, 0.0))
+    return {'count': count, 'mean': mean, 'stddev': stddev, 'min': minimum, 'max': maximum}
+
+def _distinct_per_group(groups: np.ndarray, members: np.ndarray, group_count: int) -> np.ndarray:
+    """Number of distinct members (e.g. students) in each group"""
+    width = int(members.max()) + 1 if len(members) else 1
+    pairs = np.unique(groups.astype(np.int64) * width + members)
+    return np.bincount(pairs // width, minlength=group_count)
+
+def _value(array: np.ndarray, position: int, digits: int = 3) -> Optional[float]:
+    value = float(array[position])
+    return round(value, digits) if np.isfinite(value) else None
+
+class AnalyticsService:
+    """
+    Cohort analytics answered from the memory-mapped columnar snapshot
+    instead of scanning MySQL: EPA performance overview (as the
+    epa_performance_overview view), per-indicator assessment statistics and
+    cohort comparisons. Every result carries the snapshot's freshness
+    (watermark and row counts); refresh_snapshot() appends newer rows.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, reference_cache: ReferenceDataCache, snapshot_dir: str):
+        self.db_manager = db_manager
+        self.reference_cache = reference_cache
+        self.store = SnapshotStore(snapshot_dir, db_manager)
+        
+    def refresh_snapshot(self, full: bool = False) -> Dict:
+        """Append rows settled since the watermark (or rebuild everything with full=True)"""
+        started = time.monotonic()
+        result = self.store.build() if full else self.store.append()
+        result['elapsed_seconds'] = time.monotonic() - started
+        snapshot = self.store.current()
+        result['snapshot'] = snapshot.freshness() if snapshot else None
+        return result
+        
+    def snapshot_info(self) -> Dict:
+        snapshot = self.store.current()
+        if snapshot is None:
+            return {'error': NO_SNAPSHOT_ERROR}
+        return snapshot.freshness()
+        
+    def _core_epa_scores(self, snapshot: ColumnarSnapshot, latest: bool):
+        """(student codes, EPA codes, final scores) of the Core_EPA score rows"""
+        mask = snapshot.column('scores', 'score_level') == snapshot.code('score_level', 'Core_EPA')
+        student = np.asarray(snapshot.column('scores', 'student_id')[mask])
+        epa = np.asarray(snapshot.column('scores', 'epa_id')[mask])
+        final = np.asarray(snapshot.column('scores', 'final_score')[mask])
+        
+        keep = (epa != NULL_CODE) & ~np.isnan(final)
+        student, epa, final = student[keep], epa[keep], final[keep]
+        if latest and len(student):
+            rows = _latest_rows(student, epa, len(snapshot.dictionaries.get('epa', [])))
+            student, epa, final = student[rows], epa[rows], final[rows]
+        return student, epa, final
+        
+    def epa_performance(self, latest: bool = False) -> Dict:
+        """
+        Per Core EPA: distinct students, average, min, max and population
+        stddev of Core_EPA final scores. Like the epa_performance_overview
+        view this covers every stored calculation; latest=True keeps only
+        each student's most recent one.
+        """
+        snapshot = self.store.current()
+        if snapshot is None:
+            return {'error': NO_SNAPSHOT_ERROR}
+        
+        student, epa, final = self._core_epa_scores(snapshot, latest)
+        epa_names = {row['epa_id']: row['epa_name'] for row in self.reference_cache.rows('core_epas')}
+        
+        epa_count = len(snapshot.dictionaries.get('epa', []))
+        stats = _segment_stats(final, epa, epa_count)
+        students = _distinct_per_group(epa, student, epa_count)
+        
+        overview = []
+        for code in np.flatnonzero(stats['count']):
+            epa_id = snapshot.dictionaries['epa'][code]
+            overview.append({
+                'epa_id': epa_id,
+                'epa_name': epa_names.get(epa_id),
+                'student_count': int(students[code]),
+                'score_count': int(stats['count'][code]),
+                'avg_score': _value(stats['mean'], code),
+                'min_score': _value(stats['min'], code),
+                'max_score': _value(stats['max'], code),
+                'score_stddev': _value(stats['stddev'], code)
+            })
+        overview.sort(key=lambda row: row['epa_id'])
+        
+        return {'epas': overview, 'latest_only': latest, 'snapshot': snapshot.freshness()}
+        
+    def indicator_statistics(self, epa_id: Optional[str] = None) -> Dict:
+        """Assessment count, distinct students and assessors, mean and stddev of base_score per indicator"""
+        snapshot = self.store.current()
+        if snapshot is None:
+            return {'error': NO_SNAPSHOT_ERROR}
+        
+        indicator = np.asarray(snapshot.column('assessments', 'indicator_id'))
+        student = np.asarray(snapshot.column('assessments', 'student_id'))
+        assessor = np.asarray(snapshot.column('assessments', 'assessor_id'))
+        score = np.asarray(snapshot.column('assessments', 'base_score'))
+        
+        if epa_id is not None:
+            codes = [
+                snapshot.code('indicator', row['indicator_id'])
+                for epa in self.reference_cache.epa_tree(3) if epa['epa_id'] == epa_id
+                for smaller_epa in epa['smaller_epas']
+                for activity in smaller_epa['activities']
+                for row in activity['indicators']
+            ]
+            mask = np.isin(indicator, [code for code in codes if code != NULL_CODE])
+            indicator, student, assessor, score = indicator[mask], student[mask], assessor[mask], score[mask]
+        
+        indicator_count = len(snapshot.dictionaries.get('indicator', []))
+        stats = _segment_stats(score, indicator, indicator_count)
+        students = _distinct_per_group(indicator, student, indicator_count)
+        assessors = _distinct_per_group(indicator, assessor, indicator_count)
+        
+        results = [
+            {
+                'indicator_id': snapshot.dictionaries['indicator'][code],
+                'assessments': int(stats['count'][code]),
+                'students': int(students[code]),
+                'assessors': int(assessors[code]),
+                'mean_score': _value(stats['mean'], code),
+                'score_stddev': _value(stats['stddev'], code)
+            }
+            for code in np.flatnonzero(stats['count'])
+        ]
+        results.sort(key=lambda row: row['indicator_id'])
+        
+        return {'indicators': results, 'epa_id': epa_id, 'snapshot': snapshot.freshness()}
+        
+    def cohort_comparison(self, group_by: str = 'program', epa_id: Optional[str] = None) -> Dict:
+        """
+        Latest Core EPA scores of active students compared across programs or
+        year levels: students, mean, stddev, min, median and max per
+        (cohort, EPA)
+        """
+        if group_by not in COHORT_GROUPS:
+            raise ValueError(f"group_by must be one of {', '.join(COHORT_GROUPS)}")
+        
+        snapshot = self.store.current()
+        if snapshot is None:
+            return {'error': NO_SNAPSHOT_ERROR}
+        
+        student, epa, final = self._core_epa_scores(snapshot, latest=True)
+        
+        # Student code -> cohort position, from the cached active roster
+        cohorts: List = []
+        cohort_index = {}
+        cohort_of_student = np.full(len(snapshot.dictionaries.get('student', [])), -1, dtype=np.int64)
+        for row in self.reference_cache.rows('student_roster'):
+            code = snapshot.code('student', row['student_id'])
+            if code == NULL_CODE:
+                continue
+            cohort = row[group_by]
+            if cohort not in cohort_index:
+                cohort_index[cohort] = len(cohorts)
+                cohorts.append(cohort)
+            cohort_of_student[code] = cohort_index[cohort]
+        
+        cohort = cohort_of_student[student] if len(student) else np.empty(0, dtype=np.int64)
+        keep = cohort >= 0
+        if epa_id is not None:
+            keep &= epa == snapshot.code('epa', epa_id)
+        cohort, epa, final = cohort[keep], epa[keep], final[keep]
+        
+        # One segment per (cohort, EPA), scores sorted within it for the median
+        epa_count = max(len(snapshot.dictionaries.get('epa', [])), 1)
+        segment = cohort * epa_count + epa
+        order = np.lexsort((final, segment))
+        segment, final = segment[order], final[order]
+        segments, starts, counts = np.unique(segment, return_index=True, return_counts=True)
+        
+        results = []
+        for key, start, count in zip(segments, starts, counts):
+            values = final[start:start + count]
+            results.append({
+                group_by: cohorts[key // epa_count],
+                'epa_id': snapshot.dictionaries['epa'][key % epa_count],
+                'students': int(count),
+                'mean_score': round(float(values.mean()), 3),
+                'score_stddev': round(float(values.std()), 3),
+                'min_score': round(float(values[0]), 3),
+                'median_score': round(float(np.median(values)), 3),
+                'max_score': round(float(values[-1]), 3)
+            })
+        results.sort(key=lambda row: (str(row[group_by]), row['epa_id']))
+        
+        return {'cohorts': results, 'group_by': group_by, 'epa_id': epa_id, 'snapshot': snapshot.freshness()}
@@ -0,0 +1,236 @@
+"""
+EPA Scoring Service - Assessment Validation and Bulk Ingestion
+File: backend/services/assessment_service.py
+"""
+
+from mysql.connector import Error
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import itertools
+import json
+import logging
+import time
+
+from repositories.base import ASSESSMENT_INSERT_COLUMNS, ScoringRepository
+from repositories.sql_repository import INSERT_ASSESSMENT_QUERY, MySQLScoringRepository
+from utils.database import DatabaseManager
+from utils.id_generator import new_id
+from utils.reference_cache import ReferenceDataCache
+from utils.result_cache import ProfileCache
+
+logger = logging.getLogger(__name__)
+
+# Assessments validated, inserted and committed together
+INGEST_CHUNK_SIZE = 500
+
+# Per-row errors included in a bulk response; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+REQUIRED_ASSESSMENT_FIELDS = ['student_id', 'indicator_id', 'assessor_id', 'base_score', 'evidence_type']
+
+EVIDENCE_TYPES = ('Direct_Observation', 'Simulation', 'Portfolio', 'Case_Study', 'Peer_Review')
+
+def validate_assessment(data) -> Optional[str]:
+    """Error message for an invalid assessment payload, or None if it is valid"""
+    if not isinstance(data, dict):
+        return 'Assessment must be a JSON object'
+    
+    # Validate required fields
+    for field in REQUIRED_ASSESSMENT_FIELDS:
+        if field not in data:
+            return f'Missing required field: {field}'
+    
+    # Validate score range
+    if isinstance(data['base_score'], bool) or not isinstance(data['base_score'], (int, float)):
+        return 'Base score must be a number'
+    if not (1.0 <= data['base_score'] <= 5.0):
+        return 'Base score must be between 1.0 and 5.0'
+    
+    return None
+
+def new_assessment_id() -> str:
+    """Generate a student_assessments primary key"""
+    return new_id('assessment')
+
+def assessment_row(assessment_id: str, data: Dict) -> Dict:
+    """The ASSESSMENT_INSERT_COLUMNS of a validated payload"""
+    return {
+        'assessment_id': assessment_id,
+        'student_id': data['student_id'],
+        'indicator_id': data['indicator_id'],
+        'assessor_id': data['assessor_id'],
+        'base_score': data['base_score'],
+        'context_id': data.get('context_id'),
+        'tech_level_id': data.get('tech_level_id'),
+        'evidence_type': data['evidence_type'],
+        'notes': data.get('notes', '')
+    }
+
+def assessment_params(assessment_id: str, data: Dict) -> Tuple:
+    """INSERT_ASSESSMENT_QUERY parameters for a validated payload"""
+    row = assessment_row(assessment_id, data)
+    return tuple(row[column] for column in ASSESSMENT_INSERT_COLUMNS)
+
+class AssessmentService:
+    """
+    Bulk assessment ingestion. Records are validated, inserted with batched
+    multi-row statements and committed one chunk at a time; invalid rows are
+    reported individually and never fail the rest of the batch.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, reference_cache: ReferenceDataCache,
+                 scoring_service=None, profile_cache: Optional[ProfileCache] = None,
+                 repository: Optional[ScoringRepository] = None):
+        self.db_manager = db_manager
+        self.repository = repository or MySQLScoringRepository(db_manager)
+        self.reference_cache = reference_cache
+        self.scoring_service = scoring_service
+        self.profile_cache = profile_cache
+        
+    def reference_error(self, data: Dict) -> Optional[str]:
+        """
+        Error message for a validated payload naming an unknown evidence type,
+        indicator, context or technology level: the references the
+        student_assessments foreign keys and ENUM enforce. Every insert path
+        calls it, so unknown IDs are rejected even where the table has no
+        foreign keys (partitioned, see utils/migrations.py) and before they
+        abort a multi-row insert.
+        """
+        if data['evidence_type'] not in EVIDENCE_TYPES:
+            return f"Unknown evidence_type: {data['evidence_type']}"
+        if self.reference_cache.indicator(data['indicator_id']) is None:
+            return f"Unknown indicator_id: {data['indicator_id']}"
+        if data.get('context_id') is not None and self.reference_cache.get('contexts', data['context_id']) is None:
+            return f"Unknown context_id: {data['context_id']}"
+        if data.get('tech_level_id') is not None and self.reference_cache.get('technology_levels', data['tech_level_id']) is None:
+            return f"Unknown tech_level_id: {data['tech_level_id']}"
+        return None
+        
+    def student_state(self, student_id: str) -> Tuple[int, Optional[str]]:
+        """
+        (assessment count, newest created_date) of a student, read through
+        the repository so that writes by every process change it; the
+        profile cache keys entries and validators by it
+        """
+        return self.repository.student_state(student_id)
+        
+    def _insert_chunk(self, connection, chunk: List[Tuple[int, str, Dict]]) -> Tuple[List, List[Dict]]:
+        """
+        Insert one chunk of validated rows. If the multi-row insert is rejected,
+        the chunk is retried row by row so only the offending rows fail.
+        """
+        cursor = connection.cursor()
+        
+        try:
+            try:
+                cursor.executemany(INSERT_ASSESSMENT_QUERY, [assessment_params(aid, data) for _, aid, data in chunk])
+                return chunk, []
+            except Error as e:
+                logger.warning(f"Bulk insert of {len(chunk)} assessments failed, retrying row by row: {e}")
+                connection.rollback()
+            
+            inserted, errors = [], []
+            for row_number, assessment_id, data in chunk:
+                try:
+                    cursor.execute(INSERT_ASSESSMENT_QUERY, assessment_params(assessment_id, data))
+                    inserted.append((row_number, assessment_id, data))
+                except Error as e:
+                    errors.append({'row': row_number, 'error': str(e)})
+            return inserted, errors
+        finally:
+            cursor.close()
+            
+    def _refresh_scores(self, connection, inserted: List[Tuple[int, str, Dict]]) -> int:
+        """Refresh calculated scores once per student touched by a chunk"""
+        if self.scoring_service is None:
+            return 0
+        
+        touched = {}
+        for _, _, data in inserted:
+            touched.setdefault(data['student_id'], set()).add(data['indicator_id'])
+        
+        scores_written = 0
+        for student_id, indicator_ids in touched.items():
+            result = self.scoring_service.refresh_student_scores(connection, student_id, sorted(indicator_ids))
+            scores_written += result['scores_written']
+        return scores_written
+        
+    def ingest(self, records: Iterable, chunk_size: int = INGEST_CHUNK_SIZE,
+               refresh_scores: bool = True) -> Dict:
+        """
+        Ingest an iterable of assessment payloads (a parsed JSON array or a
+        stream of NDJSON lines). A record may be an exception instance, e.g.
+        a line that failed to parse, which is reported as that row's error.
+        """
+        started = time.perf_counter()
+        stats = {'received': 0, 'inserted': 0, 'failed': 0, 'chunks': 0, 'scores_written': 0}
+        errors = []
+        assessment_ids = []
+        
+        def record_error(row_number: int, message: str):
+            stats['failed'] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'row': row_number, 'error': message})
+        
+        with self.db_manager.connection() as connection:
+            numbered = enumerate(records)
+            while True:
+                batch = list(itertools.islice(numbered, chunk_size))
+                if not batch:
+                    break
+                stats['received'] += len(batch)
+                
+                chunk = []
+                for row_number, data in batch:
+                    if isinstance(data, Exception):
+                        record_error(row_number, str(data))
+                        continue
+                    message = validate_assessment(data) or self.reference_error(data)
+                    if message:
+                        record_error(row_number, message)
+                        continue
+                    chunk.append((row_number, new_assessment_id(), data))
+                
+                if not chunk:
+                    continue
+                
+                try:
+                    inserted, chunk_errors = self._insert_chunk(connection, chunk)
+                    if refresh_scores and inserted:
+                        stats['scores_written'] += self._refresh_scores(connection, inserted)
+                    connection.commit()
+                except Error as e:
+                    logger.error(f"Error committing assessment chunk: {e}")
+                    connection.rollback()
+                    inserted, chunk_errors = [], [{'row': row_number, 'error': str(e)} for row_number, _, _ in chunk]
+                
+                if self.profile_cache is not None and inserted:
+                    self.profile_cache.bump(*{data['student_id'] for _, _, data in inserted})
+                
+                for row_error in chunk_errors:
+                    record_error(row_error['row'], row_error['error'])
+                stats['inserted'] += len(inserted)
+                stats['chunks'] += 1
+                assessment_ids.extend(assessment_id for _, assessment_id, _ in inserted)
+        
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = elapsed
+        stats['rows_per_second'] = stats['received'] / elapsed if elapsed > 0 else None
+        stats['assessment_ids'] = assessment_ids
+        stats['errors'] = errors
+        
+        logger.info(
+            f"Ingested {stats['inserted']}/{stats['received']} assessments "
+            f"in {stats['chunks']} chunks ({elapsed:.2f}s, {stats['failed']} failed)"
+        )
+        return stats
+
+def iter_ndjson(lines: Iterable[bytes]) -> Iterator:
+    """Parse an NDJSON byte stream lazily; malformed lines yield a ValueError"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f'Invalid JSON: {e}')
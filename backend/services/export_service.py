@@ -0,0 +1,254 @@
+"""
+EPA Scoring Service - Streaming Score and Assessment Export
+File: backend/services/export_service.py
+"""
+
+from mysql.connector import Error
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Tuple
+import csv
+import io
+import json
+import logging
+
+from utils.database import DatabaseManager
+from utils.reference_cache import ReferenceDataCache
+
+logger = logging.getLogger(__name__)
+
+# Rows per fetchmany() round trip, and so per output chunk
+EXPORT_FETCH_SIZE = 2000
+
+# Exportable tables: columns, primary key order (time-ordered IDs, so creation
+# order), the date column a date range applies to, and the filters each accepts. epa_id on assessments is resolved to the EPA's indicators.
+EXPORT_TABLES = {
+    'scores': {
+        'table': 'calculated_scores',
+        'columns': ('score_id', 'student_id', 'epa_id', 'smaller_epa_id', 'activity_id', 'indicator_id',
+                    'score_level', 'base_score', 'context_adjusted_score', 'tech_adjusted_score',
+                    'integration_bonus', 'standards_bonus', 'final_score', 'calculation_date'),
+        'order_by': 'score_id',
+        'date_column': 'calculation_date',
+        'filters': ('student_id', 'epa_id', 'score_level')
+    },
+    'assessments': {
+        'table': 'student_assessments',
+        'columns': ('assessment_id', 'student_id', 'indicator_id', 'assessor_id', 'base_score', 'context_id',
+                    'tech_level_id', 'evidence_type', 'assessment_date', 'notes', 'created_date'),
+        'order_by': 'assessment_id',
+        'date_column': 'assessment_date',
+        'filters': ('student_id', 'epa_id', 'indicator_id')
+    }
+}
+
+SCORE_LEVELS = ('Indicator', 'Activity', 'Smaller_EPA', 'Core_EPA', 'Framework')
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+    'columnar': ('application/x-ndjson', 'columnar.ndjson')
+}
+
+class ExportError(ValueError):
+    """Invalid export table, format or filter"""
+    pass
+
+def _json_value(value):
+    """Decimal -> float and dates -> ISO 8601 for JSON output"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+def _text_value(value):
+    """CSV cell: Decimals keep their exact digits, dates are ISO 8601"""
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def _columnar_block(columns: Tuple[str, ...], rows: List[tuple]) -> Dict:
+    """
+    One block of the columnar format: a list of values per column. String
+    columns with many repeats (student, level, evidence type, ...) are
+    dictionary encoded as {"dictionary": [...], "codes": [...]}.
+    """
+    data = {}
+    for position, column in enumerate(columns):
+        values = [row[position] for row in rows]
+        if values and all(isinstance(value, str) for value in values):
+            dictionary = {}
+            codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+            if len(dictionary) * 2 <= len(values):
+                data[column] = {'dictionary': list(dictionary), 'codes': codes}
+                continue
+        data[column] = values
+    return {'rows': len(rows), 'data': data}
+
+class ExportService:
+    """
+    Streams calculated_scores and student_assessments out as NDJSON, CSV or
+    a compact columnar NDJSON, for accreditation exports.
+
+    Rows are read through an unbuffered cursor in fetchmany() chunks and each
+    chunk is encoded and handed to the caller before the next one is read, so
+    memory stays flat however many rows match. The connection is held until
+    the stream is exhausted or closed.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, reference_cache: ReferenceDataCache):
+        self.db_manager = db_manager
+        self.reference_cache = reference_cache
+        
+    def parse_filters(self, table: str, params) -> Dict:
+        """Validated filters from a mapping (e.g. request.args); raises ExportError"""
+        if table not in EXPORT_TABLES:
+            raise ExportError(f"Unknown export table: {table}")
+        spec = EXPORT_TABLES[table]
+        
+        filters = {name: params.get(name) for name in spec['filters'] if params.get(name)}
+        if 'score_level' in filters and filters['score_level'] not in SCORE_LEVELS:
+            raise ExportError(f"score_level must be one of {', '.join(SCORE_LEVELS)}")
+        
+        for name in ('date_from', 'date_to'):
+            if params.get(name):
+                try:
+                    filters[name] = datetime.fromisoformat(params[name])
+                except ValueError:
+                    raise ExportError(f"{name} must be an ISO 8601 date or datetime")
+        # A plain date as upper bound includes that whole day
+        if 'date_to' in filters and len(params['date_to']) == 10:
+            filters['date_to'] += timedelta(days=1)
+            filters['date_to_exclusive'] = True
+        
+        unsupported = [name for name in ('score_level', 'indicator_id')
+                       if params.get(name) and name not in spec['filters']]
+        if unsupported:
+            raise ExportError(f"Filters not supported for {table}: {', '.join(unsupported)}")
+        return filters
+        
+    def _build_query(self, table: str, filters: Dict) -> Tuple[str, List]:
+        spec = EXPORT_TABLES[table]
+        conditions = []
+        params = []
+        
+        for name in spec['filters']:
+            if name not in filters:
+                continue
+            if table == 'assessments' and name == 'epa_id':
+                indicator_ids = self._epa_indicator_ids(filters['epa_id'])
+                if not indicator_ids:
+                    conditions.append("1 = 0")
+                    continue
+                conditions.append(f"indicator_id IN ({', '.join(['%s'] * len(indicator_ids))})")
+                params.extend(indicator_ids)
+            else:
+                conditions.append(f"{name} = %s")
+                params.append(filters[name])
+        
+        if 'date_from' in filters:
+            conditions.append(f"{spec['date_column']} >= %s")
+            params.append(filters['date_from'])
+        if 'date_to' in filters:
+            operator = '<' if filters.get('date_to_exclusive') else '<='
+            conditions.append(f"{spec['date_column']} {operator} %s")
+            params.append(filters['date_to'])
+        
+        query = f"SELECT {', '.join(spec['columns'])} FROM {spec['table']}"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        query += f" ORDER BY {spec['order_by']}"
+        return query, params
+        
+    def _epa_indicator_ids(self, epa_id: str) -> List[str]:
+        """Indicator IDs under a Core EPA, from the cached hierarchy"""
+        for epa in self.reference_cache.epa_tree(3):
+            if epa['epa_id'] == epa_id:
+                return [
+                    indicator['indicator_id']
+                    for smaller_epa in epa['smaller_epas']
+                    for activity in smaller_epa['activities']
+                    for indicator in activity['indicators']
+                ]
+        return []
+        
+    def iter_rows(self, table: str, filters: Dict,
+                  fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        """(columns, rows) chunks of the export, read through an unbuffered cursor"""
+        query, params = self._build_query(table, filters)
+        columns = EXPORT_TABLES[table]['columns']
+        
+        with self.db_manager.connection() as connection:
+            # Unbuffered: rows stay on the server until fetched
+            cursor = connection.cursor(buffered=False)
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    yield columns, rows
+            finally:
+                try:
+                    cursor.close()
+                except Error as e:
+                    # Stopped early (e.g. the client went away) with rows unread; the pool discards the connection
+                    logger.warning(f"Export stopped before the end of the result: {e}")
+                    
+    def iter_export(self, table: str, filters: Dict, export_format: str = 'ndjson',
+                    fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[str]:
+        """
+        The export as text chunks, one per fetched chunk of rows.
+
+        - ndjson: one JSON object per row
+        - csv: header line, then one line per row
+        - columnar: a header line {"table", "columns"}, then one line per chunk
+          {"rows": n, "data": {column: values or dictionary encoding}}
+        """
+        # Checked here, not in the generator, so callers fail before streaming starts
+        if export_format not in EXPORT_FORMATS:
+            raise ExportError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+        return self._iter_chunks(table, filters, export_format, fetch_size)
+        
+    def _iter_chunks(self, table: str, filters: Dict, export_format: str, fetch_size: int) -> Iterator[str]:
+        columns = EXPORT_TABLES[table]['columns']
+        exported = 0
+        
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(columns)
+            yield buffer.getvalue()
+        elif export_format == 'columnar':
+            yield json.dumps({'table': EXPORT_TABLES[table]['table'], 'columns': list(columns)}) + '\n'
+        
+        for _, rows in self.iter_rows(table, filters, fetch_size):
+            if export_format == 'ndjson':
+                chunk = ''.join(
+                    json.dumps(dict(zip(columns, row)), default=_json_value, ensure_ascii=False) + '\n'
+                    for row in rows
+                )
+            elif export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator='\n')
+                writer.writerows([_text_value(value) for value in row] for row in rows)
+                chunk = buffer.getvalue()
+            else:
+                chunk = json.dumps(_columnar_block(columns, rows), default=_json_value, ensure_ascii=False) + '\n'
+            
+            exported += len(rows)
+            yield chunk
+        
+        logger.info(f"Exported {exported} {table} rows as {export_format}")
+        
+    def write_export(self, output, table: str, filters: Dict, export_format: str = 'ndjson',
+                     fetch_size: int = EXPORT_FETCH_SIZE) -> int:
+        """Stream the export into a text file object; returns the number of characters written"""
+        written = 0
+        for chunk in self.iter_export(table, filters, export_format, fetch_size):
+            output.write(chunk)
+            written += len(chunk)
+        return written
@@ -0,0 +1,244 @@
+"""
+EPA Scoring Service - Quality Assurance and Inter-Rater Reliability
+File: backend/services/quality_service.py
+"""
+
+from mysql.connector import Error
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+import threading
+import time
+import numpy as np
+
+from models.reliability import RatingMatrix, reliability_band, ICC_BANDS, ALPHA_BANDS
+from utils.database import DatabaseManager, rewrite_counts
+from utils.id_generator import new_id
+
+logger = logging.getLogger(__name__)
+
+# Ratings fetched per round trip while catching up on new assessments
+RATING_FETCH_SIZE = 5000
+
+# created_date is the insert time, not the commit time: assessments stamped
+# within this many seconds of the database clock are re-read by the next
+# catch-up (and skipped by assessment_id if already added) in case an older
+# stamp commits after a newer one
+RATING_LAG_SECONDS = 60
+
+# Rows per multi-row INSERT into quality_assurance
+QA_WRITE_BATCH_SIZE = 1000
+
+INSERT_QUALITY_ASSURANCE_QUERY = """
+INSERT INTO quality_assurance
+(qa_id, indicator_id, context_id, qa_type, metric_value, status, sample_size, calculation_date)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def _optional(value: float) -> Optional[float]:
+    """NaN -> None for JSON"""
+    return None if np.isnan(value) else float(value)
+
+class QualityService:
+    """
+    Inter-rater reliability across all student assessments.
+
+    Ratings are kept in memory as sparse assessor x (student, indicator)
+    matrices, grouped by indicator and by context, and caught up
+    incrementally: each report only reads assessments created after the
+    previous report's watermark, which trails the database clock by
+    RATING_LAG_SECONDS. Deleted assessments (see
+    utils.database.mark_rewritten) make the next report rebuild. ICC(1) and
+    Krippendorff's alpha for every group are then recomputed from the
+    matrices in a few vectorized passes.
+    """
+    
+    def __init__(self, db_config: Dict, db_manager: Optional[DatabaseManager] = None):
+        self.db_config = db_config
+        self.db_manager = db_manager or DatabaseManager(db_config)
+        
+        self._lock = threading.Lock()
+        self._rewrites: Optional[int] = None
+        self._reset()
+        
+    def _reset(self):
+        """Forget all ratings; the next report rebuilds from scratch"""
+        self._by_indicator = RatingMatrix()
+        self._by_context = RatingMatrix()
+        self._watermark: Optional[datetime] = None
+        # assessment_id -> created_date of rows already added but newer than the watermark
+        self._recent: Dict[str, datetime] = {}
+        
+    def _rewritten(self, connection) -> bool:
+        """Whether student_assessments was rewritten since the last check; caller holds the lock"""
+        rewrites = rewrite_counts(connection, ['student_assessments'])['student_assessments']
+        changed = self._rewrites is not None and rewrites != self._rewrites
+        self._rewrites = rewrites
+        return changed
+        
+    def _catch_up(self, connection, fetch_size: int = RATING_FETCH_SIZE) -> int:
+        """Add assessments created after the watermark; caller holds the lock"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT CURRENT_TIMESTAMP")
+            now = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        if not isinstance(now, datetime):
+            now = datetime.fromisoformat(str(now))
+        horizon = now - timedelta(seconds=RATING_LAG_SECONDS)
+        
+        query = """
+            SELECT student_id, indicator_id, assessor_id, context_id, base_score, created_date, assessment_id
+            FROM student_assessments
+            {watermark_filter}
+        """
+        params = ()
+        if self._watermark is None:
+            query = query.format(watermark_filter="")
+        else:
+            query = query.format(watermark_filter="WHERE created_date > %s")
+            params = (self._watermark,)
+        
+        added = 0
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                
+                rows = [row for row in rows if row[6] not in self._recent]
+                for row in rows:
+                    created = row[5]
+                    if created is not None and not isinstance(created, datetime):
+                        created = datetime.fromisoformat(str(created))
+                    if created is not None and created > horizon:
+                        self._recent[row[6]] = created
+                if not rows:
+                    continue
+                
+                student_ids, indicator_ids, assessor_ids, context_ids, scores, _, _ = zip(*rows)
+                scores = np.fromiter((float(score) for score in scores), dtype=float, count=len(rows))
+                
+                self._by_indicator.add(
+                    indicator_ids, list(zip(indicator_ids, student_ids)), assessor_ids, scores)
+                
+                with_context = [position for position, context_id in enumerate(context_ids) if context_id is not None]
+                if with_context:
+                    self._by_context.add(
+                        [context_ids[p] for p in with_context],
+                        [(context_ids[p], indicator_ids[p], student_ids[p]) for p in with_context],
+                        [assessor_ids[p] for p in with_context],
+                        scores[with_context])
+                added += len(rows)
+        finally:
+            cursor.close()
+        
+        # Everything stamped up to the horizon has committed and been added
+        if self._watermark is None or horizon > self._watermark:
+            self._watermark = horizon
+            self._recent = {assessment_id: created for assessment_id, created in self._recent.items()
+                            if created > horizon}
+        return added
+    
+    @staticmethod
+    def _group_results(matrix: RatingMatrix, key: str) -> List[Dict]:
+        """Reliability per group of a rating matrix, as JSON-ready dicts"""
+        stats = matrix.statistics()
+        results = []
+        for position, group in enumerate(matrix.groups):
+            icc = _optional(stats['icc'][position])
+            alpha = _optional(stats['alpha'][position])
+            results.append({
+                key: group,
+                'units': int(stats['units'][position]),
+                'ratings': int(stats['ratings'][position]),
+                'raters': int(stats['raters'][position]),
+                'icc': icc,
+                'icc_band': reliability_band(icc, ICC_BANDS),
+                'krippendorff_alpha': alpha,
+                'alpha_band': reliability_band(alpha, ALPHA_BANDS)
+            })
+        results.sort(key=lambda result: result[key])
+        return results
+        
+    def _write_quality_assurance(self, connection, indicators: List[Dict], contexts: List[Dict],
+                                 calculation_date: datetime, batch_size: int = QA_WRITE_BATCH_SIZE) -> int:
+        """Record each group's coefficients as Inter_Rater_Reliability rows"""
+        rows = []
+        for results, key in ((indicators, 'indicator_id'), (contexts, 'context_id')):
+            for result in results:
+                indicator_id = result[key] if key == 'indicator_id' else None
+                context_id = result[key] if key == 'context_id' else None
+                for metric, band, label in (('icc', 'icc_band', 'ICC(1)'),
+                                            ('krippendorff_alpha', 'alpha_band', 'Krippendorff alpha')):
+                    if result[metric] is None:
+                        continue
+                    rows.append((
+                        new_id('quality'), indicator_id, context_id, 'Inter_Rater_Reliability',
+                        round(result[metric], 3), f"{label} {result[band]}", result['ratings'], calculation_date
+                    ))
+        
+        cursor = connection.cursor()
+        try:
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(INSERT_QUALITY_ASSURANCE_QUERY, rows[start:start + batch_size])
+        finally:
+            cursor.close()
+        return len(rows)
+        
+    def generate_reliability_report(self, full: bool = False, persist: bool = False) -> Dict:
+        """
+        ICC(1) and Krippendorff's alpha per indicator and per context.
+        Only assessments added since the last report are read unless full=True,
+        which rebuilds the rating matrices from every assessment. With
+        persist=True the coefficients are bulk-inserted into quality_assurance.
+        """
+        started = time.monotonic()
+        calculation_date = datetime.now().replace(microsecond=0)
+        
+        try:
+            with self._lock, self.db_manager.connection() as connection:
+                if self._rewritten(connection) and not full:
+                    logger.info("Assessments were deleted or rewritten; rebuilding the rating matrices")
+                    full = True
+                incremental = not full and self._watermark is not None
+                if full:
+                    self._reset()
+                new_ratings = self._catch_up(connection)
+                
+                indicators = self._group_results(self._by_indicator, 'indicator_id')
+                contexts = self._group_results(self._by_context, 'context_id')
+                ratings_processed = self._by_indicator.rating_count
+                watermark = self._watermark
+                
+                qa_rows_written = 0
+                if persist:
+                    qa_rows_written = self._write_quality_assurance(connection, indicators, contexts, calculation_date)
+                    connection.commit()
+        except Error as e:
+            logger.error(f"Error generating reliability report: {e}")
+            return {'error': str(e)}
+        
+        assessed = [result['icc'] for result in indicators if result['icc'] is not None]
+        elapsed = time.monotonic() - started
+        logger.info(f"Reliability report: {new_ratings} new ratings, {len(indicators)} indicators ({elapsed:.2f}s)")
+        
+        return {
+            'indicators': indicators,
+            'contexts': contexts,
+            'summary': {
+                'ratings_processed': ratings_processed,
+                'new_ratings': new_ratings,
+                'indicators_with_reliability': len(assessed),
+                'mean_indicator_icc': float(np.mean(assessed)) if assessed else None,
+                'indicators_below_moderate': sum(1 for icc in assessed if icc < 0.5)
+            },
+            'incremental': incremental,
+            'watermark': watermark.isoformat() if watermark else None,
+            'qa_rows_written': qa_rows_written,
+            'elapsed_seconds': elapsed,
+            'calculation_timestamp': calculation_date.isoformat()
+        }
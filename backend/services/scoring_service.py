@@ -0,0 +1,947 @@
+"""
+EPA Scoring Service - Student Profiles and Cohort Recompute
+File: backend/services/scoring_service.py
+"""
+
+from mysql.connector import Error
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from contextvars import copy_context
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+import numpy as np
+
+from models.scoring_engine import (
+    EPAScoringEngine, BATCH_CHUNK_SIZE, ENTRUSTMENT_LEVEL_COUNT, INTEGRATION_BASE_BONUS, INTEGRATION_EPAS,
+    INTEGRATION_LEVELS, INTEGRATION_PAIRS, INTEGRATION_PRIMARY, INTEGRATION_SECONDARY, INTEGRATION_TYPES,
+    entrustment_levels, integration_tiers, score_integration_pairs
+)
+from models.epa_hierarchy import EPAHierarchy, HierarchyCache, SCORE_LEVELS, SCORE_METRICS
+from models.score_statistics import ScoreStatistics
+from repositories.base import ScoringRepository
+from utils.database import DatabaseManager, PoolExhaustedError, mark_rewritten
+from utils.id_generator import new_id
+from utils.metrics import timed
+from utils.reference_cache import ReferenceDataCache
+
+logger = logging.getLogger(__name__)
+
+# Assessment rows rolled up together; a student's rows never straddle two blocks
+COHORT_BLOCK_SIZE = 50000
+
+# Rows per multi-row INSERT into calculated_scores
+SCORE_WRITE_BATCH_SIZE = 1000
+
+# Seconds a fanned-out comprehensive profile may take before it is abandoned
+PROFILE_TIMEOUT = 30.0
+
+# Share of the connection pool that profile branches may hold at once (each
+# branch runs on its own pooled connection); the rest stays free for other
+# requests, so profile_workers is capped at this share of pool_size
+PROFILE_POOL_SHARE = 0.5
+
+INSERT_CALCULATED_SCORES_QUERY = """
+INSERT INTO calculated_scores
+(score_id, student_id, epa_id, smaller_epa_id, activity_id, indicator_id, score_level,
+ base_score, context_adjusted_score, tech_adjusted_score, final_score, calculation_date)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_INTEGRATION_BONUSES_QUERY = """
+INSERT INTO integration_bonuses
+(bonus_id, student_id, primary_epa_id, secondary_epa_id, integration_type, bonus_points, calculation_date)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+# calculated_scores column that identifies the node at each score level
+LEVEL_ID_COLUMNS = {
+    'Indicator': 'indicator_id',
+    'Activity': 'activity_id',
+    'Smaller_EPA': 'smaller_epa_id',
+    'Core_EPA': 'epa_id',
+    'Framework': None
+}
+
+def new_score_id() -> str:
+    """Generate a calculated_scores primary key"""
+    return new_id('score')
+
+def new_bonus_id() -> str:
+    """Generate an integration_bonuses primary key"""
+    return new_id('bonus')
+
+class ScoringService:
+    """
+    Student- and cohort-level scoring on top of EPAScoringEngine.
+    Scores every level of the EPA hierarchy (Indicator through Framework)
+    for blocks of students at a time.
+    
+    With a repository (e.g. InMemoryScoringRepository) score_students, EPA
+    scores and profiles read from it; cohort selection, stored scores and
+    everything that writes still go through db_manager.
+    """
+    
+    def __init__(self, db_config: Dict, db_manager: Optional[DatabaseManager] = None,
+                 reference_cache: Optional[ReferenceDataCache] = None,
+                 profile_workers: int = 0, profile_timeout: float = PROFILE_TIMEOUT,
+                 repository: Optional[ScoringRepository] = None):
+        self.db_config = db_config
+        self.db_manager = db_manager or DatabaseManager(db_config)
+        self.reference_cache = reference_cache or ReferenceDataCache(self.db_manager, repository=repository)
+        self.hierarchy_cache = HierarchyCache(self.reference_cache)
+        self.engine = EPAScoringEngine(db_config, self.db_manager, self.hierarchy_cache, self.reference_cache,
+                                       repository)
+        self.statistics = ScoreStatistics()
+        
+        # Per-EPA profile fan-out; 0 workers scores profiles sequentially in one query
+        pool_size = getattr(self.db_manager, 'pool_config', {}).get('pool_size')
+        if pool_size is not None and profile_workers > pool_size * PROFILE_POOL_SHARE:
+            capped = max(int(pool_size * PROFILE_POOL_SHARE), 1)
+            logger.warning(f"profile_workers={profile_workers} would hold most of the {pool_size}-connection "
+                           f"pool; using {capped}")
+            profile_workers = capped
+        self.profile_workers = profile_workers
+        self.profile_timeout = profile_timeout
+        self._profile_executor = None
+        self._executor_lock = threading.Lock()
+        
+    def get_hierarchy(self, reload: bool = False) -> EPAHierarchy:
+        """Compiled EPA weight tree for the current curriculum version"""
+        return self.hierarchy_cache.get(reload)
+        
+    def _iter_student_blocks(self, student_ids: Optional[List[str]],
+                             block_size: int) -> Iterator[Tuple[List[str], List[str], Dict[str, np.ndarray]]]:
+        """
+        Stream scored assessments ordered by student and regroup them into
+        blocks of roughly block_size rows that always contain every row of
+        each student in the block.
+        """
+        pending_students = []
+        pending_indicators = []
+        pending_arrays = []
+        pending_count = 0
+        
+        def flush(cut: Optional[int] = None):
+            arrays = {
+                metric: np.concatenate([chunk[metric] for chunk in pending_arrays])
+                for metric in SCORE_METRICS
+            }
+            cut = len(pending_students) if cut is None else cut
+            block = (pending_students[:cut], pending_indicators[:cut],
+                     {metric: values[:cut] for metric, values in arrays.items()})
+            remainder = (pending_students[cut:], pending_indicators[cut:],
+                         {metric: values[cut:] for metric, values in arrays.items()})
+            return block, remainder
+        
+        chunks = self.engine._iter_indicator_score_chunks(
+            None, student_ids, None, None, min(block_size, BATCH_CHUNK_SIZE), order_by_student=True)
+        
+        for rows, arrays in chunks:
+            pending_students.extend(row['student_id'] for row in rows)
+            pending_indicators.extend(row['indicator_id'] for row in rows)
+            pending_arrays.append(arrays)
+            pending_count += len(rows)
+            
+            if pending_count < block_size:
+                continue
+            
+            # Hold back the last student, whose rows may continue in the next chunk
+            last_student = pending_students[-1]
+            cut = len(pending_students)
+            while cut > 0 and pending_students[cut - 1] == last_student:
+                cut -= 1
+            if cut == 0:
+                continue
+            
+            block, (pending_students, pending_indicators, remainder_arrays) = flush(cut)
+            pending_arrays = [remainder_arrays]
+            pending_count = len(pending_students)
+            yield block
+        
+        if pending_count:
+            block, _ = flush()
+            yield block
+            
+    def score_students(self, student_ids: Optional[List[str]] = None, block_size: int = COHORT_BLOCK_SIZE
+                       ) -> Iterator[Tuple[List[str], Dict[str, Dict[str, np.ndarray]]]]:
+        """
+        Roll every student's assessments up through all score levels.
+        Yields (block_student_ids, levels) where levels[score_level][metric]
+        is a block_students x nodes array (NaN = no evidence). Streams every
+        student's assessments when student_ids is None.
+        """
+        hierarchy = self.get_hierarchy()
+        
+        for students, indicators, values in self._iter_student_blocks(student_ids, block_size):
+            student_index = {}
+            student_codes = np.fromiter(
+                (student_index.setdefault(student_id, len(student_index)) for student_id in students),
+                dtype=np.int64, count=len(students))
+            indicator_codes = np.fromiter(
+                (hierarchy.indicator_index.get(indicator_id, -1) for indicator_id in indicators),
+                dtype=np.int64, count=len(indicators))
+            
+            # Indicators added after the tree was loaded are picked up on the next reload
+            known = indicator_codes >= 0
+            if not known.all():
+                logger.warning(f"Skipping {int((~known).sum())} assessments for indicators missing from the hierarchy")
+                student_codes = student_codes[known]
+                indicator_codes = indicator_codes[known]
+                values = {metric: array[known] for metric, array in values.items()}
+            
+            sums, counts = hierarchy.accumulate(student_codes, indicator_codes, len(student_index), values)
+            yield list(student_index), hierarchy.rollup(sums, counts)
+            
+    def _calculated_score_rows(self, hierarchy: EPAHierarchy, students: List[str],
+                               levels: Dict[str, Dict[str, np.ndarray]], calculation_date: datetime) -> List[Tuple]:
+        """calculated_scores rows for every (student, node) that has a score"""
+        rows = []
+        
+        for level in SCORE_LEVELS:
+            metrics = levels[level]
+            student_positions, node_positions = np.nonzero(~np.isnan(metrics['final_score']))
+            if not len(student_positions):
+                continue
+            
+            columns = [
+                np.round(metrics[metric][student_positions, node_positions], 3).tolist()
+                for metric in SCORE_METRICS
+            ]
+            
+            for i, (s, n) in enumerate(zip(student_positions.tolist(), node_positions.tolist())):
+                epa_id, smaller_epa_id, activity_id, indicator_id = hierarchy.lineage(level, n)
+                rows.append((
+                    new_score_id(), students[s], epa_id, smaller_epa_id, activity_id, indicator_id, level,
+                    *(column[i] for column in columns),
+                    calculation_date
+                ))
+        
+        return rows
+        
+    def _write_calculated_scores(self, connection, rows: List[Tuple], batch_size: int = SCORE_WRITE_BATCH_SIZE):
+        """
+        Insert calculated_scores rows with multi-row INSERT statements and
+        fold the Core_EPA rows into the running EPA statistics, in the
+        caller's transaction
+        """
+        cursor = connection.cursor()
+        
+        try:
+            for start in range(0, len(rows), batch_size):
+                # executemany() rewrites a simple INSERT ... VALUES into one multi-row statement
+                cursor.executemany(INSERT_CALCULATED_SCORES_QUERY, rows[start:start + batch_size])
+        finally:
+            cursor.close()
+        
+        self.statistics.apply(connection, rows)
+    
+    @timed('recompute_cohort')
+    def recompute_cohort(self, student_ids: Optional[List[str]] = None, block_size: int = COHORT_BLOCK_SIZE,
+                         write_batch_size: int = SCORE_WRITE_BATCH_SIZE,
+                         calculation_date: Optional[datetime] = None) -> Dict:
+        """
+        Recompute and persist every score level for a cohort in a single pass.
+        The hierarchy is loaded once, assessments are streamed in student
+        order, and each block's scores replace any rows its students already
+        have at calculation_date and are committed together, so rerunning
+        with the same calculation_date never duplicates scores. Pass
+        calculation_date to stamp several runs (e.g. shards) as one recompute.
+        The rows carry the start time but commit later, so the run is recorded
+        as a rewrite of calculated_scores (see mark_rewritten).
+        """
+        started = time.monotonic()
+        calculation_date = calculation_date or datetime.now().replace(microsecond=0)
+        hierarchy = self.get_hierarchy(reload=True)
+        
+        student_count = 0
+        scores_written = 0
+        
+        try:
+            with self.db_manager.connection() as connection:
+                for students, levels in self.score_students(student_ids, block_size):
+                    rows = self._calculated_score_rows(hierarchy, students, levels, calculation_date)
+                    replaced = self._delete_calculated_scores(connection, students, calculation_date)
+                    self._write_calculated_scores(connection, rows, write_batch_size)
+                    if replaced:
+                        # The replaced rows were already counted in the running statistics
+                        self.statistics.rebuild_students(connection, students)
+                    connection.commit()
+                    
+                    student_count += len(students)
+                    scores_written += len(rows)
+                    logger.info(f"Cohort recompute: {student_count} students, {scores_written} scores written")
+                    
+        except Error as e:
+            logger.error(f"Error recomputing cohort scores: {e}")
+            self._mark_scores_rewritten(scores_written)
+            return {'error': str(e), 'students': student_count, 'scores_written': scores_written}
+        
+        self._mark_scores_rewritten(scores_written)
+        elapsed = time.monotonic() - started
+        return {
+            'students': student_count,
+            'scores_written': scores_written,
+            'elapsed_seconds': elapsed,
+            'students_per_second': student_count / elapsed if elapsed > 0 else 0.0,
+            'calculation_date': calculation_date.isoformat()
+        }
+        
+    def _mark_scores_rewritten(self, scores_written: int) -> None:
+        if not scores_written:
+            return
+        try:
+            with self.db_manager.connection() as connection:
+                mark_rewritten(connection, ['calculated_scores'])
+                connection.commit()
+        except Error as e:
+            logger.error(f"Error recording calculated_scores rewrite: {e}")
+            
+    def _delete_calculated_scores(self, connection, student_ids: List[str], calculation_date: datetime) -> int:
+        """Delete the students' calculated_scores rows stamped calculation_date, in the caller's transaction"""
+        deleted = 0
+        cursor = connection.cursor()
+        try:
+            for start in range(0, len(student_ids), BATCH_CHUNK_SIZE):
+                chunk = student_ids[start:start + BATCH_CHUNK_SIZE]
+                cursor.execute(f"""
+                    DELETE FROM calculated_scores
+                    WHERE calculation_date = %s AND student_id IN ({', '.join(['%s'] * len(chunk))})
+                """, (calculation_date, *chunk))
+                deleted += cursor.rowcount
+        finally:
+            cursor.close()
+        return deleted
+        
+    def clear_recompute(self, student_ids: List[str], calculation_date: datetime) -> int:
+        """
+        Delete the rows an earlier, interrupted attempt of the same recompute
+        (same calculation_date) wrote for these students, so retrying a block
+        never leaves duplicates behind. Their running EPA statistics are
+        recomputed in the same transaction.
+        """
+        with self.db_manager.connection() as connection:
+            deleted = self._delete_calculated_scores(connection, student_ids, calculation_date)
+            if deleted:
+                # The deleted rows were already counted in the running statistics
+                self.statistics.rebuild_students(connection, student_ids)
+                mark_rewritten(connection, ['calculated_scores'])
+            connection.commit()
+        
+        return deleted
+    
+    @timed('refresh_student_scores')
+    def refresh_student_scores(self, connection, student_id: str, indicator_ids: List[str],
+                               calculation_date: Optional[datetime] = None) -> Dict:
+        """
+        Incrementally maintain calculated_scores after new assessments for one student.
+        Only the chain above the touched indicators is rewritten: their Indicator,
+        Activity, Smaller_EPA and Core_EPA rows, the Framework row, and the
+        integration bonuses of pairs involving the affected EPAs. Runs on the
+        caller's connection and does not commit, so it lands in the same
+        transaction as the assessment insert.
+        """
+        calculation_date = calculation_date or datetime.now().replace(microsecond=0)
+        hierarchy = self.get_hierarchy()
+        
+        touched = sorted({hierarchy.indicator_index[i] for i in indicator_ids if i in hierarchy.indicator_index})
+        epa_positions = sorted({int(hierarchy.indicator_epa[i]) for i in touched if hierarchy.indicator_epa[i] >= 0})
+        if not epa_positions:
+            return {'scores_written': 0, 'bonuses_written': 0}
+        
+        # Smaller EPA and Core EPA scores need the student's whole branch, not just the new rows
+        levels = self._score_student_branch(connection, hierarchy, student_id, epa_positions)
+        if levels is None:
+            return {'scores_written': 0, 'bonuses_written': 0}
+        
+        # Framework combines the fresh EPA scores with the stored scores of the other EPAs
+        stored = self._latest_scores(connection, student_id, ['Core_EPA'])
+        for metric in SCORE_METRICS:
+            core = levels['Core_EPA'][metric].copy()
+            for (_, epa_id), values in stored.items():
+                position = hierarchy.epa_index.get(epa_id)
+                if position is not None and position not in epa_positions:
+                    core[0, position] = values[metric]
+            levels['Framework'][metric] = hierarchy.roll_up(core, hierarchy.epa_to_framework)
+        
+        activities = sorted({int(hierarchy.indicator_parent[i]) for i in touched} - {-1})
+        affected = {
+            'Indicator': touched,
+            'Activity': activities,
+            'Smaller_EPA': sorted({int(hierarchy.activity_parent[a]) for a in activities} - {-1}),
+            'Core_EPA': epa_positions,
+            'Framework': [0]
+        }
+        chain = {}
+        for level, positions in affected.items():
+            keep = np.zeros(levels[level]['final_score'].shape[1], dtype=bool)
+            keep[positions] = True
+            chain[level] = {metric: np.where(keep, values, np.nan) for metric, values in levels[level].items()}
+        
+        score_rows = self._calculated_score_rows(hierarchy, [student_id], chain, calculation_date)
+        self._write_calculated_scores(connection, score_rows)
+        
+        bonuses_written = self._refresh_integration_bonuses(
+            connection, student_id, {hierarchy.epa_ids[p] for p in epa_positions}, calculation_date)
+        
+        return {'scores_written': len(score_rows), 'bonuses_written': bonuses_written}
+        
+    def _score_student_branch(self, connection, hierarchy: EPAHierarchy, student_id: str,
+                              epa_positions: List[int]) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+        """
+        All score levels for one student from the assessments under the given
+        Core EPAs only (NaN elsewhere), or None without assessments there
+        """
+        branch = hierarchy.epa_indicators(epa_positions)
+        rows, arrays = self.engine.score_student_assessments(
+            connection, student_id, [hierarchy.indicator_ids[i] for i in branch])
+        if not rows:
+            return None
+        
+        indicator_codes = np.fromiter((hierarchy.indicator_index[row['indicator_id']] for row in rows),
+                                      dtype=np.int64, count=len(rows))
+        sums, counts = hierarchy.accumulate(np.zeros(len(rows), dtype=np.int64), indicator_codes, 1,
+                                            {metric: arrays[metric] for metric in SCORE_METRICS})
+        return hierarchy.rollup(sums, counts)
+        
+    def _latest_scores(self, connection, student_id: str,
+                       score_levels: Optional[List[str]] = None) -> Dict[Tuple[str, Optional[str]], Dict[str, float]]:
+        """Most recent calculated_scores values per (score_level, node ID) for a student"""
+        score_levels = score_levels or list(SCORE_LEVELS)
+        cursor = connection.cursor(dictionary=True)
+        
+        try:
+            cursor.execute(f"""
+                SELECT score_level, epa_id, smaller_epa_id, activity_id, indicator_id,
+                       base_score, context_adjusted_score, tech_adjusted_score, final_score
+                FROM calculated_scores
+                WHERE student_id = %s AND score_level IN ({', '.join(['%s'] * len(score_levels))})
+                ORDER BY calculation_date, score_id
+            """, (student_id, *score_levels))
+            
+            latest = {}
+            for row in cursor.fetchall():
+                column = LEVEL_ID_COLUMNS[row['score_level']]
+                key = (row['score_level'], row[column] if column else None)
+                latest[key] = {
+                    metric: float(row[metric]) if row[metric] is not None else np.nan
+                    for metric in SCORE_METRICS
+                }
+            return latest
+        finally:
+            cursor.close()
+            
+    def _integration_bonus_rows(self, students: List[str], scores: np.ndarray, present: np.ndarray,
+                                calculation_date: datetime, pair_mask: Optional[np.ndarray] = None) -> List[Tuple]:
+        """
+        integration_bonuses rows for every pair (optionally only those in
+        pair_mask) where the student has scores in both EPAs
+        """
+        pairs = score_integration_pairs(scores)
+        evaluated = present[:, INTEGRATION_PRIMARY] & present[:, INTEGRATION_SECONDARY]
+        if pair_mask is not None:
+            evaluated &= pair_mask
+        
+        student_rows, pair_columns = np.nonzero(evaluated)
+        return [
+            (new_bonus_id(), students[row], INTEGRATION_PAIRS[column][0], INTEGRATION_PAIRS[column][1],
+             INTEGRATION_TYPES[column], float(pairs['bonus_points'][row, column]), calculation_date)
+            for row, column in zip(student_rows.tolist(), pair_columns.tolist())
+        ]
+        
+    def _write_integration_bonuses(self, connection, student_ids: List[str], rows: List[Tuple],
+                                   batch_size: int = SCORE_WRITE_BATCH_SIZE,
+                                   pair_mask: Optional[np.ndarray] = None):
+        """
+        Replace the students' integration_bonuses rows (only the pairs in
+        pair_mask, if given) with rows, using multi-row INSERT statements
+        """
+        cursor = connection.cursor()
+        
+        try:
+            if pair_mask is None:
+                for start in range(0, len(student_ids), BATCH_CHUNK_SIZE):
+                    chunk = student_ids[start:start + BATCH_CHUNK_SIZE]
+                    cursor.execute(f"""
+                        DELETE FROM integration_bonuses WHERE student_id IN ({', '.join(['%s'] * len(chunk))})
+                    """, tuple(chunk))
+            else:
+                cursor.executemany("""
+                    DELETE FROM integration_bonuses
+                    WHERE student_id = %s AND primary_epa_id = %s AND secondary_epa_id = %s
+                """, [(student_id, *INTEGRATION_PAIRS[column])
+                      for student_id in student_ids for column in np.flatnonzero(pair_mask).tolist()])
+            for start in range(0, len(rows), batch_size):
+                cursor.executemany(INSERT_INTEGRATION_BONUSES_QUERY, rows[start:start + batch_size])
+        finally:
+            cursor.close()
+            
+    def _refresh_integration_bonuses(self, connection, student_id: str, epa_ids, calculation_date: datetime) -> int:
+        """Re-evaluate and replace the student's integration pairs that involve the given EPAs"""
+        pair_mask = np.array([pair[0] in epa_ids or pair[1] in epa_ids for pair in INTEGRATION_PAIRS])
+        if not pair_mask.any():
+            return 0
+        
+        students, scores, present = self.engine.load_integration_scores(connection, [student_id])
+        rows = self._integration_bonus_rows(students, scores, present, calculation_date, pair_mask)
+        self._write_integration_bonuses(connection, [student_id], rows, pair_mask=pair_mask)
+        return len(rows)
+    
+    @timed('recompute_integration_bonuses')
+    def recompute_integration_bonuses(self, student_ids: Optional[List[str]] = None, persist: bool = False,
+                                      block_size: int = BATCH_CHUNK_SIZE,
+                                      write_batch_size: int = SCORE_WRITE_BATCH_SIZE) -> Dict:
+        """
+        Evaluate every integration pair for a cohort (all students with Core EPA
+        scores when student_ids is None) from grouped aggregates. With
+        persist=True the pairs with evidence in both EPAs replace the
+        students' integration_bonuses rows, so repeated runs never accumulate.
+        """
+        started = time.monotonic()
+        calculation_date = datetime.now().replace(microsecond=0)
+        
+        try:
+            with self.db_manager.connection() as connection:
+                students, scores, present = self.engine.load_integration_scores(connection, student_ids, block_size)
+                rows = self._integration_bonus_rows(students, scores, present, calculation_date)
+                if persist:
+                    self._write_integration_bonuses(
+                        connection, student_ids if student_ids is not None else students, rows, write_batch_size)
+                    connection.commit()
+        except Error as e:
+            logger.error(f"Error recomputing integration bonuses: {e}")
+            return {'error': str(e)}
+        
+        evaluated = present[:, INTEGRATION_PRIMARY] & present[:, INTEGRATION_SECONDARY]
+        tiers, _ = integration_tiers(np.minimum(scores[:, INTEGRATION_PRIMARY], scores[:, INTEGRATION_SECONDARY]))
+        tier_counts = np.bincount(tiers[evaluated], minlength=len(INTEGRATION_LEVELS))
+        
+        elapsed = time.monotonic() - started
+        return {
+            'students': len(students),
+            'pairs_evaluated': len(rows),
+            'bonuses_written': len(rows) if persist else 0,
+            'tier_counts': dict(zip(INTEGRATION_LEVELS, tier_counts.tolist())),
+            'total_bonus_points': float(sum(row[5] for row in rows)),
+            'elapsed_seconds': elapsed,
+            'calculation_date': calculation_date.isoformat()
+        }
+        
+    def select_students(self, connection, program: Optional[str] = None, year_level: Optional[int] = None,
+                        status: Optional[str] = None) -> Optional[List[str]]:
+        """Student IDs matching the cohort filters, or None when no filter is given"""
+        conditions, params = [], []
+        if status is not None:
+            conditions.append("status = %s")
+            params.append(status)
+        if program is not None:
+            conditions.append("program = %s")
+            params.append(program)
+        if year_level is not None:
+            conditions.append("year_level = %s")
+            params.append(year_level)
+        if not conditions:
+            return None
+        
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"SELECT student_id FROM students WHERE {' AND '.join(conditions)} ORDER BY student_id",
+                           tuple(params))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            
+    def _stored_epa_scores(self, connection, hierarchy: EPAHierarchy,
+                           student_ids: Optional[List[str]]) -> Tuple[List[str], np.ndarray]:
+        """Latest stored Core_EPA final score per student (students x EPAs, NaN = none)"""
+        query = """
+            SELECT student_id, epa_id, final_score
+            FROM (
+                SELECT student_id, epa_id, final_score,
+                       ROW_NUMBER() OVER (PARTITION BY student_id, epa_id
+                                          ORDER BY calculation_date DESC, score_id DESC) AS recency
+                FROM calculated_scores
+                WHERE score_level = 'Core_EPA' {student_filter}
+            ) latest
+            WHERE recency = 1
+        """
+        if student_ids is None:
+            batches = [("", ())]
+        else:
+            batches = [
+                (f"AND student_id IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+                for chunk in (student_ids[start:start + BATCH_CHUNK_SIZE]
+                              for start in range(0, len(student_ids), BATCH_CHUNK_SIZE))
+            ]
+        
+        student_index = {}
+        cells = []
+        cursor = connection.cursor()
+        try:
+            for student_filter, params in batches:
+                cursor.execute(query.format(student_filter=student_filter), params)
+                for student_id, epa_id, final_score in cursor.fetchall():
+                    position = hierarchy.epa_index.get(epa_id)
+                    if position is None or final_score is None:
+                        continue
+                    row = student_index.setdefault(student_id, len(student_index))
+                    cells.append((row, position, float(final_score)))
+        finally:
+            cursor.close()
+        
+        scores = np.full((len(student_index), len(hierarchy.epa_ids)), np.nan)
+        if cells:
+            rows, positions, values = zip(*cells)
+            scores[list(rows), list(positions)] = values
+        return list(student_index), scores
+    
+    @timed('entrustment_distribution')
+    def entrustment_distribution(self, student_ids: Optional[List[str]] = None, program: Optional[str] = None,
+                                 year_level: Optional[int] = None, source: str = 'stored') -> Dict:
+        """
+        Per-EPA histogram of entrustment levels 1-5 across a cohort.
+        source='stored' reads the latest maintained Core_EPA scores;
+        source='live' rescores the cohort's assessments in memory first.
+        """
+        if source not in ('stored', 'live'):
+            return {'error': f"Unknown source: {source}"}
+        
+        hierarchy = self.get_hierarchy()
+        
+        try:
+            with self.db_manager.connection() as connection:
+                cohort = self.select_students(connection, program, year_level)
+                if cohort is not None and student_ids is not None:
+                    selected = set(student_ids)
+                    cohort = [student_id for student_id in cohort if student_id in selected]
+                elif cohort is None:
+                    cohort = student_ids
+                
+                if source == 'stored':
+                    students, epa_scores = self._stored_epa_scores(connection, hierarchy, cohort)
+            
+            if source == 'live':
+                students, blocks = [], []
+                for block_students, levels in self.score_students(cohort):
+                    students.extend(block_students)
+                    blocks.append(levels['Core_EPA']['final_score'])
+                epa_scores = np.vstack(blocks) if blocks else np.empty((0, len(hierarchy.epa_ids)))
+        except Error as e:
+            logger.error(f"Error calculating entrustment distribution: {e}")
+            return {'error': str(e)}
+        
+        levels = entrustment_levels(epa_scores)
+        # Column k of the histogram counts students at level k (0 = no evidence)
+        offsets = np.arange(len(hierarchy.epa_ids)) * (ENTRUSTMENT_LEVEL_COUNT + 1)
+        histogram = np.bincount((levels + offsets).ravel(),
+                                minlength=len(hierarchy.epa_ids) * (ENTRUSTMENT_LEVEL_COUNT + 1))
+        histogram = histogram.reshape(len(hierarchy.epa_ids), ENTRUSTMENT_LEVEL_COUNT + 1)
+        
+        epas = []
+        for position, epa_id in enumerate(hierarchy.epa_ids):
+            scored = ~np.isnan(epa_scores[:, position])
+            epa_row = self.reference_cache.get('core_epas', epa_id) or {}
+            epas.append({
+                'epa_id': epa_id,
+                'epa_name': epa_row.get('epa_name'),
+                'students_scored': int(scored.sum()),
+                'students_unscored': int(histogram[position, 0]),
+                'mean_score': float(epa_scores[scored, position].mean()) if scored.any() else None,
+                'levels': {str(level): int(histogram[position, level])
+                           for level in range(1, ENTRUSTMENT_LEVEL_COUNT + 1)}
+            })
+        
+        return {
+            'source': source,
+            'filters': {'program': program, 'year_level': year_level},
+            'student_count': len(students),
+            'epas': epas,
+            'calculation_timestamp': datetime.now().isoformat()
+        }
+        
+    def epa_performance(self) -> Dict:
+        """
+        Core EPA score statistics (students, scores, mean, population stddev,
+        min, max) per EPA and overall, read from the running statistics
+        """
+        try:
+            with self.db_manager.connection() as connection:
+                epas, overall = self.statistics.epa_overview(connection)
+        except Error as e:
+            logger.error(f"Error reading EPA performance statistics: {e}")
+            return {'error': str(e)}
+        
+        for row in epas:
+            row['epa_name'] = (self.reference_cache.get('core_epas', row['epa_id']) or {}).get('epa_name')
+        return {'epas': epas, 'overall': overall}
+        
+    def rebuild_statistics(self) -> Dict:
+        """Recompute the running EPA statistics from calculated_scores"""
+        started = time.monotonic()
+        try:
+            with self.db_manager.connection() as connection:
+                result = self.statistics.rebuild(connection)
+                connection.commit()
+        except Error as e:
+            logger.error(f"Error rebuilding EPA statistics: {e}")
+            return {'error': str(e)}
+        result['elapsed_seconds'] = time.monotonic() - started
+        return result
+        
+    def reconcile_statistics(self, tolerance: float = 1e-6) -> Dict:
+        """Compare the running EPA statistics with the student_epa_summary and epa_performance_overview views"""
+        try:
+            with self.db_manager.connection() as connection:
+                return self.statistics.reconcile(connection, tolerance)
+        except Error as e:
+            logger.error(f"Error reconciling EPA statistics: {e}")
+            return {'error': str(e)}
+            
+    def get_current_scores(self, student_id: str) -> Dict:
+        """
+        Student profile read from the maintained calculated_scores rows
+        (a lookup, no recomputation); same shape as calculate_comprehensive_profile
+        """
+        hierarchy = self.get_hierarchy()
+        
+        try:
+            with self.db_manager.connection() as connection:
+                latest = self._latest_scores(connection, student_id)
+        except Error as e:
+            logger.error(f"Error reading current scores: {e}")
+            return {'error': str(e)}
+        
+        if not latest:
+            return {'error': 'No calculated scores found for this student'}
+        
+        levels = {}
+        for level in SCORE_LEVELS:
+            node_index = hierarchy.node_index(level)
+            levels[level] = {
+                metric: np.full((1, len(node_index)), np.nan) for metric in SCORE_METRICS
+            }
+        
+        for (level, node_id), values in latest.items():
+            position = hierarchy.node_index(level).get(node_id)
+            if position is None:
+                continue
+            for metric in SCORE_METRICS:
+                levels[level][metric][0, position] = values[metric]
+        
+        return self._build_profile(student_id, hierarchy, levels)
+        
+    def _score_student(self, student_id: str) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+        """All score levels for one student, or None without assessments"""
+        blocks = self.score_students([student_id])
+        try:
+            _, levels = next(blocks, (None, None))
+            return levels
+        finally:
+            blocks.close()
+            
+    def _epa_profile(self, hierarchy: EPAHierarchy, levels: Dict[str, Dict[str, np.ndarray]], epa_index: int) -> Dict:
+        """Nested EPA -> smaller EPA -> activity scores for the first student in levels"""
+        def score(level: str, index: int) -> Optional[float]:
+            value = levels[level]['final_score'][0, index]
+            return None if np.isnan(value) else float(value)
+        
+        epa_score = score('Core_EPA', epa_index)
+        smaller_epas = {}
+        
+        for s in np.nonzero(hierarchy.smaller_epa_parent == epa_index)[0].tolist():
+            smaller_score = score('Smaller_EPA', s)
+            if smaller_score is None:
+                continue
+            
+            activities = {
+                hierarchy.activity_ids[a]: score('Activity', a)
+                for a in np.nonzero(hierarchy.activity_parent == s)[0].tolist()
+                if score('Activity', a) is not None
+            }
+            smaller_epas[hierarchy.smaller_epa_ids[s]] = {
+                'score': smaller_score,
+                'activities': activities
+            }
+        
+        return {
+            'epa_id': hierarchy.epa_ids[epa_index],
+            'score': epa_score,
+            'entrustment': self.engine.calculate_entrustment_level(epa_score) if epa_score is not None else None,
+            'smaller_epas': smaller_epas
+        }
+    
+    @timed('calculate_epa_score')
+    def calculate_epa_score(self, student_id: str, epa_id: str) -> Dict:
+        """
+        Calculate one Core EPA score, with its smaller EPA and activity breakdown
+        """
+        hierarchy = self.get_hierarchy()
+        if epa_id not in hierarchy.epa_index:
+            return {'error': 'EPA not found'}
+        
+        try:
+            levels = self._score_student(student_id)
+        except Error as e:
+            logger.error(f"Error calculating EPA score: {e}")
+            return {'error': str(e)}
+        
+        if levels is None:
+            return {'error': 'No assessments found for this student'}
+        
+        result = self._epa_profile(hierarchy, levels, hierarchy.epa_index[epa_id])
+        result['student_id'] = student_id
+        result['calculation_timestamp'] = datetime.now().isoformat()
+        return result
+        
+    def _get_profile_executor(self) -> ThreadPoolExecutor:
+        """
+        Bounded thread pool shared by all fanned-out profile requests, so
+        together they never hold more than profile_workers connections
+        """
+        if self._profile_executor is None:
+            with self._executor_lock:
+                if self._profile_executor is None:
+                    self._profile_executor = ThreadPoolExecutor(
+                        max_workers=max(self.profile_workers, 1), thread_name_prefix='profile')
+        return self._profile_executor
+        
+    def _score_student_epa(self, hierarchy: EPAHierarchy, student_id: str,
+                           epa_position: int, deadline: float) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+        """One Core EPA branch of a profile, on its own pooled connection"""
+        with self.engine.repository.connection(timeout=max(deadline - time.monotonic(), 0.0)) as connection:
+            return self._score_student_branch(connection, hierarchy, student_id, [epa_position])
+            
+    def _score_student_parallel(self, student_id: str, hierarchy: EPAHierarchy,
+                                timeout: float) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+        """
+        Score every Core EPA branch concurrently and merge the branches in EPA
+        order; the framework score is rolled up from the merged EPA scores.
+        Integration pairs span two branches, so _build_profile() evaluates
+        them from the merged Core EPA scores, as on the sequential path.
+        Raises TimeoutError if the branches do not finish within timeout.
+        """
+        deadline = time.monotonic() + timeout
+        executor = self._get_profile_executor()
+        # Each branch runs in a copy of this context so its queries count towards the request's metrics
+        futures = [
+            executor.submit(copy_context().run, self._score_student_epa, hierarchy, student_id, epa_position, deadline)
+            for epa_position in range(len(hierarchy.epa_ids))
+        ]
+        
+        done, pending = wait(futures, timeout=timeout, return_when=FIRST_EXCEPTION)
+        if pending:
+            for future in pending:
+                future.cancel()
+            for future in done:
+                # A failed branch explains the early return better than a timeout
+                if future.exception() is not None:
+                    raise future.exception()
+            raise TimeoutError(f"Profile calculation exceeded {timeout:.1f}s")
+        
+        # Branches cover disjoint nodes, so merging in EPA order is deterministic
+        levels = None
+        for future in futures:
+            branch = future.result()
+            if branch is None:
+                continue
+            if levels is None:
+                levels = branch
+                continue
+            for level in SCORE_LEVELS[:-1]:
+                for metric, values in branch[level].items():
+                    scored = ~np.isnan(values)
+                    levels[level][metric][scored] = values[scored]
+        
+        if levels is not None:
+            for metric in SCORE_METRICS:
+                levels['Framework'][metric] = hierarchy.roll_up(levels['Core_EPA'][metric], hierarchy.epa_to_framework)
+        return levels
+    
+    @timed('calculate_comprehensive_profile')
+    def calculate_comprehensive_profile(self, student_id: str, parallel: Optional[bool] = None,
+                                        timeout: Optional[float] = None) -> Dict:
+        """
+        Calculate every Core EPA and the overall framework score for a student.
+        With parallel=True (the default when profile_workers > 0) each Core EPA
+        is scored concurrently on its own pooled connection, so latency tracks
+        the slowest EPA; the merged result is identical to the sequential one.
+        """
+        hierarchy = self.get_hierarchy()
+        parallel = self.profile_workers > 0 if parallel is None else parallel
+        
+        try:
+            if parallel:
+                levels = self._score_student_parallel(
+                    student_id, hierarchy, self.profile_timeout if timeout is None else timeout)
+            else:
+                levels = self._score_student(student_id)
+        except (TimeoutError, PoolExhaustedError) as e:
+            logger.warning(f"Comprehensive profile for {student_id} timed out: {e}")
+            return {'error': str(e), 'timeout': True}
+        except Error as e:
+            logger.error(f"Error calculating comprehensive profile: {e}")
+            return {'error': str(e)}
+        
+        if levels is None:
+            return {'error': 'No assessments found for this student'}
+        
+        return self._build_profile(student_id, hierarchy, levels)
+        
+    def _integration_profile(self, hierarchy: EPAHierarchy, levels: Dict[str, Dict[str, np.ndarray]]) -> Dict:
+        """
+        Every integration pair for the first student in levels, evaluated from
+        its Core EPA final scores (0.0 where an EPA is unscored, as
+        calculate_integration_bonuses treats them)
+        """
+        core_epa_scores = levels['Core_EPA']['final_score'][0]
+        scores = np.zeros((1, len(INTEGRATION_EPAS)))
+        present = np.zeros(scores.shape, dtype=bool)
+        for column, epa_id in enumerate(INTEGRATION_EPAS):
+            position = hierarchy.epa_index.get(epa_id)
+            if position is not None and not np.isnan(core_epa_scores[position]):
+                scores[0, column] = core_epa_scores[position]
+                present[0, column] = True
+        
+        pairs = score_integration_pairs(scores)
+        evaluated = present[:, INTEGRATION_PRIMARY] & present[:, INTEGRATION_SECONDARY]
+        bonuses = [
+            {
+                'primary_epa': primary_epa,
+                'secondary_epa': secondary_epa,
+                'integration_type': INTEGRATION_TYPES[column],
+                'integration_level': INTEGRATION_LEVELS[pairs['tier'][0, column]],
+                'primary_score': float(pairs['primary_score'][0, column]),
+                'secondary_score': float(pairs['secondary_score'][0, column]),
+                'base_bonus': float(INTEGRATION_BASE_BONUS[column]),
+                'bonus_multiplier': float(pairs['bonus_multiplier'][0, column]),
+                'bonus_points': float(pairs['bonus_points'][0, column]),
+                'evaluated': bool(evaluated[0, column])
+            }
+            for column, (primary_epa, secondary_epa) in enumerate(INTEGRATION_PAIRS)
+        ]
+        return {
+            'total_bonus': float(pairs['bonus_points'][0].sum()),
+            'bonuses': bonuses
+        }
+        
+    def _build_profile(self, student_id: str, hierarchy: EPAHierarchy,
+                       levels: Dict[str, Dict[str, np.ndarray]]) -> Dict:
+        """
+        Framework score, the nested breakdown of every scored Core EPA and the
+        integration pairs between them
+        """
+        framework_score = levels['Framework']['final_score'][0, 0]
+        epa_scores = {}
+        for epa_index, epa_id in enumerate(hierarchy.epa_ids):
+            if not np.isnan(levels['Core_EPA']['final_score'][0, epa_index]):
+                epa_scores[epa_id] = self._epa_profile(hierarchy, levels, epa_index)
+        
+        return {
+            'student_id': student_id,
+            'framework_score': None if np.isnan(framework_score) else float(framework_score),
+            'epa_scores': epa_scores,
+            'epa_count': len(epa_scores),
+            'integration': self._integration_profile(hierarchy, levels),
+            'calculation_timestamp': datetime.now().isoformat()
+        }
@@ -0,0 +1,66 @@
+"""
+EPA Scoring Engine - Analytics Snapshot Command
+File: backend/snapshot.py
+
+Builds and refreshes the memory-mapped columnar snapshot the analytics
+endpoints read (see utils/columnar_snapshot.py):
+
+    python snapshot.py build          # full rebuild into a new version
+    python snapshot.py append         # add rows settled since the watermark; rebuilds after a recompute/clear
+    python snapshot.py info           # watermark and row counts
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from utils.columnar_snapshot import ColumnarSnapshot, SnapshotStore
+from utils.database import DatabaseManager, db_config_from_env
+
+logger = logging.getLogger('snapshot')
+
+def default_snapshot_dir() -> str:
+    """SNAPSHOT_DIR, else backend/snapshot as in app.py"""
+    return os.getenv('SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshot'))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=('build', 'append', 'info'))
+    parser.add_argument('--snapshot-dir', default=None, help='defaults to SNAPSHOT_DIR or backend/snapshot')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'INFO'))
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    load_dotenv()
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    snapshot_dir = args.snapshot_dir or default_snapshot_dir()
+    
+    if args.command == 'info':
+        snapshot = ColumnarSnapshot.open(snapshot_dir)
+        if snapshot is None:
+            logger.error(f"No snapshot in {snapshot_dir}")
+            return 1
+        print(json.dumps(snapshot.freshness(), indent=2))
+        return 0
+    
+    db_manager = DatabaseManager(db_config_from_env(), {'pool_size': 1})
+    store = SnapshotStore(snapshot_dir, db_manager)
+    started = time.monotonic()
+    try:
+        result = store.build() if args.command == 'build' else store.append()
+    finally:
+        db_manager.close()
+    
+    result['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    result['snapshot'] = ColumnarSnapshot.open(snapshot_dir).freshness()
+    print(json.dumps(result, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
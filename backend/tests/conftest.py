@@ -0,0 +1,163 @@
+"""
+EPA Scoring Engine - Test Fixtures
+File: backend/tests/conftest.py
+
+Every test runs without a database server: the SQLite repository is loaded
+from schema.sql and data.sql, the curriculum is filled out and a seeded
+synthetic cohort is added, and the in-memory repository is a snapshot of it.
+"""
+
+from datetime import datetime, timedelta
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.scoring_engine import EPAScoringEngine
+from repositories.memory_repository import InMemoryScoringRepository
+from repositories.sqlite_repository import SQLiteScoringRepository
+from services.scoring_service import ScoringService
+from utils.database import DatabaseManager
+from utils.reference_cache import ReferenceDataCache
+
+SEED = 20240901
+
+# Never connected to: every read the tests make goes through a repository
+DB_CONFIG = {'host': 'localhost', 'database': 'epa_scoring', 'user': 'test', 'password': ''}
+
+# Children given to every curriculum node data.sql leaves without any
+CURRICULUM_SHAPE = (2, 2, 3)  # smaller EPAs per Core EPA, activities per smaller EPA, indicators per activity
+
+COMPETENCY_TYPES = ('Critical_Thinker', 'Nurse_Expert', 'Communicator', 'Leader')
+EVIDENCE_TYPES = ('Direct_Observation', 'Simulation', 'Portfolio', 'Case_Study', 'Peer_Review')
+
+STUDENT_COUNT = 24
+ASSESSMENTS_PER_STUDENT = 60
+FIRST_ASSESSMENT_DATE = datetime(2023, 9, 1, 8, 0)
+
+def _children(rows, parent_key: str, child_key: str):
+    children = {}
+    for row in rows:
+        children.setdefault(row[parent_key], []).append(row[child_key])
+    return children
+
+def _fill_curriculum(repository: SQLiteScoringRepository):
+    """Equal-weight synthetic children for every node without any (as --fill-hierarchy does)"""
+    smaller_count, activity_count, indicator_count = CURRICULUM_SHAPE
+    epa_ids = [row['epa_id'] for row in repository.reference_rows('core_epas')]
+    smaller = _children(repository.reference_rows('smaller_epas'), 'core_epa_id', 'smaller_epa_id')
+    activities = _children(repository.reference_rows('activities'), 'smaller_epa_id', 'activity_id')
+    indicators = _children(repository.reference_rows('indicators'), 'activity_id', 'indicator_id')
+    
+    smaller_rows, activity_rows, indicator_rows = [], [], []
+    for epa_id in epa_ids:
+        if epa_id not in smaller:
+            smaller[epa_id] = [f"{epa_id}_{n}" for n in range(1, smaller_count + 1)]
+            smaller_rows += [(child, epa_id, f"Smaller EPA {child}", 100.0 / smaller_count, order)
+                             for order, child in enumerate(smaller[epa_id], 1)]
+        for smaller_epa_id in smaller[epa_id]:
+            if smaller_epa_id not in activities:
+                activities[smaller_epa_id] = [f"{smaller_epa_id}_{n}" for n in range(1, activity_count + 1)]
+                activity_rows += [(child, smaller_epa_id, f"Activity {child}", 100.0 / activity_count, order)
+                                  for order, child in enumerate(activities[smaller_epa_id], 1)]
+            for activity_id in activities[smaller_epa_id]:
+                if activity_id not in indicators:
+                    indicator_rows += [
+                        (f"{activity_id}_{n}", activity_id, f"Indicator {activity_id}_{n}",
+                         COMPETENCY_TYPES[(n - 1) % len(COMPETENCY_TYPES)], 100.0 / indicator_count, n)
+                        for n in range(1, indicator_count + 1)
+                    ]
+    
+    repository.executemany("""
+        INSERT INTO smaller_epas (smaller_epa_id, core_epa_id, smaller_epa_name, weight_percentage, sequence_order)
+        VALUES (%s, %s, %s, %s, %s)
+    """, smaller_rows)
+    repository.executemany("""
+        INSERT INTO activities (activity_id, smaller_epa_id, activity_name, weight_percentage, sequence_order)
+        VALUES (%s, %s, %s, %s, %s)
+    """, activity_rows)
+    repository.executemany("""
+        INSERT INTO performance_indicators
+        (indicator_id, activity_id, indicator_name, competency_type, weight_percentage, sequence_order)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, indicator_rows)
+
+def _add_cohort(repository: SQLiteScoringRepository, rng: random.Random):
+    """
+    Students with repeated assessments of a few indicators each (so the
+    scoring policies select different evidence), some without a context or
+    technology level, all at distinct times
+    """
+    indicator_ids = [row['indicator_id'] for row in repository.reference_rows('indicators')]
+    context_ids = [row['context_id'] for row in repository.reference_rows('contexts')] + [None]
+    tech_level_ids = [row['tech_level_id'] for row in repository.reference_rows('technology_levels')] + [None]
+    faculty_ids = [row['faculty_id'] for row in repository.reference_rows('faculty_roster')]
+    
+    students = [f"TST_S{number:03d}" for number in range(1, STUDENT_COUNT + 1)]
+    repository.executemany("""
+        INSERT INTO students (student_id, student_name, student_email, program, year_level, enrollment_date, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, [(student_id, f"Student {number:03d}", f"{student_id.lower()}@university.edu",
+           rng.choice(('BSN', 'MSN')), rng.randint(1, 4), '2023-09-01',
+           'Inactive' if number % 8 == 0 else 'Active')
+          for number, student_id in enumerate(students, 1)])
+    
+    assessments = []
+    for student_id in students:
+        studied = rng.sample(indicator_ids, 12)
+        for _ in range(ASSESSMENTS_PER_STUDENT):
+            assessments.append((
+                f"TST_A{len(assessments) + 1:05d}", student_id, rng.choice(studied), rng.choice(faculty_ids),
+                round(rng.uniform(1.0, 5.0), 1), rng.choice(context_ids), rng.choice(tech_level_ids),
+                rng.choice(EVIDENCE_TYPES),
+                FIRST_ASSESSMENT_DATE + timedelta(minutes=len(assessments) * 7 + rng.randint(0, 6))
+            ))
+    # Insert in a shuffled order so no path can rely on insertion order
+    rng.shuffle(assessments)
+    repository.executemany("""
+        INSERT INTO student_assessments
+        (assessment_id, student_id, indicator_id, assessor_id, base_score, context_id, tech_level_id,
+         evidence_type, assessment_date)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, assessments)
+
+@pytest.fixture(scope='session')
+def sqlite_repository():
+    repository = SQLiteScoringRepository.from_sql_files()
+    _fill_curriculum(repository)
+    _add_cohort(repository, random.Random(SEED))
+    yield repository
+    repository.close()
+
+@pytest.fixture(scope='session')
+def memory_repository(sqlite_repository):
+    return InMemoryScoringRepository.from_repository(sqlite_repository)
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def repository(request):
+    """Each test using it runs once per repository"""
+    return request.getfixturevalue(f"{request.param}_repository")
+
+@pytest.fixture(scope='session')
+def db_manager():
+    manager = DatabaseManager(DB_CONFIG)
+    yield manager
+    manager.close()
+
+@pytest.fixture
+def service(repository, db_manager):
+    return ScoringService(DB_CONFIG, db_manager, ReferenceDataCache(db_manager, repository=repository),
+                          repository=repository)
+
+@pytest.fixture
+def uncompiled_engine(repository, db_manager):
+    """Engine without a compiled hierarchy, so activities are scored row by row"""
+    return EPAScoringEngine(DB_CONFIG, db_manager, None, ReferenceDataCache(db_manager, repository=repository),
+                            repository)
+
+@pytest.fixture
+def compiled_engine(service):
+    return service.engine
@@ -0,0 +1,38 @@
+"""
+EPA Scoring Engine - Entrustment Classification Tests
+File: backend/tests/test_entrustment.py
+"""
+
+import numpy as np
+import pytest
+
+from models.scoring_engine import ENTRUSTMENT_DESCRIPTIONS, ENTRUSTMENT_THRESHOLDS, entrustment_levels
+
+# (score, level): each threshold is the lowest score of the next level
+BOUNDARIES = [
+    (1.0, 1), (1.999, 1), (2.0, 2), (2.999, 2), (3.0, 3), (3.499, 3), (3.5, 4), (4.499, 4), (4.5, 5), (5.0, 5),
+    (np.nextafter(2.0, 0.0), 1), (np.nextafter(4.5, 0.0), 4), (0.0, 1), (6.0, 5)
+]
+
+def test_thresholds_are_sorted():
+    assert np.all(np.diff(ENTRUSTMENT_THRESHOLDS) > 0)
+    assert len(ENTRUSTMENT_THRESHOLDS) == len(ENTRUSTMENT_DESCRIPTIONS) - 1
+
+@pytest.mark.parametrize('score, level', BOUNDARIES)
+def test_array_classification_at_boundaries(score, level):
+    assert entrustment_levels([score]).tolist() == [level]
+
+def test_array_classification_in_one_call():
+    scores = np.array([score for score, _ in BOUNDARIES] + [np.nan])
+    assert entrustment_levels(scores).tolist() == [level for _, level in BOUNDARIES] + [0]
+
+@pytest.mark.parametrize('score, level', BOUNDARIES)
+def test_scalar_wraps_the_threshold_table(compiled_engine, score, level):
+    result = compiled_engine.calculate_entrustment_level(score)
+    description, supervision = ENTRUSTMENT_DESCRIPTIONS[level]
+    assert result['entrustment_level'] == level
+    assert result['description'] == description
+    assert result['supervision_type'] == supervision
+
+def test_scalar_without_evidence_is_novice(compiled_engine):
+    assert compiled_engine.calculate_entrustment_level(float('nan'))['entrustment_level'] == 1
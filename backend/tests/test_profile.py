@@ -0,0 +1,41 @@
+"""
+EPA Scoring Engine - Comprehensive Profile Tests
+File: backend/tests/test_profile.py
+"""
+
+import pytest
+
+from models.scoring_engine import INTEGRATION_PAIRS
+
+def _without_timestamps(value):
+    """The profile with every calculation_timestamp (it nests one per entrustment) removed"""
+    if isinstance(value, dict):
+        return {key: _without_timestamps(item) for key, item in value.items() if key != 'calculation_timestamp'}
+    return value
+
+def test_parallel_profile_matches_sequential(repository, service):
+    for student_id in repository.assessed_student_ids()[:6]:
+        sequential = service.calculate_comprehensive_profile(student_id, parallel=False)
+        parallel = service.calculate_comprehensive_profile(student_id, parallel=True, timeout=30.0)
+        
+        assert 'error' not in sequential
+        assert _without_timestamps(parallel) == _without_timestamps(sequential)
+
+def test_profile_evaluates_integration_pairs(repository, service):
+    evaluated = 0
+    for student_id in repository.assessed_student_ids():
+        profile = service.calculate_comprehensive_profile(student_id, parallel=True, timeout=30.0)
+        bonuses = profile['integration']['bonuses']
+        
+        assert [(bonus['primary_epa'], bonus['secondary_epa']) for bonus in bonuses] == list(INTEGRATION_PAIRS)
+        for bonus in bonuses:
+            scored = bonus['primary_epa'] in profile['epa_scores'] and bonus['secondary_epa'] in profile['epa_scores']
+            assert bonus['evaluated'] == scored
+            if scored:
+                assert bonus['primary_score'] == profile['epa_scores'][bonus['primary_epa']]['score']
+                evaluated += 1
+            else:
+                assert bonus['bonus_points'] == 0.0
+        assert profile['integration']['total_bonus'] == pytest.approx(sum(bonus['bonus_points'] for bonus in bonuses))
+    
+    assert evaluated > 0
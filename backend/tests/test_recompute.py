@@ -0,0 +1,49 @@
+"""
+EPA Scoring Engine - Sharded Recompute Equivalence Tests
+File: backend/tests/test_recompute.py
+"""
+
+from datetime import datetime
+
+import pytest
+
+from recompute import shard_students
+
+CALCULATION_DATE = datetime(2024, 6, 30, 12, 0)
+
+def _score_rows(service, student_ids, block_size):
+    """
+    calculated_scores rows recompute_cohort() would write for the students,
+    without the generated score_id
+    """
+    hierarchy = service.get_hierarchy(reload=True)
+    rows = []
+    for students, levels in service.score_students(student_ids, block_size):
+        rows.extend(row[1:] for row in service._calculated_score_rows(hierarchy, students, levels, CALCULATION_DATE))
+    return rows
+
+def _sort_key(row):
+    return tuple('' if value is None else str(value) for value in row)
+
+@pytest.mark.parametrize('shard_size', [1, 5, 7, 1000])
+def test_shards_partition_the_selection(shard_size):
+    students = [f"S{number:03d}" for number in range(23)]
+    shards = shard_students(students, shard_size)
+    assert [student for shard in shards for student in shard] == students
+    assert all(0 < len(shard) <= shard_size for shard in shards)
+
+@pytest.mark.parametrize('shard_size, block_size', [(5, 10000), (7, 3), (1, 10000), (24, 50)])
+def test_sharded_rows_equal_single_process_rows(repository, service, shard_size, block_size):
+    students = repository.assessed_student_ids()
+    single = _score_rows(service, students, 10000)
+    
+    sharded = []
+    for shard in shard_students(students, shard_size):
+        sharded.extend(_score_rows(service, shard, block_size))
+    
+    assert len(single) > len(students)
+    assert sorted(sharded, key=_sort_key) == sorted(single, key=_sort_key)
+
+def test_every_level_is_written(repository, service):
+    levels = {row[5] for row in _score_rows(service, repository.assessed_student_ids()[:3], 10000)}
+    assert levels == {'Indicator', 'Activity', 'Smaller_EPA', 'Core_EPA', 'Framework'}
@@ -0,0 +1,131 @@
+"""
+EPA Scoring Engine - Inter-Rater Reliability Tests
+File: backend/tests/test_reliability.py
+"""
+
+import numpy as np
+import pytest
+
+from models.reliability import ALPHA_BANDS, ICC_BANDS, RatingMatrix, reliability_band
+
+# Shrout & Fleiss (1979), Table 2: 6 targets x 4 judges; ICC(1,1) = 0.17
+SHROUT_FLEISS = [[9, 2, 5, 8], [6, 1, 3, 2], [8, 4, 6, 8], [7, 1, 2, 6], [10, 5, 6, 9], [6, 2, 4, 7]]
+
+# Krippendorff (2011), "Computing Krippendorff's Alpha-Reliability": 4 observers x 12 units
+# with missing values; interval alpha = 0.849
+KRIPPENDORFF = {
+    'A': [1, 2, 3, 3, 2, 1, 4, 1, 2, None, None, None],
+    'B': [1, 2, 3, 3, 2, 2, 4, 1, 2, 5, None, 3],
+    'C': [None, 3, 3, 3, 2, 3, 4, 2, 2, 5, 1, None],
+    'D': [1, 2, 3, 3, 2, 4, 4, 1, 2, 5, 1, None]
+}
+
+def _matrix(ratings):
+    """RatingMatrix from (group, unit, assessor, score) tuples"""
+    matrix = RatingMatrix(initial_capacity=4)
+    groups, units, assessors, scores = zip(*ratings)
+    matrix.add(list(groups), [(group, unit) for group, unit in zip(groups, units)], list(assessors),
+               np.array(scores, dtype=float))
+    return matrix
+
+def _hand_icc(units):
+    """One-way random effects ICC(1) from the ANOVA table, with n0 for unequal group sizes"""
+    units = [np.asarray(values, dtype=float) for values in units if len(values) >= 2]
+    k = len(units)
+    n = sum(len(values) for values in units)
+    grand_mean = np.concatenate(units).mean()
+    ss_between = sum(len(values) * (values.mean() - grand_mean) ** 2 for values in units)
+    ss_within = sum(((values - values.mean()) ** 2).sum() for values in units)
+    ms_between = ss_between / (k - 1)
+    ms_within = ss_within / (n - k)
+    n0 = (n - sum(len(values) ** 2 for values in units) / n) / (k - 1)
+    return (ms_between - ms_within) / (ms_between + (n0 - 1) * ms_within)
+
+def _hand_alpha(units):
+    """Krippendorff's interval alpha by enumerating every pair of pairable values"""
+    units = [list(map(float, values)) for values in units if len(values) >= 2]
+    values = [value for unit in units for value in unit]
+    n = len(values)
+    observed = sum(
+        sum((a - b) ** 2 for i, a in enumerate(unit) for j, b in enumerate(unit) if i != j) / (len(unit) - 1)
+        for unit in units
+    ) / n
+    expected = sum((a - b) ** 2 for i, a in enumerate(values) for j, b in enumerate(values) if i != j) / (n * (n - 1))
+    return 1.0 - observed / expected
+
+def test_shrout_fleiss_icc():
+    matrix = _matrix([('sf', target, judge, score)
+                      for target, row in enumerate(SHROUT_FLEISS) for judge, score in enumerate(row)])
+    stats = matrix.statistics()
+    assert stats['icc'][0] == pytest.approx(0.17, abs=0.005)
+    assert stats['icc'][0] == pytest.approx(_hand_icc(SHROUT_FLEISS), rel=1e-12)
+    assert (stats['units'][0], stats['ratings'][0], stats['raters'][0]) == (6, 24, 4)
+
+def test_krippendorff_interval_alpha():
+    matrix = _matrix([('k', unit, observer, score)
+                      for observer, scores in KRIPPENDORFF.items()
+                      for unit, score in enumerate(scores) if score is not None])
+    stats = matrix.statistics()
+    units = [[scores[unit] for scores in KRIPPENDORFF.values() if scores[unit] is not None] for unit in range(12)]
+    assert stats['alpha'][0] == pytest.approx(0.849, abs=0.0005)
+    assert stats['alpha'][0] == pytest.approx(_hand_alpha(units), rel=1e-12)
+    # The twelfth unit has a single value and carries no agreement information
+    assert stats['units'][0] == 11
+
+@pytest.mark.parametrize('seed', range(5))
+def test_unbalanced_groups_match_hand_computation(seed):
+    rng = np.random.default_rng(seed)
+    ratings = []
+    for group in ('EPA_001_1_1_1', 'EPA_001_1_1_2', 'EPA_002_1_1_1'):
+        for unit in range(int(rng.integers(3, 12))):
+            true_score = rng.uniform(1.0, 5.0)
+            for assessor in rng.choice(8, size=int(rng.integers(1, 6)), replace=False):
+                ratings.append((group, unit, f"FAC_{assessor}", round(true_score + rng.normal(0, 0.6), 1)))
+    
+    matrix = _matrix(ratings)
+    stats = matrix.statistics()
+    for position, group in enumerate(matrix.groups):
+        units = {}
+        for rating_group, unit, _, score in ratings:
+            if rating_group == group:
+                units.setdefault(unit, []).append(score)
+        if sum(len(values) >= 2 for values in units.values()) < 2:
+            assert np.isnan(stats['icc'][position])
+            continue
+        assert stats['icc'][position] == pytest.approx(_hand_icc(units.values()), rel=1e-9)
+        assert stats['alpha'][position] == pytest.approx(_hand_alpha(units.values()), rel=1e-9)
+
+def test_repeated_ratings_by_one_assessor_count_once():
+    single = _matrix([('g', unit, rater, score) for unit, row in enumerate(SHROUT_FLEISS)
+                      for rater, score in enumerate(row)])
+    # Each judge's rating split into two ratings with the same mean
+    repeated = _matrix([('g', unit, rater, score + offset) for unit, row in enumerate(SHROUT_FLEISS)
+                        for rater, score in enumerate(row) for offset in (-0.5, 0.5)])
+    assert repeated.rating_count == 2 * single.rating_count
+    assert repeated.statistics()['icc'][0] == pytest.approx(single.statistics()['icc'][0], rel=1e-12)
+    assert repeated.statistics()['alpha'][0] == pytest.approx(single.statistics()['alpha'][0], rel=1e-12)
+
+def test_incremental_updates_match_one_load():
+    ratings = [('k', unit, observer, score) for observer, scores in KRIPPENDORFF.items()
+               for unit, score in enumerate(scores) if score is not None]
+    incremental = RatingMatrix(initial_capacity=2)
+    for start in range(0, len(ratings), 5):
+        chunk = ratings[start:start + 5]
+        incremental.add([r[0] for r in chunk], [(r[0], r[1]) for r in chunk], [r[2] for r in chunk],
+                         np.array([r[3] for r in chunk], dtype=float))
+    
+    loaded = _matrix(ratings).statistics()
+    for name, values in incremental.statistics().items():
+        np.testing.assert_allclose(values, loaded[name], rtol=1e-12)
+
+def test_insufficient_data():
+    stats = _matrix([('g', 0, 'A', 3.0), ('g', 0, 'B', 4.0), ('g', 1, 'A', 2.0)]).statistics()
+    assert np.isnan(stats['icc'][0]) and np.isnan(stats['alpha'][0])
+    assert reliability_band(stats['icc'][0], ICC_BANDS) == 'Insufficient_Data'
+
+@pytest.mark.parametrize('value, bands, label', [
+    (0.9, ICC_BANDS, 'Excellent'), (0.75, ICC_BANDS, 'Good'), (0.74, ICC_BANDS, 'Moderate'), (-0.2, ICC_BANDS, 'Poor'),
+    (0.8, ALPHA_BANDS, 'Acceptable'), (0.7, ALPHA_BANDS, 'Tentative'), (0.1, ALPHA_BANDS, 'Unacceptable')
+])
+def test_reliability_bands(value, bands, label):
+    assert reliability_band(value, bands) == label
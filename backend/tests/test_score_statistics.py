@@ -0,0 +1,99 @@
+"""
+EPA Scoring Engine - Running Score Statistics Tests
+File: backend/tests/test_score_statistics.py
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from models.score_statistics import Moments, _without, batch_moments
+
+def _moments(scores, dates=None) -> Moments:
+    """Moments of one set of scores, folded in one at a time"""
+    moments = Moments()
+    for position, score in enumerate(scores):
+        moments.merge(Moments(1, float(score), 0.0, float(score), float(score),
+                              dates[position] if dates is not None else None))
+    return moments
+
+def _assert_matches_numpy(moments: Moments, scores: np.ndarray):
+    assert moments.count == len(scores)
+    assert moments.mean == pytest.approx(scores.mean(), rel=1e-12)
+    assert moments.m2 == pytest.approx(((scores - scores.mean()) ** 2).sum(), rel=1e-9)
+    assert moments.stddev == pytest.approx(scores.std(), rel=1e-9)
+    assert moments.sample_stddev == pytest.approx(scores.std(ddof=1), rel=1e-9)
+    assert moments.minimum == scores.min()
+    assert moments.maximum == scores.max()
+
+@pytest.mark.parametrize('parts', [1, 2, 7, 50])
+def test_merged_chunks_match_numpy(parts):
+    rng = np.random.default_rng(parts)
+    scores = np.round(rng.uniform(1.0, 5.0, 500), 3)
+    
+    merged = Moments()
+    for chunk in np.array_split(scores, parts):
+        merged.merge(_moments(chunk))
+    _assert_matches_numpy(merged, scores)
+
+def test_merge_order_does_not_matter():
+    rng = np.random.default_rng(7)
+    chunks = [rng.normal(3.5, 0.8, size) for size in (1, 13, 200, 2)]
+    forward, backward = Moments(), Moments()
+    for chunk in chunks:
+        forward.merge(_moments(chunk))
+    for chunk in reversed(chunks):
+        backward.merge(_moments(chunk))
+    
+    assert forward.count == backward.count
+    assert forward.mean == pytest.approx(backward.mean, rel=1e-12)
+    assert forward.m2 == pytest.approx(backward.m2, rel=1e-9)
+
+def test_merge_is_stable_far_from_zero():
+    """Large offsets cancel in the naive sum-of-squares formula, not in Welford's"""
+    scores = 1e9 + np.random.default_rng(3).uniform(0.0, 1.0, 1000)
+    merged = Moments()
+    for chunk in np.array_split(scores, 10):
+        merged.merge(_moments(chunk))
+    assert merged.m2 == pytest.approx(((scores - scores.mean()) ** 2).sum(), rel=1e-6)
+
+def test_merging_empty_moments_changes_nothing():
+    moments = _moments([2.0, 4.0])
+    moments.merge(Moments())
+    assert (moments.count, moments.mean, moments.m2) == (2, 3.0, 2.0)
+    
+    empty = Moments().merge(_moments([2.0, 4.0]))
+    assert (empty.count, empty.mean, empty.m2, empty.minimum, empty.maximum) == (2, 3.0, 2.0, 2.0, 4.0)
+    assert Moments().stddev is None
+
+def test_merge_keeps_latest_date():
+    start = datetime(2024, 1, 1)
+    dates = [start + timedelta(days=day) for day in (3, 1, 9, 2)]
+    merged = _moments([1.0, 2.0], dates[:2]).merge(_moments([3.0, 4.0], dates[2:]))
+    assert merged.last == dates[2]
+    assert _moments([1.0], [None]).merge(_moments([2.0], [start])).last == start
+
+def test_batch_moments_match_numpy():
+    rng = np.random.default_rng(11)
+    keys = [('S1', 'EPA_001'), ('S2', 'EPA_001'), ('S1', 'EPA_002')]
+    picks = rng.integers(0, len(keys), 300)
+    scores = np.round(rng.uniform(1.0, 5.0, 300), 3)
+    dates = [datetime(2024, 1, 1) + timedelta(hours=int(hour)) for hour in rng.permutation(300)]
+    
+    moments = batch_moments([keys[pick] for pick in picks], scores, dates)
+    for position, key in enumerate(keys):
+        selected = picks == position
+        _assert_matches_numpy(moments[key], scores[selected])
+        assert moments[key].last == max(date for date, chosen in zip(dates, selected) if chosen)
+
+def test_without_inverts_merge():
+    rng = np.random.default_rng(5)
+    kept, removed = rng.uniform(1.0, 5.0, 40), rng.uniform(1.0, 5.0, 15)
+    total = _moments(kept).merge(_moments(removed))
+    
+    remainder = _without(total, _moments(removed))
+    assert remainder.count == len(kept)
+    assert remainder.mean == pytest.approx(kept.mean(), rel=1e-12)
+    assert remainder.m2 == pytest.approx(((kept - kept.mean()) ** 2).sum(), rel=1e-9)
+    assert _without(total, total).count == 0
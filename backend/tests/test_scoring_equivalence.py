@@ -0,0 +1,128 @@
+"""
+EPA Scoring Engine - Scalar and Batch Scoring Equivalence Tests
+File: backend/tests/test_scoring_equivalence.py
+"""
+
+import numpy as np
+import pytest
+
+from conftest import DB_CONFIG
+from models.scoring_policy import SCORING_POLICIES
+from services.scoring_service import ScoringService
+from utils.reference_cache import ReferenceDataCache
+
+INDICATOR_FIELDS = ('base_score', 'context_multiplier', 'tech_multiplier', 'context_adjusted_score',
+                    'tech_adjusted_score', 'final_score', 'indicator_weight', 'final_weighted_score',
+                    'competency_type')
+
+# Settings each policy is exercised with (the defaults, then explicit ones)
+POLICY_SETTINGS = [
+    (policy, settings)
+    for policy in SCORING_POLICIES
+    for settings in ({}, {'last_n': 2, 'half_life_days': 30.0} if policy == 'time_decayed'
+                     else {'last_n': 2} if policy == 'last_n' else {})
+]
+
+def _assessment_ids(repository):
+    return [row['assessment_id'] for rows in repository.iter_assessments() for row in rows]
+
+def _student_activities(repository):
+    """Every (student, activity) pair with at least one assessment"""
+    activity_of = {row['indicator_id']: row['activity_id'] for row in repository.reference_rows('indicators')}
+    return sorted({
+        (row['student_id'], activity_of[row['indicator_id']])
+        for rows in repository.iter_assessments() for row in rows
+    })
+
+def test_indicator_batch_matches_scalar(repository, compiled_engine):
+    assessment_ids = _assessment_ids(repository)
+    batch = compiled_engine.calculate_indicator_scores_batch(assessment_ids=assessment_ids, chunk_size=97)
+    
+    assert batch['count'] == len(assessment_ids)
+    for score in batch['scores']:
+        scalar = compiled_engine.calculate_indicator_score(score['assessment_id'])
+        for field in INDICATOR_FIELDS:
+            assert score[field] == scalar[field], (score['assessment_id'], field)
+
+def test_indicator_batch_filters_select_the_same_rows(repository, compiled_engine):
+    students = repository.assessed_student_ids()[:5]
+    by_student = compiled_engine.calculate_indicator_scores_batch(student_ids=students)
+    by_id = compiled_engine.calculate_indicator_scores_batch(assessment_ids=[
+        row['assessment_id'] for rows in repository.iter_assessments(student_ids=students) for row in rows
+    ])
+    
+    def values(result):
+        return sorted((score['assessment_id'], *(score[field] for field in INDICATOR_FIELDS))
+                      for score in result['scores'])
+    
+    assert by_student['count'] > 0
+    assert values(by_student) == values(by_id)
+
+@pytest.mark.parametrize('policy, settings', POLICY_SETTINGS)
+def test_activity_compiled_matches_row_by_row(repository, compiled_engine, uncompiled_engine, policy, settings):
+    for student_id, activity_id in _student_activities(repository):
+        compiled = compiled_engine.calculate_activity_score(student_id, activity_id, policy, **settings)
+        row_by_row = uncompiled_engine.calculate_activity_score(student_id, activity_id, policy, **settings)
+        
+        assert compiled['policy'] == row_by_row['policy'] == policy
+        assert compiled['indicator_count'] == row_by_row['indicator_count']
+        assert compiled['activity_score'] == pytest.approx(row_by_row['activity_score'], rel=1e-12)
+        assert ([score['indicator_id'] for score in compiled['indicator_scores']]
+                == [score['indicator_id'] for score in row_by_row['indicator_scores']])
+
+@pytest.mark.parametrize('policy, settings', POLICY_SETTINGS)
+def test_activity_evidence_is_windowed_per_indicator(repository, compiled_engine, policy, settings):
+    per_indicator = {'all': None, 'latest': 1, 'last_n': settings.get('last_n', 3),
+                     'time_decayed': settings.get('last_n', 10)}[policy]
+    
+    for student_id, activity_id in _student_activities(repository)[:40]:
+        result = compiled_engine.calculate_activity_score(student_id, activity_id, policy, **settings)
+        counts = {}
+        for score in result['indicator_scores']:
+            counts[score['indicator_id']] = counts.get(score['indicator_id'], 0) + 1
+        if per_indicator is not None:
+            assert max(counts.values()) <= per_indicator
+        evidence = [score['evidence_weight'] for score in result['indicator_scores']]
+        if policy == 'time_decayed':
+            assert all(0.0 < weight <= 1.0 for weight in evidence)
+        else:
+            assert evidence == [1.0] * len(evidence)
+
+def test_policies_select_different_evidence(repository, compiled_engine):
+    """Guards the tests above against a cohort on which every policy agrees"""
+    counts = {policy: 0 for policy in SCORING_POLICIES}
+    for student_id, activity_id in _student_activities(repository):
+        for policy in SCORING_POLICIES:
+            counts[policy] += compiled_engine.calculate_activity_score(student_id, activity_id, policy)['indicator_count']
+    
+    assert counts['latest'] < counts['last_n'] < counts['time_decayed'] <= counts['all']
+
+def test_activity_scores_match_cohort_rollup(repository, service, compiled_engine):
+    """score_students() rolls up every assessment, i.e. the 'all' policy"""
+    hierarchy = service.get_hierarchy()
+    levels = {}
+    for students, block in service.score_students(block_size=200):
+        for position, student_id in enumerate(students):
+            levels[student_id] = block['Activity']['final_score'][position]
+    
+    for student_id, activity_id in _student_activities(repository):
+        scalar = compiled_engine.calculate_activity_score(student_id, activity_id, 'all')
+        rolled_up = levels[student_id][hierarchy.activity_index[activity_id]]
+        assert not np.isnan(rolled_up)
+        assert scalar['activity_score'] == pytest.approx(float(rolled_up), rel=1e-12)
+
+def test_repositories_score_identically(sqlite_repository, memory_repository, db_manager):
+    def core_epa_scores(repository):
+        service = ScoringService(DB_CONFIG, db_manager, ReferenceDataCache(db_manager, repository=repository),
+                                 repository=repository)
+        scores = {}
+        for students, levels in service.score_students(block_size=300):
+            for position, student_id in enumerate(students):
+                scores[student_id] = levels['Core_EPA']['final_score'][position]
+        return scores
+    
+    sqlite_scores = core_epa_scores(sqlite_repository)
+    memory_scores = core_epa_scores(memory_repository)
+    assert sqlite_scores.keys() == memory_scores.keys()
+    for student_id, scores in sqlite_scores.items():
+        np.testing.assert_array_equal(scores, memory_scores[student_id])
@@ -0,0 +1,409 @@
+"""
+EPA Scoring Engine - Memory-Mapped Columnar Snapshot
+File: backend/utils/columnar_snapshot.py
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer by convention
+    fcntl = None
+
+from utils.database import rewrite_counts
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Rows per fetchmany() while building or appending
+SNAPSHOT_FETCH_SIZE = 20000
+
+# Rows are stamped when inserted, not when committed, so an append only takes
+# rows stamped at least this long before the database's clock: a transaction
+# still open past it (or an app host clock that far behind) would be missed.
+# Back-dated bulk writes are covered by table_rewrites instead (full rebuild).
+SNAPSHOT_LAG_SECONDS = 60
+
+# Codes are int32 positions in a per-domain dictionary; NULL is -1
+NULL_CODE = -1
+# Times are int64 seconds since 1970-01-01 (naive, as stored); NULL is the minimum
+NULL_TIME = np.iinfo(np.int64).min
+
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+# Snapshot tables: source query, watermark (time column, unique id column) the
+# rows are ordered and appended by (up to the settled horizon, see
+# SNAPSHOT_LAG_SECONDS), and the stored columns. 'code' columns are
+# dictionary encoded against a domain shared by every table, so e.g. student
+# codes mean the same student in assessments and in scores.
+SNAPSHOT_TABLES = {
+    'assessments': {
+        'table': 'student_assessments',
+        'watermark': ('created_date', 'assessment_id'),
+        'columns': {
+            'student_id': ('code', 'student'),
+            'indicator_id': ('code', 'indicator'),
+            'assessor_id': ('code', 'assessor'),
+            'context_id': ('code', 'context'),
+            'tech_level_id': ('code', 'tech_level'),
+            'evidence_type': ('code', 'evidence_type'),
+            'base_score': ('float', None),
+            'assessment_date': ('time', None)
+        }
+    },
+    'scores': {
+        'table': 'calculated_scores',
+        'watermark': ('calculation_date', 'score_id'),
+        'columns': {
+            'student_id': ('code', 'student'),
+            'epa_id': ('code', 'epa'),
+            'smaller_epa_id': ('code', 'smaller_epa'),
+            'activity_id': ('code', 'activity'),
+            'indicator_id': ('code', 'indicator'),
+            'score_level': ('code', 'score_level'),
+            'base_score': ('float', None),
+            'final_score': ('float', None),
+            'calculation_date': ('time', None)
+        }
+    }
+}
+
+# Little-endian on disk whatever the host
+COLUMN_DTYPES = {'code': np.dtype('<i4'), 'float': np.dtype('<f8'), 'time': np.dtype('<i8')}
+
+MANIFEST_FILE = 'manifest.json'
+
+def _to_seconds(value) -> int:
+    if value is None:
+        return NULL_TIME
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    return int((value.replace(tzinfo=None) - _UNIX_EPOCH).total_seconds())
+
+def _write_json(path: str, data) -> None:
+    """Write atomically, so readers never see a partial file"""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, ensure_ascii=False, default=str)
+    os.replace(temporary, path)
+
+def _read_json(path: str):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+class ColumnarSnapshot:
+    """
+    Read-only view of a snapshot: every column memory-mapped, every
+    dictionary loaded, all consistent with one manifest.
+
+    The column files are plain little-endian arrays opened with np.memmap,
+    so every process (e.g. each gunicorn worker) shares the same page cache
+    pages instead of holding its own copy. Rows past the manifest's count
+    (an append in progress) are never seen.
+    """
+    
+    def __init__(self, root: str, manifest: Dict):
+        self.root = root
+        self.manifest = manifest
+        self.data_dir = os.path.join(root, manifest['data_dir'])
+        
+        self.dictionaries: Dict[str, List[str]] = {}
+        for domain, size in manifest['dictionaries'].items():
+            path = os.path.join(self.data_dir, 'dictionaries', f"{domain}.json")
+            self.dictionaries[domain] = _read_json(path)[:size] if size else []
+        self._indexes: Dict[str, Dict[str, int]] = {}
+        
+        self.tables: Dict[str, Dict[str, np.ndarray]] = {}
+        for table, table_manifest in manifest['tables'].items():
+            rows = table_manifest['rows']
+            columns = {}
+            for column, (kind, _) in SNAPSHOT_TABLES[table]['columns'].items():
+                dtype = COLUMN_DTYPES[kind]
+                if rows:
+                    columns[column] = np.memmap(
+                        os.path.join(self.data_dir, table, f"{column}.bin"), dtype=dtype, mode='r', shape=(rows,))
+                else:
+                    columns[column] = np.empty(0, dtype=dtype)
+            self.tables[table] = columns
+    
+    @classmethod
+    def open(cls, root: str) -> Optional['ColumnarSnapshot']:
+        """The current snapshot under root, or None if none has been built"""
+        path = os.path.join(root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        return cls(root, _read_json(path))
+        
+    def rows(self, table: str) -> int:
+        return self.manifest['tables'][table]['rows']
+        
+    def column(self, table: str, column: str) -> np.ndarray:
+        return self.tables[table][column]
+        
+    def code(self, domain: str, value: str) -> int:
+        """Code of a value in a domain dictionary (NULL_CODE if absent)"""
+        index = self._indexes.get(domain)
+        if index is None:
+            index = self._indexes[domain] = {item: code for code, item in enumerate(self.dictionaries.get(domain, []))}
+        return index.get(value, NULL_CODE)
+        
+    def decode(self, domain: str, codes) -> List[Optional[str]]:
+        dictionary = self.dictionaries[domain]
+        return [dictionary[code] if code != NULL_CODE else None for code in codes]
+        
+    def freshness(self) -> Dict:
+        """Build/append times and per-table watermark (rows stamped up to it are included) and row count"""
+        return {
+            'version': self.manifest['version'],
+            'built_at': self.manifest['built_at'],
+            'updated_at': self.manifest['updated_at'],
+            'tables': {
+                table: {'rows': info['rows'], 'watermark': info['watermark']}
+                for table, info in self.manifest['tables'].items()
+            }
+        }
+
+class SnapshotStore:
+    """
+    Builds, appends to and opens the snapshot under one directory.
+
+    Layout: manifest.json points at a data directory (v<N>/) holding
+    <table>/<column>.bin and dictionaries/<domain>.json. An append adds the
+    rows stamped between each table's watermark and the settled horizon
+    (database time - lag_seconds) to the end of the column files and
+    dictionaries, then replaces the manifest atomically; a full build writes
+    a new data directory and switches the manifest to it. An append turns
+    into a full build when a source table was rewritten since the build
+    (see utils.database.mark_rewritten), since deletes and back-dated rows
+    never pass the watermark. Writers are serialised with a lock file;
+    readers never block.
+    """
+    
+    def __init__(self, root: str, db_manager, check_interval: float = 5.0,
+                 lag_seconds: float = SNAPSHOT_LAG_SECONDS):
+        self.root = root
+        self.db_manager = db_manager
+        self.check_interval = check_interval
+        self.lag_seconds = lag_seconds
+        
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ColumnarSnapshot] = None
+        self._manifest_mtime = None
+        self._checked_at = 0.0
+        
+    def current(self) -> Optional[ColumnarSnapshot]:
+        """
+        The latest snapshot, reopened when another process (or this one)
+        has committed a new manifest; checked at most every check_interval s
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._snapshot is not None and now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            
+            try:
+                mtime = os.stat(os.path.join(self.root, MANIFEST_FILE)).st_mtime_ns
+            except FileNotFoundError:
+                self._snapshot = None
+                return None
+            if self._snapshot is None or mtime != self._manifest_mtime:
+                self._snapshot = ColumnarSnapshot.open(self.root)
+                self._manifest_mtime = mtime
+            return self._snapshot
+            
+    def _acquire_writer(self):
+        os.makedirs(self.root, exist_ok=True)
+        handle = open(os.path.join(self.root, '.lock'), 'w')
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        return handle
+        
+    def build(self) -> Dict:
+        """Write a complete new snapshot and switch to it"""
+        handle = self._acquire_writer()
+        try:
+            previous = ColumnarSnapshot.open(self.root)
+            version = (previous.manifest['version'] + 1) if previous else 1
+            manifest = {
+                'format': SNAPSHOT_FORMAT_VERSION,
+                'version': version,
+                'data_dir': f"v{version}",
+                'built_at': datetime.now(timezone.utc).isoformat(),
+                'updated_at': None,
+                'dictionaries': {},
+                'tables': {table: {'rows': 0, 'watermark': None, 'rewrites': None} for table in SNAPSHOT_TABLES}
+            }
+            data_dir = os.path.join(self.root, manifest['data_dir'])
+            shutil.rmtree(data_dir, ignore_errors=True)
+            for table in SNAPSHOT_TABLES:
+                os.makedirs(os.path.join(data_dir, table))
+            os.makedirs(os.path.join(data_dir, 'dictionaries'))
+            
+            appended = self._append(manifest, {})
+            
+            # Old data directories stay readable by processes that still map them
+            if previous is not None:
+                self._remove_old_versions(keep=(previous.manifest['data_dir'], manifest['data_dir']))
+            return {'version': version, 'full': True, 'appended': appended}
+        finally:
+            handle.close()
+            
+    def _rewritten(self, manifest: Dict) -> List[str]:
+        """Source tables rewritten since the snapshot was built"""
+        sources = {spec['table']: table for table, spec in SNAPSHOT_TABLES.items()}
+        with self.db_manager.connection() as connection:
+            counts = rewrite_counts(connection, sources)
+        return [table for source, table in sources.items()
+                if manifest['tables'][table]['rewrites'] != counts[source]]
+        
+    def append(self) -> Dict:
+        """
+        Add rows stamped after each table's watermark; builds if there is no
+        snapshot yet, it has an older format, or a source table was rewritten
+        """
+        handle = self._acquire_writer()
+        try:
+            current = ColumnarSnapshot.open(self.root)
+            rebuild_reason = None
+            if current is None:
+                rebuild_reason = 'no snapshot'
+            elif current.manifest.get('format') != SNAPSHOT_FORMAT_VERSION:
+                rebuild_reason = f"format {current.manifest.get('format')}"
+            else:
+                rewritten = self._rewritten(current.manifest)
+                if rewritten:
+                    rebuild_reason = f"rewritten: {', '.join(rewritten)}"
+            if rebuild_reason is not None:
+                logger.info(f"Snapshot needs a full build ({rebuild_reason})")
+                handle.close()
+                handle = None
+                return self.build()
+            
+            manifest = current.manifest
+            data_dir = os.path.join(self.root, manifest['data_dir'])
+            # Drop anything an interrupted append wrote past the committed rows
+            for table, info in manifest['tables'].items():
+                for column, (kind, _) in SNAPSHOT_TABLES[table]['columns'].items():
+                    path = os.path.join(data_dir, table, f"{column}.bin")
+                    size = info['rows'] * COLUMN_DTYPES[kind].itemsize
+                    with open(path, 'ab') as column_file:
+                        column_file.truncate(size)
+            
+            appended = self._append(manifest, {domain: list(values) for domain, values in current.dictionaries.items()})
+            return {'version': manifest['version'], 'full': False, 'appended': appended}
+        finally:
+            if handle is not None:
+                handle.close()
+                
+    def _append(self, manifest: Dict, dictionaries: Dict[str, List[str]]) -> Dict[str, int]:
+        """Append new rows of every table, then commit dictionaries and manifest"""
+        data_dir = os.path.join(self.root, manifest['data_dir'])
+        indexes = {domain: {value: code for code, value in enumerate(values)} for domain, values in dictionaries.items()}
+        
+        def encode(domain, values):
+            dictionary = dictionaries.setdefault(domain, [])
+            index = indexes.setdefault(domain, {})
+            codes = np.empty(len(values), dtype=np.int32)
+            for position, value in enumerate(values):
+                if value is None:
+                    codes[position] = NULL_CODE
+                    continue
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(dictionary)
+                    dictionary.append(value)
+                codes[position] = code
+            return codes
+        
+        appended = {}
+        with self.db_manager.connection() as connection:
+            # Read before the rows: a rewrite during this pass triggers the next build
+            counts = rewrite_counts(connection, [spec['table'] for spec in SNAPSHOT_TABLES.values()])
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT CURRENT_TIMESTAMP")
+                now = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+            if not isinstance(now, datetime):
+                now = datetime.fromisoformat(str(now))
+            horizon = now - timedelta(seconds=self.lag_seconds)
+            
+            for table, spec in SNAPSHOT_TABLES.items():
+                info = manifest['tables'][table]
+                if info['rewrites'] is None:
+                    info['rewrites'] = counts[spec['table']]
+                columns = list(spec['columns'])
+                time_column, id_column = spec['watermark']
+                
+                # Every row stamped up to the horizon has committed, so (watermark, horizon]
+                # is read exactly once and appends stay in (time, id) order
+                query = f"SELECT {', '.join(columns)} FROM {spec['table']}"
+                if info['watermark'] is None:
+                    query += f" WHERE {time_column} IS NULL OR {time_column} <= %s"
+                    params = (horizon,)
+                else:
+                    query += f" WHERE {time_column} > %s AND {time_column} <= %s"
+                    params = (datetime.fromisoformat(info['watermark']), horizon)
+                query += f" ORDER BY {time_column}, {id_column}"
+                
+                files = {
+                    column: open(os.path.join(data_dir, table, f"{column}.bin"), 'ab')
+                    for column in columns
+                }
+                count = 0
+                cursor = connection.cursor(buffered=False)
+                try:
+                    cursor.execute(query, params)
+                    while True:
+                        rows = cursor.fetchmany(SNAPSHOT_FETCH_SIZE)
+                        if not rows:
+                            break
+                        for position, (column, (kind, domain)) in enumerate(spec['columns'].items()):
+                            values = [row[position] for row in rows]
+                            if kind == 'code':
+                                array = encode(domain, values)
+                            elif kind == 'float':
+                                array = np.array([np.nan if value is None else float(value) for value in values])
+                            else:
+                                array = np.fromiter((_to_seconds(value) for value in values), dtype=np.int64,
+                                                    count=len(values))
+                            files[column].write(array.astype(COLUMN_DTYPES[kind], copy=False).tobytes())
+                        count += len(rows)
+                finally:
+                    cursor.close()
+                    for column_file in files.values():
+                        column_file.close()
+                
+                info['watermark'] = horizon.isoformat(sep=' ')
+                info['rows'] += count
+                appended[table] = count
+        
+        # Dictionaries only ever grow, so readers of the old manifest still decode correctly
+        for domain, values in dictionaries.items():
+            _write_json(os.path.join(data_dir, 'dictionaries', f"{domain}.json"), values)
+        manifest['dictionaries'] = {domain: len(values) for domain, values in dictionaries.items()}
+        manifest['updated_at'] = datetime.now(timezone.utc).isoformat()
+        _write_json(os.path.join(self.root, MANIFEST_FILE), manifest)
+        with self._lock:
+            self._checked_at = 0.0
+        
+        logger.info(f"Snapshot v{manifest['version']} appended: "
+                    + ', '.join(f"{table} +{count}" for table, count in appended.items()))
+        return appended
+        
+    def _remove_old_versions(self, keep: Tuple[str, ...]) -> None:
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith('v') and name not in keep and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,342 @@
+"""
+EPA Scoring Engine - Database Connection Management
+File: backend/utils/database.py
+"""
+
+import mysql.connector
+from mysql.connector import Error
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+import os
+import threading
+import logging
+import time
+
+from utils.metrics import InstrumentedCursor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONFIG = {
+    'pool_size': 10,
+    'checkout_timeout': 30.0,
+    'max_idle_time': 300.0,
+    'health_check_interval': 5.0
+}
+
+def db_config_from_env() -> Dict:
+    """Database settings from DB_* environment variables, as app.py reads them"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'user': os.getenv('DB_USER', 'root'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'database': os.getenv('DB_NAME', 'epa_scoring'),
+        'port': int(os.getenv('DB_PORT', 3306)),
+        'charset': 'utf8mb4'
+    }
+
+def mark_rewritten(connection, tables) -> None:
+    """
+    Count a bulk rewrite of tables in table_rewrites: rows deleted, or
+    inserted with a time stamp older than their commit (e.g. a recompute
+    stamped with its start time). Readers that follow a table by a time
+    watermark (the analytics snapshot, the rating matrix) rebuild when the
+    count changes. Runs in the caller's transaction; the caller commits.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.executemany("""
+            INSERT INTO table_rewrites (table_name, rewrite_count) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE rewrite_count = rewrite_count + 1, rewritten_at = CURRENT_TIMESTAMP
+        """, [(table,) for table in tables])
+    finally:
+        cursor.close()
+
+def rewrite_counts(connection, tables) -> Dict[str, int]:
+    """table_rewrites count per table (0 if never rewritten)"""
+    tables = list(tables)
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT table_name, rewrite_count FROM table_rewrites
+            WHERE table_name IN ({', '.join(['%s'] * len(tables))})
+        """, tuple(tables))
+        counts = {table: int(count) for table, count in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return {table: counts.get(table, 0) for table in tables}
+
+class PoolExhaustedError(Exception):
+    """Raised when no pooled connection becomes available before the checkout timeout"""
+    pass
+
+class PooledConnection:
+    """
+    Connection checked out from a ConnectionPool.
+
+    Behaves like the underlying mysql.connector connection, except that close()
+    hands the connection back to the pool instead of tearing down the socket, so
+    the existing get_connection() / close() call sites work unchanged, and
+    cursors are wrapped to record SQL timings (utils/metrics.py).
+    """
+    
+    def __init__(self, pool: 'ConnectionPool', raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+        
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise Error(msg="Connection has already been returned to the pool")
+        return getattr(raw, name)
+        
+    def cursor(self, *args, **kwargs):
+        """Cursor whose statements and fetches are recorded in the request metrics"""
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise Error(msg="Connection has already been returned to the pool")
+        return InstrumentedCursor(raw.cursor(*args, **kwargs))
+        
+    def close(self):
+        """Return the connection to the pool"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw)
+            
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+        
+    def __del__(self):
+        # Safety net for code paths that return or raise before close()
+        if self.__dict__.get('_raw') is not None:
+            logger.warning("Pooled connection was garbage collected without close(); returning it to the pool")
+            self.close()
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded MySQL connection pool
+
+    - At most pool_size connections are open at once; callers block (up to
+      checkout_timeout seconds) when all of them are in use.
+    - Connections idle longer than max_idle_time are closed instead of reused.
+    - A connection that has been idle longer than health_check_interval is
+      pinged on checkout and transparently reconnected if the server dropped it.
+    - Connections are rolled back on release so the next borrower never
+      inherits an open transaction or a stale REPEATABLE READ snapshot.
+    """
+    
+    def __init__(self, db_config: Dict, pool_size: int = 10, checkout_timeout: float = 30.0,
+                 max_idle_time: float = 300.0, health_check_interval: float = 5.0):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+        
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()  # (raw_connection, last_released_at), most recent on the right
+        self._open_count = 0
+        self._closed = False
+        
+        self._metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'reconnects': 0,
+            'evictions': 0
+        }
+        
+    def _connect(self):
+        """Open a new raw connection (called without the lock held)"""
+        raw = mysql.connector.connect(**self.db_config)
+        with self._lock:
+            self._metrics['connections_created'] += 1
+        return raw
+        
+    def _discard(self, raw):
+        """Close a raw connection that is leaving the pool"""
+        try:
+            raw.close()
+        except Exception:
+            pass
+            
+    def _evict_idle(self, now: float) -> list:
+        """Remove connections idle past max_idle_time; caller holds the lock"""
+        expired = []
+        # Oldest connections sit on the left of the deque
+        while self._idle and now - self._idle[0][1] > self.max_idle_time:
+            expired.append(self._idle.popleft()[0])
+        self._open_count -= len(expired)
+        self._metrics['evictions'] += len(expired)
+        return expired
+        
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a healthy connection, waiting if the pool is at capacity"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = None
+        
+        with self._available:
+            if self._closed:
+                raise Error(msg="Connection pool is closed")
+            
+            expired = self._evict_idle(time.monotonic())
+            
+            while True:
+                if self._idle:
+                    raw, last_used = self._idle.pop()
+                    break
+                if self._open_count < self.pool_size:
+                    raw, last_used = None, None
+                    self._open_count += 1
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics['timeouts'] += 1
+                    raise PoolExhaustedError(
+                        f"No database connection available within {timeout:.1f}s "
+                        f"(pool_size={self.pool_size})"
+                    )
+                if not waited:
+                    waited = True
+                    wait_started = time.monotonic()
+                    self._metrics['waits'] += 1
+                self._available.wait(remaining)
+            
+            self._metrics['checkouts'] += 1
+            if waited:
+                wait_time = time.monotonic() - wait_started
+                self._metrics['wait_time_total'] += wait_time
+                self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], wait_time)
+        
+        for stale in expired:
+            self._discard(stale)
+        
+        try:
+            if raw is None:
+                raw = self._connect()
+            elif time.monotonic() - last_used > self.health_check_interval:
+                raw = self._check_health(raw)
+        except Exception:
+            with self._available:
+                self._open_count -= 1
+                self._available.notify()
+            raise
+        
+        return PooledConnection(self, raw)
+        
+    def _check_health(self, raw):
+        """Ping an idle connection, reconnecting it if the server dropped it"""
+        try:
+            raw.ping(reconnect=False)
+            return raw
+        except Error as e:
+            logger.warning(f"Stale pooled connection detected, reconnecting: {e}")
+            self._discard(raw)
+            raw = self._connect()
+            with self._lock:
+                self._metrics['reconnects'] += 1
+            return raw
+            
+    def release(self, raw):
+        """Return a raw connection to the pool"""
+        healthy = True
+        try:
+            raw.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding pooled connection after failed rollback: {e}")
+            healthy = False
+        
+        with self._available:
+            if healthy and not self._closed:
+                self._idle.append((raw, time.monotonic()))
+                raw = None
+            else:
+                self._open_count -= 1
+            self._available.notify()
+        
+        if raw is not None:
+            self._discard(raw)
+            
+    def close_all(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._available:
+            self._closed = True
+            idle = [raw for raw, _ in self._idle]
+            self._idle.clear()
+            self._open_count -= len(idle)
+            self._available.notify_all()
+        
+        for raw in idle:
+            self._discard(raw)
+            
+    def stats(self) -> Dict:
+        """Snapshot of pool occupancy and checkout metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats['pool_size'] = self.pool_size
+            stats['open'] = self._open_count
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open_count - len(self._idle)
+        
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+class DatabaseManager:
+    """
+    Shared entry point for database access used by the API routes, services
+    and the scoring engine. All connections come from one ConnectionPool.
+    """
+    
+    def __init__(self, db_config: Dict, pool_config: Optional[Dict] = None):
+        self.db_config = db_config
+        self.pool_config = dict(DEFAULT_POOL_CONFIG, **(pool_config or {}))
+        self.pool = ConnectionPool(db_config, **self.pool_config)
+        
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a pooled connection; call close() to return it"""
+        return self.pool.acquire(timeout)
+    
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager that always returns the connection to the pool"""
+        connection = self.get_connection(timeout)
+        try:
+            yield connection
+        finally:
+            connection.close()
+            
+    def test_connection(self) -> bool:
+        """Check that the database is reachable"""
+        try:
+            with self.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.error(f"Database connection test failed: {e}")
+            return False
+            
+    def pool_stats(self) -> Dict:
+        """Connection pool metrics"""
+        return self.pool.stats()
+        
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close_all()
+        logger.info("Database connection pool closed")
@@ -0,0 +1,245 @@
+"""
+EPA Scoring Engine - Primary Key Generation
+File: backend/utils/id_generator.py
+"""
+
+from typing import Dict, IO, Iterable, Optional
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: worker claims are not checked
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Table prefixes; every generated key is "<prefix>_<body>"
+ID_PREFIXES = {
+    'assessment': 'ASS',
+    'score': 'SCR',
+    'bonus': 'BON',
+    'compliance': 'CMP',
+    'quality': 'QA'
+}
+
+# 2024-01-01T00:00:00Z in milliseconds; keeps the timestamp field small
+ID_EPOCH_MS = 1704067200000
+
+TIMESTAMP_BITS = 42   # ~139 years of milliseconds
+WORKER_BITS = 10      # 1024 concurrent workers
+SEQUENCE_BITS = 12    # 4096 IDs per worker per millisecond
+
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+# Crockford base32 is ordered the same as ASCII, so fixed-width encodings sort like the integers
+BASE32_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ENCODED_LENGTH = 13  # ceil(64 / 5)
+
+def encode_base32(value: int, width: int = ENCODED_LENGTH) -> str:
+    """Fixed-width, lexicographically sortable base32 encoding of a non-negative integer"""
+    chars = []
+    for _ in range(width):
+        value, remainder = divmod(value, 32)
+        chars.append(BASE32_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+def decode_base32(text: str) -> int:
+    """Inverse of encode_base32"""
+    value = 0
+    for char in text:
+        value = value * 32 + BASE32_ALPHABET.index(char)
+    return value
+
+# ID workers per host reserved for processes started outside gunicorn (the
+# CLIs, cron jobs, recompute workers); see cli_worker_ids()
+CLI_WORKER_COUNT = 32
+
+def _worker_base() -> int:
+    """ID_WORKER_ID, this host's first ID worker (0 with a warning if unset)"""
+    base = os.getenv('ID_WORKER_ID')
+    if base is None:
+        logger.warning("ID_WORKER_ID is not set; using base 0, which is only unique on a single host")
+        return 0
+    return int(base)
+
+def _check_worker_id(worker_id: int) -> int:
+    if not 0 <= worker_id <= MAX_WORKER_ID:
+        raise ValueError(f"ID worker must be between 0 and {MAX_WORKER_ID}, got {worker_id}; "
+                         f"check ID_WORKER_ID, ID_WORKER_INDEX and ID_CLI_WORKER_BASE")
+    return worker_id
+
+def cli_worker_ids() -> range:
+    """
+    ID workers for processes outside gunicorn: ID_CLI_WORKER_COUNT (default
+    CLI_WORKER_COUNT) IDs from ID_CLI_WORKER_BASE, which defaults to just
+    after the gunicorn slots (ID_WORKER_ID + WEB_WORKERS)
+    """
+    start = os.getenv('ID_CLI_WORKER_BASE')
+    start = int(start) if start is not None else _worker_base() + int(os.getenv('WEB_WORKERS', 4))
+    return range(start, start + int(os.getenv('ID_CLI_WORKER_COUNT', CLI_WORKER_COUNT)))
+
+def default_worker_id() -> int:
+    """
+    Claim this process's ID worker (see claim_worker_id). A gunicorn worker
+    uses ID_WORKER_ID + ID_WORKER_INDEX, the slot gunicorn.conf.py sets
+    after the fork (forked workers share the master's environment, so a
+    plain ID_WORKER_ID would be the same in all of them), and fails if that
+    ID is taken. Any other process takes the first free ID of
+    cli_worker_ids(), so CLIs run next to the API and to each other.
+
+    Every host needs its own range: ID_WORKER_ID values at least
+    WEB_WORKERS + ID_CLI_WORKER_COUNT apart.
+    """
+    index = os.getenv('ID_WORKER_INDEX')
+    if index is not None:
+        return claim_worker_id(_check_worker_id(_worker_base() + int(index)))
+    return claim_free_worker_id(cli_worker_ids())
+
+# Lock files held by this process, one per claimed worker ID
+_claims: Dict[int, IO] = {}
+
+def _try_claim(worker_id: int) -> bool:
+    """Lock worker_id's file unless another process holds it"""
+    if fcntl is None or worker_id in _claims:
+        return True
+    
+    lock_dir = os.getenv('ID_WORKER_LOCK_DIR', tempfile.gettempdir())
+    handle = open(os.path.join(lock_dir, f"epa-id-worker-{worker_id}.lock"), 'a')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _claims[worker_id] = handle
+    return True
+
+def claim_worker_id(worker_id: int) -> int:
+    """
+    Reserve worker_id on this host for the life of the process with an
+    exclusive lock on a file in ID_WORKER_LOCK_DIR (default: the temp dir).
+    Raises RuntimeError when another live process already holds it, so a
+    duplicate worker fails at startup instead of colliding on inserts.
+    Other hosts are not visible here; their ID_WORKER_ID ranges must not
+    overlap.
+    """
+    if not _try_claim(worker_id):
+        raise RuntimeError(f"ID worker {worker_id} is already in use by another process on this host; "
+                           f"give every gunicorn worker its own ID_WORKER_ID + ID_WORKER_INDEX")
+    return worker_id
+
+def claim_free_worker_id(worker_ids: Iterable[int]) -> int:
+    """Claim the first of worker_ids no other process on this host holds"""
+    worker_ids = list(worker_ids)
+    for worker_id in worker_ids:
+        if _try_claim(_check_worker_id(worker_id)):
+            return worker_id
+    raise RuntimeError(f"All {len(worker_ids)} ID workers from {worker_ids[0] if worker_ids else None} are in "
+                       f"use on this host; raise ID_CLI_WORKER_COUNT")
+
+class TimeOrderedIdGenerator:
+    """
+    64-bit, time-ordered IDs: milliseconds since ID_EPOCH_MS, then worker ID,
+    then a per-millisecond sequence, encoded as 13 base32 characters.
+
+    IDs from one generator are strictly increasing, so new rows append to the
+    right-hand edge of the clustered index instead of landing at random pages.
+    Generators with different worker IDs never collide, which holds only if
+    every live process has its own worker ID (see default_worker_id and
+    claim_worker_id). The generator is thread-safe;
+    if the clock steps backwards (or a millisecond's sequence runs out) it
+    keeps counting from the last timestamp issued rather than reusing values.
+    """
+    
+    def __init__(self, worker_id: Optional[int] = None):
+        self.worker_id = default_worker_id() if worker_id is None else worker_id
+        if not 0 <= self.worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        
+        self._lock = threading.Lock()
+        self._last_timestamp = -1
+        self._sequence = 0
+        
+    def next_int(self) -> int:
+        """Next raw 64-bit ID"""
+        with self._lock:
+            timestamp = max(int(time.time() * 1000) - ID_EPOCH_MS, self._last_timestamp)
+            
+            if timestamp == self._last_timestamp:
+                self._sequence = (self._sequence + 1) & MAX_SEQUENCE
+                if self._sequence == 0:
+                    # Sequence exhausted for this millisecond: borrow the next one
+                    # (the clock catches up through the max() above)
+                    timestamp += 1
+            else:
+                self._sequence = 0
+            
+            self._last_timestamp = timestamp
+            return (timestamp << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+            
+    def next_id(self, prefix: str) -> str:
+        """Next ID as "<prefix>_<13 base32 chars>" """
+        return f"{prefix}_{encode_base32(self.next_int())}"
+    
+    @staticmethod
+    def timestamp_of(generated_id: str) -> float:
+        """Creation time (UNIX seconds) embedded in an ID from this generator"""
+        value = decode_base32(generated_id.rsplit('_', 1)[1])
+        return ((value >> (WORKER_BITS + SEQUENCE_BITS)) + ID_EPOCH_MS) / 1000.0
+
+class RandomIdGenerator:
+    """Random UUID4-based IDs (the previous scheme); unordered, for comparison"""
+    
+    def next_id(self, prefix: str) -> str:
+        return f"{prefix}_{uuid.uuid4().hex}"
+
+ID_GENERATORS = {
+    'time_ordered': TimeOrderedIdGenerator,
+    'random': RandomIdGenerator
+}
+
+_generator = None
+_generator_lock = threading.Lock()
+
+def get_id_generator():
+    """
+    Process-wide generator, chosen by ID_GENERATOR (default time_ordered);
+    a time-ordered generator claims its worker ID on first use
+    """
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                name = os.getenv('ID_GENERATOR', 'time_ordered')
+                if name not in ID_GENERATORS:
+                    raise ValueError(f"Unknown ID_GENERATOR: {name}")
+                _generator = ID_GENERATORS[name]()
+    return _generator
+
+def set_id_generator(generator) -> None:
+    """Install a different generator (any object with next_id(prefix))"""
+    global _generator
+    with _generator_lock:
+        _generator = generator
+
+def _reset_after_fork():
+    # A forked child must not continue the parent's worker ID and sequence, nor
+    # count the parent's claims as its own (the parent keeps holding them)
+    global _generator, _generator_lock
+    _generator = None
+    _generator_lock = threading.Lock()
+    for handle in _claims.values():
+        handle.close()
+    _claims.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def new_id(kind: str) -> str:
+    """Generate a primary key for one of the ID_PREFIXES kinds"""
+    return get_id_generator().next_id(ID_PREFIXES[kind])
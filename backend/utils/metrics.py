@@ -0,0 +1,337 @@
+"""
+EPA Scoring Engine - Request, SQL and Scoring Metrics
+File: backend/utils/metrics.py
+"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500, 1000)
+
+# Slowest statements kept per request for the slow-request log
+SLOW_QUERY_SAMPLES = 3
+SLOW_QUERY_SQL_LENGTH = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (le = upper bound)"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """
+    Process-wide counters and histograms keyed by metric name and label
+    values, rendered in the Prometheus text exposition format. Every update
+    is a dict lookup and a few additions under one lock, cheap enough to
+    stay enabled in production. Each gunicorn worker keeps its own registry,
+    so Prometheus should scrape workers individually or sum over them.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, Histogram]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._labels: Dict[str, Tuple[str, ...]] = {}
+        
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self._help[name] = ('counter', help_text)
+        self._labels[name] = labels
+        self._counters.setdefault(name, {})
+        
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self._help[name] = ('histogram', help_text)
+        self._labels[name] = labels
+        self._buckets[name] = buckets
+        self._histograms.setdefault(name, {})
+        
+    def inc(self, name: str, labels: Tuple = (), amount: float = 1.0):
+        with self._lock:
+            series = self._counters[name]
+            series[labels] = series.get(labels, 0.0) + amount
+            
+    def observe(self, name: str, value: float, labels: Tuple = ()):
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self._buckets[name])
+            histogram.observe(value)
+            
+    def reset(self):
+        with self._lock:
+            for series in self._counters.values():
+                series.clear()
+            for series in self._histograms.values():
+                series.clear()
+                
+    def render(self, gauges: Optional[Dict[str, Tuple[str, float]]] = None,
+               counters: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """
+        Prometheus text format; gauges maps name -> (help, value) for
+        point-in-time values, counters the same for cumulative values kept
+        outside the registry
+        """
+        lines = []
+        with self._lock:
+            for name, (kind, help_text) in self._help.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                label_names = self._labels[name]
+                if kind == 'counter':
+                    for labels, value in sorted(self._counters[name].items()):
+                        lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+                    continue
+                for labels, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = _format_labels(label_names + ('le',), labels + (_format_value(bound),))
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    bucket_labels = _format_labels(label_names + ('le',), labels + ('+Inf',))
+                    lines.append(f"{name}_bucket{bucket_labels} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(label_names, labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(label_names, labels)} {histogram.count}")
+        
+        for kind, samples in (('gauge', gauges), ('counter', counters)):
+            for name, (help_text, value) in (samples or {}).items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+def _format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+REGISTRY = MetricsRegistry()
+
+REGISTRY.counter('epa_http_requests_total', 'HTTP requests handled', ('endpoint', 'method', 'status'))
+REGISTRY.histogram('epa_http_request_duration_seconds', 'HTTP request latency', ('endpoint', 'method'))
+REGISTRY.histogram('epa_http_request_db_queries', 'SQL statements executed per HTTP request', ('endpoint',),
+                   QUERY_COUNT_BUCKETS)
+REGISTRY.counter('epa_http_request_db_seconds_total', 'Time spent executing SQL and fetching rows, per endpoint',
+                 ('endpoint',))
+REGISTRY.counter('epa_http_request_db_rows_total', 'Rows fetched from the database, per endpoint', ('endpoint',))
+REGISTRY.counter('epa_http_slow_requests_total', 'HTTP requests slower than the slow-request threshold',
+                 ('endpoint',))
+REGISTRY.histogram('epa_db_query_duration_seconds', 'SQL statement execution time', ('statement',))
+REGISTRY.histogram('epa_scoring_duration_seconds', 'Scoring method run time', ('method',))
+
+class RequestStats:
+    """SQL activity of one request (or any other unit of work bound with track())"""
+    __slots__ = ('queries', 'db_time', 'rows', 'slowest', '_lock')
+    
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest: List[Tuple[float, str]] = []
+        # Profile fan-out threads can record into the same request
+        self._lock = threading.Lock()
+        
+    def record_query(self, statement: str, elapsed: float):
+        with self._lock:
+            self.queries += 1
+            self.db_time += elapsed
+            if len(self.slowest) < SLOW_QUERY_SAMPLES or elapsed > self.slowest[-1][0]:
+                self.slowest.append((elapsed, statement))
+                self.slowest.sort(key=lambda sample: -sample[0])
+                del self.slowest[SLOW_QUERY_SAMPLES:]
+                
+    def record_fetch(self, rows: int, elapsed: float):
+        with self._lock:
+            self.rows += rows
+            self.db_time += elapsed
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar('epa_request_stats', default=None)
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+def track(stats: Optional[RequestStats] = None):
+    """Bind stats (a new RequestStats by default) to the current context; returns (stats, reset token)"""
+    stats = stats or RequestStats()
+    return stats, _current_stats.set(stats)
+
+def untrack(token):
+    _current_stats.reset(token)
+
+def _statement_kind(operation: str) -> str:
+    kind = operation.lstrip()[:6].upper()
+    return kind if kind in ('SELECT', 'INSERT', 'UPDATE', 'DELETE') else 'OTHER'
+
+class InstrumentedCursor:
+    """
+    Cursor wrapper that times execute()/executemany() into the
+    epa_db_query_duration_seconds histogram and, inside a tracked request,
+    adds statement count, DB time (including fetches, which is where an
+    unbuffered cursor spends its time) and fetched rows to RequestStats
+    """
+    
+    def __init__(self, cursor, registry: MetricsRegistry = REGISTRY):
+        self._cursor = cursor
+        self._registry = registry
+        
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+        
+    def __iter__(self):
+        return iter(self._cursor)
+        
+    def _timed_execute(self, method, operation, params):
+        started = time.perf_counter()
+        try:
+            return method(operation, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._registry.observe('epa_db_query_duration_seconds', elapsed, (_statement_kind(operation),))
+            stats = _current_stats.get()
+            if stats is not None:
+                stats.record_query(operation, elapsed)
+                
+    def execute(self, operation, params=None):
+        return self._timed_execute(self._cursor.execute, operation, params)
+        
+    def executemany(self, operation, seq_params):
+        return self._timed_execute(self._cursor.executemany, operation, seq_params)
+        
+    def _timed_fetch(self, method, *args):
+        stats = _current_stats.get()
+        if stats is None:
+            return method(*args)
+        started = time.perf_counter()
+        result = method(*args)
+        rows = len(result) if isinstance(result, list) else int(result is not None)
+        stats.record_fetch(rows, time.perf_counter() - started)
+        return result
+        
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+        
+    def fetchmany(self, size=1):
+        return self._timed_fetch(self._cursor.fetchmany, size)
+        
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+        
+    def close(self):
+        return self._cursor.close()
+
+def timed(method_name: str, registry: MetricsRegistry = REGISTRY):
+    """Decorator recording a function's run time in epa_scoring_duration_seconds{method=...}"""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                registry.observe('epa_scoring_duration_seconds', time.perf_counter() - started, (method_name,))
+        return wrapper
+    return decorator
+
+def _compact_sql(statement: str) -> str:
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    if len(statement) > SLOW_QUERY_SQL_LENGTH:
+        statement = statement[:SLOW_QUERY_SQL_LENGTH] + '...'
+    return statement
+
+def init_request_metrics(app, slow_request_seconds: float = 1.0, registry: MetricsRegistry = REGISTRY):
+    """
+    Record latency, status and SQL activity of every request, labelled by
+    URL rule (e.g. /api/scores/student/<student_id>) so the label set stays
+    bounded. The request is finished in teardown so streamed responses
+    (stream_with_context) count until their last chunk. Requests slower than
+    slow_request_seconds are logged with their slowest SQL statements.
+    """
+    from flask import g, request
+    
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_stats, g.metrics_token = track()
+    
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+    
+    @app.teardown_request
+    def finish_request_metrics(exc=None):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = g.pop('metrics_stats')
+        try:
+            untrack(g.pop('metrics_token'))
+        except ValueError:
+            # Torn down in a different context than it started (e.g. a streamed response)
+            pass
+        
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('metrics_status', 500)
+        registry.inc('epa_http_requests_total', (endpoint, request.method, str(status)))
+        registry.observe('epa_http_request_duration_seconds', elapsed, (endpoint, request.method))
+        registry.observe('epa_http_request_db_queries', stats.queries, (endpoint,))
+        registry.inc('epa_http_request_db_seconds_total', (endpoint,), stats.db_time)
+        registry.inc('epa_http_request_db_rows_total', (endpoint,), stats.rows)
+        
+        if elapsed >= slow_request_seconds:
+            registry.inc('epa_http_slow_requests_total', (endpoint,))
+            slowest = '; '.join(f"[{duration * 1000:.1f}ms] {_compact_sql(statement)}"
+                                for duration, statement in stats.slowest)
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({endpoint}) -> {status}: {elapsed * 1000:.1f}ms, "
+                f"{stats.queries} queries, {stats.db_time * 1000:.1f}ms in DB, {stats.rows} rows; "
+                f"slowest SQL: {slowest or 'none'}"
+            )
+
+def pool_gauges(pool_stats: Dict) -> Dict[str, Tuple[str, float]]:
+    """Point-in-time connection pool stats as gauges for MetricsRegistry.render()"""
+    return {
+        'epa_db_pool_size': ('Configured connection pool size', pool_stats['pool_size']),
+        'epa_db_pool_open': ('Open pooled connections', pool_stats['open']),
+        'epa_db_pool_in_use': ('Pooled connections checked out', pool_stats['in_use'])
+    }
+
+def pool_counters(pool_stats: Dict) -> Dict[str, Tuple[str, float]]:
+    """Cumulative connection pool stats as counters for MetricsRegistry.render()"""
+    return {
+        'epa_db_pool_checkouts_total': ('Connection checkouts since start', pool_stats['checkouts']),
+        'epa_db_pool_waits_total': ('Checkouts that waited for a free connection', pool_stats['waits']),
+        'epa_db_pool_wait_seconds_total': ('Total time spent waiting for a connection',
+                                           pool_stats['wait_time_total']),
+        'epa_db_pool_timeouts_total': ('Checkouts that timed out', pool_stats['timeouts'])
+    }
@@ -0,0 +1,765 @@
+"""
+EPA Scoring Engine - Schema Migrations
+File: backend/utils/migrations.py
+
+Versioned schema changes for databases created from an older schema.sql
+(run them with migrate.py). schema.sql always describes the latest
+non-optional version and records it in schema_migrations, so every change
+to schema.sql needs a migration here as well. Steps inspect
+information_schema before changing anything, which makes a migration safe
+to re-run after a failure part-way through (MySQL DDL is not transactional).
+
+Migrations list the queries they are meant to speed up; the runner EXPLAINs
+and times them before and after applying each one.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import statistics
+import time
+
+from models.score_statistics import ScoreStatistics
+from models.scoring_engine import INTEGRATION_EPAS
+from repositories.sql_repository import SCORE_COLUMNS_SQL
+from utils.database import DatabaseManager
+from utils.pagination import LIST_RESOURCES, build_list_query
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE_QUERY = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+# Yearly partitions created ahead of the newest assessment (see extend_partitions)
+PARTITION_YEARS_AHEAD = 1
+
+# Students / indicators per sampled check query, like one scoring chunk or activity
+CHECK_SAMPLE_STUDENTS = 100
+CHECK_SAMPLE_INDICATORS = 8
+CHECK_DATE_RANGE_DAYS = 90
+
+# Column definitions of tables created by migrations, as in schema.sql
+EPA_SCORE_STATS_DEFINITION = """
+    epa_id VARCHAR(10) PRIMARY KEY,
+    score_count BIGINT NOT NULL DEFAULT 0,
+    student_count INT NOT NULL DEFAULT 0,
+    mean_score DOUBLE NOT NULL DEFAULT 0,
+    m2 DOUBLE NOT NULL DEFAULT 0,
+    min_score DECIMAL(5,3),
+    max_score DECIMAL(5,3),
+    last_calculation_date TIMESTAMP NULL,
+    updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+"""
+
+STUDENT_EPA_SCORE_STATS_DEFINITION = """
+    student_id VARCHAR(20) NOT NULL,
+    epa_id VARCHAR(10) NOT NULL,
+    score_count INT NOT NULL DEFAULT 0,
+    mean_score DOUBLE NOT NULL DEFAULT 0,
+    m2 DOUBLE NOT NULL DEFAULT 0,
+    min_score DECIMAL(5,3),
+    max_score DECIMAL(5,3),
+    last_calculation_date TIMESTAMP NULL,
+    PRIMARY KEY (student_id, epa_id),
+    INDEX idx_student_stats_epa (epa_id, student_id)
+"""
+
+TABLE_REWRITES_DEFINITION = """
+    table_name VARCHAR(64) PRIMARY KEY,
+    rewrite_count BIGINT NOT NULL DEFAULT 0,
+    rewritten_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP
+"""
+
+class MigrationError(Exception):
+    """A migration step found the schema in a state it cannot safely change"""
+    pass
+
+def _placeholders(values) -> str:
+    return ', '.join(['%s'] * len(values))
+
+# Queries checked by the migrations, written as the engine and services issue them.
+# build(sample) -> (sql, params); expect names the EXPLAIN row (by table alias) that
+# must use the index, optionally as a covering index or with partition pruning.
+def _check_student_indicator_assessments(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT {SCORE_COLUMNS_SQL}
+        FROM student_assessments sa
+        WHERE sa.student_id = %s AND sa.indicator_id IN ({_placeholders(sample['indicator_ids'])})
+    """, (sample['student_id'], *sample['indicator_ids'])
+
+def _check_latest_evidence(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT {SCORE_COLUMNS_SQL}
+        FROM (
+            SELECT assessment_id,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY indicator_id
+                       ORDER BY assessment_date DESC, assessment_id DESC
+                   ) AS evidence_rank
+            FROM student_assessments
+            WHERE student_id = %s AND indicator_id IN ({_placeholders(sample['indicator_ids'])})
+        ) ranked
+        JOIN student_assessments sa ON sa.assessment_id = ranked.assessment_id
+        WHERE ranked.evidence_rank <= %s
+        ORDER BY sa.assessment_date DESC, sa.assessment_id DESC
+    """, (sample['student_id'], *sample['indicator_ids'], 1)
+
+def _check_cohort_stream(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT {SCORE_COLUMNS_SQL}
+        FROM student_assessments sa
+        WHERE sa.student_id IN ({_placeholders(sample['student_ids'])})
+        ORDER BY sa.student_id
+    """, tuple(sample['student_ids'])
+
+def _check_assessment_date_range(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT {SCORE_COLUMNS_SQL}
+        FROM student_assessments sa
+        WHERE sa.assessment_date >= %s AND sa.assessment_date <= %s
+    """, (sample['start_date'], sample['end_date'])
+
+def _check_core_epa_averages(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT student_id, epa_id, AVG(final_score) as avg_score, COUNT(final_score) as score_count
+        FROM calculated_scores
+        WHERE score_level = 'Core_EPA'
+          AND epa_id IN ({_placeholders(INTEGRATION_EPAS)})
+          AND student_id IN ({_placeholders(sample['student_ids'])})
+        GROUP BY student_id, epa_id
+    """, (*INTEGRATION_EPAS, *sample['student_ids'])
+
+def _check_cohort_core_epa_averages(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT student_id, epa_id, AVG(final_score) as avg_score, COUNT(final_score) as score_count
+        FROM calculated_scores
+        WHERE score_level = 'Core_EPA'
+          AND epa_id IN ({_placeholders(INTEGRATION_EPAS)})
+        GROUP BY student_id, epa_id
+    """, tuple(INTEGRATION_EPAS)
+
+def _check_list_page(resource: str, status: str) -> Callable[[Dict], Tuple[str, Tuple]]:
+    def build(sample: Dict) -> Tuple[str, Tuple]:
+        query, params = build_list_query(resource, {
+            'fields': list(LIST_RESOURCES[resource]['columns']),
+            'filters': {'status': status},
+            'after': None,
+            'limit': 100
+        })
+        return query, tuple(params)
+    return build
+
+def _check_latest_epa_scores(sample: Dict) -> Tuple[str, Tuple]:
+    return f"""
+        SELECT student_id, epa_id, final_score
+        FROM (
+            SELECT student_id, epa_id, final_score,
+                   ROW_NUMBER() OVER (PARTITION BY student_id, epa_id
+                                      ORDER BY calculation_date DESC, score_id DESC) AS recency
+            FROM calculated_scores
+            WHERE score_level = 'Core_EPA' AND student_id IN ({_placeholders(sample['student_ids'])})
+        ) latest
+        WHERE recency = 1
+    """, tuple(sample['student_ids'])
+
+CHECKS = {
+    'student_indicator_assessments': {
+        'description': 'One student\'s assessments for an activity / EPA branch (student_assessments())',
+        'build': _check_student_indicator_assessments,
+        'expect': {'table': 'sa', 'key': 'idx_assessment_scoring', 'covering': True}
+    },
+    'latest_evidence': {
+        'description': 'Newest assessment per indicator (latest_student_assessments())',
+        'build': _check_latest_evidence,
+        'expect': {'table': 'student_assessments', 'key': 'idx_assessment_scoring', 'covering': True}
+    },
+    'cohort_stream': {
+        'description': 'Cohort scoring stream ordered by student (iter_assessments())',
+        'build': _check_cohort_stream,
+        'expect': {'table': 'sa', 'key': 'idx_assessment_scoring', 'covering': True}
+    },
+    'assessment_date_range': {
+        'description': 'Batch indicator scores for a date range (iter_assessments(start_date, end_date))',
+        'build': _check_assessment_date_range,
+        'expect': {'table': 'sa', 'pruned': True}
+    },
+    'core_epa_averages': {
+        'description': 'Integration scores for a block of students (core_epa_averages())',
+        'build': _check_core_epa_averages,
+        'expect': {'table': 'calculated_scores', 'key': 'idx_calculated_student_level', 'covering': True}
+    },
+    'cohort_core_epa_averages': {
+        'description': 'Integration scores for the whole cohort (core_epa_averages(None))',
+        'build': _check_cohort_core_epa_averages,
+        'expect': {'table': 'calculated_scores', 'key': 'idx_calculated_level_epa', 'covering': True}
+    },
+    'active_students_page': {
+        'description': 'First page of GET /api/students (keyset on student_name, student_id)',
+        'build': _check_list_page('students', 'Active'),
+        'expect': {'table': 'students', 'key': 'idx_student_status_name'}
+    },
+    'active_faculty_page': {
+        'description': 'First page of GET /api/faculty (keyset on faculty_name, faculty_id)',
+        'build': _check_list_page('faculty', 'Active'),
+        'expect': {'table': 'faculty', 'key': 'idx_faculty_status_name'}
+    },
+    'latest_epa_scores': {
+        'description': 'Latest stored Core EPA score per student (entrustment distribution)',
+        'build': _check_latest_epa_scores,
+        'expect': {'table': 'calculated_scores', 'key': 'idx_calculated_student_level', 'covering': True}
+    }
+}
+
+# Steps: add_index / drop_index (columns kept so the drop can be rolled back),
+# create_table, populate (a function of the
+# connection, re-run whenever its migration is applied; nothing to undo) and
+# partition_by_year. Optional migrations only run when asked for.
+MIGRATIONS = [
+    {
+        'version': 1,
+        'name': 'list_order_indexes',
+        'description': 'Indexes matching the keyset order of the student and faculty lists',
+        'steps': [
+            {'op': 'add_index', 'table': 'students', 'name': 'idx_student_status_name',
+             'columns': ('status', 'student_name', 'student_id')},
+            {'op': 'add_index', 'table': 'faculty', 'name': 'idx_faculty_status_name',
+             'columns': ('status', 'faculty_name', 'faculty_id')}
+        ],
+        'checks': ('active_students_page', 'active_faculty_page')
+    },
+    {
+        'version': 2,
+        'name': 'score_statistics_tables',
+        'description': 'Running Core EPA statistics tables, filled from calculated_scores '
+                       '(every score write updates them)',
+        'steps': [
+            {'op': 'create_table', 'table': 'epa_score_stats', 'definition': EPA_SCORE_STATS_DEFINITION},
+            {'op': 'create_table', 'table': 'student_epa_score_stats',
+             'definition': STUDENT_EPA_SCORE_STATS_DEFINITION},
+            # Scores written while this runs may be missed; check with score_stats.py afterwards
+            {'op': 'populate', 'name': 'rebuild_score_statistics',
+             'apply': lambda connection: ScoreStatistics().rebuild(connection)}
+        ],
+        'checks': ()
+    },
+    {
+        'version': 3,
+        'name': 'evidence_order_index',
+        'description': 'Per-student, per-indicator index in assessment date order for the latest/last-N '
+                       'scoring policies, replacing the student_id index',
+        'steps': [
+            {'op': 'add_index', 'table': 'student_assessments', 'name': 'idx_assessment_student_indicator_date',
+             'columns': ('student_id', 'indicator_id', 'assessment_date')},
+            {'op': 'drop_index', 'table': 'student_assessments', 'name': 'idx_assessment_student',
+             'columns': ('student_id',)}
+        ],
+        'checks': ()
+    },
+    {
+        'version': 4,
+        'name': 'scoring_covering_indexes',
+        'description': 'Composite covering indexes for the scoring reads, replacing their single-column prefixes',
+        'steps': [
+            {'op': 'add_index', 'table': 'student_assessments', 'name': 'idx_assessment_scoring',
+             'columns': ('student_id', 'indicator_id', 'assessment_date', 'base_score', 'context_id',
+                         'tech_level_id')},
+            {'op': 'drop_index', 'table': 'student_assessments', 'name': 'idx_assessment_student_indicator_date',
+             'columns': ('student_id', 'indicator_id', 'assessment_date')},
+            {'op': 'add_index', 'table': 'calculated_scores', 'name': 'idx_calculated_student_level',
+             'columns': ('student_id', 'score_level', 'epa_id', 'calculation_date', 'final_score')},
+            {'op': 'drop_index', 'table': 'calculated_scores', 'name': 'idx_calculated_student',
+             'columns': ('student_id',)},
+            {'op': 'add_index', 'table': 'calculated_scores', 'name': 'idx_calculated_level_epa',
+             'columns': ('score_level', 'epa_id', 'student_id', 'calculation_date', 'final_score')},
+            {'op': 'drop_index', 'table': 'calculated_scores', 'name': 'idx_calculated_level',
+             'columns': ('score_level',)}
+        ],
+        'checks': ('student_indicator_assessments', 'latest_evidence', 'cohort_stream', 'core_epa_averages',
+                   'cohort_core_epa_averages', 'latest_epa_scores')
+    },
+    {
+        'version': 5,
+        'name': 'table_rewrites',
+        'description': 'Bulk rewrite counts that make the analytics snapshot and rating matrix rebuild '
+                       '(see utils.database.mark_rewritten)',
+        'steps': [
+            {'op': 'create_table', 'table': 'table_rewrites', 'definition': TABLE_REWRITES_DEFINITION}
+        ],
+        'checks': ()
+    },
+    {
+        'version': 6,
+        'name': 'partition_student_assessments',
+        'description': 'Yearly RANGE partitions of student_assessments by assessment_date',
+        'optional': True,
+        'steps': [
+            # MySQL requires the partitioning column in every unique key and does not
+            # support foreign keys on partitioned tables; both insert paths (POST
+            # /api/assessments and the bulk import) check the indicator, context and
+            # technology level these keys enforced with AssessmentService.reference_error()
+            {'op': 'partition_by_year', 'table': 'student_assessments', 'column': 'assessment_date',
+             'primary_key': ('assessment_id',),
+             'backfill': "UPDATE student_assessments SET assessment_date = COALESCE(created_date, CURRENT_TIMESTAMP) "
+                         "WHERE assessment_date IS NULL",
+             'partitioned_definition': 'TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP',
+             'original_definition': 'TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP',
+             'foreign_keys': (('indicator_id', 'performance_indicators', 'indicator_id'),
+                              ('context_id', 'context_types', 'context_id'),
+                              ('tech_level_id', 'technology_levels', 'tech_level_id'))}
+        ],
+        'checks': ('assessment_date_range', 'student_indicator_assessments', 'cohort_stream')
+    }
+]
+
+def _is_covering(extra: str) -> bool:
+    """'Using index' (or 'Using index for group-by') in EXPLAIN Extra; not index condition pushdown"""
+    return any(part.startswith('Using index') and part != 'Using index condition'
+               for part in (extra or '').split('; '))
+
+class MigrationRunner:
+    """
+    Applies MIGRATIONS in version order and records them in schema_migrations
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, migrations: Optional[List[Dict]] = None):
+        self.db_manager = db_manager
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda migration: migration['version'])
+        
+    def _applied(self, cursor) -> Dict[int, datetime]:
+        cursor.execute(MIGRATIONS_TABLE_QUERY)
+        cursor.execute("SELECT version, applied_at FROM schema_migrations ORDER BY version")
+        return {row['version']: row['applied_at'] for row in cursor.fetchall()}
+        
+    def status(self) -> List[Dict]:
+        """Every known migration and whether (and when) it was applied"""
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                applied = self._applied(cursor)
+            finally:
+                cursor.close()
+        
+        return [
+            {
+                'version': migration['version'],
+                'name': migration['name'],
+                'description': migration['description'],
+                'optional': migration.get('optional', False),
+                'applied': migration['version'] in applied,
+                'applied_at': applied[migration['version']].isoformat() if applied.get(migration['version']) else None
+            }
+            for migration in self.migrations
+        ]
+        
+    def pending(self) -> List[Dict]:
+        """
+        Non-optional migrations not applied yet, read without creating
+        schema_migrations (a database older than it has applied none)
+        """
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                applied = set()
+                if self._table_exists(cursor, 'schema_migrations'):
+                    cursor.execute("SELECT version FROM schema_migrations")
+                    applied = {row['version'] for row in cursor.fetchall()}
+            finally:
+                cursor.close()
+        
+        return [
+            {'version': migration['version'], 'name': migration['name']}
+            for migration in self.migrations
+            if migration['version'] not in applied and not migration.get('optional')
+        ]
+        
+    def applied_checks(self) -> List[str]:
+        """Names of the checks of every applied migration, in migration order"""
+        applied = {migration['version'] for migration in self.status() if migration['applied']}
+        return list(dict.fromkeys(
+            name for migration in self.migrations if migration['version'] in applied for name in migration['checks']))
+    
+    # --- schema introspection ---
+    
+    @staticmethod
+    def _indexes(cursor, table: str) -> Dict[str, Tuple[str, ...]]:
+        cursor.execute("""
+            SELECT INDEX_NAME AS index_name, COLUMN_NAME AS column_name
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """, (table,))
+        indexes = {}
+        for row in cursor.fetchall():
+            indexes.setdefault(row['index_name'], []).append(row['column_name'])
+        return {name: tuple(columns) for name, columns in indexes.items()}
+    
+    @staticmethod
+    def _table_exists(cursor, table: str) -> bool:
+        cursor.execute("""
+            SELECT COUNT(*) AS table_count
+            FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        """, (table,))
+        return cursor.fetchone()['table_count'] > 0
+    
+    @staticmethod
+    def _partitions(cursor, table: str) -> List[Dict]:
+        cursor.execute("""
+            SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """, (table,))
+        return cursor.fetchall()
+    
+    @staticmethod
+    def _foreign_keys(cursor, table: str) -> List[str]:
+        cursor.execute("""
+            SELECT CONSTRAINT_NAME AS name
+            FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY CONSTRAINT_NAME
+        """, (table,))
+        return [row['name'] for row in cursor.fetchall()]
+    
+    @staticmethod
+    def _referencing_tables(cursor, table: str) -> List[str]:
+        cursor.execute("""
+            SELECT DISTINCT TABLE_NAME AS name
+            FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = %s
+        """, (table,))
+        return [row['name'] for row in cursor.fetchall()]
+    
+    # --- steps ---
+    
+    def _add_index(self, cursor, step: Dict) -> Optional[str]:
+        existing = self._indexes(cursor, step['table']).get(step['name'])
+        if existing == tuple(step['columns']):
+            return None
+        if existing is not None:
+            raise MigrationError(f"{step['table']}.{step['name']} exists on {', '.join(existing)}, "
+                                 f"expected {', '.join(step['columns'])}")
+        
+        statement = (f"ALTER TABLE {step['table']} ADD INDEX {step['name']} ({', '.join(step['columns'])}), "
+                     f"ALGORITHM=INPLACE, LOCK=NONE")
+        cursor.execute(statement)
+        return statement
+        
+    def _drop_index(self, cursor, step: Dict) -> Optional[str]:
+        if step['name'] not in self._indexes(cursor, step['table']):
+            return None
+        
+        statement = f"ALTER TABLE {step['table']} DROP INDEX {step['name']}, ALGORITHM=INPLACE, LOCK=NONE"
+        cursor.execute(statement)
+        return statement
+        
+    def _create_table(self, cursor, step: Dict) -> Optional[str]:
+        if self._table_exists(cursor, step['table']):
+            return None
+        
+        statement = f"CREATE TABLE {step['table']} ({step['definition'].strip()})"
+        cursor.execute(statement)
+        return statement
+        
+    def _drop_table(self, cursor, step: Dict) -> Optional[str]:
+        if not self._table_exists(cursor, step['table']):
+            return None
+        
+        statement = f"DROP TABLE {step['table']}"
+        cursor.execute(statement)
+        return statement
+    
+    @staticmethod
+    def _populate(connection, step: Dict) -> str:
+        result = step['apply'](connection)
+        return f"{step['name']}: {result}"
+    
+    @staticmethod
+    def _year_partitions(first_year: int, last_year: int) -> List[str]:
+        return [
+            f"PARTITION p{year} VALUES LESS THAN (UNIX_TIMESTAMP('{year + 1}-01-01 00:00:00'))"
+            for year in range(first_year, last_year + 1)
+        ]
+        
+    def _partition_by_year(self, cursor, step: Dict) -> Optional[str]:
+        table, column = step['table'], step['column']
+        if self._partitions(cursor, table):
+            return None
+        
+        referencing = self._referencing_tables(cursor, table)
+        if referencing:
+            raise MigrationError(f"{table} is referenced by foreign keys from {', '.join(referencing)}; "
+                                 f"MySQL cannot partition it")
+        
+        cursor.execute(step['backfill'])
+        cursor.execute(f"SELECT MIN({column}) AS first_date FROM {table}")
+        first_date = cursor.fetchone()['first_date']
+        last_year = datetime.now().year + PARTITION_YEARS_AHEAD
+        first_year = min(first_date.year if first_date else datetime.now().year, last_year)
+        
+        statements = [f"ALTER TABLE {table} DROP FOREIGN KEY {name}" for name in self._foreign_keys(cursor, table)]
+        statements.append(
+            f"ALTER TABLE {table} MODIFY {column} {step['partitioned_definition']}, "
+            f"DROP PRIMARY KEY, ADD PRIMARY KEY ({', '.join(step['primary_key'])}, {column})")
+        partitions = self._year_partitions(first_year, last_year) + ["PARTITION pmax VALUES LESS THAN MAXVALUE"]
+        statements.append(
+            f"ALTER TABLE {table} PARTITION BY RANGE (UNIX_TIMESTAMP({column})) ({', '.join(partitions)})")
+        
+        for statement in statements:
+            cursor.execute(statement)
+        return '; '.join(statements)
+        
+    def _unpartition(self, cursor, step: Dict) -> Optional[str]:
+        table, column = step['table'], step['column']
+        statements = []
+        if self._partitions(cursor, table):
+            statements.append(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        if self._indexes(cursor, table).get('PRIMARY') != tuple(step['primary_key']):
+            statements.append(
+                f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({', '.join(step['primary_key'])}), "
+                f"MODIFY {column} {step['original_definition']}")
+        if not self._foreign_keys(cursor, table):
+            statements.extend(
+                f"ALTER TABLE {table} ADD FOREIGN KEY ({local}) REFERENCES {referenced}({referenced_column})"
+                for local, referenced, referenced_column in step['foreign_keys'])
+        
+        for statement in statements:
+            cursor.execute(statement)
+        return '; '.join(statements) or None
+        
+    def _apply_step(self, connection, cursor, step: Dict, rollback: bool = False) -> Optional[str]:
+        """Run one step (or its inverse); returns the DDL executed, None if already in place"""
+        op = step['op']
+        if rollback and op == 'populate':
+            return None
+        if op == 'populate':
+            return self._populate(connection, step)
+        if rollback:
+            op = {'add_index': 'drop_index', 'drop_index': 'add_index', 'create_table': 'drop_table',
+                  'partition_by_year': 'unpartition'}[op]
+        
+        handlers: Dict[str, Callable] = {
+            'add_index': self._add_index,
+            'drop_index': self._drop_index,
+            'create_table': self._create_table,
+            'drop_table': self._drop_table,
+            'partition_by_year': self._partition_by_year,
+            'unpartition': self._unpartition
+        }
+        return handlers[op](cursor, step)
+    
+    # --- checks ---
+    
+    def _sample(self, cursor) -> Dict:
+        """Real IDs and dates for the check queries"""
+        cursor.execute("SELECT DISTINCT student_id FROM student_assessments ORDER BY student_id LIMIT %s",
+                       (CHECK_SAMPLE_STUDENTS,))
+        student_ids = [row['student_id'] for row in cursor.fetchall()] or ['']
+        
+        cursor.execute("""
+            SELECT DISTINCT indicator_id FROM student_assessments WHERE student_id = %s
+            ORDER BY indicator_id LIMIT %s
+        """, (student_ids[0], CHECK_SAMPLE_INDICATORS))
+        indicator_ids = [row['indicator_id'] for row in cursor.fetchall()] or ['']
+        
+        cursor.execute("SELECT MAX(assessment_date) AS last_date FROM student_assessments")
+        end_date = cursor.fetchone()['last_date'] or datetime.now()
+        
+        return {
+            'student_id': student_ids[0],
+            'student_ids': student_ids,
+            'indicator_ids': indicator_ids,
+            'start_date': end_date - timedelta(days=CHECK_DATE_RANGE_DAYS),
+            'end_date': end_date
+        }
+    
+    @staticmethod
+    def _verify(plan: List[Dict], expect: Dict, partition_count: int) -> Optional[str]:
+        """Why the plan misses the expectation, or None when it meets it"""
+        rows = [row for row in plan if row.get('table') == expect['table']]
+        if not rows:
+            return f"no EXPLAIN row for {expect['table']}"
+        
+        if expect.get('key') and not any(row.get('key') == expect['key'] for row in rows):
+            return f"{expect['table']} uses {', '.join(str(row.get('key')) for row in rows)}, not {expect['key']}"
+        if expect.get('covering') and not any(
+                row.get('key') == expect['key'] and _is_covering(row.get('Extra')) for row in rows):
+            return f"{expect['key']} is not covering (Extra: {'; '.join(str(row.get('Extra')) for row in rows)})"
+        if expect.get('pruned') and not any(
+                row.get('partitions') and len(row['partitions'].split(',')) < partition_count for row in rows):
+            return f"{expect['table']} reads every partition ({rows[0].get('partitions') or 'unpartitioned'})"
+        return None
+        
+    def run_checks(self, names, repeat: int = 5) -> Dict[str, Dict]:
+        """
+        EXPLAIN each named check query against the current schema and, with
+        repeat > 0, time repeat executions of it (median / min seconds)
+        """
+        results = {}
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                sample = self._sample(cursor)
+                partition_count = len(self._partitions(cursor, 'student_assessments'))
+                for name in names:
+                    check = CHECKS[name]
+                    query, params = check['build'](sample)
+                    
+                    cursor.execute(f"EXPLAIN {query}", params)
+                    plan = cursor.fetchall()
+                    
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        cursor.execute(query, params)
+                        cursor.fetchall()
+                        timings.append(time.perf_counter() - started)
+                    
+                    failure = self._verify(plan, check['expect'], partition_count)
+                    results[name] = {
+                        'description': check['description'],
+                        'plan': [
+                            {column: row.get(column) for column in
+                             ('table', 'partitions', 'type', 'key', 'rows', 'Extra')}
+                            for row in plan
+                        ],
+                        'passed': failure is None,
+                        'failure': failure,
+                        'median_seconds': statistics.median(timings) if timings else None,
+                        'min_seconds': min(timings) if timings else None
+                    }
+            finally:
+                cursor.close()
+        return results
+    
+    # --- upgrade / downgrade ---
+    
+    def upgrade(self, target: Optional[int] = None, include_optional: bool = False,
+                repeat: int = 5) -> List[Dict]:
+        """
+        Apply pending migrations up to target (all by default). Optional
+        migrations are skipped unless include_optional is set or target names
+        one. Each migration's checks run before and after it; a failed check
+        after the migration is reported, not rolled back.
+        """
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                applied = self._applied(cursor)
+            finally:
+                cursor.close()
+        
+        pending = [
+            migration for migration in self.migrations
+            if migration['version'] not in applied
+            and (target is None or migration['version'] <= target)
+            and (include_optional or not migration.get('optional') or migration['version'] == target)
+        ]
+        
+        reports = []
+        for migration in pending:
+            logger.info(f"Applying migration {migration['version']}: {migration['name']}")
+            before = self.run_checks(migration['checks'], repeat)
+            
+            started = time.monotonic()
+            executed = []
+            with self.db_manager.connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    for step in migration['steps']:
+                        statement = self._apply_step(connection, cursor, step)
+                        if statement:
+                            logger.info(statement)
+                            executed.append(statement)
+                    cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                                   (migration['version'], migration['name']))
+                    connection.commit()
+                finally:
+                    cursor.close()
+            elapsed = time.monotonic() - started
+            
+            after = self.run_checks(migration['checks'], repeat)
+            reports.append(self._report(migration, 'applied', executed, elapsed, before, after))
+        return reports
+        
+    def downgrade(self, target: int) -> List[Dict]:
+        """Roll back applied migrations newer than target, newest first"""
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                applied = self._applied(cursor)
+                reports = []
+                for migration in reversed(self.migrations):
+                    if migration['version'] <= target or migration['version'] not in applied:
+                        continue
+                    
+                    logger.info(f"Rolling back migration {migration['version']}: {migration['name']}")
+                    started = time.monotonic()
+                    executed = []
+                    for step in reversed(migration['steps']):
+                        statement = self._apply_step(connection, cursor, step, rollback=True)
+                        if statement:
+                            logger.info(statement)
+                            executed.append(statement)
+                    cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (migration['version'],))
+                    connection.commit()
+                    reports.append(self._report(migration, 'rolled_back', executed, time.monotonic() - started))
+            finally:
+                cursor.close()
+        return reports
+    
+    @staticmethod
+    def _report(migration: Dict, status: str, executed: List[str], elapsed: float,
+                before: Optional[Dict] = None, after: Optional[Dict] = None) -> Dict:
+        report = {
+            'version': migration['version'],
+            'name': migration['name'],
+            'status': status,
+            'statements': executed,
+            'elapsed_seconds': round(elapsed, 3)
+        }
+        if after is not None:
+            report['checks'] = {
+                name: {
+                    'description': after[name]['description'],
+                    'passed': after[name]['passed'],
+                    'failure': after[name]['failure'],
+                    'before': {'plan': before[name]['plan'], 'median_seconds': before[name]['median_seconds']},
+                    'after': {'plan': after[name]['plan'], 'median_seconds': after[name]['median_seconds']},
+                    'speedup': (before[name]['median_seconds'] / after[name]['median_seconds']
+                                if before[name]['median_seconds'] and after[name]['median_seconds'] else None)
+                }
+                for name in after
+            }
+            report['checks_passed'] = all(check['passed'] for check in after.values())
+        return report
+        
+    def extend_partitions(self, table: str = 'student_assessments',
+                          years_ahead: int = PARTITION_YEARS_AHEAD) -> List[str]:
+        """Split yearly partitions off pmax so inserts up to years_ahead never land in it"""
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                partitions = self._partitions(cursor, table)
+                if not partitions:
+                    raise MigrationError(f"{table} is not partitioned")
+                
+                yearly = [partition['name'] for partition in partitions if partition['name'] != 'pmax']
+                next_year = int(yearly[-1][1:]) + 1 if yearly else datetime.now().year
+                last_year = datetime.now().year + years_ahead
+                if next_year > last_year:
+                    return []
+                
+                new_partitions = self._year_partitions(next_year, last_year)
+                statement = (f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO "
+                             f"({', '.join(new_partitions)}, PARTITION pmax VALUES LESS THAN MAXVALUE)")
+                cursor.execute(statement)
+                return [f"p{year}" for year in range(next_year, last_year + 1)]
+            finally:
+                cursor.close()
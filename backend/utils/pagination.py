@@ -0,0 +1,165 @@
+"""
+EPA Scoring Engine - Keyset Pagination and Column Projection
+File: backend/utils/pagination.py
+"""
+
+from typing import Dict, List, Optional, Tuple
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Listable resources: selectable columns, the unique sort key pages are keyed
+# on, and the equality filters accepted as query parameters (with defaults)
+LIST_RESOURCES = {
+    'students': {
+        'table': 'students',
+        'columns': ('student_id', 'student_name', 'student_email', 'program', 'year_level',
+                    'enrollment_date', 'status', 'created_date'),
+        'sort': ('student_name', 'student_id'),
+        'filters': {'program': str, 'year_level': int, 'status': str},
+        'defaults': {'status': 'Active'}
+    },
+    'faculty': {
+        'table': 'faculty',
+        'columns': ('faculty_id', 'faculty_name', 'faculty_email', 'department', 'position',
+                    'specialization', 'status', 'created_date'),
+        'sort': ('faculty_name', 'faculty_id'),
+        'filters': {'department': str, 'status': str},
+        'defaults': {'status': 'Active'}
+    },
+    'core_epas': {
+        'columns': ('epa_id', 'epa_name', 'epa_description', 'total_weight', 'version', 'status',
+                    'created_date', 'updated_date'),
+        'sort': ('epa_id',),
+        'filters': {'status': str},
+        'defaults': {}
+    },
+    'contexts': {
+        'columns': ('context_id', 'context_name', 'context_description', 'base_multiplier',
+                    'trigger_conditions', 'created_date'),
+        'sort': ('context_name', 'context_id'),
+        'filters': {},
+        'defaults': {}
+    }
+}
+
+class ListQueryError(ValueError):
+    """Invalid limit, cursor, fields or filter parameter"""
+    pass
+
+def encode_cursor(values) -> str:
+    """Opaque cursor for the sort key values of the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps(list(values), default=str, ensure_ascii=False).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, key_count: int) -> List:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ListQueryError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != key_count:
+        raise ListQueryError('Invalid cursor')
+    return values
+
+def parse_list_query(resource: str, args) -> Dict:
+    """
+    limit, cursor, fields= projection and filters of a list request
+    (a request.args MultiDict); raises ListQueryError on bad input.
+    Sort key columns are always selected, since the next cursor is built
+    from them.
+    """
+    spec = LIST_RESOURCES[resource]
+    
+    limit = args.get('limit', DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ListQueryError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ListQueryError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    
+    fields = list(spec['columns'])
+    if args.get('fields'):
+        requested = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in requested if field not in spec['columns']]
+        if unknown:
+            raise ListQueryError(f"Unknown fields: {', '.join(unknown)}")
+        fields = [key for key in spec['sort'] if key not in requested] + requested
+    
+    filters = {}
+    for name, convert in spec['filters'].items():
+        value = args.get(name, spec['defaults'].get(name))
+        if value is None or value == '':
+            continue
+        try:
+            filters[name] = convert(value)
+        except (TypeError, ValueError):
+            raise ListQueryError(f"{name} must be of type {convert.__name__}")
+    # status=all lifts the default status filter
+    if filters.get('status') == 'all':
+        del filters['status']
+    
+    after = decode_cursor(args['cursor'], len(spec['sort'])) if args.get('cursor') else None
+    
+    return {'limit': limit, 'fields': fields, 'filters': filters, 'after': after}
+
+def keyset_condition(sort_keys, after) -> Tuple[str, List]:
+    """
+    "(a, b) > (x, y)" expanded to OR-ed prefixes, which MySQL turns into a
+    range scan on an index over the sort key
+    """
+    clauses = []
+    params = []
+    for position, key in enumerate(sort_keys):
+        terms = [f"{previous} = %s" for previous in sort_keys[:position]] + [f"{key} > %s"]
+        clauses.append(f"({' AND '.join(terms)})")
+        params.extend(after[:position + 1])
+    return f"({' OR '.join(clauses)})", params
+
+def build_list_query(resource: str, query: Dict) -> Tuple[str, List]:
+    """SELECT for one page; fetches limit + 1 rows to detect a following page"""
+    spec = LIST_RESOURCES[resource]
+    
+    conditions = [f"{name} = %s" for name in query['filters']]
+    params = list(query['filters'].values())
+    if query['after'] is not None:
+        condition, keyset_params = keyset_condition(spec['sort'], query['after'])
+        conditions.append(condition)
+        params.extend(keyset_params)
+    
+    # Column names come from LIST_RESOURCES only, never from the request
+    sql = f"SELECT {', '.join(query['fields'])} FROM {spec['table']}"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += f" ORDER BY {', '.join(spec['sort'])} LIMIT %s"
+    params.append(query['limit'] + 1)
+    return sql, params
+
+def finish_page(resource: str, query: Dict, rows: List[Dict]) -> Tuple[List[Dict], Optional[str]]:
+    """Trim the look-ahead row; returns the page and the cursor of the next one (None at the end)"""
+    sort_keys = LIST_RESOURCES[resource]['sort']
+    if len(rows) <= query['limit']:
+        return rows, None
+    rows = rows[:query['limit']]
+    return rows, encode_cursor(rows[-1][key] for key in sort_keys)
+
+def paginate_rows(resource: str, query: Dict, rows: List[Dict]) -> Tuple[List[Dict], Optional[str]]:
+    """The same page over rows already in memory (e.g. cached reference data)"""
+    sort_keys = LIST_RESOURCES[resource]['sort']
+    
+    def sort_value(row):
+        return tuple(row[key] for key in sort_keys)
+    
+    selected = [
+        row for row in rows
+        if all(row.get(name) == value for name, value in query['filters'].items())
+    ]
+    selected.sort(key=sort_value)
+    if query['after'] is not None:
+        after = tuple(query['after'])
+        selected = [row for row in selected if sort_value(row) > after]
+    
+    page = [{field: row.get(field) for field in query['fields']} for row in selected[:query['limit'] + 1]]
+    return finish_page(resource, query, page)
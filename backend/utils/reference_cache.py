@@ -0,0 +1,244 @@
+"""
+EPA Scoring Engine - Reference Data Cache
+File: backend/utils/reference_cache.py
+"""
+
+from typing import Dict, List, Optional
+import copy
+import threading
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Small, rarely changing tables served from memory
+REFERENCE_QUERIES = {
+    'contexts': "SELECT * FROM context_types ORDER BY context_name",
+    'technology_levels': "SELECT * FROM technology_levels ORDER BY tech_level_id",
+    'core_epas': "SELECT * FROM core_epas ORDER BY epa_id",
+    'smaller_epas': "SELECT * FROM smaller_epas ORDER BY core_epa_id, sequence_order",
+    'activities': "SELECT * FROM activities ORDER BY smaller_epa_id, sequence_order",
+    'indicators': "SELECT * FROM performance_indicators ORDER BY activity_id, sequence_order",
+    # Active people as the SPA's pickers need them (see /api/bootstrap)
+    'student_roster': """
+        SELECT student_id, student_name, program, year_level FROM students
+        WHERE status = 'Active' ORDER BY student_name, student_id
+    """,
+    'faculty_roster': """
+        SELECT faculty_id, faculty_name, department FROM faculty
+        WHERE status = 'Active' ORDER BY faculty_name, faculty_id
+    """
+}
+
+# Primary key of each dataset, used for in-memory lookups
+REFERENCE_KEYS = {
+    'contexts': 'context_id',
+    'technology_levels': 'tech_level_id',
+    'core_epas': 'epa_id',
+    'smaller_epas': 'smaller_epa_id',
+    'activities': 'activity_id',
+    'indicators': 'indicator_id',
+    'student_roster': 'student_id',
+    'faculty_roster': 'faculty_id'
+}
+
+EPA_TREE_DATASETS = ('core_epas', 'smaller_epas', 'activities', 'indicators')
+
+# Per tree level below the Core EPAs: (name of the child list on the parent, parent key column)
+EPA_TREE_CHILDREN = {
+    1: ('smaller_epas', 'core_epa_id'),
+    2: ('activities', 'smaller_epa_id'),
+    3: ('indicators', 'activity_id')
+}
+MAX_EPA_TREE_DEPTH = len(EPA_TREE_DATASETS) - 1
+
+# Datasets no score depends on
+ROSTER_DATASETS = ('student_roster', 'faculty_roster')
+
+class ReferenceDataCache:
+    """
+    Shared in-process cache of context types, technology levels, the EPA tree
+    and the active student and faculty rosters.
+
+    Each dataset is loaded on first use and kept until it is explicitly
+    invalidated or its TTL expires, whichever comes first. Every load bumps the
+    dataset's generation counter, which callers can use to key derived data.
+    A lookup miss reloads the dataset once (rate limited) so rows added since
+    the last load are found without waiting for the TTL.
+    
+    Rows are queried through db_manager, or read from a ScoringRepository
+    (repositories/) when one is given.
+    """
+    
+    def __init__(self, db_manager, ttl: float = 300.0, miss_reload_interval: float = 5.0,
+                 repository=None):
+        self.db_manager = db_manager
+        self.repository = repository
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        
+        self._lock = threading.RLock()
+        self._rows = {}
+        self._index = {}
+        self._loaded_at = {}
+        self._generations = {name: 0 for name in REFERENCE_QUERIES}
+        self._derived = {}
+        
+    def _fetch(self, names) -> Dict[str, List[Dict]]:
+        """Current rows of each dataset"""
+        if self.repository is not None:
+            return {name: self.repository.reference_rows(name) for name in names}
+        
+        fetched = {}
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            try:
+                for name in names:
+                    cursor.execute(REFERENCE_QUERIES[name])
+                    fetched[name] = cursor.fetchall()
+            finally:
+                cursor.close()
+        return fetched
+        
+    def _load(self, names) -> None:
+        """Reload datasets from the database; caller holds the lock"""
+        for name, rows in self._fetch(names).items():
+            key = REFERENCE_KEYS[name]
+            
+            self._rows[name] = rows
+            self._index[name] = {row[key]: row for row in rows}
+            self._loaded_at[name] = time.monotonic()
+            self._generations[name] += 1
+        
+        logger.debug(f"Reference data loaded: {', '.join(names)}")
+        
+    def _ensure(self, *names) -> None:
+        """Load any of the datasets that are missing or past their TTL"""
+        now = time.monotonic()
+        stale = [
+            name for name in names
+            if name not in self._rows or now - self._loaded_at[name] > self.ttl
+        ]
+        if stale:
+            self._load(stale)
+            
+    def rows(self, name: str) -> List[Dict]:
+        """All rows of a dataset (treat as read-only)"""
+        with self._lock:
+            self._ensure(name)
+            return self._rows[name]
+            
+    def index(self, name: str) -> Dict:
+        """Primary key -> row mapping of a dataset (treat as read-only)"""
+        with self._lock:
+            self._ensure(name)
+            return self._index[name]
+            
+    def get(self, name: str, key) -> Optional[Dict]:
+        """One row by primary key, reloading once on a miss"""
+        if key is None:
+            return None
+        
+        with self._lock:
+            self._ensure(name)
+            row = self._index[name].get(key)
+            if row is None and time.monotonic() - self._loaded_at[name] > self.miss_reload_interval:
+                self._load([name])
+                row = self._index[name].get(key)
+            return row
+            
+    def copy_rows(self, name: str) -> List[Dict]:
+        """Rows safe for the caller to modify (e.g. before serialising)"""
+        return copy.deepcopy(self.rows(name))
+        
+    def derived(self, key: str, datasets, build):
+        """
+        Memoise a value computed from one or more datasets; rebuilt whenever
+        any of those datasets has been reloaded since it was computed.
+        """
+        with self._lock:
+            self._ensure(*datasets)
+            generations = tuple(self._generations[name] for name in datasets)
+            cached = self._derived.get(key)
+            if cached is None or cached[0] != generations:
+                cached = (generations, build(*(self._rows[name] for name in datasets)))
+                self._derived[key] = cached
+            return cached[1]
+            
+    def context_multiplier(self, context_id: Optional[str]):
+        """context_types.base_multiplier, or None like the former LEFT JOIN"""
+        row = self.get('contexts', context_id)
+        return row['base_multiplier'] if row else None
+        
+    def tech_multiplier(self, tech_level_id: Optional[str]):
+        """technology_levels.multiplier, or None like the former LEFT JOIN"""
+        row = self.get('technology_levels', tech_level_id)
+        return row['multiplier'] if row else None
+        
+    def indicator(self, indicator_id: str) -> Optional[Dict]:
+        """performance_indicators row"""
+        return self.get('indicators', indicator_id)
+        
+    def activity_indicator_ids(self, activity_id: str) -> List[str]:
+        """Indicator IDs belonging to an activity"""
+        def build(indicators):
+            grouped = {}
+            for row in indicators:
+                grouped.setdefault(row['activity_id'], []).append(row['indicator_id'])
+            return grouped
+        
+        return self.derived('activity_indicator_ids', ('indicators',), build).get(activity_id, [])
+        
+    def epa_tree(self, depth: int = MAX_EPA_TREE_DEPTH) -> List[Dict]:
+        """
+        Core EPA -> smaller EPA -> activity -> indicator tree, cut at depth
+        (0 = Core EPAs only, 3 = down to indicators). Assembled from the cached
+        tables with one grouping pass per level and memoised per depth until
+        the curriculum is reloaded; treat as read-only.
+        """
+        if not 0 <= depth <= MAX_EPA_TREE_DEPTH:
+            raise ValueError(f"depth must be between 0 and {MAX_EPA_TREE_DEPTH}")
+            
+        def build(*levels):
+            children = None
+            for level in range(depth, -1, -1):
+                nodes = []
+                for row in levels[level]:
+                    node = dict(row)
+                    if children is not None:
+                        child_list = EPA_TREE_CHILDREN[level + 1][0]
+                        node[child_list] = children.get(row[REFERENCE_KEYS[EPA_TREE_DATASETS[level]]], [])
+                    nodes.append(node)
+                
+                if level == 0:
+                    return nodes
+                parent_key = EPA_TREE_CHILDREN[level][1]
+                children = {}
+                for node in nodes:
+                    children.setdefault(node[parent_key], []).append(node)
+        
+        return self.derived(f"epa_tree:{depth}", EPA_TREE_DATASETS[:depth + 1], build)
+        
+    def epa_details(self, epa_id: str, depth: int = 2) -> Optional[Dict]:
+        """One Core EPA with its subtree down to depth (see epa_tree), as a fresh dict"""
+        if self.get('core_epas', epa_id) is None:
+            return None
+        
+        for epa in self.epa_tree(depth):
+            if epa['epa_id'] == epa_id:
+                return copy.deepcopy(epa)
+        return None
+        
+    def generations(self) -> Dict[str, int]:
+        """Load counter per dataset; changes whenever a dataset is reloaded"""
+        with self._lock:
+            return dict(self._generations)
+            
+    def invalidate(self, *names) -> None:
+        """Drop cached datasets (all of them when no names are given)"""
+        with self._lock:
+            for name in names or REFERENCE_QUERIES:
+                self._rows.pop(name, None)
+                self._index.pop(name, None)
+                self._loaded_at.pop(name, None)
+        logger.info(f"Reference data invalidated: {', '.join(names) if names else 'all'}")
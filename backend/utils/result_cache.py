@@ -0,0 +1,145 @@
+"""
+EPA Scoring Engine - Student Profile Result Cache
+File: backend/utils/result_cache.py
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class ProfileCache:
+    """
+    Bounded LRU cache of computed student results, keyed by (student, EPA).
+
+    Every student has a generation counter that write paths bump after they
+    commit new assessments, and bump_all() invalidates every student at once
+    (e.g. when reference data changes). Those counters live in this process
+    and miss writes handled by other workers, so callers also pass a state
+    token read from the database (see AssessmentService.student_state): an
+    entry is only served while both its generation and its state match.
+    What the token does not cover, such as reference data reloaded by
+    another process, is bounded by entries expiring after ttl seconds.
+
+    Validators come from the same inputs, which lets a conditional request
+    be answered with 304 before anything is computed. Last-Modified is the
+    time this process first saw the student's current state and reference
+    version (never earlier than the current ttl window), so it differs
+    between processes and only ever makes them answer 200 too often.
+    """
+    
+    def __init__(self, max_entries: int = 10000, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> (generation, state, stored_at, result)
+        self._generations: Dict[str, int] = {}
+        self._modified: Dict[str, datetime] = {}
+        self._observed = OrderedDict()  # student_id -> ((version, state), first seen)
+        self._epoch = 0
+        self._epoch_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        
+        self._metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+        
+    def _generation(self, student_id: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(student_id, 0)
+        
+    def bump(self, *student_ids: str) -> None:
+        """Invalidate every cached result of the given students"""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            for student_id in student_ids:
+                self._generations[student_id] = self._generations.get(student_id, 0) + 1
+                self._modified[student_id] = now
+            self._metrics['invalidations'] += len(student_ids)
+            
+    def bump_all(self) -> None:
+        """Invalidate every cached result"""
+        with self._lock:
+            self._epoch += 1
+            self._epoch_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            self._entries.clear()
+        logger.info("Profile cache invalidated")
+        
+    def _first_seen(self, student_id: str, token: Hashable, now: datetime) -> datetime:
+        """When this process first saw token for the student; caller holds the lock"""
+        observed = self._observed.get(student_id)
+        if observed is None or observed[0] != token:
+            observed = self._observed[student_id] = (token, now)
+        self._observed.move_to_end(student_id)
+        while len(self._observed) > self.max_entries:
+            self._observed.popitem(last=False)
+        return observed[1]
+        
+    def validators(self, student_id: str, epa_id: Optional[str] = None, version: str = '',
+                   state: Hashable = None) -> Tuple[str, datetime]:
+        """
+        (entity tag, Last-Modified) for a student's result at the current
+        generation and state. version folds in anything else the result
+        depends on (e.g. reference data). Send the tag as a weak ETag:
+        equivalent results, but response bodies carry their own timestamp.
+        """
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        # The TTL window is part of both validators, so clients revalidate as often as entries expire
+        window = int(time.time() // self.ttl) if self.ttl > 0 else 0
+        window_start = datetime.fromtimestamp(window * self.ttl, timezone.utc).replace(microsecond=0)
+        
+        with self._lock:
+            epoch, generation = self._generation(student_id)
+            modified = max(self._modified.get(student_id, self._epoch_modified), self._epoch_modified,
+                           self._first_seen(student_id, (version, state), now), window_start)
+        
+        digest = hashlib.blake2b(
+            f"{student_id}|{epa_id}|{epoch}|{generation}|{window}|{version}|{state}".encode(),
+            digest_size=12).hexdigest()
+        return digest, modified
+        
+    def get_or_compute(self, student_id: str, epa_id: Optional[str], compute: Callable[[], Dict],
+                       state: Hashable = None) -> Dict:
+        """
+        Cached result for (student, EPA) at the given state, computing and
+        storing it on a miss. Results carrying an 'error' key are returned
+        but not cached.
+        """
+        key = (student_id, epa_id)
+        
+        with self._lock:
+            generation = self._generation(student_id)
+            entry = self._entries.get(key)
+            if (entry is not None and entry[0] == generation and entry[1] == state
+                    and time.monotonic() - entry[2] <= self.ttl):
+                self._entries.move_to_end(key)
+                self._metrics['hits'] += 1
+                return entry[3]
+            self._metrics['misses'] += 1
+        
+        # Computed outside the lock so one slow profile does not block other students
+        result = compute()
+        if 'error' in result:
+            return result
+        
+        with self._lock:
+            # A write that landed while computing makes this result stale already
+            if self._generation(student_id) == generation:
+                self._entries[key] = (generation, state, time.monotonic(), result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._metrics['evictions'] += 1
+        return result
+        
+    def stats(self) -> Dict:
+        """Cache occupancy and hit/miss counters"""
+        with self._lock:
+            stats = dict(self._metrics)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
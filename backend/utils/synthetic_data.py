@@ -0,0 +1,336 @@
+"""
+EPA Scoring Engine - Synthetic Cohort Generator
+File: backend/utils/synthetic_data.py
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+import logging
+import numpy as np
+
+from utils.database import DatabaseManager, mark_rewritten
+
+logger = logging.getLogger(__name__)
+
+# Every generated student, faculty member and assessment ID starts with this,
+# so a synthetic cohort can be told apart from (and cleared without touching) real data
+SYNTHETIC_PREFIX = 'SYN_'
+
+# Students generated from one random stream; fixed so the data only depends on the seed
+GENERATION_BLOCK = 1000
+
+# Rows per multi-row INSERT
+INSERT_BATCH_SIZE = 5000
+
+# Default branching when --fill-hierarchy creates the missing curriculum levels
+HIERARCHY_SHAPE = (4, 3, 4)  # smaller EPAs per Core EPA, activities per smaller EPA, indicators per activity
+
+STUDENTS_PER_ASSESSOR = 25
+
+PROGRAMS = (('BSN', 0.70), ('BSN_Bridge', 0.20), ('MSN', 0.10))
+STUDENT_STATUSES = (('Active', 0.94), ('Inactive', 0.03), ('Graduated', 0.03))
+DEPARTMENTS = ('Nursing', 'Critical Care', 'Community Health', 'Mental Health')
+COMPETENCY_TYPES = ('Critical_Thinker', 'Nurse_Expert', 'Communicator', 'Leader')
+
+# Relative frequency of each setting; unlisted contexts get weight 1
+CONTEXT_WEIGHTS = {'STD_CARE': 8.0, 'GER_CARE': 2.0, 'PED_CARE': 2.0, 'SURG_CARE': 2.0, 'EMERG_CARE': 1.5,
+                   'CRIT_CARE': 1.5, 'DISASTER': 0.2}
+TECH_LEVEL_WEIGHTS = {'BASIC_TECH': 0.6, 'ADV_TECH': 0.3, 'INNOV_TECH': 0.1}
+EVIDENCE_TYPES = (('Direct_Observation', 0.45), ('Simulation', 0.25), ('Portfolio', 0.15), ('Case_Study', 0.10),
+                  ('Peer_Review', 0.05))
+
+# Score model: base_score = ability + growth * years enrolled - indicator difficulty + noise, clipped to 1-5
+ABILITY_MEAN, ABILITY_SD = 3.2, 0.45
+GROWTH_MEAN, GROWTH_SD = 0.15, 0.05
+DIFFICULTY_SD = 0.35
+NOISE_SD = 0.45
+
+INSERT_STUDENTS_QUERY = """
+INSERT INTO students (student_id, student_name, student_email, program, year_level, enrollment_date, status)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_FACULTY_QUERY = """
+INSERT INTO faculty (faculty_id, faculty_name, faculty_email, department, position, specialization, status)
+VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+
+INSERT_ASSESSMENTS_QUERY = """
+INSERT INTO student_assessments
+(assessment_id, student_id, indicator_id, assessor_id, base_score, context_id, tech_level_id, evidence_type,
+ assessment_date)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Tables holding per-student rows, cleared child-first
+SYNTHETIC_STUDENT_TABLES = ('calculated_scores', 'integration_bonuses', 'standards_compliance',
+                            'student_epa_score_stats', 'student_assessments', 'students')
+
+def synthetic_student_id(number: int) -> str:
+    return f"{SYNTHETIC_PREFIX}S{number:07d}"
+
+def _weighted(choices, rng: np.random.Generator, size: int) -> np.ndarray:
+    """size draws from ((value, weight), ...)"""
+    values = [value for value, _ in choices]
+    weights = np.array([weight for _, weight in choices], dtype=float)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+class SyntheticCohortGenerator:
+    """
+    Seeded generator of realistic students, assessors and assessments for
+    load and benchmark databases. Assessments are spread over the real
+    indicator hierarchy (optionally filled out to HIERARCHY_SHAPE first),
+    weighted by Core EPA weight, across every context type and technology
+    level. Scores follow a per-student ability and growth rate and a
+    per-indicator difficulty, so roll-ups, integration tiers and
+    entrustment levels come out varied rather than uniform.
+
+    Students are generated in fixed blocks of GENERATION_BLOCK, each from
+    its own random stream seeded by (seed, block), so the same seed always
+    gives the same rows however the load is batched or resumed.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, seed: int = 42):
+        self.db_manager = db_manager
+        self.seed = seed
+        
+    def fill_hierarchy(self, shape: Tuple[int, int, int] = HIERARCHY_SHAPE) -> Dict[str, int]:
+        """
+        Give every Core EPA, smaller EPA and activity without children a full
+        set of synthetic children (equal weights, IDs in the EPA_001_1_1_1
+        style); existing curriculum rows are left untouched
+        """
+        smaller_count, activity_count, indicator_count = shape
+        created = {'smaller_epas': 0, 'activities': 0, 'indicators': 0}
+        
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT epa_id FROM core_epas ORDER BY epa_id")
+                epa_ids = [row[0] for row in cursor.fetchall()]
+                cursor.execute("SELECT core_epa_id, smaller_epa_id FROM smaller_epas")
+                smaller = _children(cursor.fetchall())
+                cursor.execute("SELECT smaller_epa_id, activity_id FROM activities")
+                activities = _children(cursor.fetchall())
+                cursor.execute("SELECT activity_id, indicator_id FROM performance_indicators")
+                indicators = _children(cursor.fetchall())
+                
+                for epa_id in epa_ids:
+                    if not smaller.get(epa_id):
+                        smaller[epa_id] = [f"{epa_id}_{n}" for n in range(1, smaller_count + 1)]
+                        cursor.executemany("""
+                            INSERT INTO smaller_epas
+                            (smaller_epa_id, core_epa_id, smaller_epa_name, weight_percentage, sequence_order)
+                            VALUES (%s, %s, %s, %s, %s)
+                        """, [(child, epa_id, f"Synthetic Smaller EPA {child}", weight, order)
+                              for order, (child, weight) in enumerate(_equal_weights(smaller[epa_id]), 1)])
+                        created['smaller_epas'] += smaller_count
+                    
+                    for smaller_epa_id in smaller[epa_id]:
+                        if not activities.get(smaller_epa_id):
+                            activities[smaller_epa_id] = [f"{smaller_epa_id}_{n}" for n in range(1, activity_count + 1)]
+                            cursor.executemany("""
+                                INSERT INTO activities
+                                (activity_id, smaller_epa_id, activity_name, weight_percentage, sequence_order)
+                                VALUES (%s, %s, %s, %s, %s)
+                            """, [(child, smaller_epa_id, f"Synthetic Activity {child}", weight, order)
+                                  for order, (child, weight) in enumerate(_equal_weights(activities[smaller_epa_id]), 1)])
+                            created['activities'] += activity_count
+                        
+                        for activity_id in activities[smaller_epa_id]:
+                            if indicators.get(activity_id):
+                                continue
+                            children = [f"{activity_id}_{n}" for n in range(1, indicator_count + 1)]
+                            cursor.executemany("""
+                                INSERT INTO performance_indicators
+                                (indicator_id, activity_id, indicator_name, competency_type, weight_percentage,
+                                 sequence_order)
+                                VALUES (%s, %s, %s, %s, %s, %s)
+                            """, [(child, activity_id, f"Synthetic Indicator {child}",
+                                   COMPETENCY_TYPES[(order - 1) % len(COMPETENCY_TYPES)], weight, order)
+                                  for order, (child, weight) in enumerate(_equal_weights(children), 1)])
+                            created['indicators'] += indicator_count
+                connection.commit()
+            finally:
+                cursor.close()
+        
+        logger.info(f"Filled hierarchy: {created}")
+        return created
+        
+    def _reference(self, connection) -> Dict:
+        """Indicators with their EPA weights, context and tech level IDs"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT pi.indicator_id, ce.epa_id, ce.total_weight
+                FROM performance_indicators pi
+                JOIN activities a ON pi.activity_id = a.activity_id
+                JOIN smaller_epas se ON a.smaller_epa_id = se.smaller_epa_id
+                JOIN core_epas ce ON se.core_epa_id = ce.epa_id
+                ORDER BY pi.indicator_id
+            """)
+            indicators = cursor.fetchall()
+            cursor.execute("SELECT context_id FROM context_types ORDER BY context_id")
+            contexts = [row[0] for row in cursor.fetchall()]
+            cursor.execute("SELECT tech_level_id FROM technology_levels ORDER BY tech_level_id")
+            tech_levels = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+        
+        if not indicators:
+            raise ValueError("No performance indicators in the hierarchy (load data.sql or use --fill-hierarchy)")
+        
+        # Each Core EPA receives assessments in proportion to its weight, spread evenly over its indicators
+        per_epa = {}
+        for _, epa_id, _ in indicators:
+            per_epa[epa_id] = per_epa.get(epa_id, 0) + 1
+        indicator_weights = np.array([float(weight) / per_epa[epa_id] for _, epa_id, weight in indicators])
+        
+        difficulty_rng = np.random.default_rng([self.seed, 0xD1FF])
+        return {
+            'indicators': [row[0] for row in indicators],
+            'indicator_p': indicator_weights / indicator_weights.sum(),
+            'difficulty': difficulty_rng.normal(0.0, DIFFICULTY_SD, len(indicators)),
+            'contexts': [(context_id, CONTEXT_WEIGHTS.get(context_id, 1.0)) for context_id in contexts],
+            'tech_levels': [(tech_id, TECH_LEVEL_WEIGHTS.get(tech_id, 0.1)) for tech_id in tech_levels]
+        }
+        
+    def faculty_rows(self, students: int) -> List[Tuple]:
+        count = max(students // STUDENTS_PER_ASSESSOR, 20)
+        return [
+            (f"{SYNTHETIC_PREFIX}F{n:05d}", f"Synthetic Assessor {n}", f"syn.assessor{n}@example.edu",
+             DEPARTMENTS[n % len(DEPARTMENTS)], 'Clinical Instructor', None, 'Active')
+            for n in range(1, count + 1)
+        ]
+        
+    def iter_blocks(self, reference: Dict, students: int, assessments_per_student: float,
+                    faculty_ids: List[str], today: datetime) -> Iterator[Tuple[List[Tuple], List[Tuple]]]:
+        """(student rows, assessment rows) per GENERATION_BLOCK students"""
+        for block, first in enumerate(range(1, students + 1, GENERATION_BLOCK)):
+            rng = np.random.default_rng([self.seed, block])
+            numbers = np.arange(first, min(first + GENERATION_BLOCK, students + 1))
+            size = len(numbers)
+            
+            year_level = rng.integers(1, 5, size)
+            program = _weighted(PROGRAMS, rng, size)
+            status = _weighted(STUDENT_STATUSES, rng, size)
+            ability = rng.normal(ABILITY_MEAN, ABILITY_SD, size)
+            growth = rng.normal(GROWTH_MEAN, GROWTH_SD, size)
+            counts = rng.poisson(assessments_per_student, size)
+            
+            student_rows = []
+            enrolled = []
+            for position, number in enumerate(numbers.tolist()):
+                enrollment = datetime(today.year - int(year_level[position]), 9, 1)
+                enrolled.append(enrollment)
+                student_rows.append((synthetic_student_id(number), f"Synthetic Student {number}",
+                                     f"syn.student{number}@example.edu", program[position],
+                                     int(year_level[position]), enrollment.date(), status[position]))
+            
+            total = int(counts.sum())
+            owner = np.repeat(np.arange(size), counts)
+            indicator = rng.choice(len(reference['indicators']), size=total, p=reference['indicator_p'])
+            # Time since enrollment, as a fraction of the student's time in the program so far
+            elapsed_days = np.array([(today - enrolled[s]).days for s in range(size)], dtype=float)[owner]
+            offset_days = np.floor(rng.random(total) * elapsed_days)
+            scores = (ability[owner] + growth[owner] * offset_days / 365.0 - reference['difficulty'][indicator]
+                      + rng.normal(0.0, NOISE_SD, total))
+            scores = np.round(np.clip(scores, 1.0, 5.0), 2)
+            context = _weighted(reference['contexts'], rng, total)
+            tech_level = _weighted(reference['tech_levels'], rng, total)
+            evidence = _weighted(EVIDENCE_TYPES, rng, total)
+            assessor = rng.integers(0, len(faculty_ids), total)
+            
+            # Each student's assessments in date order, numbered from 1
+            order = np.lexsort((offset_days, owner))
+            assessment_rows = []
+            sequence = 0
+            previous_owner = -1
+            for row in order.tolist():
+                student = int(owner[row])
+                sequence = sequence + 1 if student == previous_owner else 1
+                previous_owner = student
+                student_id = student_rows[student][0]
+                assessment_rows.append((
+                    f"{SYNTHETIC_PREFIX}A{student_id[len(SYNTHETIC_PREFIX) + 1:]}_{sequence:05d}",
+                    student_id,
+                    reference['indicators'][indicator[row]],
+                    faculty_ids[assessor[row]],
+                    float(scores[row]),
+                    context[row],
+                    tech_level[row],
+                    evidence[row],
+                    enrolled[student] + timedelta(days=float(offset_days[row]), hours=8 + row % 9)
+                ))
+            yield student_rows, assessment_rows
+            
+    def generate(self, students: int, assessments_per_student: float = 100.0,
+                 today: Optional[datetime] = None) -> Dict:
+        """Insert a synthetic cohort; commits once per block of GENERATION_BLOCK students"""
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        faculty = self.faculty_rows(students)
+        loaded = {'students': 0, 'faculty': len(faculty), 'assessments': 0}
+        
+        with self.db_manager.connection() as connection:
+            reference = self._reference(connection)
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(INSERT_FACULTY_QUERY, faculty)
+                connection.commit()
+                
+                faculty_ids = [row[0] for row in faculty]
+                for student_rows, assessment_rows in self.iter_blocks(
+                        reference, students, assessments_per_student, faculty_ids, today):
+                    cursor.executemany(INSERT_STUDENTS_QUERY, student_rows)
+                    for start in range(0, len(assessment_rows), INSERT_BATCH_SIZE):
+                        cursor.executemany(INSERT_ASSESSMENTS_QUERY, assessment_rows[start:start + INSERT_BATCH_SIZE])
+                    connection.commit()
+                    
+                    loaded['students'] += len(student_rows)
+                    loaded['assessments'] += len(assessment_rows)
+                    logger.info(f"Generated {loaded['students']}/{students} students, "
+                                f"{loaded['assessments']} assessments")
+            finally:
+                cursor.close()
+        
+        loaded['indicators'] = len(reference['indicators'])
+        return loaded
+        
+    def clear(self, batch_size: int = 50000) -> Dict[str, int]:
+        """Delete every synthetic student's rows and the synthetic assessors (curriculum rows are kept)"""
+        deleted = {}
+        pattern = SYNTHETIC_PREFIX.replace('_', '\\_') + '%'
+        
+        with self.db_manager.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                for table in SYNTHETIC_STUDENT_TABLES:
+                    deleted[table] = 0
+                    while True:
+                        cursor.execute(f"DELETE FROM {table} WHERE student_id LIKE %s LIMIT {int(batch_size)}",
+                                       (pattern,))
+                        connection.commit()
+                        deleted[table] += cursor.rowcount
+                        if cursor.rowcount < batch_size:
+                            break
+                cursor.execute("DELETE FROM faculty WHERE faculty_id LIKE %s", (pattern,))
+                deleted['faculty'] = cursor.rowcount
+                mark_rewritten(connection, [table for table in SYNTHETIC_STUDENT_TABLES if deleted[table]])
+                connection.commit()
+            finally:
+                cursor.close()
+        
+        logger.info(f"Cleared synthetic data: {deleted}")
+        return deleted
+
+def _children(pairs) -> Dict[str, List[str]]:
+    children: Dict[str, List[str]] = {}
+    for parent, child in pairs:
+        children.setdefault(parent, []).append(child)
+    return children
+
+def _equal_weights(children: List[str]) -> List[Tuple[str, float]]:
+    """Weights summing to exactly 100.00, the remainder on the last child"""
+    weight = round(100.0 / len(children), 2)
+    weights = [weight] * (len(children) - 1) + [round(100.0 - weight * (len(children) - 1), 2)]
+    return list(zip(children, weights))
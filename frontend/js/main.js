@@ -83,13 +83,14 @@ async function loadInitialData() {
     try {
         showLoading();
         
-        // Load all required data
-        await Promise.all([
-            loadStudents(),
-            loadFaculty(),
-            loadEPAs(),
-            loadContexts()
-        ]);
+        // All reference data in one round trip
+        const data = await apiRequest('/bootstrap');
+        studentsData = data.students || [];
+        facultyData = data.faculty || [];
+        epasData = data.epas || [];
+        contextsData = data.contexts || [];
+        
+        document.getElementById('total-students').textContent = studentsData.length;
         
         // Load dashboard by default
         loadDashboardData();
@@ -104,58 +105,6 @@ async function loadInitialData() {
     }
 }
 
-// Load students data
-async function loadStudents() {
-    try {
-        const response = await apiRequest('/students');
-        studentsData = response.students || [];
-        
-        // Update students count
-        document.getElementById('total-students').textContent = studentsData.length;
-        
-        return studentsData;
-    } catch (error) {
-        console.error('Error loading students:', error);
-        throw error;
-    }
-}
-
-// Load faculty data
-async function loadFaculty() {
-    try {
-        const response = await apiRequest('/faculty');
-        facultyData = response.faculty || [];
-        return facultyData;
-    } catch (error) {
-        console.error('Error loading faculty:', error);
-        throw error;
-    }
-}
-
-// Load EPAs data
-async function loadEPAs() {
-    try {
-        const response = await apiRequest('/epas');
-        epasData = response.epas || [];
-        return epasData;
-    } catch (error) {
-        console.error('Error loading EPAs:', error);
-        throw error;
-    }
-}
-
-// Load contexts data
-async function loadContexts() {
-    try {
-        const response = await apiRequest('/contexts');
-        contextsData = response.contexts || [];
-        return contextsData;
-    } catch (error) {
-        console.error('Error loading contexts:', error);
-        throw error;
-    }
-}
-
 // Initialize forms
 function initializeForms() {
     // Assessment form
@@ -222,25 +171,26 @@ async function handleEPASelectionChange(e) {
     try {
         showLoading();
         
-        // Get EPA details with indicators
-        const response = await apiRequest(`/epas/${epaId}`);
+        // Get EPA details down to its performance indicators
+        const response = await apiRequest(`/epas/${epaId}?depth=3`);
         const epa = response.epa;
         
-        // Populate indicators
-        if (epa.smaller_epas) {
-            epa.smaller_epas.forEach(smallerEpa => {
-                if (smallerEpa.activities) {
-                    smallerEpa.activities.forEach(activity => {
-                        // For demo, we'll use activity IDs as indicator IDs
-                        // In real implementation, you'd fetch actual indicators
-                        const option = document.createElement('option');
-                        option.value = activity.activity_id + '_IND_1'; // Demo indicator ID
-                        option.textContent = activity.activity_name;
-                        indicatorSelect.appendChild(option);
-                    });
-                }
+        // Populate indicators, grouped by activity
+        (epa.smaller_epas || []).forEach(smallerEpa => {
+            (smallerEpa.activities || []).forEach(activity => {
+                const group = document.createElement('optgroup');
+                group.label = activity.activity_name;
+                
+                (activity.indicators || []).forEach(indicator => {
+                    const option = document.createElement('option');
+                    option.value = indicator.indicator_id;
+                    option.textContent = indicator.indicator_name;
+                    group.appendChild(option);
+                });
+                
+                if (group.children.length) indicatorSelect.appendChild(group);
             });
-        }
+        });
         
         hideLoading();
         
@@ -264,14 +214,21 @@ function loadDashboardData() {
 }
 
 // Update dashboard statistics
-function updateDashboardStats() {
-    // Update total students (already updated in loadStudents)
+async function updateDashboardStats() {
+    // Update total students (already updated in loadInitialData)
     
     // Update total assessments (demo data)
     document.getElementById('total-assessments').textContent = '156';
     
-    // Update average score (demo data)
-    document.getElementById('avg-score').textContent = '3.8';
+    // Average Core EPA score across all EPAs, from the running statistics
+    try {
+        const response = await apiRequest('/reports/epa/performance');
+        const overall = response.result.overall;
+        document.getElementById('avg-score').textContent =
+            overall.avg_score === null ? '-' : overall.avg_score.toFixed(1);
+    } catch (error) {
+        console.error('Error loading EPA performance:', error);
+    }
 }
 
 // Load EPA overview for dashboard